@@ -1,6 +1,8 @@
 /**
  * 服务器配置文件
  */
+const os = require('os');
+const path = require('path');
 
 // 从环境变量中获取配置，如果不存在则使用默认值
 const config = {
@@ -29,6 +31,25 @@ const config = {
   // 跨域配置
   CORS_ORIGIN: process.env.CORS_ORIGIN || '*',
 
+  // Python工作进程池配置（PYTHON_WORKERS=0 时退回为每次请求启动一个进程）
+  PYTHON_COMMAND: process.env.PYTHON_COMMAND || 'python',
+  PYTHON_WORKERS: parseInt(process.env.PYTHON_WORKERS || '4', 10),
+  PYTHON_CALL_TIMEOUT: parseInt(process.env.PYTHON_CALL_TIMEOUT || '120000', 10),
+  // 登录、注册的密码哈希专用的工作进程数，默认为CPU核数（为 0 时每次启动一个进程）
+  HASHING_WORKERS: parseInt(process.env.HASHING_WORKERS || String(os.cpus().length), 10),
+  // 同时进行的登录（密码哈希）数，默认为CPU核数
+  LOGIN_CONCURRENCY: parseInt(process.env.LOGIN_CONCURRENCY || String(os.cpus().length), 10),
+
+  // 编程提交写入配置（batch: 组提交队列，direct: 每次提交单独写入，spool: 先写本地预写日志再后台写入数据库）
+  INGEST_MODE: process.env.INGEST_MODE || 'direct',
+  INGEST_BATCH_SIZE: parseInt(process.env.INGEST_BATCH_SIZE || '50', 10),
+  INGEST_FLUSH_MS: parseInt(process.env.INGEST_FLUSH_MS || '20', 10),
+  INGEST_SPOOL_DIR: process.env.INGEST_SPOOL_DIR || path.join(__dirname, 'data', 'submission-spool'),
+  INGEST_SPOOL_SEGMENT_BYTES: parseInt(process.env.INGEST_SPOOL_SEGMENT_BYTES || String(16 * 1024 * 1024), 10),
+  INGEST_SPOOL_RETRY_MS: parseInt(process.env.INGEST_SPOOL_RETRY_MS || '1000', 10),
+  // 派生表更新（derived_updates.py run）的间隔，为 0 时不在服务进程中运行（改由定时任务执行）
+  INGEST_DERIVE_INTERVAL_MS: parseInt(process.env.INGEST_DERIVE_INTERVAL_MS || '5000', 10),
+
   // 日志配置
   LOG_LEVEL: process.env.LOG_LEVEL || 'info',
 };
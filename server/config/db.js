@@ -6,10 +6,11 @@
 const dbConfig = {
     // 统一使用education_platform数据库
     database: {
-        host: 'localhost',
-        user: 'root',
-        password: 'mwYgR7#*X2',
-        database: 'education_platform'
+        host: process.env.DB_HOST || 'localhost',
+        user: process.env.DB_USER || 'root',
+        // 密码只从环境变量读取，与 src/services/db_pool.py 一致
+        password: process.env.DB_PASSWORD,
+        database: process.env.DB_NAME || 'education_platform'
     }
 };
 
@@ -16,7 +16,7 @@ function setupMiddlewares(app, staticRoot) {
     app.use(cors({
         origin: '*',
         methods: ['GET', 'POST', 'PUT', 'DELETE'],
-        allowedHeaders: ['Content-Type']
+        allowedHeaders: ['Content-Type', 'Authorization']
     }));
     
     // 解析JSON请求体
@@ -2,8 +2,34 @@
  * 用户认证相关路由
  */
 const express = require('express');
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
 const router = express.Router();
-const { executePythonScript } = require('../services/python');
+const { executePythonScript, executeHashingScript } = require('../services/python');
+const config = require('../config');
+
+// 登录时的密码验证占满一个CPU核，在密码哈希专用的工作进程池中执行，
+// 同时进行的登录不超过 LOGIN_CONCURRENCY 个，其余排队
+let activeLogins = 0;
+const waitingLogins = [];
+
+function acquireLoginSlot() {
+    if (activeLogins < config.LOGIN_CONCURRENCY) {
+        activeLogins++;
+        return Promise.resolve();
+    }
+    return new Promise(resolve => waitingLogins.push(resolve));
+}
+
+function releaseLoginSlot() {
+    const next = waitingLogins.shift();
+    if (next) {
+        next();
+    } else {
+        activeLogins--;
+    }
+}
 
 /**
  * 用户登录
@@ -17,15 +43,26 @@ router.post('/login', async (req, res) => {
             return res.status(400).json({ success: false, message: '缺少用户类型' });
         }
 
-        const result = await executePythonScript('db_operations.py', [
-            'login',
-            user_type,
-            email,
-            password
-        ]);
+        await acquireLoginSlot();
+        let result;
+        try {
+            result = await executeHashingScript('db_operations.py', [
+                'login',
+                user_type,
+                email,
+                password
+            ]);
+        } finally {
+            releaseLoginSlot();
+        }
 
         if (result.success) {
-            res.json({ success: true, message: '登录成功' });
+            res.json({
+                success: true,
+                message: '登录成功',
+                token: result.token,
+                expires_at: result.expires_at
+            });
         } else {
             res.status(401).json({ success: false, message: result.message || '邮箱或密码错误' });
         }
@@ -43,7 +80,7 @@ router.post('/register', async (req, res) => {
     try {
         const { user_type, email, password } = req.body;
 
-        const result = await executePythonScript('db_operations.py', [
+        const result = await executeHashingScript('db_operations.py', [
             'register',
             user_type,
             email,
@@ -61,4 +98,116 @@ router.post('/register', async (req, res) => {
     }
 });
 
+/**
+ * 获取请求中携带的会话令牌
+ */
+function getSessionToken(req) {
+    const header = req.headers.authorization || '';
+    if (header.startsWith('Bearer ')) {
+        return header.slice(7);
+    }
+    return (req.body && req.body.token) || '';
+}
+
+/**
+ * 要求请求携带教师的会话令牌（Authorization: Bearer <token>）
+ */
+async function requireTeacher(req, res, next) {
+    try {
+        const token = getSessionToken(req);
+        if (!token) {
+            return res.status(401).json({ success: false, message: '缺少会话令牌' });
+        }
+
+        const result = await executePythonScript('db_operations.py', ['verify_session', token]);
+        if (!result.success) {
+            return res.status(401).json({ success: false, message: result.message || '会话无效' });
+        }
+        if (result.session.user_type !== 'teacher') {
+            return res.status(403).json({ success: false, message: '只有教师可以执行该操作' });
+        }
+
+        req.session = result.session;
+        next();
+    } catch (error) {
+        console.error('校验会话错误:', error);
+        res.status(500).json({ success: false, message: '服务器错误' });
+    }
+}
+
+/**
+ * 批量导入学生账号（需要教师登录）
+ * 请求体为CSV或JSON格式的学生名单（Content-Type: text/csv 或 text/plain），
+ * 字段: email, student_id, class, name, 可选 major, password
+ * 未提供密码的学生生成随机的一次性初始密码，只在本次响应的 data.passwords 中返回
+ */
+router.post('/bulk-register', requireTeacher, express.text({ type: ['text/*'], limit: '20mb' }), async (req, res) => {
+    const rosterPath = path.join(os.tmpdir(), `roster_${Date.now()}_${process.pid}.txt`);
+    try {
+        if (!req.body || typeof req.body !== 'string') {
+            return res.status(400).json({ success: false, message: '缺少学生名单' });
+        }
+
+        // 名单可能很大，写入临时文件后把路径传给Python脚本
+        await fs.promises.writeFile(rosterPath, req.body, 'utf-8');
+        const result = await executeHashingScript('db_operations.py', ['bulk_register', rosterPath]);
+
+        // 响应中包含初始密码，不允许缓存
+        res.set('Cache-Control', 'no-store');
+        if (result.success) {
+            res.json(result);
+        } else {
+            res.status(400).json(result);
+        }
+    } catch (error) {
+        console.error('批量导入学生账号错误:', error);
+        res.status(500).json({ success: false, message: '服务器错误' });
+    } finally {
+        fs.promises.unlink(rosterPath).catch(() => {});
+    }
+});
+
+/**
+ * 校验会话令牌
+ * 只做签名和有效期检查，不再重新验证密码
+ */
+router.post('/verify', async (req, res) => {
+    try {
+        const token = getSessionToken(req);
+        if (!token) {
+            return res.status(401).json({ success: false, message: '缺少会话令牌' });
+        }
+
+        const result = await executePythonScript('db_operations.py', ['verify_session', token]);
+
+        if (result.success) {
+            res.json(result);
+        } else {
+            res.status(401).json({ success: false, message: result.message || '会话无效' });
+        }
+    } catch (error) {
+        console.error('校验会话错误:', error);
+        res.status(500).json({ success: false, message: '服务器错误' });
+    }
+});
+
+/**
+ * 退出登录
+ * 将会话令牌加入注销列表
+ */
+router.post('/logout', async (req, res) => {
+    try {
+        const token = getSessionToken(req);
+        if (!token) {
+            return res.json({ success: true, message: '已退出登录' });
+        }
+
+        const result = await executePythonScript('db_operations.py', ['revoke_session', token]);
+        res.json(result);
+    } catch (error) {
+        console.error('退出登录错误:', error);
+        res.status(500).json({ success: false, message: '服务器错误' });
+    }
+});
+
 module.exports = router;
\ No newline at end of file
@@ -4,6 +4,7 @@
 const express = require('express');
 const router = express.Router();
 const codingService = require('../services/coding');
+const config = require('../config');
 // 引入C++代码验证服务
 const { compileAndRunCpp, validateCppCode } = require('../services/cppRuntime');
 
@@ -13,7 +14,9 @@ const { compileAndRunCpp, validateCppCode } = require('../services/cppRuntime');
  */
 router.post('/submit', async (req, res) => {
   try {
-    console.log('收到编程数据提交请求:', JSON.stringify(req.body, null, 2));
+    if (config.LOG_LEVEL === 'debug') {
+      console.log('收到编程数据提交请求:', JSON.stringify(req.body, null, 2));
+    }
 
     const {
       student_class,
@@ -30,13 +33,22 @@ router.post('/submit', async (req, res) => {
 
     // 数据验证
     if (!student_id || !problem_id || !code_content) {
-      console.error('缺少必要参数:', { student_id, problem_id, code_content });
+      console.error('缺少必要参数:', { student_id, problem_id, code_length: code_content ? code_content.length : 0 });
       return res.status(400).json({
         success: false,
         message: '缺少必要参数'
       });
     }
 
+    // 幂等键（可选），客户端重试同一次提交时使用相同的键，只会写入一次
+    const idempotencyKey = req.get('Idempotency-Key') || req.body.idempotency_key;
+    if (idempotencyKey && String(idempotencyKey).length > 64) {
+      return res.status(400).json({
+        success: false,
+        message: '幂等键长度不能超过64'
+      });
+    }
+
     // 确保所有必要字段都存在
     const submissionData = {
       student_class: student_class || '',
@@ -50,12 +62,19 @@ router.post('/submit', async (req, res) => {
       submission_time: submission_time || new Date().toISOString(),
       coding_time: coding_time || 0
     };
+    if (idempotencyKey) {
+      submissionData.idempotency_key = String(idempotencyKey);
+    }
 
-    console.log('处理后的提交数据:', submissionData);
+    if (config.LOG_LEVEL === 'debug') {
+      console.log('处理后的提交数据:', submissionData);
+    }
 
     // 调用服务处理数据
     const result = await codingService.submitCodingData(submissionData);
-    console.log('数据处理结果:', result);
+    if (config.LOG_LEVEL === 'debug') {
+      console.log('数据处理结果:', result);
+    }
 
     res.json(result);
   } catch (error) {
@@ -68,6 +87,17 @@ router.post('/submit', async (req, res) => {
   }
 });
 
+/**
+ * 获取提交写入队列的运行指标
+ */
+router.get('/ingest-metrics', (req, res) => {
+  res.json({
+    success: true,
+    mode: config.INGEST_MODE,
+    data: codingService.getIngestMetrics()
+  });
+});
+
 /**
  * 获取学生的编程统计数据
  */
@@ -104,6 +134,28 @@ router.get('/class/:className', async (req, res) => {
   }
 });
 
+/**
+ * 多个班级的编程统计对比
+ * 查询参数 classes 为逗号分隔的班级名称，省略时对比全部班级
+ */
+router.get('/class-comparison', async (req, res) => {
+  try {
+    const classNames = (req.query.classes || '')
+      .split(',')
+      .map(name => name.trim())
+      .filter(Boolean);
+    const result = await codingService.compareClasses(classNames);
+    res.json(result);
+  } catch (error) {
+    console.error('获取班级对比数据失败:', error);
+    res.status(500).json({
+      success: false,
+      message: '服务器错误',
+      error: error.message
+    });
+  }
+});
+
 /**
  * 获取特定题目的提交统计
  */
@@ -122,6 +174,122 @@ router.get('/problem/:problemId', async (req, res) => {
   }
 });
 
+/**
+ * 获取题目的解题用时分布
+ */
+router.get('/problem/:problemId/solving-time', async (req, res) => {
+  try {
+    const { problemId } = req.params;
+    const result = await codingService.getSolvingTimeHistogram(problemId, req.query.className);
+    res.json(result);
+  } catch (error) {
+    console.error('获取解题用时分布失败:', error);
+    res.status(500).json({
+      success: false,
+      message: '服务器错误',
+      error: error.message
+    });
+  }
+});
+
+/**
+ * 获取题目的解题次数、解题用时分位数，可按班级筛选
+ */
+router.get('/problem/:problemId/quantiles', async (req, res) => {
+  try {
+    const { problemId } = req.params;
+    const result = await codingService.getSolvingQuantiles(problemId, req.query.className);
+    res.json(result);
+  } catch (error) {
+    console.error('获取解题分位数失败:', error);
+    res.status(500).json({
+      success: false,
+      message: '服务器错误',
+      error: error.message
+    });
+  }
+});
+
+/**
+ * 获取班级所有题目合并的解题次数、解题用时分位数
+ */
+router.get('/class/:className/quantiles', async (req, res) => {
+  try {
+    const { className } = req.params;
+    const result = await codingService.getSolvingQuantiles(null, className);
+    res.json(result);
+  } catch (error) {
+    console.error('获取解题分位数失败:', error);
+    res.status(500).json({
+      success: false,
+      message: '服务器错误',
+      error: error.message
+    });
+  }
+});
+
+/**
+ * 导出题目的提交记录（含代码）
+ */
+router.get('/problem/:problemId/export', async (req, res) => {
+  try {
+    const { problemId } = req.params;
+    const result = await codingService.exportSubmissions(problemId, req.query.className);
+    res.json(result);
+  } catch (error) {
+    console.error('导出提交记录失败:', error);
+    res.status(500).json({
+      success: false,
+      message: '服务器错误',
+      error: error.message
+    });
+  }
+});
+
+/**
+ * 获取单次提交的代码
+ */
+router.get('/submission/:submissionId/code', async (req, res) => {
+  try {
+    const { submissionId } = req.params;
+    const result = await codingService.getSubmissionCode(submissionId);
+    res.json(result);
+  } catch (error) {
+    console.error('获取提交代码失败:', error);
+    res.status(500).json({
+      success: false,
+      message: '服务器错误',
+      error: error.message
+    });
+  }
+});
+
+/**
+ * 分页获取提交记录
+ * 查询参数: result, from, to, limit（最大500）, cursor（上一页返回的 next_cursor）
+ */
+const submissionHistoryRoutes = {
+  student: '/student/:value/submissions',
+  problem: '/problem/:value/submissions',
+  class: '/class/:value/submissions'
+};
+
+Object.entries(submissionHistoryRoutes).forEach(([scope, path]) => {
+  router.get(path, async (req, res) => {
+    try {
+      const result = await codingService.getSubmissionHistory(scope, req.params.value, req.query);
+      res.json(result);
+    } catch (error) {
+      console.error('获取提交记录失败:', error);
+      res.status(500).json({
+        success: false,
+        message: '服务器错误',
+        error: error.message
+      });
+    }
+  });
+});
+
 /**
  * 运行C++代码
  */
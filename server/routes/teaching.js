@@ -66,9 +66,11 @@ router.get('/stats', async (req, res) => {
  */
 router.get('/activity-trend', async (req, res) => {
     try {
-        const { range } = req.query;
+        const { range, className } = req.query;
         console.log(`正在获取活动趋势数据，时间范围: ${range || 'week'}...`);
-        const result = await executePythonScript('teaching_stats_api.py', ['get_activity_trend', range || 'week']);
+        const args = ['get_activity_trend', range || 'week'];
+        if (className) args.push(className);
+        const result = await executePythonScript('teaching_stats_api.py', args);
         res.json(result);
     } catch (error) {
         console.error('获取活动趋势数据失败:', error);
@@ -116,4 +118,81 @@ router.get('/todos', async (req, res) => {
     }
 });
 
+/**
+ * 一次获取教师首页数据（教学统计、活动趋势、题目完成情况、待处理事项）
+ */
+router.get('/dashboard', async (req, res) => {
+    try {
+        const { range, className } = req.query;
+        console.log('正在获取教师首页数据...');
+        const args = ['get_dashboard_bundle', range || 'week'];
+        if (className) args.push(className);
+        const result = await executePythonScript('teaching_stats_api.py', args);
+        res.json(result);
+    } catch (error) {
+        console.error('获取教师首页数据失败:', error);
+        res.status(500).json({
+            success: false,
+            message: '服务器错误',
+            error: error.message
+        });
+    }
+});
+
+/**
+ * 获取学生留存（N日留存、周留存、按首次活跃周的留存表）和连续活跃概况，可按班级筛选
+ */
+router.get('/retention', async (req, res) => {
+    try {
+        const { className, days, weeks } = req.query;
+        const args = ['class', className || ''];
+        if (days) args.push(days);
+        if (weeks) args.push(weeks);
+        const result = await executePythonScript('activity_bitmaps.py', args);
+        res.json(result);
+    } catch (error) {
+        console.error('获取学生留存数据失败:', error);
+        res.status(500).json({
+            success: false,
+            message: '服务器错误',
+            error: error.message
+        });
+    }
+});
+
+/**
+ * 获取学生的活跃天数、当前连续活跃天数和最长连续活跃天数
+ */
+router.get('/student-streak/:studentId', async (req, res) => {
+    try {
+        const { studentId } = req.params;
+        const result = await executePythonScript('activity_bitmaps.py', ['student', studentId]);
+        res.json(result);
+    } catch (error) {
+        console.error('获取学生连续活跃天数失败:', error);
+        res.status(500).json({
+            success: false,
+            message: '服务器错误',
+            error: error.message
+        });
+    }
+});
+
+/**
+ * 获取看板缓存命中统计
+ */
+router.get('/cache-stats', async (req, res) => {
+    try {
+        const result = await executePythonScript('dashboard_cache.py', ['stats']);
+        res.json(result);
+    } catch (error) {
+        console.error('获取看板缓存统计失败:', error);
+        res.status(500).json({
+            success: false,
+            message: '服务器错误',
+            error: error.message
+        });
+    }
+});
+
 module.exports = router;
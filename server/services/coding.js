@@ -2,6 +2,86 @@
  * 编程数据处理服务
  */
 const { executePythonScript } = require('./python');
+const config = require('../config');
+const { SubmissionQueue } = require('./submissionQueue');
+const { SubmissionSpool } = require('./submissionSpool');
+
+// 组提交队列，仅在 batch 写入模式下使用
+const submissionQueue = config.INGEST_MODE === 'batch'
+  ? new SubmissionQueue({
+    maxBatchSize: config.INGEST_BATCH_SIZE,
+    flushIntervalMs: config.INGEST_FLUSH_MS
+  })
+  : null;
+
+// 本地预写日志，仅在 spool 写入模式下使用；启动时重放上次未写入数据库的提交
+const submissionSpool = config.INGEST_MODE === 'spool'
+  ? new SubmissionSpool({
+    dir: config.INGEST_SPOOL_DIR,
+    segmentBytes: config.INGEST_SPOOL_SEGMENT_BYTES,
+    batchSize: config.INGEST_BATCH_SIZE,
+    retryMs: config.INGEST_SPOOL_RETRY_MS
+  })
+  : null;
+
+// direct 写入模式下每次提交的数据库开销
+const directMetrics = {
+  committed: 0,
+  failed: 0,
+  roundTrips: 0,
+  statements: 0,
+  bytesSent: 0
+};
+
+// 派生表更新的运行指标
+const deriveMetrics = {
+  runs: 0,
+  failed: 0,
+  derived: 0,
+  roundTrips: 0,
+  lastRunAt: null
+};
+let deriving = false;
+
+if (submissionSpool) {
+  try {
+    submissionSpool.start();
+  } catch (error) {
+    console.error('打开预写日志失败:', error);
+  }
+}
+
+/**
+ * 更新提交之后的派生表（代码块、汇总表、直方图等）
+ * 提交写入只写提交记录和解题统计，派生表由这里定时补上；上一次还未结束时跳过
+ */
+async function runDerivedUpdates() {
+  if (deriving) {
+    return;
+  }
+  deriving = true;
+  try {
+    const result = await executePythonScript('derived_updates.py', ['run']);
+    deriveMetrics.runs++;
+    deriveMetrics.lastRunAt = new Date().toISOString();
+    if (result.success) {
+      deriveMetrics.derived += result.data.derived;
+      deriveMetrics.roundTrips += result.data.round_trips;
+    } else {
+      deriveMetrics.failed++;
+      console.error('更新派生表失败:', result.message);
+    }
+  } catch (error) {
+    deriveMetrics.failed++;
+    console.error('更新派生表失败:', error);
+  } finally {
+    deriving = false;
+  }
+}
+
+if (config.INGEST_DERIVE_INTERVAL_MS > 0) {
+  setInterval(runDerivedUpdates, config.INGEST_DERIVE_INTERVAL_MS).unref();
+}
 
 /**
  * 提交编程数据到数据库
@@ -10,14 +90,36 @@ const { executePythonScript } = require('./python');
  */
 async function submitCodingData(data) {
   try {
-    // 将对象转换为字符串，以便传递给Python
+    if (submissionSpool) {
+      // 落盘后立即确认，由后台重放写入数据库
+      const { key } = await submissionSpool.append(data, data.idempotency_key);
+      return {
+        success: true,
+        message: '编程数据已接收',
+        spooled: true,
+        idempotency_key: key
+      };
+    }
+
+    if (submissionQueue) {
+      // 加入组提交队列，所在批次写入成功后返回
+      return await submissionQueue.enqueue(data);
+    }
+
+    // 将对象转换为字符串，通过标准输入传递给Python（提交的代码可能超出命令行长度限制）
     const dataJsonString = JSON.stringify(data);
 
     // 调用Python脚本存储数据
-    const result = await executePythonScript('coding_data.py', [
-      'submit_data',
-      dataJsonString
-    ]);
+    const result = await executePythonScript('coding_data.py', ['submit_data', '-'], dataJsonString);
+
+    if (result.success) {
+      directMetrics.committed++;
+    } else {
+      directMetrics.failed++;
+    }
+    directMetrics.roundTrips += result.round_trips || 0;
+    directMetrics.statements += result.statements || 0;
+    directMetrics.bytesSent += result.bytes_sent || 0;
 
     return result;
   } catch (error) {
@@ -83,6 +185,25 @@ async function getClassCodingStats(className) {
   }
 }
 
+/**
+ * 多个班级的编程统计对比，一次计算所有班级
+ * @param {string[]} classNames - 班级名称列表，为空时对比全部班级
+ * @returns {Promise} 班级 × 指标矩阵
+ */
+async function compareClasses(classNames = []) {
+  try {
+    const result = await executePythonScript('coding_data.py', [
+      'compare_classes',
+      ...classNames
+    ]);
+
+    return result;
+  } catch (error) {
+    console.error('获取班级对比数据失败:', error);
+    throw new Error(`获取班级对比数据失败: ${error.message}`);
+  }
+}
+
 /**
  * 获取特定题目的统计数据
  * @param {string} problemId - 题目ID
@@ -102,10 +223,149 @@ async function getProblemStats(problemId) {
   }
 }
 
+/**
+ * 获取题目的解题用时分布（对数刻度直方图、中位数、P90）
+ * @param {string} problemId - 题目ID
+ * @param {string} [className] - 班级名称，不传时为全部班级
+ * @returns {Promise} 解题用时分布
+ */
+async function getSolvingTimeHistogram(problemId, className) {
+  try {
+    const args = ['get', problemId];
+    if (className) {
+      args.push(className);
+    }
+    const result = await executePythonScript('solving_histograms.py', args);
+
+    return result;
+  } catch (error) {
+    console.error('获取解题用时分布失败:', error);
+    throw new Error(`获取解题用时分布失败: ${error.message}`);
+  }
+}
+
+/**
+ * 获取题目（或班级）的解题次数、解题用时分位数（P50/P90/P99）
+ * @param {string|null} problemId - 题目ID，为空时返回班级所有题目合并的分位数
+ * @param {string} [className] - 班级名称
+ * @returns {Promise} 分位数
+ */
+async function getSolvingQuantiles(problemId, className) {
+  try {
+    const args = problemId ? ['get_problem', problemId] : ['get_class'];
+    if (className) {
+      args.push(className);
+    }
+    const result = await executePythonScript('quantile_sketches.py', args);
+
+    return result;
+  } catch (error) {
+    console.error('获取解题分位数失败:', error);
+    throw new Error(`获取解题分位数失败: ${error.message}`);
+  }
+}
+
+/**
+ * 获取单次提交的代码
+ * @param {string} submissionId - 提交ID
+ * @returns {Promise} 提交记录和代码
+ */
+async function getSubmissionCode(submissionId) {
+  try {
+    const result = await executePythonScript('coding_data.py', [
+      'get_submission_code',
+      String(submissionId)
+    ]);
+
+    return result;
+  } catch (error) {
+    console.error('获取提交代码失败:', error);
+    throw new Error(`获取提交代码失败: ${error.message}`);
+  }
+}
+
+/**
+ * 导出题目的提交记录（含代码）
+ * @param {string} problemId - 题目ID
+ * @param {string} [className] - 班级名称，不传时导出全部班级
+ * @returns {Promise} 提交记录列表
+ */
+async function exportSubmissions(problemId, className) {
+  try {
+    const args = ['export_submissions', problemId];
+    if (className) {
+      args.push(className);
+    }
+    const result = await executePythonScript('coding_data.py', args);
+
+    return result;
+  } catch (error) {
+    console.error('导出提交记录失败:', error);
+    throw new Error(`导出提交记录失败: ${error.message}`);
+  }
+}
+
+/**
+ * 分页获取提交记录（按 submission_time, id 倒序的键集分页）
+ * @param {string} scope - 分页范围: student/problem/class
+ * @param {string} value - 学号、题目ID或班级名称
+ * @param {Object} [options] - result, from, to, limit, cursor
+ * @returns {Promise} 一页提交记录和下一页游标
+ */
+async function getSubmissionHistory(scope, value, options = {}) {
+  try {
+    const filters = {};
+    ['result', 'from', 'to', 'limit', 'cursor'].forEach(key => {
+      if (options[key]) {
+        filters[key] = options[key];
+      }
+    });
+    const result = await executePythonScript('submission_history.py', [
+      'list',
+      scope,
+      value,
+      JSON.stringify(filters)
+    ]);
+
+    return result;
+  } catch (error) {
+    console.error('获取提交记录失败:', error);
+    throw new Error(`获取提交记录失败: ${error.message}`);
+  }
+}
+
+/**
+ * 获取提交写入的运行指标
+ * @returns {Object} 队列或预写日志指标，direct模式下为每次提交的数据库开销；derive 为派生表更新的指标
+ */
+function getIngestMetrics() {
+  const derive = Object.assign({}, deriveMetrics);
+  if (submissionSpool) {
+    return Object.assign(submissionSpool.getMetrics(), { derive });
+  }
+  if (submissionQueue) {
+    return Object.assign(submissionQueue.getMetrics(), { derive });
+  }
+  const processed = directMetrics.committed + directMetrics.failed;
+  return Object.assign({}, directMetrics, {
+    roundTripsPerSubmission: processed ? +(directMetrics.roundTrips / processed).toFixed(3) : 0,
+    statementsPerSubmission: processed ? +(directMetrics.statements / processed).toFixed(3) : 0,
+    bytesPerSubmission: processed ? Math.round(directMetrics.bytesSent / processed) : 0,
+    derive
+  });
+}
+
 module.exports = {
   submitCodingData,
+  getIngestMetrics,
   ensureTablesCreated,
   getStudentCodingStats,
   getClassCodingStats,
-  getProblemStats
+  compareClasses,
+  getProblemStats,
+  getSolvingTimeHistogram,
+  getSolvingQuantiles,
+  getSubmissionCode,
+  exportSubmissions,
+  getSubmissionHistory
 };
\ No newline at end of file
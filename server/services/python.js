@@ -3,20 +3,82 @@
  */
 const { spawn } = require('child_process');
 const path = require('path');
+const config = require('../config');
+const { PythonWorkerPool } = require('./pythonPool');
+
+// 非debug日志级别下，超过该长度的参数不写入日志
+const MAX_LOGGED_ARG_LENGTH = 200;
+
+// 常驻工作进程池，首次调用时创建
+let workerPool = null;
+// 登录、注册的密码哈希（PBKDF2）专用的工作进程池，不占用处理其他调用的工作进程
+let hashingPool = null;
+
+function getWorkerPool() {
+    if (!workerPool && config.PYTHON_WORKERS > 0) {
+        workerPool = new PythonWorkerPool({
+            size: config.PYTHON_WORKERS,
+            timeout: config.PYTHON_CALL_TIMEOUT,
+            pythonCommand: config.PYTHON_COMMAND
+        });
+    }
+    return workerPool;
+}
+
+function getHashingPool() {
+    if (!hashingPool && config.HASHING_WORKERS > 0) {
+        hashingPool = new PythonWorkerPool({
+            size: config.HASHING_WORKERS,
+            timeout: config.PYTHON_CALL_TIMEOUT,
+            pythonCommand: config.PYTHON_COMMAND
+        });
+    }
+    return hashingPool;
+}
 
 /**
- * 执行Python脚本并返回结果
- * @param {string} scriptName - Python脚本文件名
- * @param {Array} args - 传递给Python脚本的参数
- * @returns {Promise} 脚本执行结果的Promise对象
+ * 解析Python脚本的标准输出为JSON
+ * @param {string} result - 脚本的标准输出
+ * @returns {Object} 解析结果
  */
-function executePythonScript(scriptName, args) {
-    // 使用相对路径从服务器脚本位置查找Python脚本
-    const scriptPath = path.join(__dirname, '..', '..', 'src', 'services', scriptName);
+function parseScriptOutput(result) {
+    try {
+        // 尝试解析最后一个有效的JSON对象
+        const jsonLines = result.split(/\r?\n/).filter(line => line.trim());
+        let parsedResult;
 
-    console.log(`执行Python脚本: ${scriptPath}`);
-    console.log(`参数: ${args.join(', ')}`);
+        if (jsonLines.length > 0) {
+            // 使用最后一个可能的JSON行
+            const lastJsonLine = jsonLines[jsonLines.length - 1];
+            try {
+                parsedResult = JSON.parse(lastJsonLine);
+                console.log('成功解析Python脚本输出为JSON');
+            } catch (e) {
+                console.warn(`解析最后一行JSON失败: ${e.message}`);
+                // 尝试解析整个输出
+                parsedResult = JSON.parse(result);
+            }
+        } else {
+            parsedResult = JSON.parse(result);
+        }
+
+        return parsedResult;
+    } catch (e) {
+        console.warn(`解析Python脚本输出为JSON失败: ${e.message}`);
+        console.log(`原始输出: ${result}`);
+        // 如果无法解析为JSON，返回一个默认的成功响应
+        return {
+            success: false,
+            message: '无法解析Python脚本输出',
+            rawOutput: result
+        };
+    }
+}
 
+/**
+ * 在新的Python进程中执行脚本
+ */
+function spawnPythonScript(scriptPath, args, input) {
     return new Promise((resolve, reject) => {
         // 设置环境变量以确保Python正确处理UTF-8编码
         const env = Object.assign({}, process.env, {
@@ -24,7 +86,9 @@ function executePythonScript(scriptName, args) {
             PYTHONLEGACYWINDOWSSTDIO: 'utf-8'
         });
 
-        const pythonProcess = spawn('python', [scriptPath, ...args], { env });
+        const pythonProcess = spawn(config.PYTHON_COMMAND, [scriptPath, ...args], { env });
+        pythonProcess.stdin.on('error', () => {});
+        pythonProcess.stdin.end(input !== undefined ? input : '');
         let result = '';
         let error = '';
 
@@ -43,42 +107,96 @@ function executePythonScript(scriptName, args) {
                 console.error(`Python脚本执行失败: ${error}`);
                 reject(error || 'Python脚本执行失败');
             } else {
-                try {
-                    // 尝试解析最后一个有效的JSON对象
-                    const jsonLines = result.split(/\r?\n/).filter(line => line.trim());
-                    let parsedResult;
-
-                    if (jsonLines.length > 0) {
-                        // 使用最后一个可能的JSON行
-                        const lastJsonLine = jsonLines[jsonLines.length - 1];
-                        try {
-                            parsedResult = JSON.parse(lastJsonLine);
-                            console.log('成功解析Python脚本输出为JSON');
-                        } catch (e) {
-                            console.warn(`解析最后一行JSON失败: ${e.message}`);
-                            // 尝试解析整个输出
-                            parsedResult = JSON.parse(result);
-                        }
-                    } else {
-                        parsedResult = JSON.parse(result);
-                    }
-
-                    resolve(parsedResult);
-                } catch (e) {
-                    console.warn(`解析Python脚本输出为JSON失败: ${e.message}`);
-                    console.log(`原始输出: ${result}`);
-                    // 如果无法解析为JSON，返回一个默认的成功响应
-                    resolve({
-                        success: false,
-                        message: '无法解析Python脚本输出',
-                        rawOutput: result
-                    });
-                }
+                resolve(parseScriptOutput(result));
             }
         });
     });
 }
 
+/**
+ * 在常驻工作进程中执行脚本
+ */
+async function callPythonWorker(pool, scriptName, args, input) {
+    const { exit_code: code, stdout, stderr } = await pool.call(scriptName, args, undefined, input);
+
+    if (stderr) {
+        console.log(`Python脚本错误输出: ${stderr}`);
+    }
+    console.log(`Python脚本执行完成，退出码: ${code}`);
+
+    if (code !== 0) {
+        console.error(`Python脚本执行失败: ${stderr}`);
+        throw stderr || 'Python脚本执行失败';
+    }
+    return parseScriptOutput(stdout);
+}
+
+/**
+ * 格式化参数用于日志，非debug级别下长参数（如提交的代码）只记录长度
+ */
+function formatArgs(args) {
+    if (config.LOG_LEVEL === 'debug') {
+        return args.join(', ');
+    }
+    return args.map(arg => {
+        const text = String(arg);
+        return text.length > MAX_LOGGED_ARG_LENGTH ? `<${Buffer.byteLength(text)} bytes>` : text;
+    }).join(', ');
+}
+
+/**
+ * 执行Python脚本并返回结果
+ * @param {string} scriptName - Python脚本文件名
+ * @param {Array} args - 传递给Python脚本的参数
+ * @param {string} [input] - 写入脚本标准输入的数据，较大的数据（如提交的代码）通过标准输入传递，不受命令行长度限制
+ * @returns {Promise} 脚本执行结果的Promise对象
+ */
+function executePythonScript(scriptName, args, input) {
+    return runPythonScript(getWorkerPool(), scriptName, args, input);
+}
+
+/**
+ * 在密码哈希专用的工作进程池中执行脚本（登录、注册、批量导入账号）
+ * 哈希计算占满CPU，放在单独的进程池中，登录高峰时其他调用不需要排在哈希计算之后
+ * @param {string} scriptName - Python脚本文件名
+ * @param {Array} args - 传递给Python脚本的参数
+ * @param {string} [input] - 写入脚本标准输入的数据
+ * @returns {Promise} 脚本执行结果的Promise对象
+ */
+function executeHashingScript(scriptName, args, input) {
+    return runPythonScript(getHashingPool(), scriptName, args, input);
+}
+
+function runPythonScript(pool, scriptName, args, input) {
+    // 使用相对路径从服务器脚本位置查找Python脚本
+    const scriptPath = path.join(__dirname, '..', '..', 'src', 'services', scriptName);
+
+    console.log(`执行Python脚本: ${scriptPath}`);
+    console.log(`参数: ${formatArgs(args)}`);
+
+    if (pool) {
+        return callPythonWorker(pool, scriptName, args, input);
+    }
+    return spawnPythonScript(scriptPath, args, input);
+}
+
+/**
+ * 获取工作进程池的运行统计
+ */
+function getPythonPoolStats() {
+    return workerPool ? workerPool.getStats() : null;
+}
+
+/**
+ * 获取密码哈希工作进程池的运行统计
+ */
+function getHashingPoolStats() {
+    return hashingPool ? hashingPool.getStats() : null;
+}
+
 module.exports = {
-    executePythonScript
-};
\ No newline at end of file
+    executePythonScript,
+    executeHashingScript,
+    getPythonPoolStats,
+    getHashingPoolStats
+};
@@ -0,0 +1,245 @@
+/**
+ * 常驻Python工作进程池
+ * 维护N个 src/services/service_worker.py 进程，通过长度前缀的JSON帧发送调用，
+ * 支持单次调用超时以及进程崩溃后自动重启
+ */
+const { spawn } = require('child_process');
+const path = require('path');
+
+const WORKER_SCRIPT = path.join(__dirname, '..', '..', 'src', 'services', 'service_worker.py');
+const RESTART_DELAY_MS = 500;
+
+/**
+ * 单个Python工作进程
+ */
+class PythonWorker {
+    constructor(pool, index) {
+        this.pool = pool;
+        this.index = index;
+        this.process = null;
+        this.buffer = Buffer.alloc(0);
+        this.current = null;  // 当前正在执行的调用
+        this.failed = false;
+        this.nextId = 1;
+        this.start();
+    }
+
+    start() {
+        const env = Object.assign({}, process.env, {
+            PYTHONIOENCODING: 'utf-8',
+            PYTHONLEGACYWINDOWSSTDIO: 'utf-8'
+        });
+
+        this.buffer = Buffer.alloc(0);
+        this.process = spawn(this.pool.pythonCommand, [WORKER_SCRIPT], { env });
+        this.ready = true;
+
+        this.process.stdout.on('data', (data) => this.onData(data));
+
+        this.process.stderr.on('data', (data) => {
+            console.log(`Python工作进程[${this.index}]错误输出: ${data.toString('utf-8')}`);
+        });
+
+        this.process.stdin.on('error', (err) => {
+            console.error(`写入Python工作进程[${this.index}]失败: ${err.message}`);
+        });
+
+        this.process.on('error', (err) => {
+            // 进程无法启动(如找不到python)时不再重启，避免无限重试
+            console.error(`Python工作进程[${this.index}]启动失败: ${err.message}`);
+            this.ready = false;
+            this.failed = true;
+            const call = this.current;
+            this.current = null;
+            if (call) {
+                clearTimeout(call.timer);
+                call.reject(`Python工作进程启动失败: ${err.message}`);
+            }
+            this.pool.dispatch();
+        });
+
+        this.process.on('exit', (code, signal) => this.onExit(code, signal));
+    }
+
+    get busy() {
+        return this.current !== null;
+    }
+
+    onData(data) {
+        this.buffer = Buffer.concat([this.buffer, data]);
+
+        // 按帧拆分: 4字节大端长度 + JSON
+        while (this.buffer.length >= 4) {
+            const length = this.buffer.readUInt32BE(0);
+            if (this.buffer.length < 4 + length) {
+                break;
+            }
+            const payload = this.buffer.slice(4, 4 + length).toString('utf-8');
+            this.buffer = this.buffer.slice(4 + length);
+
+            let message;
+            try {
+                message = JSON.parse(payload);
+            } catch (e) {
+                console.error(`Python工作进程[${this.index}]返回了无法解析的帧: ${e.message}`);
+                continue;
+            }
+            this.finish(message);
+        }
+    }
+
+    finish(message) {
+        const call = this.current;
+        if (!call || call.id !== message.id) {
+            return;
+        }
+        clearTimeout(call.timer);
+        this.current = null;
+        this.pool.stats.completed++;
+        call.resolve(message);
+        this.pool.dispatch();
+    }
+
+    onExit(code, signal) {
+        console.warn(`Python工作进程[${this.index}]退出，退出码: ${code}，信号: ${signal}`);
+        this.ready = false;
+
+        const call = this.current;
+        this.current = null;
+        if (call) {
+            clearTimeout(call.timer);
+            call.reject(call.timedOut
+                ? `Python脚本执行超时(${call.timeout}ms)`
+                : `Python工作进程意外退出，退出码: ${code}`);
+        }
+
+        if (this.pool.closed || this.failed) {
+            return;
+        }
+
+        // 崩溃或超时被终止后自动重启
+        this.pool.stats.restarts++;
+        setTimeout(() => {
+            if (!this.pool.closed) {
+                this.start();
+                this.pool.dispatch();
+            }
+        }, RESTART_DELAY_MS);
+    }
+
+    run(call) {
+        call.id = this.nextId++;
+        this.current = call;
+
+        call.timer = setTimeout(() => {
+            call.timedOut = true;
+            this.pool.stats.timeouts++;
+            console.error(`Python脚本执行超时: ${call.script} ${call.args.join(' ')}`);
+            this.process.kill('SIGKILL');
+        }, call.timeout);
+
+        const request = {
+            id: call.id,
+            script: call.script,
+            args: call.args
+        };
+        if (call.input !== undefined) {
+            request.stdin = call.input;
+        }
+        const payload = Buffer.from(JSON.stringify(request), 'utf-8');
+        const header = Buffer.alloc(4);
+        header.writeUInt32BE(payload.length, 0);
+        this.process.stdin.write(Buffer.concat([header, payload]));
+    }
+}
+
+/**
+ * Python工作进程池
+ */
+class PythonWorkerPool {
+    /**
+     * @param {Object} options
+     * @param {number} options.size - 工作进程数量
+     * @param {number} options.timeout - 默认单次调用超时(毫秒)
+     * @param {string} options.pythonCommand - Python可执行文件
+     */
+    constructor({ size = 4, timeout = 120000, pythonCommand = 'python' } = {}) {
+        this.size = size;
+        this.timeout = timeout;
+        this.pythonCommand = pythonCommand;
+        this.queue = [];
+        this.closed = false;
+        this.stats = { submitted: 0, completed: 0, timeouts: 0, restarts: 0 };
+        this.workers = [];
+        for (let i = 0; i < size; i++) {
+            this.workers.push(new PythonWorker(this, i));
+        }
+    }
+
+    /**
+     * 在工作进程中执行脚本
+     * @param {string} scriptName - Python脚本文件名
+     * @param {Array} args - 传递给脚本的参数
+     * @param {number} [timeout] - 本次调用超时(毫秒)
+     * @param {string} [input] - 本次调用的标准输入
+     * @returns {Promise<{exit_code: number, stdout: string, stderr: string}>}
+     */
+    call(scriptName, args, timeout, input) {
+        return new Promise((resolve, reject) => {
+            if (this.closed) {
+                reject('Python工作进程池已关闭');
+                return;
+            }
+            this.stats.submitted++;
+            this.queue.push({
+                script: scriptName,
+                args: args.map(arg => String(arg)),
+                timeout: timeout || this.timeout,
+                input,
+                resolve,
+                reject
+            });
+            this.dispatch();
+        });
+    }
+
+    dispatch() {
+        if (this.workers.length > 0 && this.workers.every(w => w.failed)) {
+            for (const call of this.queue.splice(0)) {
+                call.reject('没有可用的Python工作进程');
+            }
+            return;
+        }
+        while (this.queue.length > 0) {
+            const worker = this.workers.find(w => w.ready && !w.busy);
+            if (!worker) {
+                return;
+            }
+            worker.run(this.queue.shift());
+        }
+    }
+
+    getStats() {
+        return Object.assign({
+            size: this.size,
+            busy: this.workers.filter(w => w.busy).length,
+            queued: this.queue.length
+        }, this.stats);
+    }
+
+    close() {
+        this.closed = true;
+        for (const call of this.queue.splice(0)) {
+            call.reject('Python工作进程池已关闭');
+        }
+        for (const worker of this.workers) {
+            if (worker.process) {
+                worker.process.stdin.end();
+            }
+        }
+    }
+}
+
+module.exports = {
+    PythonWorkerPool
+};
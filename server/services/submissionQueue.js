@@ -0,0 +1,141 @@
+/**
+ * 编程提交组提交队列
+ * 把并发到达的提交先放入内存队列，达到批量大小或等待时间后
+ * 一次性交给 coding_data.py submit_batch 在一个事务中写入，
+ * 每条提交在所在批次提交成功后才返回结果
+ */
+const { executePythonScript } = require('./python');
+
+class SubmissionQueue {
+    /**
+     * @param {Object} options
+     * @param {number} options.maxBatchSize - 单批最大提交数
+     * @param {number} options.flushIntervalMs - 队列中最早的提交最多等待的时间(毫秒)
+     */
+    constructor({ maxBatchSize = 50, flushIntervalMs = 20 } = {}) {
+        this.maxBatchSize = maxBatchSize;
+        this.flushIntervalMs = flushIntervalMs;
+        this.pending = [];
+        this.timer = null;
+        this.flushing = false;
+        this.metrics = {
+            enqueued: 0,
+            committed: 0,
+            failed: 0,
+            batches: 0,
+            failedBatches: 0,
+            maxBatchSize: 0,
+            totalFlushMs: 0,
+            maxFlushMs: 0,
+            totalWaitMs: 0,
+            roundTrips: 0,
+            statements: 0,
+            bytesSent: 0
+        };
+    }
+
+    /**
+     * 加入一条提交，批次提交后返回该条提交的结果
+     * @param {Object} data - 编程数据对象
+     * @returns {Promise<Object>}
+     */
+    enqueue(data) {
+        return new Promise((resolve, reject) => {
+            this.pending.push({ data, resolve, reject, enqueuedAt: Date.now() });
+            this.metrics.enqueued++;
+            this.schedule();
+        });
+    }
+
+    schedule() {
+        if (this.flushing) {
+            // 上一批完成后会继续处理剩余的提交
+            return;
+        }
+        if (this.pending.length >= this.maxBatchSize) {
+            this.flush();
+        } else if (!this.timer) {
+            this.timer = setTimeout(() => this.flush(), this.flushIntervalMs);
+        }
+    }
+
+    async flush() {
+        if (this.timer) {
+            clearTimeout(this.timer);
+            this.timer = null;
+        }
+        if (this.flushing || this.pending.length === 0) {
+            return;
+        }
+
+        // 同一时间只有一个批次在写入，保证同一学生同一题目的统计按顺序更新
+        this.flushing = true;
+        const batch = this.pending.splice(0, this.maxBatchSize);
+        const startedAt = Date.now();
+
+        try {
+            // 批次数据通过标准输入传递，不受命令行参数长度限制
+            const result = await executePythonScript('coding_data.py', ['submit_batch', '-'],
+                JSON.stringify(batch.map(item => item.data)));
+
+            if (!result.success || !Array.isArray(result.results)) {
+                throw new Error(result.message || '批量写入失败');
+            }
+            this.metrics.roundTrips += result.round_trips || 0;
+            this.metrics.statements += result.statements || 0;
+            this.metrics.bytesSent += result.bytes_sent || 0;
+
+            batch.forEach((item, index) => {
+                const itemResult = result.results[index] || { success: false, message: '批量写入结果缺失' };
+                if (itemResult.success) {
+                    this.metrics.committed++;
+                } else {
+                    this.metrics.failed++;
+                }
+                item.resolve(itemResult);
+            });
+        } catch (error) {
+            this.metrics.failedBatches++;
+            this.metrics.failed += batch.length;
+            const message = error instanceof Error ? error.message : String(error);
+            batch.forEach(item => item.reject(new Error(message)));
+        } finally {
+            const flushMs = Date.now() - startedAt;
+            this.metrics.batches++;
+            this.metrics.maxBatchSize = Math.max(this.metrics.maxBatchSize, batch.length);
+            this.metrics.totalFlushMs += flushMs;
+            this.metrics.maxFlushMs = Math.max(this.metrics.maxFlushMs, flushMs);
+            batch.forEach(item => {
+                this.metrics.totalWaitMs += startedAt - item.enqueuedAt;
+            });
+
+            this.flushing = false;
+            if (this.pending.length > 0) {
+                this.schedule();
+            }
+        }
+    }
+
+    getMetrics() {
+        const m = this.metrics;
+        const processed = m.committed + m.failed;
+        return Object.assign({}, m, {
+            queued: this.pending.length,
+            flushing: this.flushing,
+            config: {
+                maxBatchSize: this.maxBatchSize,
+                flushIntervalMs: this.flushIntervalMs
+            },
+            avgBatchSize: m.batches ? +(processed / m.batches).toFixed(2) : 0,
+            avgFlushMs: m.batches ? +(m.totalFlushMs / m.batches).toFixed(2) : 0,
+            avgQueueWaitMs: processed ? +(m.totalWaitMs / processed).toFixed(2) : 0,
+            roundTripsPerSubmission: processed ? +(m.roundTrips / processed).toFixed(3) : 0,
+            statementsPerSubmission: processed ? +(m.statements / processed).toFixed(3) : 0,
+            bytesPerSubmission: processed ? Math.round(m.bytesSent / processed) : 0
+        });
+    }
+}
+
+module.exports = {
+    SubmissionQueue
+};
@@ -0,0 +1,490 @@
+/**
+ * 编程提交本地预写日志（spool）
+ * 提交先追加写入本地磁盘上的分段日志文件并 fsync，落盘后立即确认，
+ * 后台的重放任务按写入顺序把日志中的提交分批交给 coding_data.py submit_batch 写入数据库。
+ * 数据库变慢或短暂不可用时提交不受影响，也不会丢失，恢复后自动补写。
+ *
+ * 日志格式: 每条记录一行 "<校验和> <JSON>\n"，JSON 为 {key, data, spooledAt}，
+ * 校验和为 JSON 的 SHA-256 前8位十六进制。每条记录带一个幂等键，
+ * 重放中断（进程退出、数据库超时）后重复写入的记录由数据库端按幂等键跳过。
+ *
+ * 目录内容:
+ *   segment-<序号>.log  分段日志，写满 segmentBytes 后切换到下一个分段
+ *   checkpoint.json     已写入数据库的位置 {segment, offset}，之前的分段会被删除
+ *   rejected.log        校验和错误或数据/约束错误、无法写入的记录，保留原始行和原因供人工处理
+ *                       （数据库的短暂性错误不会移到这里，整批保留在日志中重试）
+ */
+const fs = require('fs');
+const path = require('path');
+const crypto = require('crypto');
+const { promisify } = require('util');
+const { executePythonScript } = require('./python');
+
+const fsWrite = promisify(fs.write);
+const fsFsync = promisify(fs.fsync);
+
+const SEGMENT_PATTERN = /^segment-(\d+)\.log$/;
+const CHECKPOINT_FILE = 'checkpoint.json';
+const REJECTED_FILE = 'rejected.log';
+// 重放时单次读取的字节数，单条记录超过该长度时读取到分段末尾
+const READ_CHUNK_BYTES = 4 * 1024 * 1024;
+
+function segmentName(segment) {
+    return `segment-${String(segment).padStart(12, '0')}.log`;
+}
+
+function checksum(payload) {
+    return crypto.createHash('sha256').update(payload).digest('hex').slice(0, 8);
+}
+
+/**
+ * 把记录编码为一行
+ */
+function encodeRecord(record) {
+    const payload = JSON.stringify(record);
+    return Buffer.from(`${checksum(payload)} ${payload}\n`, 'utf-8');
+}
+
+/**
+ * 解析一行（不含换行符），校验和不匹配或无法解析时返回null
+ */
+function decodeRecord(line) {
+    const separator = line.indexOf(' ');
+    if (separator !== 8) {
+        return null;
+    }
+    const payload = line.slice(separator + 1);
+    if (checksum(payload) !== line.slice(0, separator)) {
+        return null;
+    }
+    try {
+        return JSON.parse(payload);
+    } catch (e) {
+        return null;
+    }
+}
+
+function sleep(ms) {
+    return new Promise(resolve => setTimeout(resolve, ms));
+}
+
+async function writeAll(fd, buffer) {
+    let written = 0;
+    while (written < buffer.length) {
+        const { bytesWritten } = await fsWrite(fd, buffer, written, buffer.length - written);
+        written += bytesWritten;
+    }
+}
+
+class SubmissionSpool {
+    /**
+     * @param {Object} options
+     * @param {string} options.dir - 日志目录
+     * @param {number} options.segmentBytes - 单个分段文件的大小上限
+     * @param {number} options.batchSize - 重放时单批最大提交数
+     * @param {number} options.retryMs - 数据库写入失败后的首次重试间隔，之后逐次加倍
+     * @param {number} options.maxRetryMs - 重试间隔上限
+     */
+    constructor({ dir, segmentBytes = 16 * 1024 * 1024, batchSize = 50, retryMs = 1000, maxRetryMs = 30000 }) {
+        this.dir = dir;
+        this.segmentBytes = segmentBytes;
+        this.batchSize = batchSize;
+        this.retryMs = retryMs;
+        this.maxRetryMs = maxRetryMs;
+
+        this.opened = false;
+        this.fd = null;
+        this.activeSegment = 0;
+        this.activeSize = 0;      // 已 fsync 的长度，重放只读到这里
+        this.readSegment = 0;
+        this.readOffset = 0;
+
+        this.appendQueue = [];
+        this.writing = false;
+        this.draining = false;
+        this.drainRequested = false;
+        this.retryDelay = retryMs;
+
+        this.metrics = {
+            appended: 0,
+            fsyncs: 0,
+            totalAppendMs: 0,
+            maxAppendMs: 0,
+            replayed: 0,
+            duplicates: 0,
+            rejected: 0,
+            drainBatches: 0,
+            drainErrors: 0,
+            lastDrainError: null,
+            pending: 0,
+            roundTrips: 0,
+            statements: 0
+        };
+    }
+
+    filePath(name) {
+        return path.join(this.dir, name);
+    }
+
+    listSegments() {
+        return fs.readdirSync(this.dir)
+            .map(name => SEGMENT_PATTERN.exec(name))
+            .filter(Boolean)
+            .map(match => parseInt(match[1], 10))
+            .sort((a, b) => a - b);
+    }
+
+    readCheckpoint() {
+        try {
+            const checkpoint = JSON.parse(fs.readFileSync(this.filePath(CHECKPOINT_FILE), 'utf-8'));
+            return { segment: checkpoint.segment, offset: checkpoint.offset };
+        } catch (e) {
+            return null;
+        }
+    }
+
+    /**
+     * 原子地更新检查点: 写临时文件、fsync、重命名
+     */
+    writeCheckpoint(segment, offset) {
+        const tmpPath = this.filePath(`${CHECKPOINT_FILE}.tmp`);
+        const fd = fs.openSync(tmpPath, 'w');
+        try {
+            fs.writeSync(fd, JSON.stringify({ segment, offset }));
+            fs.fsyncSync(fd);
+        } finally {
+            fs.closeSync(fd);
+        }
+        fs.renameSync(tmpPath, this.filePath(CHECKPOINT_FILE));
+    }
+
+    /**
+     * 新建或删除文件后 fsync 目录，保证目录项落盘（部分平台不支持，忽略错误）
+     */
+    syncDir() {
+        try {
+            const fd = fs.openSync(this.dir, 'r');
+            try {
+                fs.fsyncSync(fd);
+            } finally {
+                fs.closeSync(fd);
+            }
+        } catch (e) {
+            // Windows 不支持对目录 fsync
+        }
+    }
+
+    /**
+     * 打开日志目录，截掉最后一个分段末尾未写完整的记录（进程在写入中途退出），
+     * 统计尚未重放的记录数
+     */
+    open() {
+        if (this.opened) {
+            return;
+        }
+        fs.mkdirSync(this.dir, { recursive: true });
+
+        let segments = this.listSegments();
+        const checkpoint = this.readCheckpoint() || { segment: segments[0] || 1, offset: 0 };
+
+        // 检查点之前的分段已全部写入数据库
+        segments.filter(segment => segment < checkpoint.segment).forEach(segment => {
+            fs.unlinkSync(this.filePath(segmentName(segment)));
+        });
+        segments = segments.filter(segment => segment >= checkpoint.segment);
+
+        if (segments.length === 0) {
+            segments = [checkpoint.segment];
+            fs.closeSync(fs.openSync(this.filePath(segmentName(checkpoint.segment)), 'a'));
+            this.syncDir();
+        }
+
+        this.activeSegment = segments[segments.length - 1];
+        const activePath = this.filePath(segmentName(this.activeSegment));
+        const content = fs.readFileSync(activePath);
+        const validEnd = this.lastValidOffset(content);
+        if (validEnd < content.length) {
+            console.warn(`预写日志 ${segmentName(this.activeSegment)} 末尾有 ${content.length - validEnd} 字节不完整的记录，已截断`);
+            fs.truncateSync(activePath, validEnd);
+        }
+
+        this.fd = fs.openSync(activePath, 'a');
+        this.activeSize = validEnd;
+        this.readSegment = checkpoint.segment;
+        this.readOffset = checkpoint.offset;
+
+        this.metrics.pending = segments.reduce((count, segment) => {
+            const data = segment === this.activeSegment
+                ? content.subarray(0, validEnd)
+                : fs.readFileSync(this.filePath(segmentName(segment)));
+            const start = segment === checkpoint.segment ? checkpoint.offset : 0;
+            return count + data.subarray(start).toString('utf-8').split('\n').filter(Boolean).length;
+        }, 0);
+
+        this.opened = true;
+    }
+
+    /**
+     * 最后一条完整且校验通过的记录的结束位置
+     */
+    lastValidOffset(content) {
+        let validEnd = 0;
+        let start = 0;
+        let newline = content.indexOf(0x0a, start);
+        while (newline !== -1) {
+            if (decodeRecord(content.subarray(start, newline).toString('utf-8'))) {
+                validEnd = newline + 1;
+            }
+            start = newline + 1;
+            newline = content.indexOf(0x0a, start);
+        }
+        return validEnd;
+    }
+
+    /**
+     * 追加一条提交，fsync 后返回
+     * 同一时刻到达的多条提交合并为一次写入和一次 fsync
+     * @param {Object} data - 编程数据对象
+     * @param {string} [key] - 幂等键，不传时生成UUID
+     * @returns {Promise<{key: string}>}
+     */
+    append(data, key) {
+        this.open();
+        const record = { key: key || crypto.randomUUID(), data, spooledAt: new Date().toISOString() };
+        return new Promise((resolve, reject) => {
+            this.appendQueue.push({ line: encodeRecord(record), key: record.key, resolve, reject, queuedAt: Date.now() });
+            if (!this.writing) {
+                this.writing = true;
+                setImmediate(() => this.writePending());
+            }
+        });
+    }
+
+    async writePending() {
+        while (this.appendQueue.length > 0) {
+            const items = this.appendQueue.splice(0);
+            const buffer = Buffer.concat(items.map(item => item.line));
+            try {
+                if (this.activeSize > 0 && this.activeSize + buffer.length > this.segmentBytes) {
+                    this.rotate();
+                }
+                await writeAll(this.fd, buffer);
+                await fsFsync(this.fd);
+                this.activeSize += buffer.length;
+
+                const now = Date.now();
+                this.metrics.fsyncs++;
+                this.metrics.appended += items.length;
+                this.metrics.pending += items.length;
+                items.forEach(item => {
+                    const appendMs = now - item.queuedAt;
+                    this.metrics.totalAppendMs += appendMs;
+                    this.metrics.maxAppendMs = Math.max(this.metrics.maxAppendMs, appendMs);
+                    item.resolve({ key: item.key });
+                });
+                this.drain();
+            } catch (error) {
+                console.error('写入预写日志失败:', error);
+                items.forEach(item => item.reject(error));
+            }
+        }
+        this.writing = false;
+    }
+
+    rotate() {
+        fs.closeSync(this.fd);
+        this.activeSegment++;
+        this.fd = fs.openSync(this.filePath(segmentName(this.activeSegment)), 'a');
+        this.activeSize = 0;
+        this.syncDir();
+    }
+
+    /**
+     * 从重放位置读取一批记录
+     * @returns {{records: Array, end: number, corrupt: Array<string>}} end 为这批记录之后的位置
+     */
+    readBatch() {
+        const isActive = this.readSegment === this.activeSegment;
+        const filePath = this.filePath(segmentName(this.readSegment));
+        const limit = isActive ? this.activeSize : fs.statSync(filePath).size;
+        const available = limit - this.readOffset;
+        if (available <= 0) {
+            return { records: [], end: this.readOffset, corrupt: [] };
+        }
+
+        const fd = fs.openSync(filePath, 'r');
+        let content;
+        try {
+            let length = Math.min(available, READ_CHUNK_BYTES);
+            content = Buffer.alloc(length);
+            fs.readSync(fd, content, 0, length, this.readOffset);
+            if (content.indexOf(0x0a) === -1 && length < available) {
+                length = available;
+                content = Buffer.alloc(length);
+                fs.readSync(fd, content, 0, length, this.readOffset);
+            }
+        } finally {
+            fs.closeSync(fd);
+        }
+
+        const records = [];
+        const corrupt = [];
+        let start = 0;
+        let newline = content.indexOf(0x0a, start);
+        while (newline !== -1 && records.length < this.batchSize) {
+            const line = content.subarray(start, newline).toString('utf-8');
+            const record = decodeRecord(line);
+            if (record) {
+                records.push(record);
+            } else {
+                corrupt.push(line);
+            }
+            start = newline + 1;
+            newline = content.indexOf(0x0a, start);
+        }
+        return { records, end: this.readOffset + start, corrupt };
+    }
+
+    reject(lines, reason) {
+        if (lines.length === 0) {
+            return;
+        }
+        const entries = lines.map(line => JSON.stringify({ reason, line, rejectedAt: new Date().toISOString() }) + '\n');
+        fs.appendFileSync(this.filePath(REJECTED_FILE), entries.join(''));
+        this.metrics.rejected += lines.length;
+        this.metrics.pending -= lines.length;
+        console.error(`预写日志中有 ${lines.length} 条记录无法写入（${reason}），已移至 ${REJECTED_FILE}`);
+    }
+
+    /**
+     * 把一批记录写入数据库，数据库不可用或有记录遇到短暂性错误时抛出异常（整批稍后重试）
+     */
+    async replay(records) {
+        // 批次数据通过标准输入传递，不受命令行参数长度限制
+        const result = await executePythonScript('coding_data.py', ['submit_batch', '-'],
+            JSON.stringify(records.map(record => Object.assign({}, record.data, { idempotency_key: record.key }))));
+        if (!result.success || !Array.isArray(result.results)) {
+            throw new Error(result.message || '批量写入失败');
+        }
+        this.metrics.roundTrips += result.round_trips || 0;
+        this.metrics.statements += result.statements || 0;
+        // 死锁、锁等待超时、连接中断等短暂性错误: 不丢弃任何记录，整批稍后重试，
+        // 已写入的记录重试时按幂等键跳过；只有数据或约束错误的记录移至 rejected.log
+        const transient = result.results.find(item => !item.success && item.transient);
+        if (transient || result.results.length < records.length) {
+            throw new Error((transient && transient.message) || '批量写入结果缺失');
+        }
+
+        const failed = [];
+        records.forEach((record, index) => {
+            const itemResult = result.results[index];
+            if (!itemResult.success) {
+                failed.push(encodeRecord(record).toString('utf-8').trimEnd());
+                console.error(`预写日志记录 ${record.key} 写入失败: ${itemResult.message}`);
+            } else if (itemResult.duplicate) {
+                this.metrics.duplicates++;
+            }
+        });
+        const written = records.length - failed.length;
+        this.metrics.replayed += written;
+        this.metrics.pending -= written;
+        this.reject(failed, '数据写入失败');
+    }
+
+    /**
+     * 启动重放；正在重放时只做标记，当前一轮结束后继续
+     */
+    drain() {
+        if (this.draining) {
+            this.drainRequested = true;
+            return;
+        }
+        this.draining = true;
+        this.drainLoop()
+            .catch(error => console.error('预写日志重放异常:', error))
+            .finally(() => {
+                this.draining = false;
+                if (this.drainRequested) {
+                    this.drainRequested = false;
+                    this.drain();
+                }
+            });
+    }
+
+    async drainLoop() {
+        this.open();
+        for (;;) {
+            this.drainRequested = false;
+            const { records, end, corrupt } = this.readBatch();
+
+            if (records.length === 0 && corrupt.length === 0) {
+                if (this.readSegment >= this.activeSegment) {
+                    return;
+                }
+                // 分段已全部写入数据库，切换到下一个分段并删除该分段
+                const finished = this.readSegment;
+                this.readSegment++;
+                this.readOffset = 0;
+                this.writeCheckpoint(this.readSegment, 0);
+                fs.unlinkSync(this.filePath(segmentName(finished)));
+                this.syncDir();
+                continue;
+            }
+
+            if (records.length > 0) {
+                try {
+                    await this.replay(records);
+                    this.retryDelay = this.retryMs;
+                    this.metrics.drainBatches++;
+                } catch (error) {
+                    const message = error instanceof Error ? error.message : String(error);
+                    this.metrics.drainErrors++;
+                    this.metrics.lastDrainError = { message, at: new Date().toISOString() };
+                    console.error(`预写日志重放失败，${this.retryDelay}ms 后重试: ${message}`);
+                    await sleep(this.retryDelay);
+                    this.retryDelay = Math.min(this.retryDelay * 2, this.maxRetryMs);
+                    continue;
+                }
+            }
+            this.reject(corrupt, '校验和错误');
+
+            this.readOffset = end;
+            this.writeCheckpoint(this.readSegment, this.readOffset);
+        }
+    }
+
+    /**
+     * 打开日志并重放上次退出时未写入数据库的记录
+     */
+    start() {
+        this.open();
+        if (this.metrics.pending > 0) {
+            console.log(`预写日志中有 ${this.metrics.pending} 条未写入数据库的提交，开始重放`);
+        }
+        this.drain();
+    }
+
+    getMetrics() {
+        const m = this.metrics;
+        return Object.assign({}, m, {
+            draining: this.draining,
+            activeSegment: this.activeSegment,
+            readSegment: this.readSegment,
+            readOffset: this.readOffset,
+            config: {
+                dir: this.dir,
+                segmentBytes: this.segmentBytes,
+                batchSize: this.batchSize
+            },
+            avgAppendMs: m.appended ? +(m.totalAppendMs / m.appended).toFixed(2) : 0,
+            roundTripsPerSubmission: m.replayed ? +(m.roundTrips / m.replayed).toFixed(3) : 0,
+            statementsPerSubmission: m.replayed ? +(m.statements / m.replayed).toFixed(3) : 0
+        });
+    }
+}
+
+module.exports = {
+    SubmissionSpool,
+    encodeRecord,
+    decodeRecord
+};
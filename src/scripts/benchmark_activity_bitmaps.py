@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+学生活跃位图的性能对比
+在内存中生成模拟数据（默认 10000 名学生 × 365 天），分别用
+activity_bitmaps 中的位运算和按日期逐天比对的原有做法（每个学生一组活跃日期，
+相当于按 DATE(submission_time) 分组的结果）计算连续活跃天数、N日留存、周留存和留存表，
+比较耗时并检查两者结果一致。不需要数据库，位图从模拟的按月位图行拼接得到。
+
+    python benchmark_activity_bitmaps.py [学生数] [天数]
+"""
+
+import os
+import sys
+import time
+import random
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'services'))
+
+from activity_bitmaps import (
+    load_bitmaps, retention, streak_summary, RETENTION_DAYS, RETENTION_WEEKS
+)
+
+STUDENTS = 10000
+DAYS = 365
+
+
+class RowsCursor:
+    """返回固定结果的游标，代替数据库读取按月位图行"""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def execute(self, sql, params=None):
+        pass
+
+    def fetchall(self):
+        return self.rows
+
+
+def generate(students, days, seed=42):
+    """每个学生随机的加入日期和逐渐下降的活跃概率，返回 (基准日期, {学号: 活跃日序号列表})"""
+    rng = random.Random(seed)
+    base = date(2025, 1, 1)
+    activity = {}
+    for i in range(students):
+        start = rng.randrange(days)
+        rate = rng.uniform(0.2, 0.9)
+        decay = rng.uniform(0.97, 1.0)
+        active = [start]
+        for day in range(start + 1, days):
+            rate *= decay
+            if rng.random() < rate:
+                active.append(day)
+        activity[f'S{i:05d}'] = active
+    return base, activity
+
+
+def monthly_rows(base, activity):
+    """按 (学号, 月份) 生成位图行，与 edu_student_activity_bitmap 的存储一致"""
+    words = {}
+    for student_id, active in activity.items():
+        for offset in active:
+            day = base + timedelta(days=offset)
+            key = (student_id, day.replace(day=1))
+            words[key] = words.get(key, 0) | (1 << (day.day - 1))
+    return [
+        {'student_id': student_id, 'month_start': month_start, 'day_bits': bits}
+        for (student_id, month_start), bits in words.items()
+    ]
+
+
+def legacy_metrics(activity, today, days, weeks):
+    """原有做法: 每个学生的活跃日期集合，逐天比对"""
+    streaks = {}
+    daily_counts = [0] * days
+    daily_eligible = [0] * days
+    weekly_counts = [0] * weeks
+    weekly_eligible = [0] * weeks
+    cohorts = {}
+
+    for student_id, active in activity.items():
+        active_set = set(active)
+
+        longest = run = 0
+        previous = None
+        for day in active:
+            run = run + 1 if previous is not None and day == previous + 1 else 1
+            longest = max(longest, run)
+            previous = day
+
+        end = today if today in active_set else today - 1
+        current = 0
+        while end - current in active_set:
+            current += 1
+        streaks[student_id] = {
+            'active_days': len(active),
+            'current_streak': current,
+            'longest_streak': longest
+        }
+
+        first = active[0]
+        for n in range(days):
+            if first + n <= today:
+                daily_eligible[n] += 1
+                if first + n in active_set:
+                    daily_counts[n] += 1
+
+        retained = []
+        for k in range(weeks):
+            hit = any(first + 7 * k + j in active_set for j in range(7))
+            retained.append(hit)
+            if first + 7 * k <= today:
+                weekly_eligible[k] += 1
+                if hit:
+                    weekly_counts[k] += 1
+
+        cohort = cohorts.setdefault(first // 7, {'size': 0, 'hits': [0] * weeks, 'last_first': first})
+        cohort['size'] += 1
+        cohort['last_first'] = max(cohort['last_first'], first)
+        for k, hit in enumerate(retained):
+            cohort['hits'][k] += hit
+
+    def rates(counts, eligible):
+        return [round(c / e * 100, 1) if e else None for c, e in zip(counts, eligible)]
+
+    cohort_table = []
+    for week in sorted(cohorts):
+        cohort = cohorts[week]
+        observable = max(min((today - cohort['last_first']) // 7 + 1, weeks), 0)
+        cohort_table.append({
+            'cohort_week': week,
+            'size': cohort['size'],
+            'retention': [round(c / cohort['size'] * 100, 1) for c in cohort['hits'][:observable]]
+        })
+
+    return streaks, {
+        'students': len(activity),
+        'daily_retention': rates(daily_counts, daily_eligible),
+        'weekly_retention': rates(weekly_counts, weekly_eligible),
+        'cohorts': cohort_table
+    }
+
+
+def bitmap_metrics(base, rows, today, days, weeks):
+    bitmaps = load_bitmaps(RowsCursor(rows), base)
+    streaks = {student_id: streak_summary(bits, today) for student_id, bits in bitmaps.items()}
+    return streaks, retention(bitmaps, today, days, weeks)
+
+
+def timed(label, func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - started
+    print(f"{label}: {elapsed * 1000:.1f} ms")
+    return result, elapsed
+
+
+def main():
+    students = int(sys.argv[1]) if len(sys.argv) > 1 else STUDENTS
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else DAYS
+
+    base, activity = generate(students, days)
+    rows = monthly_rows(base, activity)
+    today = days - 1
+    active_days = sum(len(active) for active in activity.values())
+    print(f"学生数: {students}，天数: {days}，活跃的(学生, 日期): {active_days}，位图行: {len(rows)}")
+
+    legacy, legacy_time = timed("逐天比对", legacy_metrics, activity, today, RETENTION_DAYS, RETENTION_WEEKS)
+    current, bitmap_time = timed("活跃位图", bitmap_metrics, base, rows, today, RETENTION_DAYS, RETENTION_WEEKS)
+    print(f"加速: {legacy_time / bitmap_time:.1f} 倍")
+
+    if legacy == current:
+        print("两种实现的结果一致")
+    else:
+        print("两种实现的结果不一致")
+        for name, (a, b) in {'streaks': (legacy[0], current[0]), 'retention': (legacy[1], current[1])}.items():
+            if a != b:
+                print(f"  {name} 不同")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
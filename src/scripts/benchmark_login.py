@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+登录接口压力测试
+向运行中的服务器并发发送 POST /api/auth/login，测量完整登录路径
+（Node 路由、登录并发限制、Python 工作进程、数据库查询、密码验证、签发令牌）
+的吞吐量和延迟分布。需要一个已注册的账号。
+
+同时测量其他接口受登录高峰的影响: 先在没有登录时连续请求一个普通接口（默认 GET /api/problems/all，
+经过 Python 工作进程），得到基线延迟；登录压测期间再持续请求该接口，对比两者的 P50/P99。
+
+    python benchmark_login.py <邮箱> <密码> [请求数] [并发数] [--teacher]
+
+请求数默认200，并发数默认50。服务器地址由环境变量 BENCHMARK_URL 指定，
+默认 http://localhost:3000；对比用的接口由 BENCHMARK_PROBE_PATH 指定。
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+import urllib.request
+import urllib.error
+from concurrent.futures import ThreadPoolExecutor
+
+BASE_URL = os.environ.get('BENCHMARK_URL', 'http://localhost:3000')
+REQUESTS = 200
+CONCURRENCY = 50
+PROBE_PATH = os.environ.get('BENCHMARK_PROBE_PATH', '/api/problems/all')
+# 对比接口的基线请求数和并发数
+PROBE_REQUESTS = 50
+PROBE_CONCURRENCY = 2
+
+
+def _percentile(sorted_values, percent):
+    """计算百分位数（最近秩法）"""
+    if not sorted_values:
+        return 0
+    index = max(0, int(round(percent / 100 * len(sorted_values))) - 1)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+def login_once(user_type, email, password):
+    """发送一次登录请求，返回 (是否成功, 耗时秒数)"""
+    body = json.dumps({'user_type': user_type, 'email': email, 'password': password}).encode('utf-8')
+    request = urllib.request.Request(
+        f"{BASE_URL}/api/auth/login",
+        data=body,
+        headers={'Content-Type': 'application/json'},
+        method='POST'
+    )
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=120) as response:
+            ok = json.loads(response.read().decode('utf-8')).get('success', False)
+    except (urllib.error.URLError, ValueError):
+        ok = False
+    return ok, time.perf_counter() - start
+
+
+def probe_once():
+    """请求一次对比接口，返回 (是否成功, 耗时秒数)"""
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(f"{BASE_URL}{PROBE_PATH}", timeout=120) as response:
+            ok = json.loads(response.read().decode('utf-8')).get('success', False)
+    except (urllib.error.URLError, ValueError):
+        ok = False
+    return ok, time.perf_counter() - start
+
+
+def probe_until(stop, results):
+    """持续请求对比接口，直到 stop 被设置"""
+    while not stop.is_set():
+        results.append(probe_once())
+
+
+def _latency_summary(results):
+    latencies = sorted(latency for _, latency in results)
+    return {
+        'requests': len(results),
+        'failures': sum(1 for ok, _ in results if not ok),
+        'p50_ms': round(_percentile(latencies, 50) * 1000, 1),
+        'p99_ms': round(_percentile(latencies, 99) * 1000, 1)
+    }
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if arg != '--teacher']
+    if len(args) < 2:
+        print(json.dumps({'success': False, 'message': '用法: benchmark_login.py <邮箱> <密码> [请求数] [并发数] [--teacher]'}))
+        sys.exit(1)
+
+    user_type = 'teacher' if '--teacher' in sys.argv else 'student'
+    email, password = args[0], args[1]
+    count = int(args[2]) if len(args) > 2 else REQUESTS
+    concurrency = int(args[3]) if len(args) > 3 else CONCURRENCY
+
+    with ThreadPoolExecutor(max_workers=PROBE_CONCURRENCY) as executor:
+        baseline = list(executor.map(lambda _: probe_once(), range(PROBE_REQUESTS)))
+
+    stop = threading.Event()
+    during = []
+    probes = [threading.Thread(target=probe_until, args=(stop, during)) for _ in range(PROBE_CONCURRENCY)]
+    for probe in probes:
+        probe.start()
+
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(lambda _: login_once(user_type, email, password), range(count)))
+        elapsed = time.perf_counter() - start
+    finally:
+        stop.set()
+        for probe in probes:
+            probe.join()
+
+    latencies = sorted(latency for _, latency in results)
+    failures = sum(1 for ok, _ in results if not ok)
+    print(json.dumps({
+        'success': True,
+        'data': {
+            'logins': count,
+            'concurrency': concurrency,
+            'failures': failures,
+            'elapsed_seconds': round(elapsed, 3),
+            'throughput_per_second': round(count / elapsed, 1) if elapsed > 0 else 0,
+            'p50_ms': round(_percentile(latencies, 50) * 1000, 1),
+            'p99_ms': round(_percentile(latencies, 99) * 1000, 1),
+            'max_ms': round(latencies[-1] * 1000, 1) if latencies else 0,
+            'probe': {
+                'path': PROBE_PATH,
+                'baseline': _latency_summary(baseline),
+                'during_logins': _latency_summary(during)
+            }
+        }
+    }))
+
+
+if __name__ == "__main__":
+    main()
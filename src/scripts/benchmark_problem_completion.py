@@ -0,0 +1,195 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+题目完成情况统计的性能对比
+对当前数据库分别执行原来的实现（每个难度五条查询，在Python中求平均）
+和 teaching_stats_api.compute_problem_completion（两条分组查询），
+比较耗时、执行的语句数，并检查两者输出一致。
+
+    python benchmark_problem_completion.py [运行次数]
+"""
+
+import os
+import sys
+import time
+import json
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'services'))
+
+from db_pool import get_connection
+from teaching_stats_api import compute_problem_completion
+from difficulty_levels import create_difficulty_table
+
+RUNS = 5
+
+
+class CountingCursor:
+    """记录执行语句数的游标包装"""
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self.statements = 0
+
+    def execute(self, sql, params=None):
+        self.statements += 1
+        return self.cursor.execute(sql, params)
+
+    def __getattr__(self, name):
+        return getattr(self.cursor, name)
+
+
+def legacy_problem_completion(cursor):
+    """原来的实现: 逐个难度查询"""
+    cursor.execute("""
+        SELECT DISTINCT difficulty
+        FROM edu_problems
+        ORDER BY
+            CASE
+                WHEN difficulty = 'easy' THEN 1
+                WHEN difficulty = 'medium' THEN 2
+                WHEN difficulty = 'hard' THEN 3
+                WHEN difficulty = '1' THEN 1
+                WHEN difficulty = '2' THEN 2
+                WHEN difficulty = '3' THEN 3
+                ELSE 4
+            END
+    """)
+    difficulty_results = cursor.fetchall()
+
+    cursor.execute("""
+        SELECT COUNT(DISTINCT student_id) as active_students
+        FROM edu_coding_submissions
+    """)
+    active_students = cursor.fetchone()['active_students']
+
+    difficulties = []
+    student_completion_rates = []
+    problem_attempt_rates = []
+    success_rates = []
+    avg_attempts_per_problem = []
+
+    for difficulty in difficulty_results:
+        diff = difficulty['difficulty']
+        difficulty_name = diff
+        if diff == 'easy' or diff == '1':
+            difficulty_name = '简单'
+        elif diff == 'medium' or diff == '2':
+            difficulty_name = '中等'
+        elif diff == 'hard' or diff == '3':
+            difficulty_name = '困难'
+        difficulties.append(difficulty_name)
+
+        cursor.execute("SELECT COUNT(*) as total FROM edu_problems WHERE difficulty = %s", (diff,))
+        total_problems = cursor.fetchone()['total']
+
+        cursor.execute("""
+            SELECT student_id,
+                COUNT(DISTINCT CASE WHEN submit_result = 'success' THEN problem_id END) as solved_problems
+            FROM edu_coding_submissions s
+            JOIN edu_problems p ON s.problem_id = p.id
+            WHERE p.difficulty = %s
+            GROUP BY student_id
+        """, (diff,))
+        student_results = cursor.fetchall()
+        if not student_results:
+            student_completion_rates.append(0)
+        else:
+            total_completion_rate = sum((s['solved_problems'] / total_problems) * 100 for s in student_results)
+            student_completion_rates.append(round(total_completion_rate / len(student_results), 1))
+
+        cursor.execute("""
+            SELECT COUNT(DISTINCT p.id) as attempted_problems
+            FROM edu_problems p
+            JOIN edu_coding_submissions s ON p.id = s.problem_id
+            WHERE p.difficulty = %s
+        """, (diff,))
+        attempted_problems = cursor.fetchone()['attempted_problems']
+        problem_attempt_rates.append(round((attempted_problems / total_problems) * 100, 1))
+
+        cursor.execute("""
+            SELECT COUNT(*) as total_submissions,
+                SUM(CASE WHEN submit_result = 'success' THEN 1 ELSE 0 END) as successful_submissions
+            FROM edu_coding_submissions s
+            JOIN edu_problems p ON s.problem_id = p.id
+            WHERE p.difficulty = %s
+        """, (diff,))
+        submission_result = cursor.fetchone()
+        if submission_result['total_submissions'] > 0:
+            success_rates.append(round((submission_result['successful_submissions'] / submission_result['total_submissions']) * 100, 1))
+        else:
+            success_rates.append(0)
+
+        cursor.execute("""
+            SELECT p.id, COUNT(*) as attempts
+            FROM edu_problems p
+            JOIN edu_coding_submissions s ON p.id = s.problem_id
+            WHERE p.difficulty = %s
+            GROUP BY p.id
+        """, (diff,))
+        problem_attempts = cursor.fetchall()
+        if not problem_attempts:
+            avg_attempts_per_problem.append(0)
+        else:
+            avg_attempts_per_problem.append(round(sum(p['attempts'] for p in problem_attempts) / len(problem_attempts), 1))
+
+    return {
+        'difficulties': difficulties,
+        'student_completion_rates': student_completion_rates,
+        'problem_attempt_rates': problem_attempt_rates,
+        'success_rates': success_rates,
+        'avg_attempts_per_problem': avg_attempts_per_problem,
+        'active_students': active_students
+    }
+
+
+def _normalize(result):
+    """统一数值类型后比较（Decimal 与 float）"""
+    return json.loads(json.dumps(result, default=float))
+
+
+def measure(name, func, conn, runs):
+    timings = []
+    statements = 0
+    output = None
+    for _ in range(runs):
+        cursor = CountingCursor(conn.cursor(dictionary=True))
+        started = time.perf_counter()
+        output = func(cursor)
+        timings.append((time.perf_counter() - started) * 1000)
+        statements = cursor.statements
+        cursor.close()
+    print(f"{name}: 中位数 {statistics.median(timings):.1f}ms, 最快 {min(timings):.1f}ms, "
+          f"最慢 {max(timings):.1f}ms, 每次 {statements} 条语句")
+    return output
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else RUNS
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        create_difficulty_table(cursor)
+        conn.commit()
+        cursor.close()
+
+        legacy = measure("原实现", legacy_problem_completion, conn, runs)
+        current, message = measure("分组查询", compute_problem_completion, conn, runs)
+        if current is None:
+            print(f"没有可统计的数据: {message}")
+            return
+
+        if _normalize(legacy) == _normalize(current):
+            print("两种实现的输出一致")
+        else:
+            print("两种实现的输出不一致:")
+            print(json.dumps(_normalize(legacy), ensure_ascii=False))
+            print(json.dumps(_normalize(current), ensure_ascii=False))
+            sys.exit(1)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,20 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-import mysql.connector
+import os
 import sys
 import json
 
-# 数据库连接配置
-DB_CONFIG = {
-    'host': 'localhost',
-    'user': 'root',
-    'password': 'mwYgR7#*X2',
-    'database': 'education_platform'
-}
+# 数据库连接来自共享连接池（db_pool.py），配置通过环境变量读取
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'services'))
+
+from db_pool import get_db_connection
 
 def check_teaching_contents():
     """检查教学内容表"""
     try:
         # 连接数据库
-        conn = mysql.connector.connect(**DB_CONFIG)
+        conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
         
         # 查询章节数据
@@ -47,7 +44,7 @@ def check_section_progress():
     """检查小节进度表"""
     try:
         # 连接数据库
-        conn = mysql.connector.connect(**DB_CONFIG)
+        conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
         
         # 查询小节进度数据
@@ -81,7 +78,7 @@ def check_student_profile():
     """检查学生个人信息表"""
     try:
         # 连接数据库
-        conn = mysql.connector.connect(**DB_CONFIG)
+        conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
         
         # 查询学生个人信息
@@ -0,0 +1,242 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+热点查询执行计划回归检查
+在一个单独的检查库中建表、执行索引迁移、生成模拟提交数据，
+然后对 coding_data、teaching_stats、teaching_stats_api、student_detail、learning_data
+中读取提交记录表的热点查询逐条执行 EXPLAIN。查询由各服务自己的 build_*_query
+构造函数生成，与线上执行的 SQL 相同。
+任何一条查询对 edu_coding_submissions 退化为全表扫描（type=ALL 或没有使用索引）时，
+以退出码1结束，可以直接放在部署前的检查步骤中。
+
+    python check_query_plans.py [行数] [--keep]
+
+行数默认200000。检查库名为 "<DB_NAME>_plan_check"，每次运行前重建，
+加 --keep 时检查结束后保留该库以便手工分析。
+新增读取提交记录表的热点查询时，为其提供构造函数并加入 build_hot_queries。
+"""
+
+import os
+import re
+import sys
+from datetime import datetime, timedelta
+
+CHECK_DB_NAME = os.environ.get('DB_NAME', 'education_platform') + '_plan_check'
+# 必须在导入 db_pool 之前设置，连接池使用检查库
+os.environ['DB_NAME'] = CHECK_DB_NAME
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'services'))
+
+import mysql.connector
+from db_pool import DB_CONFIG, check_password, get_connection
+import coding_data
+import learning_data
+import problem_operations
+import student_detail
+import teaching_stats
+import teaching_stats_api
+from difficulty_levels import create_difficulty_table
+from submission_history import build_page_query, encode_cursor
+
+SEED_ROWS = 200000
+SEED_CLASSES = 20
+SEED_STUDENTS = 2000
+SEED_PROBLEMS = 100
+SEED_SIGNATURES = 30
+
+NOW = datetime.now()
+
+SUBMISSION_TABLE = 'edu_coding_submissions'
+# FROM/JOIN 提交记录表时的别名，没有别名时 EXPLAIN 中显示表名
+SUBMISSION_ALIAS = re.compile(
+    r"(?:FROM|JOIN)\s+" + SUBMISSION_TABLE + r"(?:\s+(?:AS\s+)?(?!WHERE|GROUP|ORDER|JOIN|LEFT|INNER|ON|LIMIT)(\w+))?",
+    re.IGNORECASE
+)
+
+
+def build_hot_queries():
+    """由各服务自己的查询构造函数生成热点查询 [(名称, SQL, 参数)]
+
+    服务中的查询修改后这里自动使用新的 SQL；不读取提交记录表的分区（汇总表等）不做检查。
+    """
+    queries = [
+        ('coding_data.get_class_stats 学生排名', *coding_data.build_class_rankings_query('班级1')),
+        ('coding_data.compare_classes 学生指标', *coding_data.build_comparison_students_query(['班级1', '班级2'])),
+        ('coding_data.get_problem_stats 常见错误', *coding_data.build_problem_errors_query('1')),
+        ('coding_data.export_submissions', *coding_data.build_export_query('1', '班级1')),
+        ('teaching_stats_api.get_problem_completion 活跃学生总数', *teaching_stats_api.build_active_students_query()),
+        ('teaching_stats_api.get_problem_completion 难度指标', *teaching_stats_api.build_difficulty_metrics_query()),
+        ('teaching_stats_api.get_todos 最近成功提交', *teaching_stats_api.build_recent_successes_query()),
+    ]
+    for section, query in teaching_stats.build_learning_pattern_queries('班级1').items():
+        queries.append((f"teaching_stats.analyze_learning_patterns {section}", *query))
+    for section, query in student_detail.build_submission_queries('s1').items():
+        queries.append((f"student_detail / learning_analysis {section}", *query))
+    for name, query in learning_data.build_submission_queries('s1').items():
+        queries.append((f"learning_data {name}", *query))
+
+    # submission_history 的分页查询，带结果过滤和游标（第二页之后的形式）
+    for scope, value in (('student', 's1'), ('problem', '1'), ('class', '班级1')):
+        sql, params, _ = build_page_query(scope, value, {
+            'result': 'failed',
+            'cursor': encode_cursor(NOW - timedelta(days=30), 1000000),
+            'limit': 500
+        })
+        queries.append((f"submission_history.list_submissions {scope}", sql, params))
+
+    return [query for query in queries if SUBMISSION_TABLE in query[1]]
+
+
+def submission_aliases(sql):
+    """SQL 中提交记录表在 EXPLAIN 里的表名或别名"""
+    return {match.group(1) or SUBMISSION_TABLE for match in SUBMISSION_ALIAS.finditer(sql)}
+
+
+HOT_QUERIES = build_hot_queries()
+
+
+def create_check_database():
+    """重建检查库"""
+    check_password()
+    server_config = {key: value for key, value in DB_CONFIG.items() if key != 'database'}
+    conn = mysql.connector.connect(**server_config)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"DROP DATABASE IF EXISTS `{CHECK_DB_NAME}`")
+        cursor.execute(f"CREATE DATABASE `{CHECK_DB_NAME}` DEFAULT CHARACTER SET utf8mb4")
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def drop_check_database():
+    check_password()
+    server_config = {key: value for key, value in DB_CONFIG.items() if key != 'database'}
+    conn = mysql.connector.connect(**server_config)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"DROP DATABASE IF EXISTS `{CHECK_DB_NAME}`")
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def seed(cursor, rows):
+    """生成确定性的模拟数据，每次运行的数据分布相同"""
+    cursor.execute("CREATE TABLE plan_check_seq (n INT PRIMARY KEY)")
+    cursor.executemany("INSERT INTO plan_check_seq (n) VALUES (%s)", [(i,) for i in range(1000)])
+
+    cursor.executemany("""
+        INSERT INTO edu_problems (id, teacher_email, title, difficulty, content)
+        VALUES (%s, 'teacher@example.com', %s, %s, '')
+    """, [(i, f"题目{i}", ('easy', 'medium', 'hard')[i % 3]) for i in range(1, SEED_PROBLEMS + 1)])
+
+    cursor.executemany("""
+        INSERT INTO edu_error_signatures (fingerprint, canonical_message, category, occurrences)
+        VALUES (%s, %s, 'compile', 0)
+    """, [(i, f"error: 错误{i}") for i in range(1, SEED_SIGNATURES + 1)])
+
+    # k 为行号，学生、题目、结果和时间都由 k 推出
+    student = f"MOD(k * 7919, {SEED_STUDENTS})"
+    problem = f"1 + MOD(k * 104729, {SEED_PROBLEMS})"
+    failed = "MOD(k, 5) >= 2"
+    offset = "MOD(k * 15485863, 365 * 86400)"
+    cursor.execute(f"""
+        INSERT INTO edu_coding_submissions
+            (student_class, student_id, problem_id, problem_title, submit_result,
+             execution_errors, error_fingerprint, first_view_time, submission_time)
+        SELECT
+            CONCAT('班级', MOD({student}, {SEED_CLASSES})),
+            CONCAT('s', {student}),
+            {problem},
+            CONCAT('题目', {problem}),
+            IF({failed}, 'failed', 'success'),
+            IF({failed}, 'error', NULL),
+            IF({failed}, 1 + MOD(k, {SEED_SIGNATURES}), NULL),
+            NOW() - INTERVAL {offset} SECOND - INTERVAL 10 MINUTE,
+            NOW() - INTERVAL {offset} SECOND
+        FROM (
+            SELECT a.n * 1000 + b.n as k
+            FROM plan_check_seq a CROSS JOIN plan_check_seq b
+        ) seq
+        WHERE k < {int(rows)}
+    """)
+
+    cursor.execute("""
+        INSERT INTO edu_problem_solving_stats (student_id, problem_id, total_attempts, is_solved, time_spent_seconds)
+        SELECT student_id, problem_id, COUNT(*), MAX(submit_result = 'success'), 600
+        FROM edu_coding_submissions
+        GROUP BY student_id, problem_id
+    """)
+    cursor.execute("DROP TABLE plan_check_seq")
+
+    for table in ('edu_coding_submissions', 'edu_problem_solving_stats', 'edu_problems', 'edu_error_signatures'):
+        cursor.execute(f"ANALYZE TABLE {table}")
+        cursor.fetchall()
+
+
+def check_plans(cursor):
+    """逐条执行 EXPLAIN，返回失败的查询名称列表"""
+    failures = []
+    for name, sql, params in HOT_QUERIES:
+        tables = submission_aliases(sql)
+        cursor.execute("EXPLAIN " + sql, params)
+        plan = [row for row in cursor.fetchall() if row['table'] in tables]
+
+        problems = []
+        if not plan:
+            problems.append("执行计划中没有找到提交记录表")
+        for row in plan:
+            if row['type'] == 'ALL':
+                problems.append("全表扫描")
+            elif not row['key']:
+                problems.append(f"没有使用索引 (type={row['type']})")
+
+        if problems:
+            failures.append(name)
+            print(f"[失败] {name}: {', '.join(problems)}")
+        else:
+            for row in plan:
+                covering = 'Using index' in (row.get('Extra') or '')
+                print(f"[通过] {name}: type={row['type']}, key={row['key']}, "
+                      f"rows={row['rows']}{', 覆盖索引' if covering else ''}")
+    return failures
+
+
+def main():
+    keep = '--keep' in sys.argv
+    args = [arg for arg in sys.argv[1:] if arg != '--keep']
+    rows = int(args[0]) if args else SEED_ROWS
+
+    create_check_database()
+    print(f"检查库: {CHECK_DB_NAME}")
+
+    # 与线上一致的建表和索引迁移
+    problem_operations.create_tables()
+    coding_data.create_tables()
+
+    conn = get_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        # 难度指标查询关联难度映射表
+        create_difficulty_table(cursor)
+        seed(cursor, rows)
+        conn.commit()
+        print(f"已生成 {rows} 条模拟提交记录")
+
+        failures = check_plans(cursor)
+    finally:
+        cursor.close()
+        conn.close()
+        if not keep:
+            drop_check_database()
+
+    if failures:
+        print(f"\n{len(failures)}/{len(HOT_QUERIES)} 条查询的执行计划退化为全表扫描")
+        sys.exit(1)
+    print(f"\n全部 {len(HOT_QUERIES)} 条热点查询均使用索引")
+
+
+if __name__ == "__main__":
+    main()
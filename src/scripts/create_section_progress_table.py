@@ -1,24 +1,21 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-import mysql.connector
+import os
 import sys
 import json
 import traceback
 
-# 数据库连接配置
-DB_CONFIG = {
-    'host': 'localhost',
-    'user': 'root',
-    'password': 'mwYgR7#*X2',
-    'database': 'education_platform'
-}
+# 数据库连接来自共享连接池（db_pool.py），配置通过环境变量读取
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'services'))
+
+from db_pool import get_db_connection
 
 def create_section_progress_table():
     """创建学习小节进度表"""
     try:
         # 连接数据库
-        conn = mysql.connector.connect(**DB_CONFIG)
+        conn = get_db_connection()
         cursor = conn.cursor()
         
         # 创建学习小节进度表
@@ -55,7 +52,7 @@ def import_from_localstorage():
     """从localStorage导入学习进度数据"""
     try:
         # 连接数据库
-        conn = mysql.connector.connect(**DB_CONFIG)
+        conn = get_db_connection()
         cursor = conn.cursor()
         
         # 获取所有学生
@@ -1,17 +1,15 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import os
 import sys
 import json
 import mysql.connector
 
-# 数据库连接配置
-DB_CONFIG = {
-    'host': 'localhost',
-    'user': 'root',
-    'password': 'mwYgR7#*X2',
-    'database': 'education_platform'
-}
+# 数据库连接来自共享连接池（db_pool.py），配置通过环境变量读取
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'services'))
+
+from db_pool import get_db_connection
 
 # 章节数据
 CHAPTERS_DATA = [
@@ -103,15 +101,6 @@ CHAPTERS_DATA = [
     }
 ]
 
-def get_db_connection():
-    """建立数据库连接"""
-    try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        return conn
-    except mysql.connector.Error as err:
-        print(f"数据库连接失败: {str(err)}")
-        sys.exit(1)
-
 def import_chapters():
     """导入章节数据"""
     conn = get_db_connection()
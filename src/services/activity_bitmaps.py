@@ -0,0 +1,445 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+学生活跃位图
+连续活跃天数（streak）、N日留存和按首次活跃周划分的留存表，原来需要对提交记录按
+DATE(submission_time) 分组后逐天比对，开销随历史长度平方增长。
+这里为每个学生按月保存一个活跃位图，每天一位（第 d 天对应第 d-1 位），提交后由派生表更新（derived_updates.py）
+用 day_bits = day_bits | VALUES(day_bits) 置位:
+
+    edu_student_activity_bitmap  (学号, 月份): 班级、当月活跃位图（BIGINT）
+
+读取时把各月的位图按日期拼成一个整数（第 i 位对应 base + i 天），指标都用位运算计算:
+- 最长连续天数: 反复执行 x &= x >> 1，执行的次数即最长的连续 1 的长度
+- 当前连续天数: 截止到今天（今天还没有提交时截止到昨天）的最高一个 0 位的位置
+- 留存: 位图右移到首次活跃日对齐后，用按位的并行计数器（bit-sliced counter）一次累加所有学生，
+  得到首次活跃后第 N 天仍活跃的人数；周留存先把每 7 位折叠为 1 位再累加
+学生的班级取提交时所在的班级。从原始数据重建:
+
+    python activity_bitmaps.py student <学号>
+    python activity_bitmaps.py class <班级名称> [天数] [周数]
+    python activity_bitmaps.py rebuild
+"""
+
+import sys
+import json
+import time
+import mysql.connector
+from bisect import bisect_right
+from datetime import date, datetime, timedelta
+from db_pool import get_db_connection
+from rollups import submission_day
+
+# 留存曲线的默认天数和周数
+RETENTION_DAYS = 30
+RETENTION_WEEKS = 12
+
+# 重建时每条语句写入的行数
+REBUILD_CHUNK_SIZE = 1000
+
+# 表不存在
+ER_NO_SUCH_TABLE = 1146
+
+
+def create_bitmap_table(cursor):
+    """创建学生活跃位图表"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS edu_student_activity_bitmap (
+            student_id VARCHAR(50) NOT NULL,
+            month_start DATE NOT NULL,
+            student_class VARCHAR(100) NOT NULL DEFAULT '',
+            day_bits BIGINT UNSIGNED NOT NULL DEFAULT 0,
+            PRIMARY KEY (student_id, month_start),
+            INDEX idx_class_month (student_class, month_start)
+        )
+    """)
+
+
+def _bitmap_upsert(rows):
+    """{(学号, 月份): (班级, 位图)} 生成多行upsert语句"""
+    params = {}
+    values = []
+    for j, ((student_id, month_start), (student_class, bits)) in enumerate(rows.items()):
+        params[f'ab_sid_{j}'] = student_id
+        params[f'ab_month_{j}'] = month_start
+        params[f'ab_class_{j}'] = student_class
+        params[f'ab_bits_{j}'] = bits
+        values.append(f"(%(ab_sid_{j})s, %(ab_month_{j})s, %(ab_class_{j})s, %(ab_bits_{j})s)")
+
+    sql = """
+        INSERT INTO edu_student_activity_bitmap (student_id, month_start, student_class, day_bits)
+        VALUES
+    """ + ',\n'.join(values) + """
+        ON DUPLICATE KEY UPDATE
+            student_class = VALUES(student_class),
+            day_bits = day_bits | VALUES(day_bits)
+    """
+    return sql, params
+
+
+def _set_day(rows, student_id, student_class, day):
+    """在 rows 中把学生在 day（date）这一天的位置为 1"""
+    key = (student_id, day.replace(day=1).strftime('%Y-%m-%d'))
+    current_class, bits = rows.get(key, (student_class, 0))
+    rows[key] = (student_class or current_class, bits | (1 << (day.day - 1)))
+
+
+def build_bitmap_upsert(batch):
+    """生成更新活跃位图的语句"""
+    rows = {}
+    for data in batch:
+        day = datetime.strptime(submission_day(data), '%Y-%m-%d').date()
+        _set_day(rows, data.get('student_id'), data.get('student_class') or '', day)
+    return _bitmap_upsert(rows)
+
+
+def _row(row, fields):
+    """兼容字典游标和元组游标"""
+    return row if isinstance(row, dict) else dict(zip(fields, row))
+
+
+def load_bitmaps(cursor, base, student_id=None, class_name=None):
+    """读取 base（date，月初）之后的位图，拼接为 {学号: 整数}，第 i 位对应 base + i 天"""
+    conditions = ["month_start >= %(base)s"]
+    params = {'base': base}
+    if student_id is not None:
+        conditions.append("student_id = %(student_id)s")
+        params['student_id'] = student_id
+    if class_name:
+        conditions.append("student_class = %(class_name)s")
+        params['class_name'] = class_name
+
+    cursor.execute(f"""
+        SELECT student_id, month_start, day_bits
+        FROM edu_student_activity_bitmap
+        WHERE {' AND '.join(conditions)}
+    """, params)
+
+    base_ordinal = base.toordinal()
+    bitmaps = {}
+    for row in cursor.fetchall():
+        row = _row(row, ('student_id', 'month_start', 'day_bits'))
+        month_start = row['month_start']
+        if isinstance(month_start, str):
+            month_start = datetime.strptime(month_start, '%Y-%m-%d').date()
+        offset = month_start.toordinal() - base_ordinal
+        bitmaps[row['student_id']] = bitmaps.get(row['student_id'], 0) | (int(row['day_bits']) << offset)
+    return bitmaps
+
+
+def popcount(bits):
+    return bin(bits).count('1')
+
+
+def longest_streak(bits):
+    """最长连续活跃天数"""
+    length = 0
+    while bits:
+        bits &= bits >> 1
+        length += 1
+    return length
+
+
+def current_streak(bits, today):
+    """截止到第 today 位的连续活跃天数，今天还没有活跃时截止到昨天"""
+    if today < 0:
+        return 0
+    if not (bits >> today) & 1:
+        today -= 1
+        if today < 0 or not (bits >> today) & 1:
+            return 0
+    window = (1 << (today + 1)) - 1
+    zeros = window & ~bits
+    if not zeros:
+        return today + 1
+    return today - (zeros.bit_length() - 1)
+
+
+def first_day(bits):
+    """最低的 1 位（首次活跃日），没有活跃时为 -1"""
+    return (bits & -bits).bit_length() - 1
+
+
+def fold_weeks(bits, weeks):
+    """每 7 位折叠为 1 位: 第 k 位表示第 k 周（第 7k 到 7k+6 位）有活跃"""
+    folded = 0
+    for k in range(weeks):
+        if (bits >> (7 * k)) & 0x7F:
+            folded |= 1 << k
+    return folded
+
+
+class BitSlicedCounter:
+    """按位并行计数: 同时对每个位置累加 0/1，planes[k] 是各位置计数的第 k 个二进制位"""
+
+    def __init__(self):
+        self.planes = []
+
+    def add(self, bits):
+        """每个位置的计数加上 bits 在该位置的值，全部用整数的位运算完成"""
+        carry = bits
+        for k, plane in enumerate(self.planes):
+            if not carry:
+                return
+            self.planes[k] = plane ^ carry
+            carry = plane & carry
+        if carry:
+            self.planes.append(carry)
+
+    def counts(self, width):
+        """前 width 个位置的计数"""
+        return [
+            sum(((plane >> i) & 1) << k for k, plane in enumerate(self.planes))
+            for i in range(width)
+        ]
+
+
+def _eligible(firsts, horizon, width, step=1):
+    """首次活跃后至少经过 n*step 天（n < width）的学生人数"""
+    firsts = sorted(firsts)
+    # 首次活跃日 <= horizon - n*step 的学生才能观察到第 n 个时间点
+    return [bisect_right(firsts, horizon - n * step) for n in range(width)]
+
+
+def _rates(counts, eligible):
+    return [round(c / e * 100, 1) if e else None for c, e in zip(counts, eligible)]
+
+
+def retention(bitmaps, today, days=RETENTION_DAYS, weeks=RETENTION_WEEKS):
+    """N日留存、周留存和按首次活跃周划分的留存表
+
+    bitmaps 为 {学号: 整数}，today 为今天对应的位。第 N 天留存 = 首次活跃后第 N 天仍活跃的人数 /
+    首次活跃至今已满 N 天的人数；周留存同理，按首次活跃日起每 7 天为一周。
+    """
+    daily = BitSlicedCounter()
+    weekly = BitSlicedCounter()
+    cohorts = {}
+    firsts = []
+    day_mask = (1 << days) - 1
+
+    for bits in bitmaps.values():
+        first = first_day(bits)
+        if first < 0:
+            continue
+        firsts.append(first)
+        aligned = bits >> first
+        daily.add(aligned & day_mask)
+        folded = fold_weeks(aligned, weeks)
+        weekly.add(folded)
+
+        cohort = cohorts.setdefault(first // 7, {'counter': BitSlicedCounter(), 'size': 0, 'last_first': first})
+        cohort['counter'].add(folded)
+        cohort['size'] += 1
+        cohort['last_first'] = max(cohort['last_first'], first)
+
+    # 留存表只列出组内所有学生都已进入的周: 组内最晚的首次活跃日 + 7k <= today
+    cohort_table = []
+    for week in sorted(cohorts):
+        cohort = cohorts[week]
+        observable = max(min((today - cohort['last_first']) // 7 + 1, weeks), 0)
+        counts = cohort['counter'].counts(observable)
+        cohort_table.append({
+            'cohort_week': week,
+            'size': cohort['size'],
+            'retention': [round(c / cohort['size'] * 100, 1) for c in counts]
+        })
+
+    return {
+        'students': len(firsts),
+        'daily_retention': _rates(daily.counts(days), _eligible(firsts, today, days)),
+        'weekly_retention': _rates(weekly.counts(weeks), _eligible(firsts, today, weeks, step=7)),
+        'cohorts': cohort_table
+    }
+
+
+def streak_summary(bits, today):
+    """单个学生的活跃天数和连续天数"""
+    return {
+        'active_days': popcount(bits),
+        'current_streak': current_streak(bits, today),
+        'longest_streak': longest_streak(bits)
+    }
+
+
+def _history_base(months):
+    """months 个月前的月初"""
+    today = date.today()
+    year, month = today.year, today.month - months
+    while month <= 0:
+        year -= 1
+        month += 12
+    return date(year, month, 1)
+
+
+def _active_before(cursor, base, class_name=None):
+    """base 之前已经活跃过的学生，这些学生的首次活跃日不在读取的范围内，不计入留存"""
+    params = {'base': base}
+    class_filter = ""
+    if class_name:
+        class_filter = "AND student_class = %(class_name)s"
+        params['class_name'] = class_name
+    cursor.execute(f"""
+        SELECT DISTINCT student_id
+        FROM edu_student_activity_bitmap
+        WHERE month_start < %(base)s {class_filter}
+    """, params)
+    return {_row(row, ('student_id',))['student_id'] for row in cursor.fetchall()}
+
+
+def _load(conn, cursor, base, **filters):
+    """读取位图，首次使用时创建位图表（历史数据通过 rebuild 导入）"""
+    try:
+        return load_bitmaps(cursor, base, **filters)
+    except mysql.connector.Error as err:
+        if err.errno != ER_NO_SUCH_TABLE:
+            raise
+        create_bitmap_table(cursor)
+        conn.commit()
+        return load_bitmaps(cursor, base, **filters)
+
+
+def get_student_streaks(student_id):
+    """输出学生最近一年的活跃天数、当前连续天数和最长连续天数"""
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+
+    try:
+        base = _history_base(12)
+        bits = _load(conn, cursor, base, student_id=student_id).get(student_id, 0)
+        today = date.today().toordinal() - base.toordinal()
+        first = first_day(bits)
+        last = bits.bit_length() - 1
+
+        data = streak_summary(bits, today)
+        data['student_id'] = student_id
+        data['first_active'] = (base + timedelta(days=first)).strftime('%Y-%m-%d') if first >= 0 else None
+        data['last_active'] = (base + timedelta(days=last)).strftime('%Y-%m-%d') if last >= 0 else None
+        print(json.dumps({
+            'success': True,
+            'data': data
+        }))
+    except mysql.connector.Error as err:
+        print(json.dumps({
+            'success': False,
+            'message': f"获取学生连续活跃天数失败: {str(err)}"
+        }))
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def get_class_retention(class_name=None, days=RETENTION_DAYS, weeks=RETENTION_WEEKS):
+    """输出班级（未指定时为全部学生）的留存曲线、留存表和连续活跃天数分布"""
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+
+    try:
+        # 覆盖留存表最早一周所需的历史，至少一年
+        base = _history_base(max(12, (weeks * 7 + days) // 30 + 2))
+        bitmaps = _load(conn, cursor, base, class_name=class_name)
+        today = date.today().toordinal() - base.toordinal()
+
+        earlier = _active_before(cursor, base, class_name)
+        data = retention(
+            {student_id: bits for student_id, bits in bitmaps.items() if student_id not in earlier},
+            today, days, weeks
+        )
+        for cohort in data['cohorts']:
+            cohort['cohort_week'] = (base + timedelta(days=cohort['cohort_week'] * 7)).strftime('%Y-%m-%d')
+
+        streaks = [streak_summary(bits, today) for bits in bitmaps.values()]
+        current = [s['current_streak'] for s in streaks]
+        data['class_name'] = class_name
+        data['streaks'] = {
+            'active_now': sum(1 for value in current if value > 0),
+            'avg_current_streak': round(sum(current) / len(current), 2) if current else 0,
+            'max_current_streak': max(current, default=0),
+            'max_longest_streak': max((s['longest_streak'] for s in streaks), default=0)
+        }
+
+        print(json.dumps({
+            'success': True,
+            'data': data
+        }))
+    except mysql.connector.Error as err:
+        print(json.dumps({
+            'success': False,
+            'message': f"获取留存数据失败: {str(err)}"
+        }))
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def rebuild():
+    """从提交记录重建活跃位图"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    started = time.time()
+
+    try:
+        create_bitmap_table(cursor)
+        cursor.execute("DELETE FROM edu_student_activity_bitmap")
+
+        # 按时间顺序读取，同一学生的班级取最后一次提交所在的班级
+        cursor.execute("""
+            SELECT student_id, COALESCE(student_class, ''), DATE(submission_time) as day
+            FROM edu_coding_submissions
+            WHERE submission_time IS NOT NULL
+            GROUP BY student_id, COALESCE(student_class, ''), DATE(submission_time)
+            ORDER BY day
+        """)
+        rows = {}
+        for student_id, student_class, day in cursor.fetchall():
+            _set_day(rows, student_id, student_class, day)
+
+        items = list(rows.items())
+        for i in range(0, len(items), REBUILD_CHUNK_SIZE):
+            sql, params = _bitmap_upsert(dict(items[i:i + REBUILD_CHUNK_SIZE]))
+            cursor.execute(sql, params)
+
+        conn.commit()
+        print(json.dumps({
+            'success': True,
+            'message': "学生活跃位图重建完成",
+            'data': {
+                'bitmap_rows': len(items),
+                'elapsed_seconds': round(time.time() - started, 2)
+            }
+        }))
+    except mysql.connector.Error as err:
+        conn.rollback()
+        print(json.dumps({
+            'success': False,
+            'message': f"重建学生活跃位图失败: {str(err)}"
+        }))
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(json.dumps({
+            'success': False,
+            'message': "缺少操作参数"
+        }))
+        sys.exit(1)
+
+    operation = sys.argv[1]
+
+    if operation == "student" and len(sys.argv) > 2:
+        get_student_streaks(sys.argv[2])
+    elif operation == "class":
+        class_name = sys.argv[2] if len(sys.argv) > 2 and sys.argv[2] else None
+        days = int(sys.argv[3]) if len(sys.argv) > 3 else RETENTION_DAYS
+        weeks = int(sys.argv[4]) if len(sys.argv) > 4 else RETENTION_WEEKS
+        get_class_retention(class_name, days, weeks)
+    elif operation == "rebuild":
+        rebuild()
+    else:
+        print(json.dumps({
+            'success': False,
+            'message': "无效的操作或参数不足"
+        }))
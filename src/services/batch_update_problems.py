@@ -3,28 +3,8 @@
 
 import mysql.connector
 import json
-import sys
 import argparse
-
-# 数据库连接配置
-DB_CONFIG = {
-    'host': 'localhost',
-    'user': 'root',
-    'password': 'mwYgR7#*X2',
-    'database': 'education_platform'
-}
-
-def get_db_connection():
-    """建立数据库连接"""
-    try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        return conn
-    except mysql.connector.Error as err:
-        print(json.dumps({
-            'success': False,
-            'message': f"数据库连接失败: {str(err)}"
-        }))
-        sys.exit(1)
+from db_pool import get_db_connection
 
 def get_all_chapters():
     """获取所有章节"""
@@ -2,17 +2,10 @@ import sys
 import json
 import mysql.connector
 from datetime import datetime
-
-# 数据库连接配置
-DB_CONFIG = {
-    'host': 'localhost',
-    'user': 'root',
-    'password': 'mwYgR7#*X2',
-    'database': 'education_platform'  # 更改为统一数据库
-}
+from db_pool import get_connection
 
 def update_chat(chat_id, messages):
-    conn = get_db_connection()
+    conn = get_connection()
     cursor = conn.cursor()
     
     cursor.execute('''
@@ -30,11 +23,8 @@ def update_chat(chat_id, messages):
         'message': '聊天记录更新成功'
     })
 
-def get_db_connection():
-    return mysql.connector.connect(**DB_CONFIG)
-
 def create_tables():
-    conn = get_db_connection()
+    conn = get_connection()
     cursor = conn.cursor()
     
     # 创建聊天历史表
@@ -54,7 +44,7 @@ def create_tables():
     conn.close()
 
 def get_chat_history(email):
-    conn = get_db_connection()
+    conn = get_connection()
     cursor = conn.cursor(dictionary=True)
     
     cursor.execute('''
@@ -77,7 +67,7 @@ def get_chat_history(email):
     return json.dumps(history)
 
 def save_chat(email, messages):
-    conn = get_db_connection()
+    conn = get_connection()
     cursor = conn.cursor()
     
     # 从消息中提取前20个字符作为标题
@@ -102,7 +92,7 @@ def save_chat(email, messages):
     })
 
 def get_chat(chat_id):
-    conn = get_db_connection()
+    conn = get_connection()
     cursor = conn.cursor(dictionary=True)
     
     cursor.execute('''
@@ -125,7 +115,7 @@ def get_chat(chat_id):
         })
 
 def delete_chat(chat_id):
-    conn = get_db_connection()
+    conn = get_connection()
     cursor = conn.cursor()
     
     cursor.execute('''
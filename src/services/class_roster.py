@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+班级名册维度表
+edu_classes 保存所有班级，edu_class_members 保存 (班级, 学号) 成员关系。
+成员关系有两个来源，分别用一个标记记录:
+    in_profile       学生个人信息中填写的班级（save_profile 时维护）
+    has_submissions  学生以该班级提交过代码（提交写入时维护）
+两个标记都为0的成员关系会被删除。班级列表和班级学生列表按主键读取这两张表，
+不再对提交记录表和个人信息表做 DISTINCT 扫描。
+
+首次部署时从已有数据生成:
+    python class_roster.py rebuild
+"""
+
+import sys
+import json
+import mysql.connector
+from db_pool import get_db_connection
+
+
+def create_roster_tables(cursor):
+    """创建班级和班级成员表"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS edu_classes (
+            class_name VARCHAR(100) NOT NULL PRIMARY KEY,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS edu_class_members (
+            class_name VARCHAR(100) NOT NULL,
+            student_id VARCHAR(50) NOT NULL,
+            in_profile BOOLEAN NOT NULL DEFAULT FALSE,
+            has_submissions BOOLEAN NOT NULL DEFAULT FALSE,
+            joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (class_name, student_id),
+            INDEX (student_id)
+        )
+    """)
+
+
+def is_valid_class(class_name):
+    """与原来的班级列表查询一致，空值和字符串 'null' 不算班级"""
+    return bool(class_name) and class_name != 'null'
+
+
+def build_roster_statements(batch):
+    """生成提交写入时更新班级名册的语句列表 [(sql, params)]，批次中没有有效班级时为空"""
+    members = []
+    for data in batch:
+        member = (data.get('student_class'), data.get('student_id'))
+        if is_valid_class(member[0]) and member[1] and member not in members:
+            members.append(member)
+    if not members:
+        return []
+
+    classes = list(dict.fromkeys(class_name for class_name, _ in members))
+    class_params = {f'roster_class_{i}': class_name for i, class_name in enumerate(classes)}
+    class_sql = """
+        INSERT IGNORE INTO edu_classes (class_name)
+        VALUES
+    """ + ',\n'.join(f"(%(roster_class_{i})s)" for i in range(len(classes)))
+
+    member_params = {}
+    rows = []
+    for i, (class_name, student_id) in enumerate(members):
+        member_params[f'member_class_{i}'] = class_name
+        member_params[f'member_student_{i}'] = student_id
+        rows.append(f"(%(member_class_{i})s, %(member_student_{i})s, TRUE)")
+    member_sql = """
+        INSERT INTO edu_class_members (class_name, student_id, has_submissions)
+        VALUES
+    """ + ',\n'.join(rows) + """
+        ON DUPLICATE KEY UPDATE has_submissions = TRUE
+    """
+    return [(class_sql, class_params), (member_sql, member_params)]
+
+
+def update_profile_member(cursor, student_id, class_name, old_student_id=None, old_class_name=None):
+    """个人信息保存后更新名册: 撤销旧的个人信息班级，登记新的班级"""
+    if old_student_id and (old_student_id, old_class_name) != (student_id, class_name):
+        cursor.execute("""
+            UPDATE edu_class_members
+            SET in_profile = FALSE
+            WHERE class_name = %s AND student_id = %s
+        """, (old_class_name or '', old_student_id))
+        cursor.execute("""
+            DELETE FROM edu_class_members
+            WHERE class_name = %s AND student_id = %s
+            AND in_profile = FALSE AND has_submissions = FALSE
+        """, (old_class_name or '', old_student_id))
+
+    if student_id and is_valid_class(class_name):
+        cursor.execute("INSERT IGNORE INTO edu_classes (class_name) VALUES (%s)", (class_name,))
+        cursor.execute("""
+            INSERT INTO edu_class_members (class_name, student_id, in_profile)
+            VALUES (%s, %s, TRUE)
+            ON DUPLICATE KEY UPDATE in_profile = TRUE
+        """, (class_name, student_id))
+
+
+def rebuild():
+    """从提交记录和个人信息重建班级名册"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    try:
+        create_roster_tables(cursor)
+        cursor.execute("DELETE FROM edu_class_members")
+        cursor.execute("""
+            INSERT INTO edu_class_members (class_name, student_id, has_submissions)
+            SELECT student_class, student_id, TRUE
+            FROM edu_coding_submissions
+            WHERE student_class IS NOT NULL AND student_class != '' AND student_class != 'null'
+            GROUP BY student_class, student_id
+        """)
+        cursor.execute("""
+            INSERT INTO edu_class_members (class_name, student_id, in_profile)
+            SELECT class_name, student_id, TRUE
+            FROM edu_profiles_student
+            WHERE class_name IS NOT NULL AND class_name != '' AND class_name != 'null'
+            AND student_id IS NOT NULL AND student_id != ''
+            ON DUPLICATE KEY UPDATE in_profile = TRUE
+        """)
+        cursor.execute("""
+            INSERT IGNORE INTO edu_classes (class_name)
+            SELECT DISTINCT class_name FROM edu_class_members
+        """)
+
+        cursor.execute("SELECT COUNT(*) FROM edu_classes")
+        classes = cursor.fetchone()[0]
+        cursor.execute("SELECT COUNT(*) FROM edu_class_members")
+        members = cursor.fetchone()[0]
+        conn.commit()
+
+        print(json.dumps({
+            'success': True,
+            'message': "班级名册重建完成",
+            'data': {
+                'classes': classes,
+                'members': members
+            }
+        }))
+    except mysql.connector.Error as err:
+        conn.rollback()
+        print(json.dumps({
+            'success': False,
+            'message': f"重建班级名册失败: {str(err)}"
+        }))
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(json.dumps({
+            'success': False,
+            'message': "缺少操作参数"
+        }))
+        sys.exit(1)
+
+    operation = sys.argv[1]
+
+    if operation == "rebuild":
+        rebuild()
+    else:
+        print(json.dumps({
+            'success': False,
+            'message': "无效的操作或参数不足"
+        }))
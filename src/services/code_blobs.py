@@ -0,0 +1,319 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+代码内容存储模块
+提交的代码按内容的SHA-256哈希去重后压缩存放在 edu_code_blobs 表中，
+edu_coding_submissions 只保存 code_hash 引用。学生反复提交几乎相同的代码时，
+相同内容只存一份，提交表的行也不再携带大段文本。
+提交写入时代码原文先存在提交记录中，随后由派生表更新（derived_updates.py）移入代码块表。
+
+压缩格式:
+    zstd  安装了 zstandard 包时使用
+    zlib  标准库，未安装 zstandard 时使用
+每个代码块记录自己的压缩格式，两种格式的数据可以共存。
+
+迁移已有数据:
+    python code_blobs.py migrate [每批行数]
+查看存储统计:
+    python code_blobs.py stats
+
+环境变量:
+    CODE_BLOB_CODEC  指定压缩格式（zstd/zlib）
+"""
+
+import os
+import sys
+import json
+import zlib
+import time
+import hashlib
+import mysql.connector
+from db_pool import get_db_connection
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+CODE_BLOB_CODEC = os.environ.get('CODE_BLOB_CODEC', 'zstd' if zstandard else 'zlib')
+if CODE_BLOB_CODEC == 'zstd' and zstandard is None:
+    CODE_BLOB_CODEC = 'zlib'
+
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 3
+
+# 按哈希批量查询代码块时单条语句的最大哈希数
+FETCH_CHUNK_SIZE = 500
+MIGRATE_BATCH_SIZE = 500
+
+
+def create_blob_table(cursor):
+    """创建代码块表"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS edu_code_blobs (
+            code_hash CHAR(64) NOT NULL PRIMARY KEY,
+            codec VARCHAR(8) NOT NULL,
+            raw_size INT NOT NULL,
+            stored_size INT NOT NULL,
+            content MEDIUMBLOB NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def ensure_submission_columns(cursor):
+    """为旧版提交表补充 code_hash 列，并允许 code_content 为空"""
+    cursor.execute("""
+        SELECT COLUMN_NAME, IS_NULLABLE
+        FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE()
+        AND TABLE_NAME = 'edu_coding_submissions'
+        AND COLUMN_NAME IN ('code_hash', 'code_content')
+    """)
+    columns = {row[0]: row[1] for row in cursor.fetchall()}
+
+    if 'code_hash' not in columns:
+        cursor.execute("""
+            ALTER TABLE edu_coding_submissions
+            ADD COLUMN code_hash CHAR(64) NULL AFTER problem_title,
+            ADD INDEX idx_code_hash (code_hash)
+        """)
+    if columns.get('code_content') == 'NO':
+        cursor.execute("ALTER TABLE edu_coding_submissions MODIFY code_content MEDIUMTEXT NULL")
+
+
+def code_hash(code):
+    """计算代码内容的哈希"""
+    return hashlib.sha256((code or '').encode('utf-8')).hexdigest()
+
+
+def compress_code(code):
+    """压缩代码，返回 (压缩格式, 压缩后的字节)"""
+    raw = (code or '').encode('utf-8')
+    if CODE_BLOB_CODEC == 'zstd':
+        return 'zstd', zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(raw)
+    return 'zlib', zlib.compress(raw, ZLIB_LEVEL)
+
+
+def decompress_code(codec, content):
+    """按代码块记录的压缩格式解压"""
+    if content is None:
+        return None
+    content = bytes(content)
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("读取zstd压缩的代码需要安装 zstandard")
+        raw = zstandard.ZstdDecompressor().decompress(content)
+    elif codec == 'zlib':
+        raw = zlib.decompress(content)
+    else:
+        raw = content
+    return raw.decode('utf-8')
+
+
+def build_blob_insert(codes):
+    """生成写入一组代码的语句
+
+    返回 (sql, params, hashes)，hashes 与输入顺序一致。
+    同一批中重复的代码只压缩一次，已存在的代码块由 INSERT IGNORE 跳过。
+    """
+    hashes = []
+    unique = {}
+    for code in codes:
+        digest = code_hash(code)
+        hashes.append(digest)
+        if digest not in unique:
+            unique[digest] = code
+
+    rows = []
+    params = {}
+    for i, (digest, code) in enumerate(unique.items()):
+        codec, content = compress_code(code)
+        params[f'blob_hash_{i}'] = digest
+        params[f'blob_codec_{i}'] = codec
+        params[f'blob_raw_size_{i}'] = len((code or '').encode('utf-8'))
+        params[f'blob_stored_size_{i}'] = len(content)
+        params[f'blob_content_{i}'] = content
+        rows.append(
+            f"(%(blob_hash_{i})s, %(blob_codec_{i})s, %(blob_raw_size_{i})s, "
+            f"%(blob_stored_size_{i})s, %(blob_content_{i})s)"
+        )
+
+    sql = """
+        INSERT IGNORE INTO edu_code_blobs (code_hash, codec, raw_size, stored_size, content)
+        VALUES
+    """ + ',\n'.join(rows)
+    return sql, params, hashes
+
+
+def fetch_codes(cursor, hashes):
+    """按哈希批量读取并解压代码，返回 {code_hash: 代码}"""
+    hashes = list({h for h in hashes if h})
+    codes = {}
+    for start in range(0, len(hashes), FETCH_CHUNK_SIZE):
+        chunk = hashes[start:start + FETCH_CHUNK_SIZE]
+        placeholders = ', '.join(['%s'] * len(chunk))
+        cursor.execute(
+            f"SELECT code_hash, codec, content FROM edu_code_blobs WHERE code_hash IN ({placeholders})",
+            tuple(chunk)
+        )
+        for row in cursor.fetchall():
+            if isinstance(row, dict):
+                row = (row['code_hash'], row['codec'], row['content'])
+            codes[row[0]] = decompress_code(row[1], row[2])
+    return codes
+
+
+def attach_code(cursor, rows):
+    """为提交记录填充 code_content
+
+    已迁移的记录从代码块表读取并解压，未迁移的旧记录保留原有的 code_content。
+    rows 为字典游标返回的记录，需要包含 code_hash 和 code_content 字段。
+    """
+    codes = fetch_codes(cursor, [row.get('code_hash') for row in rows if row.get('code_content') is None])
+    for row in rows:
+        if row.get('code_content') is None and row.get('code_hash'):
+            row['code_content'] = codes.get(row['code_hash'])
+    return rows
+
+
+def migrate(batch_size=MIGRATE_BATCH_SIZE):
+    """把提交表中的代码内容迁移到代码块表
+
+    按ID分批处理，每批一个事务: 写入代码块，回填 code_hash，清空 code_content。
+    可以重复执行，已迁移的行会被跳过。
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    started = time.time()
+    migrated = 0
+    raw_bytes = 0
+    blobs_before = 0
+
+    try:
+        create_blob_table(cursor)
+        ensure_submission_columns(cursor)
+        conn.commit()
+
+        cursor.execute("SELECT COUNT(*) FROM edu_code_blobs")
+        blobs_before = cursor.fetchone()[0]
+
+        last_id = 0
+        while True:
+            cursor.execute("""
+                SELECT id, code_content
+                FROM edu_coding_submissions
+                WHERE id > %s AND code_hash IS NULL AND code_content IS NOT NULL
+                ORDER BY id
+                LIMIT %s
+            """, (last_id, batch_size))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+
+            sql, params, hashes = build_blob_insert([row[1] for row in rows])
+            cursor.execute(sql, params)
+            cursor.executemany(
+                "UPDATE edu_coding_submissions SET code_hash = %s, code_content = NULL WHERE id = %s",
+                [(digest, row[0]) for digest, row in zip(hashes, rows)]
+            )
+            conn.commit()
+
+            migrated += len(rows)
+            raw_bytes += sum(len(row[1].encode('utf-8')) for row in rows)
+            last_id = rows[-1][0]
+
+        cursor.execute("SELECT COUNT(*), COALESCE(SUM(stored_size), 0) FROM edu_code_blobs")
+        blob_count, stored_bytes = cursor.fetchone()
+
+        print(json.dumps({
+            'success': True,
+            'message': "代码内容迁移完成",
+            'data': {
+                'migrated_rows': migrated,
+                'migrated_bytes': raw_bytes,
+                'blobs_created': blob_count - blobs_before,
+                'total_blobs': blob_count,
+                'total_stored_bytes': int(stored_bytes),
+                'codec': CODE_BLOB_CODEC,
+                'elapsed_seconds': round(time.time() - started, 2)
+            }
+        }))
+    except mysql.connector.Error as err:
+        conn.rollback()
+        print(json.dumps({
+            'success': False,
+            'message': f"迁移代码内容失败: {str(err)}",
+            'migrated_rows': migrated
+        }))
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def get_storage_stats():
+    """输出代码块存储统计"""
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+
+    try:
+        cursor.execute("""
+            SELECT
+                COUNT(*) as blobs,
+                COALESCE(SUM(raw_size), 0) as raw_bytes,
+                COALESCE(SUM(stored_size), 0) as stored_bytes
+            FROM edu_code_blobs
+        """)
+        blobs = cursor.fetchone()
+
+        cursor.execute("""
+            SELECT
+                COUNT(*) as submissions,
+                COUNT(code_hash) as referenced,
+                COUNT(code_content) as legacy_rows
+            FROM edu_coding_submissions
+        """)
+        submissions = cursor.fetchone()
+
+        print(json.dumps({
+            'success': True,
+            'data': {
+                'blobs': blobs['blobs'],
+                'raw_bytes': int(blobs['raw_bytes']),
+                'stored_bytes': int(blobs['stored_bytes']),
+                'submissions': submissions['submissions'],
+                'referenced_submissions': submissions['referenced'],
+                'legacy_rows': submissions['legacy_rows'],
+                'dedup_ratio': round(submissions['referenced'] / blobs['blobs'], 2) if blobs['blobs'] else 0
+            }
+        }))
+    except mysql.connector.Error as err:
+        print(json.dumps({
+            'success': False,
+            'message': f"获取代码存储统计失败: {str(err)}"
+        }))
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(json.dumps({
+            'success': False,
+            'message': "缺少操作参数"
+        }))
+        sys.exit(1)
+
+    operation = sys.argv[1]
+
+    if operation == "migrate":
+        migrate(int(sys.argv[2]) if len(sys.argv) > 2 else MIGRATE_BATCH_SIZE)
+    elif operation == "stats":
+        get_storage_stats()
+    else:
+        print(json.dumps({
+            'success': False,
+            'message': "无效的操作或参数不足"
+        }))
@@ -1,11 +1,29 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import os
 import sys
 import json
 import mysql.connector
 from datetime import datetime, date
 from decimal import Decimal
+from db_pool import get_db_connection, execute_statements
+from code_blobs import create_blob_table, ensure_submission_columns, attach_code
+from rollups import create_rollup_tables
+from error_signatures import (
+    create_signature_table, ensure_fingerprint_column, normalize_error, fingerprint, build_top_errors_query
+)
+from solving_histograms import create_histogram_table, read_histogram
+from schema_migrations import apply_migrations
+from class_roster import create_roster_tables
+from ingest_keys import create_key_table, batch_keys, find_existing_keys, build_key_insert
+from daily_activity import create_activity_tables
+from quantile_sketches import create_sketch_table
+from activity_bitmaps import create_bitmap_table
+
+# 日志级别，与Node端的 LOG_LEVEL 一致；debug 时输出提交数据和写入前后的统计记录
+LOG_LEVEL = os.environ.get('CODING_LOG_LEVEL', os.environ.get('LOG_LEVEL', 'info')).lower()
+DEBUG = LOG_LEVEL == 'debug'
 
 # 添加自定义JSON编码器
 class CustomJSONEncoder(json.JSONEncoder):
@@ -16,26 +34,6 @@ class CustomJSONEncoder(json.JSONEncoder):
             return float(obj)
         return super().default(obj)
 
-# 数据库连接配置
-DB_CONFIG = {
-    'host': 'localhost',
-    'user': 'root',
-    'password': 'mwYgR7#*X2',
-    'database': 'education_platform'
-}
-
-def get_db_connection():
-    """建立数据库连接"""
-    try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        return conn
-    except mysql.connector.Error as err:
-        print(json.dumps({
-            'success': False,
-            'message': f"数据库连接失败: {str(err)}"
-        }))
-        sys.exit(1)
-
 def create_tables():
     """创建必要的数据表结构"""
     conn = get_db_connection()
@@ -50,17 +48,58 @@ def create_tables():
                 student_id VARCHAR(50) NOT NULL,
                 problem_id VARCHAR(50) NOT NULL,
                 problem_title TEXT NOT NULL,
-                code_content TEXT NOT NULL,
+                code_hash CHAR(64) NULL,
+                code_content MEDIUMTEXT NULL,
                 submit_result ENUM('success', 'failed') NOT NULL,
                 execution_errors TEXT,
+                error_fingerprint BIGINT NULL,
                 first_view_time TIMESTAMP,
                 submission_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                INDEX (student_id),
-                INDEX (problem_id),
-                INDEX (student_class)
+                derived TINYINT NOT NULL DEFAULT 1,
+                ingested_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                INDEX idx_student_time (student_id, submission_time, submit_result, problem_id, student_class),
+                INDEX idx_student_error (student_id, submit_result, error_fingerprint),
+                INDEX idx_problem_error (problem_id, submit_result, error_fingerprint),
+                INDEX idx_problem_time (problem_id, submission_time),
+                INDEX idx_class_time (student_class, submission_time),
+                INDEX idx_class_student (student_class, student_id, submit_result, problem_id),
+                INDEX idx_class_error (student_class, error_fingerprint, student_id, problem_id),
+                INDEX idx_submission_time (submission_time, student_id),
+                INDEX idx_result_time (submit_result, submission_time),
+                INDEX idx_code_hash (code_hash),
+                INDEX idx_derive_pending (derived, id)
             )
         """)
 
+        # 代码内容存放在按哈希去重的代码块表中，旧表补充 code_hash 列
+        create_blob_table(cursor)
+        ensure_submission_columns(cursor)
+
+        # 班级/题目、班级/日期汇总表
+        create_rollup_tables(cursor)
+
+        # 错误签名表，旧表补充 error_fingerprint 列
+        create_signature_table(cursor)
+        ensure_fingerprint_column(cursor)
+
+        # 解题用时直方图
+        create_histogram_table(cursor)
+
+        # 班级名册
+        create_roster_tables(cursor)
+
+        # 提交幂等键
+        create_key_table(cursor)
+
+        # 每日活动汇总和活跃学生草图
+        create_activity_tables(cursor)
+
+        # 解题次数和解题用时的分位数草图
+        create_sketch_table(cursor)
+
+        # 学生按月的活跃位图
+        create_bitmap_table(cursor)
+
         # 学生解题统计表
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS edu_problem_solving_stats (
@@ -77,6 +116,9 @@ def create_tables():
             )
         """)
 
+        # 旧表补充复合/覆盖索引（见 schema_migrations.py）
+        apply_migrations(cursor)
+
         conn.commit()
         print(json.dumps({
             'success': True,
@@ -91,138 +133,257 @@ def create_tables():
         cursor.close()
         conn.close()
 
+# 批量写入时单行提交记录的模板，参数名带行号后缀；derived = 0 表示派生表还未计入这条提交
+SUBMISSION_ROW_TEMPLATE = """(
+    %(student_class_{i})s, %(student_id_{i})s, %(problem_id_{i})s,
+    %(problem_title_{i})s, %(code_content_{i})s, %(submit_result_{i})s,
+    %(execution_errors_{i})s, %(error_fingerprint_{i})s, STR_TO_DATE(%(first_view_time_{i})s, '%Y-%m-%d %H:%i:%s'),
+    STR_TO_DATE(%(submission_time_{i})s, '%Y-%m-%d %H:%i:%s'), 0
+)"""
+
+# 批量写入时单行解题统计的模板
+STATS_ROW_TEMPLATE = """(
+    %(student_id_{i})s, %(problem_id_{i})s, 1,
+    %(is_solved_{i})s, STR_TO_DATE(%(first_view_time_{i})s, '%Y-%m-%d %H:%i:%s'),
+    %(coding_time_{i})s,
+    CASE WHEN %(is_solved_{i})s = TRUE THEN 1 ELSE 0 END,
+    CASE WHEN %(is_solved_{i})s = TRUE THEN STR_TO_DATE(%(submission_time_{i})s, '%Y-%m-%d %H:%i:%s') ELSE NULL END
+)"""
+
+# 与 submit_data 中的更新逻辑一致，本次提交的值通过 VALUES() 引用，
+# 同一批次内同一学生同一题目的多行会按顺序依次应用
+STATS_UPSERT_CLAUSE = """
+    ON DUPLICATE KEY UPDATE
+        total_attempts = total_attempts + 1,
+        is_solved = CASE
+            WHEN VALUES(is_solved) = TRUE
+            THEN TRUE
+            ELSE is_solved
+        END,
+        attempts_until_success = CASE
+            WHEN is_solved = FALSE AND VALUES(is_solved) = TRUE
+            THEN total_attempts + 1
+            WHEN attempts_until_success = 0 AND VALUES(is_solved) = TRUE
+            THEN total_attempts
+            ELSE attempts_until_success
+        END,
+        solved_time = CASE
+            WHEN (is_solved = FALSE OR solved_time IS NULL) AND VALUES(is_solved) = TRUE
+            THEN VALUES(solved_time)
+            ELSE solved_time
+        END,
+        time_spent_seconds = CASE
+            WHEN is_solved = TRUE
+            THEN time_spent_seconds
+            ELSE VALUES(time_spent_seconds)
+        END
+"""
+
+
+def _write_submission_batch(cursor, batch, meter):
+    """在当前事务中写入一批提交记录，返回各条记录的ID（与批次顺序一致）
+
+    只写提交记录和解题统计，在一次往返中执行（多语句执行，写入连接）:
+    幂等键（没有键时跳过）、每条提交记录一条 INSERT（从各自的结果中取得自增ID）、解题统计一条多行upsert。
+    提交记录直接保存代码原文和错误指纹，derived = 0；代码块、错误签名、汇总表、直方图、班级名册、
+    每日活动、分位数草图和活跃位图由 derived_updates.py 在提交之后分批更新。
+    幂等键最先写入，重复的键在其他语句执行之前就因主键冲突失败，之后的语句不再执行。
+    """
+    statements = []
+    key_sql, key_params = build_key_insert(batch_keys(batch))
+    if key_sql:
+        statements.append((key_sql, key_params))
+
+    params = {}
+    for i, data in enumerate(batch):
+        for key in ('student_class', 'student_id', 'problem_id', 'problem_title',
+                    'code_content', 'submit_result', 'execution_errors',
+                    'first_view_time', 'submission_time'):
+            params[f'{key}_{i}'] = data.get(key)
+        message, _ = normalize_error(data.get('execution_errors'))
+        params[f'error_fingerprint_{i}'] = fingerprint(message) if message is not None else None
+        params[f'is_solved_{i}'] = data.get('submit_result') == 'success'
+        params[f'coding_time_{i}'] = int(data.get('coding_time', 0) or 0)
+
+    submission_index = len(statements)
+    for i in range(len(batch)):
+        statements.append((
+            """
+            INSERT INTO edu_coding_submissions (
+                student_class, student_id, problem_id, problem_title,
+                code_content, submit_result, execution_errors, error_fingerprint,
+                first_view_time, submission_time, derived
+            ) VALUES
+            """ + SUBMISSION_ROW_TEMPLATE.format(i=i),
+            params
+        ))
+    statements.append((
+        """
+        INSERT INTO edu_problem_solving_stats (
+            student_id, problem_id, total_attempts,
+            is_solved, first_view_time, time_spent_seconds,
+            attempts_until_success, solved_time
+        ) VALUES
+        """ + ',\n'.join(STATS_ROW_TEMPLATE.format(i=i) for i in range(len(batch)))
+        + STATS_UPSERT_CLAUSE,
+        params
+    ))
+
+    results = execute_statements(cursor, statements, meter)
+    return [lastrowid for _, lastrowid in results[submission_index:submission_index + len(batch)]]
+
+
+def _new_meter():
+    """创建一次写入的开销计数: 数据库往返次数、执行的语句数和发送的语句字节数"""
+    return {'round_trips': 0, 'statements': 0, 'bytes_sent': 0}
+
+
+def _execute(cursor, sql, params, meter):
+    """执行语句并计入往返次数、语句数和语句字节数"""
+    cursor.execute(sql, params)
+    meter['round_trips'] += 1
+    meter['statements'] += 1
+    statement = cursor.statement or ''
+    if isinstance(statement, str):
+        statement = statement.encode('utf-8')
+    meter['bytes_sent'] += len(statement)
+
+
+def _commit(conn, meter):
+    """提交事务并计入一次往返"""
+    conn.commit()
+    meter['round_trips'] += 1
+
+
+def _log_stats_record(cursor, data, label, meter):
+    """调试用: 读取并输出学生在该题目上的解题统计记录"""
+    _execute(cursor, """
+        SELECT
+            student_id,
+            problem_id,
+            is_solved,
+            total_attempts,
+            attempts_until_success,
+            solved_time,
+            time_spent_seconds
+        FROM edu_problem_solving_stats
+        WHERE student_id = %(student_id)s AND problem_id = %(problem_id)s
+    """, {
+        'student_id': data['student_id'],
+        'problem_id': data['problem_id']
+    }, meter)
+    record = cursor.fetchone()
+    if record:
+        print(f"{label}: is_solved={record['is_solved']}, total_attempts={record['total_attempts']}, attempts_until_success={record['attempts_until_success']}, solved_time={record['solved_time']}, time_spent_seconds={record['time_spent_seconds']}", file=sys.stderr)
+    else:
+        print(f"{label}: 无", file=sys.stderr)
+
+
+# 重复写入同一幂等键时的主键冲突
+ER_DUP_ENTRY = 1062
+
+# 短暂性的数据库错误: 锁等待超时、死锁、连接数已满、服务器关闭、查询被中断、
+# 无法连接、连接断开、查询超时。重试即可成功，不是数据本身的问题
+TRANSIENT_ERRNOS = {1205, 1213, 1040, 1053, 1317, 2002, 2003, 2006, 2013, 2055, 3024}
+
+# 死锁: 并发写入同一学生同一题目的新解题统计记录时，两个事务在唯一索引的间隙锁上互相等待
+ER_LOCK_DEADLOCK = 1213
+DEADLOCK_RETRIES = 2
+
+DUPLICATE_RESULT = {
+    'success': True,
+    'duplicate': True,
+    'message': "重复提交，已忽略"
+}
+
+
+def _write_and_commit(conn, cursor, batch, meter):
+    """写入一批提交记录并提交事务，返回各条记录的ID
+
+    死锁时回滚并整体重试；其他错误由调用方回滚。
+    """
+    for attempt in range(DEADLOCK_RETRIES + 1):
+        try:
+            submission_ids = _write_submission_batch(cursor, batch, meter)
+            _commit(conn, meter)
+            return submission_ids
+        except mysql.connector.Error as err:
+            if err.errno != ER_LOCK_DEADLOCK or attempt == DEADLOCK_RETRIES:
+                raise
+            conn.rollback()
+
+
+def _split_replayed(cursor, batch, meter):
+    """按幂等键找出已经写入过的提交（包括同一批次中重复的键）
+
+    返回 (需要写入的提交, 重复提交在批次中的位置集合)。
+    """
+    keys = batch_keys(batch)
+    if not keys:
+        return batch, set()
+
+    existing = find_existing_keys(cursor, keys)
+    meter['round_trips'] += 1
+    meter['statements'] += 1
+
+    fresh = []
+    duplicates = set()
+    seen = set()
+    for index, data in enumerate(batch):
+        key = data.get('idempotency_key')
+        if key and (key in existing or key in seen):
+            duplicates.add(index)
+            continue
+        if key:
+            seen.add(key)
+        fresh.append(data)
+    return fresh, duplicates
+
+
 def submit_data(data_json_str):
-    """处理提交的编程数据"""
+    """处理提交的编程数据
+
+    在一个事务中写入提交记录和解题统计（见 _write_submission_batch），共2条语句
+    （带幂等键时另有写入幂等键1条），数据库往返固定2次: 多语句写入1次、提交1次。
+    重复的幂等键由写入时的主键冲突识别，不预先读取。派生表由 derived_updates.py 随后更新。
+    写入前后的统计记录查询和完整数据的日志只在 debug 日志级别下执行。
+    结果中附带本次提交的数据库往返次数（round_trips）、语句数（statements）和发送的语句字节数（bytes_sent）。
+    """
+    meter = _new_meter()
     try:
-        print(f"收到数据: {data_json_str}", file=sys.stderr)
+        if DEBUG:
+            print(f"收到数据: {data_json_str}", file=sys.stderr)
         data = json.loads(data_json_str)
 
-        conn = get_db_connection()
+        conn = get_db_connection(ingest=True)
         cursor = conn.cursor(dictionary=True)
 
         try:
-            # 1. 插入提交记录到edu_coding_submissions
-            submissions_sql = """
-                INSERT INTO edu_coding_submissions (
-                    student_class, student_id, problem_id, problem_title,
-                    code_content, submit_result, execution_errors,
-                    first_view_time, submission_time
-                ) VALUES (
-                    %(student_class)s, %(student_id)s, %(problem_id)s,
-                    %(problem_title)s, %(code_content)s, %(submit_result)s,
-                    %(execution_errors)s, STR_TO_DATE(%(first_view_time)s, '%Y-%m-%d %H:%i:%s'),
-                    STR_TO_DATE(%(submission_time)s, '%Y-%m-%d %H:%i:%s')
-                )
-            """
-            cursor.execute(submissions_sql, data)
-            submission_id = cursor.lastrowid
-
-            # 检查当前题目的解决状态
-            cursor.execute("""
-                SELECT
-                    student_id,
-                    problem_id,
-                    is_solved,
-                    total_attempts,
-                    attempts_until_success,
-                    solved_time
-                FROM edu_problem_solving_stats
-                WHERE student_id = %(student_id)s AND problem_id = %(problem_id)s
-            """, {
-                'student_id': data['student_id'],
-                'problem_id': data['problem_id']
-            })
-
-            existing_record = cursor.fetchone()
-            is_success = data['submit_result'] == 'success'
-
-            # 打印调试信息
-            print(f"题目提交状态: 学生ID={data['student_id']}, 题目ID={data['problem_id']}, 提交结果={data['submit_result']}", file=sys.stderr)
-            if existing_record:
-                print(f"现有记录: is_solved={existing_record['is_solved']}, total_attempts={existing_record['total_attempts']}, attempts_until_success={existing_record['attempts_until_success']}, solved_time={existing_record['solved_time']}, time_spent_seconds={existing_record.get('time_spent_seconds', 0)}", file=sys.stderr)
-            else:
-                print(f"没有找到现有记录，将创建新记录", file=sys.stderr)
-
-            # 2. 更新或插入解题统计到edu_problem_solving_stats
-            stats_sql = """
-                INSERT INTO edu_problem_solving_stats (
-                    student_id, problem_id, total_attempts,
-                    is_solved, first_view_time, time_spent_seconds,
-                    attempts_until_success, solved_time
-                ) VALUES (
-                    %(student_id)s, %(problem_id)s, 1,
-                    %(is_solved)s, STR_TO_DATE(%(first_view_time)s, '%Y-%m-%d %H:%i:%s'),
-                    %(coding_time)s,
-                    CASE WHEN %(is_solved)s = TRUE THEN 1 ELSE 0 END,
-                    CASE WHEN %(is_solved)s = TRUE THEN STR_TO_DATE(%(submission_time)s, '%Y-%m-%d %H:%i:%s') ELSE NULL END
-                )
-                ON DUPLICATE KEY UPDATE
-                    total_attempts = total_attempts + 1,
-                    is_solved = CASE
-                        WHEN %(is_solved)s = TRUE
-                        THEN TRUE
-                        ELSE is_solved
-                    END,
-                    attempts_until_success = CASE
-                        WHEN is_solved = FALSE AND %(is_solved)s = TRUE
-                        THEN total_attempts + 1
-                        WHEN attempts_until_success = 0 AND %(is_solved)s = TRUE
-                        THEN total_attempts
-                        ELSE attempts_until_success
-                    END,
-                    solved_time = CASE
-                        WHEN (is_solved = FALSE OR solved_time IS NULL) AND %(is_solved)s = TRUE
-                        THEN STR_TO_DATE(%(submission_time)s, '%Y-%m-%d %H:%i:%s')
-                        ELSE solved_time
-                    END,
-                    time_spent_seconds = CASE
-                        WHEN is_solved = TRUE
-                        THEN time_spent_seconds
-                        ELSE %(coding_time)s
-                    END
-            """
+            if DEBUG:
+                print(f"题目提交状态: 学生ID={data['student_id']}, 题目ID={data['problem_id']}, 提交结果={data['submit_result']}", file=sys.stderr)
+                _log_stats_record(cursor, data, '现有记录', meter)
 
-            stats_data = {
-                'student_id': data['student_id'],
-                'problem_id': data['problem_id'],
-                'is_solved': is_success,
-                'first_view_time': data['first_view_time'],
-                'submission_time': data['submission_time'],
-                'coding_time': int(data.get('coding_time', 0))
-            }
+            submission_id = _write_and_commit(conn, cursor, [data], meter)[0]
 
-            cursor.execute(stats_sql, stats_data)
-            conn.commit()
-
-            # 验证更新后的记录
-            cursor.execute("""
-                SELECT
-                    student_id,
-                    problem_id,
-                    is_solved,
-                    total_attempts,
-                    attempts_until_success,
-                    solved_time,
-                    time_spent_seconds
-                FROM edu_problem_solving_stats
-                WHERE student_id = %(student_id)s AND problem_id = %(problem_id)s
-            """, {
-                'student_id': data['student_id'],
-                'problem_id': data['problem_id']
-            })
-
-            updated_record = cursor.fetchone()
-            if updated_record:
-                print(f"更新后记录: is_solved={updated_record['is_solved']}, total_attempts={updated_record['total_attempts']}, attempts_until_success={updated_record['attempts_until_success']}, solved_time={updated_record['solved_time']}, time_spent_seconds={updated_record['time_spent_seconds']}", file=sys.stderr)
+            if DEBUG:
+                _log_stats_record(cursor, data, '更新后记录', meter)
+                print(f"提交开销: 往返{meter['round_trips']}次, 语句{meter['statements']}条, 发送{meter['bytes_sent']}字节", file=sys.stderr)
 
             print(json.dumps({
                 'success': True,
                 'message': "编程数据提交成功",
-                'submission_id': submission_id
+                'submission_id': submission_id,
+                'round_trips': meter['round_trips'],
+                'statements': meter['statements'],
+                'bytes_sent': meter['bytes_sent']
             }))
 
         except mysql.connector.Error as e:
             conn.rollback()
+            if e.errno == ER_DUP_ENTRY:
+                # 已经写入过同一个幂等键（重试或并发写入）
+                print(json.dumps(dict(DUPLICATE_RESULT, round_trips=meter['round_trips'], statements=meter['statements'], bytes_sent=meter['bytes_sent'])))
+                return
             raise e
 
     except Exception as e:
@@ -238,6 +399,95 @@ def submit_data(data_json_str):
         if 'conn' in locals():
             conn.close()
 
+
+def submit_batch(batch_json_str):
+    """批量处理提交的编程数据（组提交）
+
+    整批数据在一个事务中写入，提交成功后才返回每条记录的结果。
+    往返次数与批次大小无关: 带幂等键时读取已写入的键1次，多语句写入1次、提交1次。
+    提交记录每条一条 INSERT，解题统计一条多行upsert（在同一次往返中），各提交记录返回自增ID。
+    整批写入失败时回滚，并逐条单独写入，避免一条错误数据影响同批的其他提交。
+    逐条写入失败的结果带有 errno 和 transient（死锁、锁等待超时等短暂性错误，重试即可），
+    调用方据此区分需要重试的记录和数据本身有问题的记录。
+    带幂等键的提交如果已经写入过（预写日志重放、重试），直接返回重复结果，不再写入。
+    """
+    try:
+        batch = json.loads(batch_json_str)
+    except ValueError as e:
+        print(json.dumps({
+            'success': False,
+            'message': f"处理数据失败: {str(e)}"
+        }))
+        return
+
+    if not batch:
+        print(json.dumps({'success': True, 'results': [], 'round_trips': 0, 'statements': 0, 'bytes_sent': 0}))
+        return
+
+    conn = get_db_connection(ingest=True)
+    cursor = conn.cursor()
+    results = []
+    meter = _new_meter()
+
+    try:
+        fresh, duplicates = _split_replayed(cursor, batch, meter)
+        fresh_results = []
+        if fresh:
+            try:
+                submission_ids = _write_and_commit(conn, cursor, fresh, meter)
+                fresh_results = [{
+                    'success': True,
+                    'message': "编程数据提交成功",
+                    'submission_id': submission_id
+                } for submission_id in submission_ids]
+            except (mysql.connector.Error, TypeError, ValueError) as batch_err:
+                conn.rollback()
+                print(f"批量写入失败，改为逐条写入: {str(batch_err)}", file=sys.stderr)
+                fresh_results = []
+                for data in fresh:
+                    try:
+                        submission_id = _write_and_commit(conn, cursor, [data], meter)[0]
+                        fresh_results.append({
+                            'success': True,
+                            'message': "编程数据提交成功",
+                            'submission_id': submission_id
+                        })
+                    except (mysql.connector.Error, TypeError, ValueError) as err:
+                        conn.rollback()
+                        if getattr(err, 'errno', None) == ER_DUP_ENTRY:
+                            # 并发写入了同一个幂等键
+                            fresh_results.append(dict(DUPLICATE_RESULT))
+                            continue
+                        errno = getattr(err, 'errno', None)
+                        fresh_results.append({
+                            'success': False,
+                            'message': f"处理数据失败: {str(err)}",
+                            'errno': errno,
+                            'transient': errno in TRANSIENT_ERRNOS
+                        })
+
+        fresh_iter = iter(fresh_results)
+        results = [
+            dict(DUPLICATE_RESULT) if index in duplicates else next(fresh_iter)
+            for index in range(len(batch))
+        ]
+
+        print(json.dumps({
+            'success': True,
+            'results': results,
+            'round_trips': meter['round_trips'],
+            'statements': meter['statements'],
+            'bytes_sent': meter['bytes_sent']
+        }))
+    except Exception as e:
+        print(json.dumps({
+            'success': False,
+            'message': f"处理数据失败: {str(e)}"
+        }))
+    finally:
+        cursor.close()
+        conn.close()
+
 def get_student_stats(student_id):
     """获取学生编程统计数据 - 简化版，只返回题目ID和解决状态"""
     conn = get_db_connection()
@@ -274,21 +524,98 @@ def get_student_stats(student_id):
         cursor.close()
         conn.close()
 
+# 以下 build_*_query 生成统计页面的热点查询，返回 (sql, params)，
+# src/scripts/check_query_plans.py 对其中读取提交记录表的查询做执行计划检查
+
+def build_class_rankings_query(class_name):
+    """班级学生排名，读取 (班级, 学生) 汇总表"""
+    return """
+        SELECT
+            student_id,
+            solved_problems,
+            attempts as total_submissions,
+            ROUND(successes / attempts * 100, 2) as success_rate
+        FROM edu_class_student_rollup
+        WHERE student_class = %s
+        ORDER BY solved_problems DESC, success_rate DESC
+    """, (class_name,)
+
+
+def build_comparison_students_query(class_names=None):
+    """班级对比的学生排名指标，读取 (班级, 学生) 汇总表"""
+    params = {}
+    class_filter = ""
+    if class_names:
+        for i, name in enumerate(class_names):
+            params[f'class_{i}'] = name
+        class_filter = "WHERE student_class IN (" + ', '.join(f"%(class_{i})s" for i in range(len(class_names))) + ")"
+    return f"""
+        SELECT
+            student_class,
+            student_id,
+            solved_problems,
+            successes / attempts * 100 as success_rate
+        FROM edu_class_student_rollup
+        {class_filter}
+    """, params
+
+
+def build_problem_errors_query(problem_id):
+    """题目的常见错误"""
+    return build_top_errors_query(
+        ["problem_id = %s", "submit_result = 'failed'"], (problem_id,), 10,
+        message_alias='execution_errors', count_alias='count'
+    )
+
+
+def build_export_query(problem_id, class_name=None):
+    """按题目（和班级）导出提交记录"""
+    sql = """
+        SELECT
+            id as submission_id,
+            student_class,
+            student_id,
+            problem_id,
+            problem_title,
+            submit_result,
+            execution_errors,
+            first_view_time,
+            submission_time,
+            code_hash,
+            code_content
+        FROM edu_coding_submissions
+        WHERE problem_id = %s
+    """
+    params = [problem_id]
+    if class_name:
+        sql += " AND student_class = %s"
+        params.append(class_name)
+    sql += " ORDER BY id"
+    return sql, tuple(params)
+
+
 def get_class_stats(class_name):
     """获取班级编程统计数据"""
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
 
     try:
-        # 首先检查是否有该班级的数据
+        # 班级内各题目完成情况直接读取 (班级, 题目) 汇总表
         cursor.execute("""
-            SELECT COUNT(*) as count
-            FROM edu_coding_submissions
+            SELECT
+                problem_id,
+                problem_title,
+                attempts as total_attempts,
+                students as students_attempted,
+                successes as successful_attempts,
+                ROUND(successes / attempts * 100, 2) as success_rate
+            FROM edu_class_problem_rollup
             WHERE student_class = %s
+            ORDER BY problem_id
         """, (class_name,))
 
-        count_result = cursor.fetchone()
-        has_data = count_result and count_result['count'] > 0
+        problem_stats = cursor.fetchall() or []
+        has_data = len(problem_stats) > 0
 
         if not has_data:
             print(f"警告: 没有找到班级 '{class_name}' 的编程数据", file=sys.stderr)
@@ -314,58 +641,22 @@ def get_class_stats(class_name):
             }, cls=CustomJSONEncoder))
             return
 
-        # 获取班级总体统计
-        cursor.execute("""
-            SELECT
-                COUNT(DISTINCT student_id) as total_students,
-                COUNT(DISTINCT problem_id) as total_problems,
-                COUNT(*) as total_submissions,
-                SUM(CASE WHEN submit_result = 'success' THEN 1 ELSE 0 END) as successful_submissions,
-                ROUND(AVG(CASE WHEN submit_result = 'success' THEN 1 ELSE 0 END) * 100, 2) as success_rate
-            FROM edu_coding_submissions
-            WHERE student_class = %s
-        """, (class_name,))
-
-        class_stats = cursor.fetchone() or {
-            'total_students': 0,
-            'total_problems': 0,
-            'total_submissions': 0,
-            'successful_submissions': 0,
-            'success_rate': 0
-        }
-
-        # 获取班级内各题目完成情况
-        cursor.execute("""
-            SELECT
-                problem_id,
-                MAX(problem_title) as problem_title,
-                COUNT(*) as total_attempts,
-                COUNT(DISTINCT student_id) as students_attempted,
-                SUM(CASE WHEN submit_result = 'success' THEN 1 ELSE 0 END) as successful_attempts,
-                ROUND(AVG(CASE WHEN submit_result = 'success' THEN 1 ELSE 0 END) * 100, 2) as success_rate
-            FROM edu_coding_submissions
-            WHERE student_class = %s
-            GROUP BY problem_id
-            ORDER BY problem_id
-        """, (class_name,))
-
-        problem_stats = cursor.fetchall() or []
-
-        # 获取学生排名情况
-        cursor.execute("""
-            SELECT
-                student_id,
-                COUNT(DISTINCT CASE WHEN submit_result = 'success' THEN problem_id END) as solved_problems,
-                COUNT(*) as total_submissions,
-                ROUND(AVG(CASE WHEN submit_result = 'success' THEN 1 ELSE 0 END) * 100, 2) as success_rate
-            FROM edu_coding_submissions
-            WHERE student_class = %s
-            GROUP BY student_id
-            ORDER BY solved_problems DESC, success_rate DESC
-        """, (class_name,))
+        # 学生排名读取 (班级, 学生) 汇总表
+        cursor.execute(*build_class_rankings_query(class_name))
 
         student_rankings = cursor.fetchall() or []
 
+        # 班级总体统计由各题目的汇总数据相加得到
+        total_submissions = sum(row['total_attempts'] for row in problem_stats)
+        successful_submissions = sum(row['successful_attempts'] for row in problem_stats)
+        class_stats = {
+            'total_students': len(student_rankings),
+            'total_problems': len(problem_stats),
+            'total_submissions': total_submissions,
+            'successful_submissions': successful_submissions,
+            'success_rate': round(successful_submissions / total_submissions * 100, 2) if total_submissions else 0
+        }
+
         # 检查是否所有数据都为空
         all_empty = (
             class_stats['total_students'] == 0 and
@@ -398,76 +689,214 @@ def get_class_stats(class_name):
         cursor.close()
         conn.close()
 
-def get_problem_stats(problem_id):
-    """获取特定题目的提交统计"""
+# 班级对比矩阵的指标（列）顺序
+COMPARISON_METRICS = (
+    'total_students',
+    'total_problems',
+    'total_submissions',
+    'successful_submissions',
+    'success_rate',
+    'avg_solution_time',
+    'avg_solved_problems',
+    'max_solved_problems',
+    'avg_student_success_rate',
+    'active_days',
+)
+
+
+def compare_classes(class_names=None):
+    """多个班级（未指定时为全部班级）的编程统计对比
+
+    与 get_class_stats 相同的班级统计、题目统计和学生排名指标，所有班级一起计算:
+        1. (班级, 题目) 汇总表一次读出所有班级的题目统计
+        2. (班级, 学生) 汇总表一次读出所有班级的学生排名指标
+        3. (班级, 日期) 汇总表按班级分组得到活跃天数
+    返回 班级 × 指标 的矩阵和 班级 × 题目 的成功率矩阵，可以直接用于图表。
+    """
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
 
     try:
-        # 获取题目基本信息
-        cursor.execute("""
+        params = {}
+        class_filter = ""
+        if class_names:
+            for i, name in enumerate(class_names):
+                params[f'class_{i}'] = name
+            class_filter = "WHERE student_class IN (" + ', '.join(f"%(class_{i})s" for i in range(len(class_names))) + ")"
+
+        cursor.execute(f"""
             SELECT
+                student_class,
                 problem_id,
-                MAX(problem_title) as problem_title,
-                COUNT(DISTINCT student_id) as total_students,
-                COUNT(*) as total_submissions,
-                SUM(CASE WHEN submit_result = 'success' THEN 1 ELSE 0 END) as successful_submissions,
-                ROUND(AVG(CASE WHEN submit_result = 'success' THEN 1 ELSE 0 END) * 100, 2) as success_rate
-            FROM edu_coding_submissions
-            WHERE problem_id = %s
-        """, (problem_id,))
+                problem_title,
+                attempts,
+                successes,
+                students,
+                solve_seconds,
+                timed_solves
+            FROM edu_class_problem_rollup
+            {class_filter}
+            ORDER BY problem_id
+        """, params)
+        problem_rows = cursor.fetchall()
+
+        cursor.execute(*build_comparison_students_query(class_names))
+        student_rows = cursor.fetchall()
+
+        cursor.execute(f"""
+            SELECT student_class, COUNT(*) as active_days
+            FROM edu_class_day_rollup
+            {class_filter}
+            GROUP BY student_class
+        """, params)
+        active_days = {row['student_class']: row['active_days'] for row in cursor.fetchall()}
+
+        # 未指定班级时对比所有有数据的班级，指定时保持给定的顺序（没有数据的班级各项为0）
+        if class_names:
+            classes = list(dict.fromkeys(class_names))
+        else:
+            classes = sorted({row['student_class'] for row in problem_rows if row['student_class']})
+
+        totals = {name: {
+            'problems': 0, 'attempts': 0, 'successes': 0, 'solve_seconds': 0, 'timed_solves': 0,
+            'students': 0, 'solved': [], 'success_rates': []
+        } for name in classes}
+        problems = {}
+        problem_rates = {}
+        for row in problem_rows:
+            total = totals.get(row['student_class'])
+            if total is None:
+                continue
+            total['problems'] += 1
+            total['attempts'] += row['attempts']
+            total['successes'] += row['successes']
+            total['solve_seconds'] += row['solve_seconds']
+            total['timed_solves'] += row['timed_solves']
+            if row['problem_title'] or row['problem_id'] not in problems:
+                problems[row['problem_id']] = row['problem_title']
+            problem_rates[(row['student_class'], row['problem_id'])] = (
+                round(row['successes'] / row['attempts'] * 100, 2) if row['attempts'] else 0
+            )
 
-        problem_info = cursor.fetchone()
+        for row in student_rows:
+            total = totals.get(row['student_class'])
+            if total is None:
+                continue
+            total['students'] += 1
+            total['solved'].append(row['solved_problems'])
+            total['success_rates'].append(float(row['success_rate'] or 0))
+
+        matrix = []
+        for name in classes:
+            total = totals[name]
+            solved = total['solved']
+            values = {
+                'total_students': total['students'],
+                'total_problems': total['problems'],
+                'total_submissions': total['attempts'],
+                'successful_submissions': total['successes'],
+                'success_rate': round(total['successes'] / total['attempts'] * 100, 2) if total['attempts'] else 0,
+                'avg_solution_time': round(total['solve_seconds'] / total['timed_solves'], 1) if total['timed_solves'] else None,
+                'avg_solved_problems': round(sum(solved) / len(solved), 2) if solved else 0,
+                'max_solved_problems': max(solved, default=0),
+                'avg_student_success_rate': (
+                    round(sum(total['success_rates']) / len(total['success_rates']), 2) if total['success_rates'] else 0
+                ),
+                'active_days': active_days.get(name, 0),
+            }
+            matrix.append([values[metric] for metric in COMPARISON_METRICS])
 
-        # 获取各班级的完成情况
+        problem_ids = list(problems)
+        result = {
+            'classes': classes,
+            'metrics': list(COMPARISON_METRICS),
+            'matrix': matrix,
+            'problems': [{'problem_id': pid, 'problem_title': problems[pid]} for pid in problem_ids],
+            # 班级没有提交过的题目为 null
+            'problem_success_rates': [
+                [problem_rates.get((name, pid)) for pid in problem_ids] for name in classes
+            ]
+        }
+
+        print(json.dumps({
+            'success': True,
+            'data': result,
+            'message': '获取班级对比数据成功' if classes else '没有找到班级编程数据'
+        }, cls=CustomJSONEncoder))
+
+    except mysql.connector.Error as err:
+        print(json.dumps({
+            'success': False,
+            'message': f"获取班级对比数据失败: {str(err)}"
+        }))
+    finally:
+        cursor.close()
+        conn.close()
+
+def get_problem_stats(problem_id):
+    """获取特定题目的提交统计"""
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+
+    try:
+        # 各班级的完成情况直接读取 (班级, 题目) 汇总表
         cursor.execute("""
             SELECT
                 student_class,
-                COUNT(DISTINCT student_id) as students_attempted,
-                COUNT(*) as total_attempts,
-                SUM(CASE WHEN submit_result = 'success' THEN 1 ELSE 0 END) as successful_attempts,
-                ROUND(AVG(CASE WHEN submit_result = 'success' THEN 1 ELSE 0 END) * 100, 2) as success_rate
-            FROM edu_coding_submissions
+                problem_title,
+                students as students_attempted,
+                attempts as total_attempts,
+                successes as successful_attempts,
+                ROUND(successes / attempts * 100, 2) as success_rate
+            FROM edu_class_problem_rollup
             WHERE problem_id = %s
-            GROUP BY student_class
             ORDER BY success_rate DESC
         """, (problem_id,))
 
         class_stats = cursor.fetchall()
 
-        # 获取错误统计
+        # 各班级的学生数分别去重，同一学生可能以多个班级提交，不能相加；
+        # 题目的学生数读取解题统计（每个 (学生, 题目) 一行）
         cursor.execute("""
-            SELECT
-                execution_errors,
-                COUNT(*) as count
-            FROM edu_coding_submissions
-            WHERE problem_id = %s AND submit_result = 'failed' AND execution_errors IS NOT NULL
-            GROUP BY execution_errors
-            ORDER BY count DESC
-            LIMIT 10
+            SELECT COUNT(*) as total_students
+            FROM edu_problem_solving_stats
+            WHERE problem_id = %s
         """, (problem_id,))
+        total_students = cursor.fetchone()['total_students']
+
+        # 题目的提交数由各班级的汇总数据相加得到
+        total_submissions = sum(row['total_attempts'] for row in class_stats)
+        successful_submissions = sum(row['successful_attempts'] for row in class_stats)
+        problem_info = {
+            'problem_id': problem_id,
+            'problem_title': max((row['problem_title'] or '' for row in class_stats), default=None),
+            'total_students': total_students,
+            'total_submissions': total_submissions,
+            'successful_submissions': successful_submissions,
+            'success_rate': round(successful_submissions / total_submissions * 100, 2) if total_submissions else None
+        }
+        for row in class_stats:
+            del row['problem_title']
 
-        common_errors = cursor.fetchall()
+        # 获取错误统计
+        cursor.execute(*build_problem_errors_query(problem_id))
 
-        # 获取解题时间分布
-        cursor.execute("""
-            SELECT
-                TIMESTAMPDIFF(MINUTE, first_view_time, submission_time) as solving_time,
-                COUNT(*) as count
-            FROM edu_coding_submissions
-            WHERE problem_id = %s AND submit_result = 'success'
-            AND first_view_time IS NOT NULL
-            GROUP BY solving_time
-            ORDER BY solving_time
-        """, (problem_id,))
+        common_errors = cursor.fetchall()
 
-        solving_time_distribution = cursor.fetchall()
+        # 获取解题时间分布（对数刻度直方图，提交时增量维护）
+        solving_time = read_histogram(cursor, problem_id)
+        solving_time_distribution = solving_time['buckets']
 
         result = {
             'problem_info': problem_info,
             'class_stats': class_stats,
             'common_errors': common_errors,
-            'solving_time_distribution': solving_time_distribution
+            'solving_time_distribution': solving_time_distribution,
+            'solving_time_summary': {
+                'total': solving_time['total'],
+                'median_minutes': solving_time['median_minutes'],
+                'p90_minutes': solving_time['p90_minutes']
+            }
         }
 
         print(json.dumps({
@@ -484,56 +913,94 @@ def get_problem_stats(problem_id):
         cursor.close()
         conn.close()
 
-def get_students_by_class(class_name):
-    """从编程提交记录中获取班级所有学生"""
+def get_submission_code(submission_id):
+    """获取单次提交的代码"""
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
 
     try:
-        # 从编程提交记录中获取学生
         cursor.execute("""
-            SELECT DISTINCT
+            SELECT
+                id as submission_id,
                 student_id,
-                student_class as class_name
+                problem_id,
+                submit_result,
+                submission_time,
+                code_hash,
+                code_content
             FROM edu_coding_submissions
-            WHERE student_class = %s
-        """, (class_name,))
+            WHERE id = %s
+        """, (submission_id,))
 
-        students_from_submissions = cursor.fetchall()
+        submission = cursor.fetchone()
+        if not submission:
+            print(json.dumps({
+                'success': False,
+                'message': "提交记录不存在"
+            }))
+            return
 
-        # 从解题统计中获取学生
-        cursor.execute("""
-            SELECT DISTINCT
-                s.student_id,
-                MAX(c.student_class) as class_name
-            FROM edu_problem_solving_stats s
-            JOIN edu_coding_submissions c ON s.student_id = c.student_id
-            WHERE c.student_class = %s
-            GROUP BY s.student_id
-        """, (class_name,))
+        attach_code(cursor, [submission])
 
-        students_from_stats = cursor.fetchall()
+        print(json.dumps({
+            'success': True,
+            'data': submission
+        }, cls=CustomJSONEncoder))
+
+    except (mysql.connector.Error, RuntimeError) as err:
+        print(json.dumps({
+            'success': False,
+            'message': f"获取提交代码失败: {str(err)}"
+        }))
+    finally:
+        cursor.close()
+        conn.close()
 
-        # 合并两个来源的学生数据
-        all_students = {}
+def export_submissions(problem_id, class_name=None):
+    """导出题目的全部提交记录（含代码）"""
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
 
-        for student in students_from_submissions:
-            all_students[student['student_id']] = {
+    try:
+        cursor.execute(*build_export_query(problem_id, class_name))
+        submissions = attach_code(cursor, cursor.fetchall())
+
+        print(json.dumps({
+            'success': True,
+            'data': submissions
+        }, cls=CustomJSONEncoder))
+
+    except (mysql.connector.Error, RuntimeError) as err:
+        print(json.dumps({
+            'success': False,
+            'message': f"导出提交记录失败: {str(err)}"
+        }))
+    finally:
+        cursor.close()
+        conn.close()
+
+def get_students_by_class(class_name):
+    """从班级名册中获取班级所有学生"""
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+
+    try:
+        # 按主键前缀读取，包含提交过代码的学生和个人信息中填写该班级的学生
+        cursor.execute("""
+            SELECT student_id, class_name
+            FROM edu_class_members
+            WHERE class_name = %s
+            ORDER BY student_id
+        """, (class_name,))
+
+        students_list = [
+            {
                 'student_id': student['student_id'],
                 'class_name': student['class_name'],
                 'name': student['student_id']  # 使用学号作为名称
             }
-
-        for student in students_from_stats:
-            if student['student_id'] not in all_students:
-                all_students[student['student_id']] = {
-                    'student_id': student['student_id'],
-                    'class_name': student['class_name'],
-                    'name': student['student_id']  # 使用学号作为名称
-                }
-
-        # 转换为列表
-        students_list = list(all_students.values())
+            for student in cursor.fetchall()
+        ]
 
         print(json.dumps({
             'success': True,
@@ -549,6 +1016,11 @@ def get_students_by_class(class_name):
         cursor.close()
         conn.close()
 
+def _payload(arg):
+    """提交数据参数，为 '-' 时从标准输入读取（Node 端通过标准输入传递，不受命令行长度限制）"""
+    return sys.stdin.read() if arg == '-' else arg
+
+
 if __name__ == "__main__":
     # 解析命令行参数
     if len(sys.argv) < 2:
@@ -561,13 +1033,21 @@ if __name__ == "__main__":
     operation = sys.argv[1]
 
     if operation == "submit_data" and len(sys.argv) > 2:
-        submit_data(sys.argv[2])
+        submit_data(_payload(sys.argv[2]))
+    elif operation == "submit_batch" and len(sys.argv) > 2:
+        submit_batch(_payload(sys.argv[2]))
     elif operation == "get_student_stats" and len(sys.argv) > 2:
         get_student_stats(sys.argv[2])
     elif operation == "get_class_stats" and len(sys.argv) > 2:
         get_class_stats(sys.argv[2])
+    elif operation == "compare_classes":
+        compare_classes(sys.argv[2:])
     elif operation == "get_problem_stats" and len(sys.argv) > 2:
         get_problem_stats(sys.argv[2])
+    elif operation == "get_submission_code" and len(sys.argv) > 2:
+        get_submission_code(sys.argv[2])
+    elif operation == "export_submissions" and len(sys.argv) > 2:
+        export_submissions(sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else None)
     elif operation == "get_students_by_class" and len(sys.argv) > 2:
         get_students_by_class(sys.argv[2])
     elif operation == "create_tables":
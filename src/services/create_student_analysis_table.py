@@ -5,26 +5,9 @@
 创建学生AI分析结果表
 """
 
-import sys
 import json
 import mysql.connector
-
-def get_db_connection():
-    """获取数据库连接"""
-    try:
-        conn = mysql.connector.connect(
-            host='localhost',
-            user='root',
-            password='mwYgR7#*X2',
-            database='education_platform'
-        )
-        return conn
-    except mysql.connector.Error as err:
-        print(json.dumps({
-            'success': False,
-            'message': f"数据库连接失败: {str(err)}"
-        }))
-        sys.exit(1)
+from db_pool import get_db_connection
 
 def create_student_analysis_table():
     """创建学生AI分析结果表"""
@@ -0,0 +1,313 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+每日活动汇总
+活动趋势（提交数、成功数、提问数、活跃学生数）读取按 (日期, 班级) 增量维护的汇总表，
+不再对提交记录和问题表按 DATE(...) 分组:
+
+    edu_daily_activity        (日期, 班级): 提交次数、成功次数、提问次数
+    edu_daily_active_sketch   (日期, 班级, 寄存器): 活跃学生的 HyperLogLog 寄存器
+
+活跃学生数是去重计数，按天的精确值不能相加得到一段时间或多个班级的人数。
+每个学生按学号哈希落到 2^PRECISION 个寄存器之一，寄存器保存哈希剩余位的前导零个数+1 的最大值，
+任意日期范围、任意班级的寄存器取最大值即合并后的草图，合并和求 sum(2^-rank) 都在SQL中完成，
+估计值的标准误差约为 1.04 / sqrt(2^PRECISION)（约1.6%），人数较少时使用线性计数，接近精确值。
+草图表只保存非零寄存器，行数不超过当天活跃学生数。
+
+提交由派生表更新（derived_updates.py）计入两张表，提问在 qa_operations.submit_question 中计入提问学生所在的班级
+（没有个人信息的提问计入空班级）。从原始数据重建:
+    python daily_activity.py rebuild
+"""
+
+import sys
+import json
+import math
+import time
+import hashlib
+import mysql.connector
+from db_pool import get_db_connection
+from rollups import submission_day
+
+PRECISION = 12
+REGISTERS = 1 << PRECISION
+HASH_BITS = 64 - PRECISION
+
+# 重建时每条语句写入的寄存器行数
+REBUILD_CHUNK_SIZE = 1000
+
+
+def create_activity_tables(cursor):
+    """创建每日活动汇总表"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS edu_daily_activity (
+            activity_date DATE NOT NULL,
+            student_class VARCHAR(100) NOT NULL,
+            submissions INT NOT NULL DEFAULT 0,
+            successes INT NOT NULL DEFAULT 0,
+            questions INT NOT NULL DEFAULT 0,
+            PRIMARY KEY (activity_date, student_class)
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS edu_daily_active_sketch (
+            activity_date DATE NOT NULL,
+            student_class VARCHAR(100) NOT NULL,
+            register_idx SMALLINT NOT NULL,
+            register_rank TINYINT NOT NULL,
+            PRIMARY KEY (activity_date, student_class, register_idx)
+        )
+    """)
+
+
+def register_of(student_id):
+    """学号对应的 (寄存器编号, 秩)"""
+    value = int.from_bytes(hashlib.sha1(str(student_id).encode('utf-8')).digest()[:8], 'big')
+    rest = value & ((1 << HASH_BITS) - 1)
+    return value >> HASH_BITS, HASH_BITS - rest.bit_length() + 1
+
+
+def estimate(nonzero, inverse_sum):
+    """由非零寄存器个数和 sum(2^-rank)（只含非零寄存器）估计去重人数"""
+    if not nonzero:
+        return 0
+    zeros = REGISTERS - nonzero
+    alpha = 0.7213 / (1 + 1.079 / REGISTERS)
+    raw = alpha * REGISTERS * REGISTERS / (float(inverse_sum) + zeros)
+    if raw <= 2.5 * REGISTERS and zeros:
+        return int(round(REGISTERS * math.log(REGISTERS / zeros)))
+    return int(round(raw))
+
+
+def _sketch_upsert(registers):
+    """{(日期, 班级, 寄存器): 秩} 生成多行upsert语句"""
+    params = {}
+    rows = []
+    for j, ((day, student_class, index), rank) in enumerate(registers.items()):
+        params[f'sk_day_{j}'] = day
+        params[f'sk_class_{j}'] = student_class
+        params[f'sk_idx_{j}'] = index
+        params[f'sk_rank_{j}'] = rank
+        rows.append(f"(%(sk_day_{j})s, %(sk_class_{j})s, %(sk_idx_{j})s, %(sk_rank_{j})s)")
+
+    sql = """
+        INSERT INTO edu_daily_active_sketch (activity_date, student_class, register_idx, register_rank)
+        VALUES
+    """ + ',\n'.join(rows) + """
+        ON DUPLICATE KEY UPDATE register_rank = GREATEST(register_rank, VALUES(register_rank))
+    """
+    return sql, params
+
+
+def build_activity_statements(batch):
+    """生成更新每日活动汇总和活跃学生草图的语句列表 [(sql, params)]"""
+    params = {}
+    groups = {}
+    registers = {}
+
+    for data in batch:
+        student_class = data.get('student_class') or ''
+        day = submission_day(data)
+        group = groups.setdefault((day, student_class), {'submissions': 0, 'successes': 0})
+        group['submissions'] += 1
+        if data.get('submit_result') == 'success':
+            group['successes'] += 1
+
+        index, rank = register_of(data.get('student_id'))
+        key = (day, student_class, index)
+        registers[key] = max(registers.get(key, 0), rank)
+
+    rows = []
+    for j, ((day, student_class), group) in enumerate(groups.items()):
+        params[f'da_day_{j}'] = day
+        params[f'da_class_{j}'] = student_class
+        params[f'da_submissions_{j}'] = group['submissions']
+        params[f'da_successes_{j}'] = group['successes']
+        rows.append(
+            f"(%(da_day_{j})s, %(da_class_{j})s, %(da_submissions_{j})s, %(da_successes_{j})s)"
+        )
+
+    activity_sql = """
+        INSERT INTO edu_daily_activity (activity_date, student_class, submissions, successes)
+        VALUES
+    """ + ',\n'.join(rows) + """
+        ON DUPLICATE KEY UPDATE
+            submissions = submissions + VALUES(submissions),
+            successes = successes + VALUES(successes)
+    """
+    return [(activity_sql, params), _sketch_upsert(registers)]
+
+
+def record_question(cursor, student_class, day=None):
+    """在当前事务中计入一次提问"""
+    cursor.execute("""
+        INSERT INTO edu_daily_activity (activity_date, student_class, questions)
+        VALUES (%s, %s, 1)
+        ON DUPLICATE KEY UPDATE questions = questions + 1
+    """, (day or time.strftime('%Y-%m-%d'), student_class or ''))
+
+
+def _row(row, fields):
+    """兼容字典游标和元组游标"""
+    return row if isinstance(row, dict) else dict(zip(fields, row))
+
+
+def read_trend(cursor, start_date, end_date, class_name=None):
+    """读取 [start_date, end_date] 每天的活动和整个范围内的活跃学生数
+
+    返回 ({日期: {submissions, successes, questions, active_students}}, 范围内活跃学生数)，
+    日期为 'YYYY-MM-DD'，没有活动的日期不在结果中。
+    """
+    params = {'start': start_date, 'end': end_date}
+    class_filter = ""
+    if class_name:
+        class_filter = "AND student_class = %(class_name)s"
+        params['class_name'] = class_name
+
+    days = {}
+
+    def day_entry(value):
+        key = value.strftime('%Y-%m-%d') if hasattr(value, 'strftime') else str(value)
+        return days.setdefault(key, {'submissions': 0, 'successes': 0, 'questions': 0, 'active_students': 0})
+
+    fields = ('activity_date', 'submissions', 'successes', 'questions')
+    cursor.execute(f"""
+        SELECT
+            activity_date,
+            SUM(submissions) as submissions,
+            SUM(successes) as successes,
+            SUM(questions) as questions
+        FROM edu_daily_activity
+        WHERE activity_date BETWEEN %(start)s AND %(end)s {class_filter}
+        GROUP BY activity_date
+    """, params)
+    for row in cursor.fetchall():
+        row = _row(row, fields)
+        entry = day_entry(row['activity_date'])
+        for field in fields[1:]:
+            entry[field] = int(row[field] or 0)
+
+    # 各班级同一寄存器取最大值，即当天合并后的草图
+    fields = ('activity_date', 'nonzero', 'inverse_sum')
+    cursor.execute(f"""
+        SELECT activity_date, COUNT(*) as nonzero, SUM(POW(2, -register_rank)) as inverse_sum
+        FROM (
+            SELECT activity_date, register_idx, MAX(register_rank) as register_rank
+            FROM edu_daily_active_sketch
+            WHERE activity_date BETWEEN %(start)s AND %(end)s {class_filter}
+            GROUP BY activity_date, register_idx
+        ) merged
+        GROUP BY activity_date
+    """, params)
+    for row in cursor.fetchall():
+        row = _row(row, fields)
+        day_entry(row['activity_date'])['active_students'] = estimate(row['nonzero'], row['inverse_sum'])
+
+    fields = ('nonzero', 'inverse_sum')
+    cursor.execute(f"""
+        SELECT COUNT(*) as nonzero, SUM(POW(2, -register_rank)) as inverse_sum
+        FROM (
+            SELECT register_idx, MAX(register_rank) as register_rank
+            FROM edu_daily_active_sketch
+            WHERE activity_date BETWEEN %(start)s AND %(end)s {class_filter}
+            GROUP BY register_idx
+        ) merged
+    """, params)
+    row = _row(cursor.fetchone(), fields)
+    return days, estimate(row['nonzero'], row['inverse_sum'])
+
+
+def rebuild():
+    """从提交记录和问题表重建每日活动汇总"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    started = time.time()
+
+    try:
+        # 先计入待更新派生表的提交，重建之后不会再次计入（derived_updates 依赖本模块，延迟导入）
+        from derived_updates import drain
+        drain()
+
+        create_activity_tables(cursor)
+        cursor.execute("DELETE FROM edu_daily_activity")
+        cursor.execute("DELETE FROM edu_daily_active_sketch")
+
+        cursor.execute("""
+            INSERT INTO edu_daily_activity (activity_date, student_class, submissions, successes)
+            SELECT
+                DATE(submission_time),
+                COALESCE(student_class, ''),
+                COUNT(*),
+                SUM(CASE WHEN submit_result = 'success' THEN 1 ELSE 0 END)
+            FROM edu_coding_submissions
+            WHERE submission_time IS NOT NULL
+            GROUP BY DATE(submission_time), COALESCE(student_class, '')
+        """)
+        activity_rows = cursor.rowcount
+
+        # 提问按提问学生当前所在的班级计入
+        cursor.execute("""
+            INSERT INTO edu_daily_activity (activity_date, student_class, questions)
+            SELECT DATE(q.created_at), COALESCE(p.class_name, ''), COUNT(*)
+            FROM edu_qa_questions q
+            LEFT JOIN edu_profiles_student p ON p.email = q.email
+            GROUP BY DATE(q.created_at), COALESCE(p.class_name, '')
+            ON DUPLICATE KEY UPDATE questions = VALUES(questions)
+        """)
+
+        # 寄存器在Python中计算，与写入时使用同一个哈希
+        cursor.execute("""
+            SELECT DISTINCT DATE(submission_time), COALESCE(student_class, ''), student_id
+            FROM edu_coding_submissions
+            WHERE submission_time IS NOT NULL
+        """)
+        registers = {}
+        for day, student_class, student_id in cursor.fetchall():
+            index, rank = register_of(student_id)
+            key = (day.strftime('%Y-%m-%d'), student_class, index)
+            registers[key] = max(registers.get(key, 0), rank)
+
+        items = list(registers.items())
+        for i in range(0, len(items), REBUILD_CHUNK_SIZE):
+            sql, params = _sketch_upsert(dict(items[i:i + REBUILD_CHUNK_SIZE]))
+            cursor.execute(sql, params)
+
+        conn.commit()
+        print(json.dumps({
+            'success': True,
+            'message': "每日活动汇总重建完成",
+            'data': {
+                'activity_rows': activity_rows,
+                'sketch_rows': len(items),
+                'elapsed_seconds': round(time.time() - started, 2)
+            }
+        }))
+    except mysql.connector.Error as err:
+        conn.rollback()
+        print(json.dumps({
+            'success': False,
+            'message': f"重建每日活动汇总失败: {str(err)}"
+        }))
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(json.dumps({
+            'success': False,
+            'message': "缺少操作参数"
+        }))
+        sys.exit(1)
+
+    operation = sys.argv[1]
+
+    if operation == "rebuild":
+        rebuild()
+    else:
+        print(json.dumps({
+            'success': False,
+            'message': "无效的操作或参数不足"
+        }))
@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+教师看板结果缓存
+教学统计、活动趋势、题目完成情况、学习模式分析每次打开看板都要重新计算。
+这里把这些操作的输出按 (脚本, 操作, 参数) 保存在进程间共享缓存（shared_cache.py）中:
+
+- 新鲜期（DASHBOARD_CACHE_TTL 秒）内直接返回缓存的输出
+- 过了新鲜期、或依赖的数据已变更（失效标签被更新）时，在 DASHBOARD_CACHE_STALE 秒内
+  仍返回旧的输出，同时启动一个后台进程重新计算（stale-while-revalidate），同一个键同时只刷新一次
+  （刷新标记用 shared_cache.add 原子地写入）
+- 超过该时间或没有缓存时同步计算
+
+失效标签: 提交问题（questions）、修改题目（problems）时更新对应标签的版本；提交（submissions）的标签
+由派生表更新（derived_updates.py）每批更新一次，而不是每次提交都更新。
+缓存条目记录计算时各标签的版本，版本不一致即视为过期；但计算后不到 DASHBOARD_CACHE_MIN_REFRESH 秒的
+条目仍按新鲜返回，提交持续不断时每个键最多每隔这么久重新计算一次。
+只缓存成功且完整的输出，命中/未命中/返回旧值/后台刷新的次数记录在共享计数器中。
+
+    python dashboard_cache.py stats
+    python dashboard_cache.py invalidate <标签> [标签 ...]
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import uuid
+import subprocess
+from contextlib import redirect_stdout
+from shared_cache import get_many, set_many, add, delete_many, incr_counter, get_counters
+
+CACHE_TTL = int(os.environ.get('DASHBOARD_CACHE_TTL', '60'))
+STALE_TTL = int(os.environ.get('DASHBOARD_CACHE_STALE', '600'))
+# 标签变更后，计算时间不到该秒数的条目不重新计算
+MIN_REFRESH = int(os.environ.get('DASHBOARD_CACHE_MIN_REFRESH', '10'))
+
+# 失效标签
+TAG_SUBMISSIONS = 'submissions'
+TAG_QUESTIONS = 'questions'
+TAG_PROBLEMS = 'problems'
+
+ENTRY_NAMESPACE = 'dashboard'
+TAG_NAMESPACE = 'dashboard_tags'
+REFRESH_NAMESPACE = 'dashboard_refresh'
+COUNTER_PREFIX = 'dashboard.'
+
+# 标签版本的保存时间要长于缓存条目
+TAG_TTL = 30 * 24 * 3600
+# 后台刷新的互斥时间，刷新进程异常退出后到期自动释放
+REFRESH_LOCK_TTL = 120
+
+# 后台刷新进程通过该环境变量得知要刷新的键
+REFRESH_ENV = 'DASHBOARD_CACHE_REFRESH'
+
+COUNTER_KINDS = ('hit', 'stale', 'miss', 'refresh')
+
+
+def cache_key(script, argv):
+    return json.dumps([os.path.basename(script)] + [str(arg) for arg in argv], ensure_ascii=False)
+
+
+def tag_versions(tags):
+    """标签的当前版本，从未更新过的标签版本为 0"""
+    versions = get_many(TAG_NAMESPACE, tags)
+    return {tag: versions.get(tag, 0) for tag in tags}
+
+
+def bump_tags(*tags):
+    """数据变更后更新标签版本，依赖这些标签的缓存随之过期"""
+    set_many(TAG_NAMESPACE, {tag: uuid.uuid4().hex for tag in tags}, TAG_TTL)
+
+
+def _count(operation, kind):
+    incr_counter(f"{COUNTER_PREFIX}{operation}.{kind}")
+
+
+def _is_cacheable(output):
+    """输出的最后一行JSON是否表示成功且完整（有超时或出错的部分时不缓存）"""
+    lines = [line for line in output.strip().splitlines() if line.strip()]
+    if not lines:
+        return False
+    try:
+        result = json.loads(lines[-1])
+        return result.get('success') is True and not (result.get('incomplete_sections') or result.get('errors'))
+    except (ValueError, AttributeError):
+        return False
+
+
+def _start_refresh(key, script, argv):
+    """启动后台进程重新计算，已有进程在刷新该键时跳过"""
+    if not add(REFRESH_NAMESPACE, key, True, REFRESH_LOCK_TTL):
+        return
+    try:
+        subprocess.Popen(
+            [sys.executable, os.path.abspath(script)] + [str(arg) for arg in argv],
+            cwd=os.path.dirname(os.path.abspath(script)),
+            env=dict(os.environ, **{REFRESH_ENV: key}),
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True
+        )
+    except OSError as err:
+        delete_many(REFRESH_NAMESPACE, [key])
+        print(f"启动缓存刷新进程失败: {str(err)}", file=sys.stderr)
+
+
+def _is_fresh(entry, tags, now):
+    """条目在新鲜期内，且标签未变更或计算后还不到 MIN_REFRESH 秒"""
+    if entry['fresh_until'] <= now:
+        return False
+    return entry['tags'] == tag_versions(tags) or now - entry.get('computed_at', 0) < MIN_REFRESH
+
+
+def cached_output(script, argv, tags, compute, ttl=CACHE_TTL, stale_ttl=STALE_TTL):
+    """带缓存地执行一个输出JSON的操作
+
+    script 为操作所在的脚本（后台刷新时以 argv 作为命令行参数重新执行），
+    compute 为实际执行操作、向标准输出打印结果的函数。
+    """
+    key = cache_key(script, argv)
+    operation = f"{os.path.splitext(os.path.basename(script))[0]}.{argv[0]}"
+    refreshing = os.environ.get(REFRESH_ENV) == key
+
+    if not refreshing:
+        entry = get_many(ENTRY_NAMESPACE, [key]).get(key)
+        if entry:
+            if _is_fresh(entry, tags, time.time()):
+                _count(operation, 'hit')
+            else:
+                _count(operation, 'stale')
+                _start_refresh(key, script, argv)
+            sys.stdout.write(entry['output'])
+            return
+        _count(operation, 'miss')
+    else:
+        _count(operation, 'refresh')
+
+    # 在计算之前读取标签版本，计算期间发生的变更会让这次的结果被视为过期
+    versions = tag_versions(tags)
+    started = time.perf_counter()
+    buffer = io.StringIO()
+    try:
+        with redirect_stdout(buffer):
+            compute()
+    finally:
+        if refreshing:
+            delete_many(REFRESH_NAMESPACE, [key])
+
+    output = buffer.getvalue()
+    if _is_cacheable(output):
+        set_many(ENTRY_NAMESPACE, {key: {
+            'output': output,
+            'tags': versions,
+            'computed_at': time.time(),
+            'fresh_until': time.time() + ttl,
+            'compute_ms': round((time.perf_counter() - started) * 1000, 1)
+        }}, ttl + stale_ttl)
+    sys.stdout.write(output)
+
+
+def get_stats():
+    """输出各操作的缓存命中统计"""
+    counters = get_counters(COUNTER_PREFIX)
+    operations = {}
+    for name, value in counters.items():
+        operation, kind = name[len(COUNTER_PREFIX):].rsplit('.', 1)
+        operations.setdefault(operation, {k: 0 for k in COUNTER_KINDS})[kind] = value
+
+    totals = {kind: sum(op[kind] for op in operations.values()) for kind in COUNTER_KINDS}
+    for stats in list(operations.values()) + [totals]:
+        served = stats['hit'] + stats['stale'] + stats['miss']
+        stats['hit_rate'] = round((stats['hit'] + stats['stale']) / served * 100, 1) if served else 0
+
+    print(json.dumps({
+        'success': True,
+        'data': {
+            'ttl_seconds': CACHE_TTL,
+            'stale_seconds': STALE_TTL,
+            'min_refresh_seconds': MIN_REFRESH,
+            'totals': totals,
+            'operations': operations
+        }
+    }))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(json.dumps({
+            'success': False,
+            'message': "缺少操作参数"
+        }))
+        sys.exit(1)
+
+    operation = sys.argv[1]
+
+    if operation == "stats":
+        get_stats()
+    elif operation == "invalidate" and len(sys.argv) > 2:
+        bump_tags(*sys.argv[2:])
+        print(json.dumps({
+            'success': True,
+            'message': "缓存标签已更新"
+        }))
+    else:
+        print(json.dumps({
+            'success': False,
+            'message': "无效的操作或参数不足"
+        }))
@@ -1,47 +1,22 @@
 import sys
+import csv
 import json
 import mysql.connector
 from mysql.connector import Error
-import hashlib
+import time
 import os
+import secrets
+from db_pool import get_db_connection
+from password_hashing import hash_password, hash_passwords_parallel, verify_password
+from session_tokens import issue_token, decode_token, revoke_token
+from profile_operations import create_tables as create_profile_tables
+from identity_resolution import invalidate as invalidate_identities
+from class_roster import update_profile_member
 
-# 数据库配置
-DB_CONFIG = {
-    'host': 'localhost',
-    'user': 'root',
-    'password': 'mwYgR7#*X2',
-    'database': 'education_platform'  # 更改为统一数据库
-}
-
-def get_db_connection():
-    """建立数据库连接"""
-    try:
-        connection = mysql.connector.connect(**DB_CONFIG)
-        return connection
-    except Error as e:
-        print(json.dumps({'success': False, 'message': f'数据库连接错误: {str(e)}'}))
-        sys.exit(1)
-
-def hash_password(password):
-    """密码加密"""
-    salt = os.urandom(32).hex()
-    key = hashlib.pbkdf2_hmac(
-        'sha256',
-        password.encode('utf-8'),
-        salt.encode('utf-8'),
-        100000
-    ).hex()
-    return salt, key
-
-def verify_password(stored_salt, stored_password, provided_password):
-    """验证密码"""
-    key = hashlib.pbkdf2_hmac(
-        'sha256',
-        provided_password.encode('utf-8'),
-        stored_salt.encode('utf-8'),
-        100000
-    ).hex()
-    return key == stored_password
+# 批量导入时每个事务写入的账号数
+BULK_CHUNK_SIZE = int(os.environ.get('BULK_CHUNK_SIZE', '500'))
+# 名单未提供密码时生成的一次性初始密码的随机字节数
+INITIAL_PASSWORD_BYTES = 9
 
 def init_database():
     """初始化数据库表"""
@@ -110,6 +85,193 @@ def register(user_type, email, password):
         connection.close()
 
 
+def parse_roster(roster_path):
+    """读取CSV或JSON格式的学生名单
+
+    需要的字段: email, student_id, class(或class_name), name
+    可选字段: major, password（未提供时生成随机的一次性初始密码，generated 为True）
+    """
+    with open(roster_path, 'r', encoding='utf-8-sig') as f:
+        content = f.read()
+
+    if content.lstrip().startswith(('[', '{')):
+        rows = json.loads(content)
+        if isinstance(rows, dict):
+            rows = rows.get('students', [])
+    else:
+        rows = list(csv.DictReader(content.splitlines()))
+
+    students = []
+    invalid = []
+    for index, row in enumerate(rows, start=1):
+        row = {str(k).strip().lower(): (str(v).strip() if v is not None else '') for k, v in row.items()}
+        student = {
+            'email': row.get('email', ''),
+            'student_id': row.get('student_id', ''),
+            'class_name': row.get('class') or row.get('class_name', ''),
+            'name': row.get('name', ''),
+            'major': row.get('major') or None,
+            'password': row.get('password'),
+            'generated': False
+        }
+        if not student['email'] or not student['student_id']:
+            invalid.append({'row': index, 'email': student['email'], 'reason': '缺少邮箱或学号'})
+            continue
+        if not student['password']:
+            student['password'] = secrets.token_urlsafe(INITIAL_PASSWORD_BYTES)
+            student['generated'] = True
+        students.append(student)
+    return students, invalid
+
+
+def _insert_student_chunk(cursor, chunk):
+    """在当前事务中批量写入一组学生账号和个人信息，并与 save_profile 一样更新班级名册"""
+    # 已存在的个人信息（账号不存在但个人信息已填写过的邮箱），用于撤销旧的名册班级
+    placeholders = ', '.join(['%s'] * len(chunk))
+    cursor.execute(
+        f"SELECT email, student_id, class_name FROM edu_profiles_student WHERE email IN ({placeholders})",
+        [s['email'] for s in chunk]
+    )
+    previous = {row[0]: (row[1], row[2]) for row in cursor.fetchall()}
+
+    cursor.executemany(
+        "INSERT INTO edu_users_student (email, password, salt) VALUES (%s, %s, %s)",
+        [(s['email'], s['hashed_password'], s['salt']) for s in chunk]
+    )
+    cursor.executemany(
+        """
+        INSERT INTO edu_profiles_student (email, student_id, class_name, major, name)
+        VALUES (%s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            student_id = VALUES(student_id),
+            class_name = VALUES(class_name),
+            major = COALESCE(VALUES(major), major),
+            name = VALUES(name)
+        """,
+        [(s['email'], s['student_id'], s['class_name'], s['major'], s['name']) for s in chunk]
+    )
+
+    for student in chunk:
+        old_student_id, old_class_name = previous.get(student['email'], (None, None))
+        update_profile_member(
+            cursor, student['student_id'], student['class_name'], old_student_id, old_class_name
+        )
+
+
+def _generated_passwords(students):
+    """已写入的学生中使用生成密码的账号及其初始密码"""
+    return [
+        {'email': s['email'], 'student_id': s['student_id'], 'password': s['password']}
+        for s in students if s['generated']
+    ]
+
+
+def bulk_register_students(roster_path):
+    """批量导入学生账号
+
+    密码哈希在进程池中并行计算，账号和个人信息按块使用executemany写入，
+    班级名册在同一事务中更新，每块一个事务。已存在或名单内重复的邮箱记录到duplicates中，不会中断导入。
+    名单未提供密码的学生使用随机生成的初始密码，只在结果的 passwords 中返回这一次。
+    """
+    start = time.perf_counter()
+
+    try:
+        students, invalid = parse_roster(roster_path)
+    except (OSError, ValueError, csv.Error) as e:
+        print(json.dumps({'success': False, 'message': f'读取学生名单失败: {str(e)}'}))
+        return
+
+    init_database()
+    create_profile_tables()
+
+    connection = get_db_connection()
+    cursor = connection.cursor()
+    duplicates = []
+    passwords = []
+    created = 0
+
+    try:
+        # 名单内部重复的邮箱
+        unique_students = []
+        seen = set()
+        for student in students:
+            if student['email'] in seen:
+                duplicates.append({'email': student['email'], 'reason': '名单中重复'})
+            else:
+                seen.add(student['email'])
+                unique_students.append(student)
+
+        # 数据库中已存在的邮箱，按块用 IN 查询
+        existing = set()
+        emails = [s['email'] for s in unique_students]
+        for i in range(0, len(emails), BULK_CHUNK_SIZE):
+            batch = emails[i:i + BULK_CHUNK_SIZE]
+            placeholders = ', '.join(['%s'] * len(batch))
+            cursor.execute(f"SELECT email FROM edu_users_student WHERE email IN ({placeholders})", batch)
+            existing.update(row[0] for row in cursor.fetchall())
+
+        new_students = []
+        for student in unique_students:
+            if student['email'] in existing:
+                duplicates.append({'email': student['email'], 'reason': '该邮箱已被注册'})
+            else:
+                new_students.append(student)
+
+        # 并行计算密码哈希
+        hashed = hash_passwords_parallel([s['password'] for s in new_students])
+        for student, (salt, hashed_password) in zip(new_students, hashed):
+            student['salt'] = salt
+            student['hashed_password'] = hashed_password
+
+        for i in range(0, len(new_students), BULK_CHUNK_SIZE):
+            chunk = new_students[i:i + BULK_CHUNK_SIZE]
+            try:
+                _insert_student_chunk(cursor, chunk)
+                connection.commit()
+                created += len(chunk)
+                passwords.extend(_generated_passwords(chunk))
+                invalidate_identities(
+                    emails=[s['email'] for s in chunk],
+                    student_ids=[s['student_id'] for s in chunk]
+                )
+            except mysql.connector.IntegrityError:
+                # 与并发注册冲突时整块回滚，改为逐条写入以找出冲突的邮箱
+                connection.rollback()
+                for student in chunk:
+                    try:
+                        _insert_student_chunk(cursor, [student])
+                        connection.commit()
+                        created += 1
+                        passwords.extend(_generated_passwords([student]))
+                        invalidate_identities(emails=[student['email']], student_ids=[student['student_id']])
+                    except mysql.connector.IntegrityError:
+                        connection.rollback()
+                        duplicates.append({'email': student['email'], 'reason': '该邮箱已被注册'})
+
+        print(json.dumps({
+            'success': True,
+            'message': f'成功导入 {created} 个学生账号',
+            'data': {
+                'total': len(students) + len(invalid),
+                'created': created,
+                'duplicates': duplicates,
+                'invalid': invalid,
+                'passwords': passwords,
+                'elapsed_seconds': round(time.perf_counter() - start, 3)
+            }
+        }))
+    except Error as e:
+        connection.rollback()
+        print(json.dumps({
+            'success': False,
+            'message': f'批量导入错误: {str(e)}',
+            'data': {'created': created, 'duplicates': duplicates, 'invalid': invalid, 'passwords': passwords}
+        }))
+    finally:
+        cursor.close()
+        connection.close()
+
+
 def login(user_type, email, password):
     """用户登录"""
     connection = get_db_connection()
@@ -128,9 +290,16 @@ def login(user_type, email, password):
         
         if result:
             stored_password, stored_salt = result
-            # 验证密码
+            # 在当前进程中验证密码，同时进行的验证数受工作进程数（或 LOGIN_CONCURRENCY）限制
             if verify_password(stored_salt, stored_password, password):
-                print(json.dumps({'success': True, 'message': '登录成功'}))
+                # 签发会话令牌，后续请求凭令牌校验身份，无需再次验证密码
+                token, expires_at = issue_token(user_type, email)
+                print(json.dumps({
+                    'success': True,
+                    'message': '登录成功',
+                    'token': token,
+                    'expires_at': expires_at
+                }))
                 return
         
         print(json.dumps({'success': False, 'message': '邮箱或密码错误'}))
@@ -142,26 +311,71 @@ def login(user_type, email, password):
         connection.close()
 
 
+def verify_session(token):
+    """校验会话令牌（仅HMAC计算，不访问数据库）"""
+    payload, error = decode_token(token)
+    if payload is None:
+        print(json.dumps({'success': False, 'message': error}))
+        return
+
+    print(json.dumps({
+        'success': True,
+        'session': {
+            'email': payload['sub'],
+            'user_type': payload['typ'],
+            'expires_at': payload['exp']
+        }
+    }))
+
+
+def revoke_session(token):
+    """注销会话令牌"""
+    revoked, error = revoke_token(token)
+    if revoked:
+        print(json.dumps({'success': True, 'message': '已退出登录'}))
+    else:
+        print(json.dumps({'success': False, 'message': error}))
 
 
 if __name__ == "__main__":
-    # 确保数据库表已创建
-    init_database()
-    
+    action = sys.argv[1] if len(sys.argv) > 1 else None
+
+    if action == "init":
+        init_database()
+        print(json.dumps({'success': True, 'message': '数据库初始化成功'}))
+        sys.exit(0)
+
+    if action in ("verify_session", "revoke_session"):
+        if len(sys.argv) < 3:
+            print(json.dumps({'success': False, 'message': '缺少会话令牌'}))
+            sys.exit(1)
+        if action == "verify_session":
+            verify_session(sys.argv[2])
+        else:
+            revoke_session(sys.argv[2])
+        sys.exit(0)
+
+    if action == "bulk_register":
+        if len(sys.argv) < 3:
+            print(json.dumps({'success': False, 'message': '缺少学生名单文件'}))
+            sys.exit(1)
+        bulk_register_students(sys.argv[2])
+        sys.exit(0)
+
     # 解析命令行参数
     if len(sys.argv) < 4:
         print(json.dumps({'success': False, 'message': '参数不足'}))
         sys.exit(1)
-        
-    action = sys.argv[1]
+
     user_type = sys.argv[2]  # student or teacher
     email = sys.argv[3]
     password = sys.argv[4] if len(sys.argv) > 4 else None
-    
+
     if action == "register" and password:
+        # 注册不是高频路径，在此确保数据库表已创建；登录不再每次执行建表语句
+        init_database()
         register(user_type, email, password)
     elif action == "login" and password:
         login(user_type, email, password)
     else:
         print(json.dumps({'success': False, 'message': '无效的操作'}))
-
@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+共享的MySQL数据访问模块
+所有服务脚本通过这里获取数据库连接，连接来自 mysql.connector.pooling 连接池。
+在常驻工作进程（service_worker.py）中，连接池在多次调用之间复用，
+每个池内连接只需完成一次TCP握手和认证。
+
+共享连接池关闭多语句执行（驱动默认开启）: 即使某处拼接进SQL的内容被注入，也无法追加语句。
+提交写入和派生表更新需要在一次往返中发送多条语句，使用单独的写入连接池（get_ingest_connection），
+这些连接只执行由参数化模板生成的语句。
+
+配置通过环境变量读取:
+    DB_HOST, DB_PORT, DB_USER, DB_PASSWORD, DB_NAME
+    DB_PASSWORD 没有默认值，未设置时建立连接失败（数据库无密码时设置为空字符串）
+    DB_POOL_NAME  连接池名称
+    DB_POOL_SIZE  连接池大小，默认8: 查询分区并发（query_fanout.py）最多7个分区各借一个连接，
+                  另留一个连接中止超时的查询
+    DB_INGEST_POOL_SIZE  写入连接池大小，默认2
+"""
+
+import os
+import re
+import sys
+import json
+import threading
+import mysql.connector
+from mysql.connector import pooling
+from mysql.connector.constants import ClientFlag
+from mysql.connector.errors import PoolError
+
+# 数据库连接配置
+DB_CONFIG = {
+    'host': os.environ.get('DB_HOST', 'localhost'),
+    'port': int(os.environ.get('DB_PORT', '3306')),
+    'user': os.environ.get('DB_USER', 'root'),
+    'password': os.environ.get('DB_PASSWORD'),
+    'database': os.environ.get('DB_NAME', 'education_platform')
+}
+
+POOL_NAME = os.environ.get('DB_POOL_NAME', 'edu_pool')
+POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', '8'))
+INGEST_POOL_SIZE = int(os.environ.get('DB_INGEST_POOL_SIZE', '2'))
+
+# 共享连接池的连接不允许多语句，写入连接池的连接允许
+SHARED_CONFIG = dict(DB_CONFIG, client_flags=[-ClientFlag.MULTI_STATEMENTS])
+INGEST_CONFIG = dict(DB_CONFIG, client_flags=[ClientFlag.MULTI_STATEMENTS])
+
+_pools = {}
+_pool_lock = threading.Lock()
+
+# 连接池统计: hits为从池中借出的连接，misses为池不可用或已耗尽时新建的独立连接；
+# 查询分区在多个线程中同时借连接，计数在锁内更新
+_stats_lock = threading.Lock()
+_stats = {
+    'hits': 0,
+    'misses': 0,
+    'reconnects': 0
+}
+
+
+def _get_pool(name, size, config):
+    """延迟创建连接池"""
+    if name not in _pools:
+        with _pool_lock:
+            if name not in _pools:
+                _pools[name] = pooling.MySQLConnectionPool(
+                    pool_name=name,
+                    pool_size=size,
+                    pool_reset_session=True,
+                    **config
+                )
+    return _pools[name]
+
+
+def _count(kind):
+    with _stats_lock:
+        _stats[kind] += 1
+
+
+def _check_connection(conn):
+    """借出前检查连接是否可用，断开时自动重连"""
+    try:
+        conn.ping(reconnect=False)
+    except mysql.connector.Error:
+        _count('reconnects')
+        conn.reconnect(attempts=1, delay=0)
+
+
+def check_password():
+    """未设置 DB_PASSWORD 时抛出 mysql.connector.Error，不使用仓库中的默认密码连接"""
+    if DB_CONFIG['password'] is None:
+        raise mysql.connector.errors.InterfaceError(msg="未设置 DB_PASSWORD 环境变量")
+
+
+def _borrow(name, size, config):
+    """从指定连接池借出连接，池已耗尽时临时建立独立连接"""
+    check_password()
+    try:
+        conn = _get_pool(name, size, config).get_connection()
+    except PoolError:
+        # 连接池已耗尽，临时建立独立连接
+        _count('misses')
+        return mysql.connector.connect(**config)
+
+    _count('hits')
+    try:
+        _check_connection(conn)
+    except mysql.connector.Error:
+        conn.close()
+        raise
+    return conn
+
+
+def get_connection():
+    """获取数据库连接（不允许多语句），失败时抛出 mysql.connector.Error
+
+    调用方使用完后照常调用 conn.close()，池内连接会被归还到连接池。
+    """
+    return _borrow(POOL_NAME, POOL_SIZE, SHARED_CONFIG)
+
+
+def get_ingest_connection():
+    """获取允许多语句的写入连接，只用于提交写入和派生表更新，失败时抛出 mysql.connector.Error"""
+    return _borrow(f"{POOL_NAME}_ingest", INGEST_POOL_SIZE, INGEST_CONFIG)
+
+
+# 语句中的命名参数 %(name)s
+NAMED_PARAM = re.compile(r"%\((\w+)\)s")
+
+
+def execute_statements(cursor, statements, meter=None):
+    """在写入连接上一次往返执行多条语句，返回每条语句的 (结果行, lastrowid)
+
+    各语句的命名参数加上序号前缀后合并，不同语句中同名的参数互不影响。
+    语句只使用命名参数（%(name)s）。
+    某条语句出错时服务器不再执行之后的语句，异常在读取到该语句的结果时抛出。
+    meter 不为None时计入往返次数、语句数和发送的语句字节数。
+    """
+    parts = []
+    params = {}
+    for n, (sql, statement_params) in enumerate(statements):
+        parts.append(NAMED_PARAM.sub(lambda match: f"%(s{n}_{match.group(1)})s", sql))
+        # 只复制语句中用到的参数（多条语句可以共用同一个参数字典）
+        for key in set(NAMED_PARAM.findall(sql)):
+            params[f's{n}_{key}'] = statement_params[key]
+
+    cursor.execute(';\n'.join(parts), params)
+    if meter is not None:
+        meter['round_trips'] += 1
+        meter['statements'] += len(statements)
+        statement = cursor.statement or ''
+        if isinstance(statement, str):
+            statement = statement.encode('utf-8')
+        meter['bytes_sent'] += len(statement)
+
+    results = []
+    while True:
+        rows = cursor.fetchall() if cursor.with_rows else None
+        results.append((rows, cursor.lastrowid))
+        if len(results) == len(statements) or not cursor.nextset():
+            break
+    return results
+
+
+def get_db_connection(ingest=False):
+    """建立数据库连接，失败时输出错误信息并退出；ingest 为True时使用写入连接"""
+    try:
+        return get_ingest_connection() if ingest else get_connection()
+    except mysql.connector.Error as err:
+        print(json.dumps({
+            'success': False,
+            'message': f"数据库连接失败: {str(err)}"
+        }))
+        sys.exit(1)
+
+
+def get_pool_stats():
+    """获取连接池统计信息"""
+    with _stats_lock:
+        stats = dict(_stats)
+    return {
+        'pool_name': POOL_NAME,
+        'pool_size': POOL_SIZE,
+        'pool_created': POOL_NAME in _pools,
+        'hits': stats['hits'],
+        'misses': stats['misses'],
+        'reconnects': stats['reconnects']
+    }
@@ -0,0 +1,278 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+派生表更新
+提交写入（coding_data.submit_data / submit_batch）只执行两条语句: 写入提交记录
+（代码原文和错误指纹直接存在提交记录中，derived = 0）和更新解题统计。
+其余派生表在提交之后按提交ID顺序分批补上:
+
+    edu_code_blobs        代码原文移入代码块表，提交记录改为只保存 code_hash
+    edu_error_signatures  错误签名的出现次数
+    汇总表（rollups.py）、解题用时直方图、班级名册、每日活动汇总、分位数草图、活跃位图
+
+每批在一个事务中读取并锁定 derived = 0 的记录（FOR UPDATE SKIP LOCKED，多个进程可以同时运行），
+读取首次解出信息后，在一次往返中执行全部派生表语句并把这些记录标记为 derived = 1，
+派生表和标记一起提交，每条提交只会计入一次。一次运行计入了提交时，更新一次看板缓存的
+submissions 失效标签（dashboard_cache.py），而不是每次提交都更新。
+
+学生数去重和首次解出按提交ID判断（见 rollups.py、quantile_sketches.py）。
+只处理写入超过 INGEST_DERIVE_DELAY 秒的记录，让ID更小、仍在写入事务中的提交先提交。
+Node 端在提交之后定时触发 run（config.js 的 INGEST_DERIVE_INTERVAL_MS）。
+各派生表的 rebuild 先调用 drain 计入全部待更新的记录，避免重建之后再次计入。
+
+    python derived_updates.py run [每批行数]
+    python derived_updates.py status
+
+环境变量:
+    INGEST_DERIVE_DELAY       只处理写入超过该秒数的提交，默认2
+    INGEST_DERIVE_BATCH_SIZE  每批行数，默认500
+"""
+
+import os
+import sys
+import json
+import time
+import mysql.connector
+from datetime import datetime
+from db_pool import get_db_connection, get_ingest_connection, execute_statements
+from code_blobs import build_blob_insert
+from error_signatures import build_signature_upsert
+from rollups import build_rollup_statements
+from solving_histograms import build_histogram_upsert
+from class_roster import build_roster_statements
+from daily_activity import build_activity_statements
+from quantile_sketches import build_first_solve_query, first_solves, build_sketch_upsert
+from activity_bitmaps import build_bitmap_upsert
+from dashboard_cache import bump_tags, TAG_SUBMISSIONS
+
+DERIVE_DELAY = int(os.environ.get('INGEST_DERIVE_DELAY', '2'))
+DERIVE_BATCH_SIZE = int(os.environ.get('INGEST_DERIVE_BATCH_SIZE', '500'))
+
+# 并发的派生表更新在汇总表的同一行上互相等待时可能死锁，回滚后重新读取这一批
+ER_LOCK_DEADLOCK = 1213
+DEADLOCK_RETRIES = 2
+
+# 与提交数据中的时间格式一致，汇总表按前10位取日期
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def build_pending_query(batch_size, delay):
+    """按ID顺序读取并锁定一批待更新派生表的提交"""
+    sql = """
+        SELECT
+            id, student_class, student_id, problem_id, problem_title, code_content,
+            submit_result, execution_errors, first_view_time, submission_time
+        FROM edu_coding_submissions
+        WHERE derived = 0 AND ingested_at <= NOW() - INTERVAL %(delay)s SECOND
+        ORDER BY id
+        LIMIT %(limit)s
+        FOR UPDATE SKIP LOCKED
+    """
+    return sql, {'delay': delay, 'limit': batch_size}
+
+
+def as_batch(rows):
+    """把读取到的提交记录转换为与提交数据相同格式的批次（时间为字符串）"""
+    batch = []
+    for row in rows:
+        data = dict(row)
+        for key in ('first_view_time', 'submission_time'):
+            if isinstance(data.get(key), datetime):
+                data[key] = data[key].strftime(TIME_FORMAT)
+        batch.append(data)
+    return batch
+
+
+def build_mark_statements(batch):
+    """生成写入代码块、回填 code_hash 并把这批提交标记为 derived = 1 的语句列表 [(sql, params)]
+
+    code_content 已经为NULL的记录（已被 code_blobs.py migrate 迁移）保留原有的 code_hash。
+    批次中的提交时间都有值时附带时间范围，分区表只查找相关月份的分区。
+    """
+    statements = []
+    params = {}
+    cases = []
+    codes = [data for data in batch if data.get('code_content') is not None]
+    if codes:
+        blob_sql, blob_params, hashes = build_blob_insert([data['code_content'] for data in codes])
+        statements.append((blob_sql, blob_params))
+        for i, (data, digest) in enumerate(zip(codes, hashes)):
+            params[f'dm_code_id_{i}'] = data['id']
+            params[f'dm_hash_{i}'] = digest
+            cases.append(f"WHEN %(dm_code_id_{i})s THEN %(dm_hash_{i})s")
+
+    ids = []
+    for i, data in enumerate(batch):
+        params[f'dm_id_{i}'] = data['id']
+        ids.append(f"%(dm_id_{i})s")
+
+    time_filter = ""
+    times = [data.get('submission_time') for data in batch]
+    if all(times):
+        params['dm_from'] = min(times)
+        params['dm_to'] = max(times)
+        time_filter = " AND submission_time >= %(dm_from)s AND submission_time <= %(dm_to)s"
+
+    code_hash = f"CASE id {' '.join(cases)} ELSE code_hash END" if cases else "code_hash"
+    statements.append((f"""
+        UPDATE edu_coding_submissions
+        SET code_hash = {code_hash}, code_content = NULL, derived = 1
+        WHERE id IN ({', '.join(ids)}){time_filter}
+    """, params))
+    return statements
+
+
+def build_derived_statements(batch, solves):
+    """生成更新全部派生表的语句列表 [(sql, params)]
+
+    batch 为 as_batch 转换后的提交（按 id 升序），solves 为其中的首次解出。
+    """
+    statements = build_mark_statements(batch)
+
+    signature_sql, signature_params, _ = build_signature_upsert(
+        [data.get('execution_errors') for data in batch]
+    )
+    if signature_sql:
+        statements.append((signature_sql, signature_params))
+
+    statements.extend(build_rollup_statements(batch, solves))
+
+    histogram_sql, histogram_params = build_histogram_upsert(batch)
+    if histogram_sql:
+        statements.append((histogram_sql, histogram_params))
+
+    statements.extend(build_roster_statements(batch))
+    statements.extend(build_activity_statements(batch))
+
+    sketch_sql, sketch_params = build_sketch_upsert(batch, solves)
+    if sketch_sql:
+        statements.append((sketch_sql, sketch_params))
+
+    bitmap_sql, bitmap_params = build_bitmap_upsert(batch)
+    if bitmap_sql:
+        statements.append((bitmap_sql, bitmap_params))
+    return statements
+
+
+def _derive_batch(conn, cursor, batch_size, delay, meter):
+    """更新一批提交的派生表并提交事务，返回这一批的提交数"""
+    for attempt in range(DEADLOCK_RETRIES + 1):
+        try:
+            cursor.execute(*build_pending_query(batch_size, delay))
+            batch = as_batch(cursor.fetchall())
+            meter['round_trips'] += 1
+            if not batch:
+                conn.commit()
+                return 0
+
+            solves = {}
+            solve_sql, solve_params = build_first_solve_query(batch)
+            if solve_sql:
+                cursor.execute(solve_sql, solve_params)
+                solves = first_solves(batch, cursor.fetchall())
+                meter['round_trips'] += 1
+
+            execute_statements(cursor, build_derived_statements(batch, solves), meter)
+            conn.commit()
+            meter['round_trips'] += 1
+            return len(batch)
+        except mysql.connector.Error as err:
+            conn.rollback()
+            if err.errno != ER_LOCK_DEADLOCK or attempt == DEADLOCK_RETRIES:
+                raise
+
+
+def drain(batch_size=DERIVE_BATCH_SIZE, delay=0):
+    """计入全部待更新的提交，返回 (提交数, 开销计数)，失败时抛出 mysql.connector.Error"""
+    conn = get_ingest_connection()
+    cursor = conn.cursor(dictionary=True)
+    meter = {'round_trips': 0, 'statements': 0, 'bytes_sent': 0}
+    derived = 0
+
+    try:
+        while True:
+            count = _derive_batch(conn, cursor, batch_size, delay, meter)
+            derived += count
+            if count < batch_size:
+                break
+    finally:
+        cursor.close()
+        conn.close()
+
+    if derived:
+        bump_tags(TAG_SUBMISSIONS)
+    return derived, meter
+
+
+def run(batch_size=DERIVE_BATCH_SIZE):
+    """更新写入超过 INGEST_DERIVE_DELAY 秒的提交的派生表"""
+    started = time.time()
+    try:
+        derived, meter = drain(batch_size, DERIVE_DELAY)
+        print(json.dumps({
+            'success': True,
+            'data': {
+                'derived': derived,
+                'round_trips': meter['round_trips'],
+                'statements': meter['statements'],
+                'bytes_sent': meter['bytes_sent'],
+                'elapsed_seconds': round(time.time() - started, 2)
+            }
+        }))
+    except mysql.connector.Error as err:
+        print(json.dumps({
+            'success': False,
+            'message': f"更新派生表失败: {str(err)}"
+        }))
+
+
+def get_status():
+    """输出待更新派生表的提交数和最早一条的等待时间"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute("""
+            SELECT COUNT(*), TIMESTAMPDIFF(SECOND, MIN(ingested_at), NOW())
+            FROM edu_coding_submissions
+            WHERE derived = 0
+        """)
+        pending, lag = cursor.fetchone()
+        print(json.dumps({
+            'success': True,
+            'data': {
+                'pending': pending,
+                'lag_seconds': lag or 0,
+                'delay_seconds': DERIVE_DELAY
+            }
+        }))
+    except mysql.connector.Error as err:
+        print(json.dumps({
+            'success': False,
+            'message': f"获取派生表更新状态失败: {str(err)}"
+        }))
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(json.dumps({
+            'success': False,
+            'message': "缺少操作参数"
+        }))
+        sys.exit(1)
+
+    operation = sys.argv[1]
+
+    if operation == "run":
+        run(int(sys.argv[2]) if len(sys.argv) > 2 else DERIVE_BATCH_SIZE)
+    elif operation == "status":
+        get_status()
+    else:
+        print(json.dumps({
+            'success': False,
+            'message': "无效的操作或参数不足"
+        }))
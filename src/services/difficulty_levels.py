@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+题目难度映射表
+题目难度历史上有 'easy'/'medium'/'hard' 和 '1'/'2'/'3' 两种写法，
+统计查询通过 edu_difficulty_levels 把原始值映射为统一的等级（排序用）和中文名称，
+不再在每个查询和Python代码里重复 CASE 判断。表中没有的原始值等级为 OTHER_LEVEL，名称为原始值。
+"""
+
+# (原始值, 等级, 名称)
+DIFFICULTY_LEVELS = [
+    ('easy', 1, '简单'),
+    ('1', 1, '简单'),
+    ('medium', 2, '中等'),
+    ('2', 2, '中等'),
+    ('hard', 3, '困难'),
+    ('3', 3, '困难'),
+]
+
+OTHER_LEVEL = 4
+
+
+def create_difficulty_table(cursor):
+    """创建难度映射表并写入默认映射，已有的映射不覆盖"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS edu_difficulty_levels (
+            raw_value VARCHAR(20) NOT NULL PRIMARY KEY,
+            level TINYINT NOT NULL,
+            label VARCHAR(20) NOT NULL
+        )
+    """)
+    cursor.executemany("""
+        INSERT IGNORE INTO edu_difficulty_levels (raw_value, level, label)
+        VALUES (%s, %s, %s)
+    """, DIFFICULTY_LEVELS)
+
+
+def level_columns(problem_alias='p', level_alias='dl'):
+    """查询中归一化后的 (等级, 名称) 表达式，配合 LEFT JOIN edu_difficulty_levels 使用"""
+    return (
+        f"COALESCE({level_alias}.level, {OTHER_LEVEL})",
+        f"COALESCE({level_alias}.label, {problem_alias}.difficulty)"
+    )
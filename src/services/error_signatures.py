@@ -0,0 +1,265 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+错误签名模块
+提交写入时把 execution_errors 归一化为规范错误信息，计算指纹ID存入提交记录的 error_fingerprint，
+规范信息和出现次数由派生表更新（derived_updates.py）计入 edu_error_signatures 表。
+"常见错误"类的统计按指纹分组（有索引），不再对 TEXT 字段做 SUBSTRING_INDEX 分组。
+
+归一化规则:
+    - 取第一条包含 error/错误 的行（没有时取第一条非空行）
+    - 去掉源文件路径、临时文件名（cppRuntime 使用UUID命名）和行号列号
+    - 引号中的标识符替换为 '<id>'，十六进制地址替换为 <addr>
+同一种编译错误在不同学生、不同行号上得到相同的指纹。
+
+为已有提交记录补充指纹:
+    python error_signatures.py backfill [每批行数]
+"""
+
+import re
+import sys
+import json
+import time
+import hashlib
+import mysql.connector
+from db_pool import get_db_connection
+
+MAX_MESSAGE_LENGTH = 255
+BACKFILL_BATCH_SIZE = 1000
+
+_UUID_RE = re.compile(r'[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}')
+_PATH_RE = re.compile(r'(?:[A-Za-z]:)?(?:[\w.\-<>~]*[\\/])+[\w.\-<>]+|<uuid>\.\w+')
+_LOCATION_RE = re.compile(r'<file>(?::\d+)+:?')
+_HEX_RE = re.compile(r'0x[0-9a-fA-F]+')
+_QUOTED_RE = re.compile(r"[‘'`][A-Za-z_][\w:<>,*& ]*[’'`]")
+_SPACE_RE = re.compile(r'\s+')
+_ERROR_LINE_RE = re.compile(r'error|错误', re.IGNORECASE)
+
+
+def create_signature_table(cursor):
+    """创建错误签名表"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS edu_error_signatures (
+            fingerprint BIGINT NOT NULL PRIMARY KEY,
+            canonical_message VARCHAR(255) NOT NULL,
+            category VARCHAR(20) NOT NULL,
+            occurrences INT NOT NULL DEFAULT 0,
+            first_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX (category)
+        )
+    """)
+
+
+def ensure_fingerprint_column(cursor):
+    """为提交表补充 error_fingerprint 列及按学生、题目、班级分组用的索引"""
+    cursor.execute("""
+        SELECT COUNT(*)
+        FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE()
+        AND TABLE_NAME = 'edu_coding_submissions'
+        AND COLUMN_NAME = 'error_fingerprint'
+    """)
+    if cursor.fetchone()[0] == 0:
+        cursor.execute("""
+            ALTER TABLE edu_coding_submissions
+            ADD COLUMN error_fingerprint BIGINT NULL AFTER execution_errors,
+            ADD INDEX idx_student_error (student_id, submit_result, error_fingerprint),
+            ADD INDEX idx_problem_error (problem_id, submit_result, error_fingerprint),
+            ADD INDEX idx_class_error (student_class, error_fingerprint, student_id, problem_id)
+        """)
+
+
+def normalize_error(execution_errors):
+    """归一化错误信息，返回 (规范信息, 分类)，没有错误时返回 (None, None)"""
+    if not execution_errors or not execution_errors.strip():
+        return None, None
+
+    lines = [line.strip() for line in execution_errors.splitlines() if line.strip()]
+    line = next((l for l in lines if _ERROR_LINE_RE.search(l)), lines[0])
+
+    message = _UUID_RE.sub('<uuid>', line)
+    message = _PATH_RE.sub('<file>', message)
+    message = _LOCATION_RE.sub('', message)
+    message = _HEX_RE.sub('<addr>', message)
+    message = _QUOTED_RE.sub("'<id>'", message)
+    message = _SPACE_RE.sub(' ', message).strip(' :')[:MAX_MESSAGE_LENGTH]
+
+    if re.search(r'\berror:', line):
+        category = 'compile'
+    elif '进程退出' in line or 'terminate' in line or 'Segmentation' in line:
+        category = 'runtime'
+    else:
+        category = 'other'
+    return message or '<empty>', category
+
+
+def fingerprint(canonical_message):
+    """规范信息的指纹ID（63位整数，可直接存入有符号BIGINT）"""
+    digest = hashlib.sha1(canonical_message.encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') >> 1
+
+
+def build_signature_upsert(errors):
+    """生成写入一组错误签名的语句
+
+    返回 (sql, params, fingerprints)，fingerprints 与输入顺序一致，没有错误的位置为None；
+    一组中没有任何错误时 sql 为None，调用方可以跳过这条语句。
+    """
+    fingerprints = []
+    signatures = {}
+    for errors_text in errors:
+        message, category = normalize_error(errors_text)
+        if message is None:
+            fingerprints.append(None)
+            continue
+        fp = fingerprint(message)
+        fingerprints.append(fp)
+        entry = signatures.setdefault(fp, [message, category, 0])
+        entry[2] += 1
+
+    if not signatures:
+        return None, {}, fingerprints
+
+    rows = []
+    params = {}
+    for i, (fp, (message, category, count)) in enumerate(signatures.items()):
+        params[f'sig_fp_{i}'] = fp
+        params[f'sig_message_{i}'] = message
+        params[f'sig_category_{i}'] = category
+        params[f'sig_count_{i}'] = count
+        rows.append(f"(%(sig_fp_{i})s, %(sig_message_{i})s, %(sig_category_{i})s, %(sig_count_{i})s)")
+
+    sql = """
+        INSERT INTO edu_error_signatures (fingerprint, canonical_message, category, occurrences)
+        VALUES
+    """ + ',\n'.join(rows) + """
+        ON DUPLICATE KEY UPDATE
+            occurrences = occurrences + VALUES(occurrences),
+            last_seen = CURRENT_TIMESTAMP
+    """
+    return sql, params, fingerprints
+
+
+def build_top_errors_query(conditions, params, limit, message_alias='error_type',
+                           count_alias='occurrence_count', aggregates=None):
+    """最常见错误的查询，返回 (sql, params)
+
+    先按写入时计算的错误指纹分组取出现次数最多的 limit 个指纹，再关联规范错误信息。
+    conditions 为提交记录表上的过滤条件（AND 连接），aggregates 为额外的 {别名: 聚合表达式}。
+    """
+    aggregates = aggregates or {}
+    where = ' AND '.join(list(conditions) + ['error_fingerprint IS NOT NULL'])
+    inner_columns = ''.join(f", {expression} as {alias}" for alias, expression in aggregates.items())
+    outer_columns = ''.join(f", t.{alias}" for alias in aggregates)
+    sql = f"""
+        SELECT es.canonical_message as {message_alias}, t.{count_alias}{outer_columns}
+        FROM (
+            SELECT error_fingerprint, COUNT(*) as {count_alias}{inner_columns}
+            FROM edu_coding_submissions
+            WHERE {where}
+            GROUP BY error_fingerprint
+            ORDER BY {count_alias} DESC
+            LIMIT {int(limit)}
+        ) t
+        JOIN edu_error_signatures es ON es.fingerprint = t.error_fingerprint
+        ORDER BY t.{count_alias} DESC
+    """
+    return sql, params
+
+
+def build_student_errors_query(student_id, limit=5):
+    """学生最常见的错误类型（学生详情、学习数据、学习行为分析共用）"""
+    return build_top_errors_query(["student_id = %s", "submit_result = 'failed'"], (student_id,), limit)
+
+
+def backfill(batch_size=BACKFILL_BATCH_SIZE):
+    """为没有指纹的已有提交记录计算并写入错误指纹，可以重复执行"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    started = time.time()
+    updated = 0
+
+    try:
+        create_signature_table(cursor)
+        ensure_fingerprint_column(cursor)
+        conn.commit()
+
+        last_id = 0
+        while True:
+            cursor.execute("""
+                SELECT id, execution_errors
+                FROM edu_coding_submissions
+                WHERE id > %s AND error_fingerprint IS NULL
+                AND execution_errors IS NOT NULL AND execution_errors != ''
+                ORDER BY id
+                LIMIT %s
+            """, (last_id, batch_size))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+
+            sql, params, fingerprints = build_signature_upsert([row[1] for row in rows])
+            if sql:
+                cursor.execute(sql, params)
+                cursor.executemany(
+                    "UPDATE edu_coding_submissions SET error_fingerprint = %s WHERE id = %s",
+                    [(fp, row[0]) for fp, row in zip(fingerprints, rows) if fp is not None]
+                )
+            conn.commit()
+
+            updated += sum(1 for fp in fingerprints if fp is not None)
+            last_id = rows[-1][0]
+
+        cursor.execute("SELECT COUNT(*) FROM edu_error_signatures")
+        signature_count = cursor.fetchone()[0]
+
+        print(json.dumps({
+            'success': True,
+            'message': "错误指纹补充完成",
+            'data': {
+                'updated_rows': updated,
+                'total_signatures': signature_count,
+                'elapsed_seconds': round(time.time() - started, 2)
+            }
+        }))
+    except mysql.connector.Error as err:
+        conn.rollback()
+        print(json.dumps({
+            'success': False,
+            'message': f"补充错误指纹失败: {str(err)}",
+            'updated_rows': updated
+        }))
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(json.dumps({
+            'success': False,
+            'message': "缺少操作参数"
+        }))
+        sys.exit(1)
+
+    operation = sys.argv[1]
+
+    if operation == "backfill":
+        backfill(int(sys.argv[2]) if len(sys.argv) > 2 else BACKFILL_BATCH_SIZE)
+    elif operation == "normalize" and len(sys.argv) > 2:
+        message, category = normalize_error(sys.argv[2])
+        print(json.dumps({
+            'success': True,
+            'data': {
+                'canonical_message': message,
+                'category': category,
+                'fingerprint': str(fingerprint(message)) if message else None
+            }
+        }, ensure_ascii=False))
+    else:
+        print(json.dumps({
+            'success': False,
+            'message': "无效的操作或参数不足"
+        }))
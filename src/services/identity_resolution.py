@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+身份解析
+待办事项、学生活动、问答、学生详情等需要把邮箱或学号转换为姓名/邮箱/班级，
+原来每条记录查一次个人信息表。这里把一批邮箱或学号去重后用一条 IN 查询解析，
+结果放入进程间共享缓存（shared_cache.py），各服务进程共用；没有个人信息的键也缓存，
+有效期较短。个人信息变更时由 profile_operations / db_operations 调用 invalidate 使缓存失效。
+
+身份字段: email, student_id, name, class_name, major, role('student' 或 'teacher')
+"""
+
+import mysql.connector
+from shared_cache import get_many, set_many, delete_many
+
+# 缓存命名空间
+EMAIL_NAMESPACE = 'identity_email'
+STUDENT_NAMESPACE = 'identity_student'
+
+IDENTITY_TTL = 600
+# 没有个人信息的键缓存较短时间，新建的个人信息很快可见
+MISSING_TTL = 60
+
+IN_CHUNK_SIZE = 500
+
+# 表不存在（个人信息表还未创建时按没有个人信息处理）
+ER_NO_SUCH_TABLE = 1146
+
+STUDENT_FIELDS = ('email', 'student_id', 'name', 'class_name', 'major')
+TEACHER_FIELDS = ('email', 'name')
+
+
+def _fetch(cursor, sql, fields, values):
+    """按块执行 IN 查询，返回字典行的列表（兼容元组游标）"""
+    rows = []
+    for i in range(0, len(values), IN_CHUNK_SIZE):
+        chunk = values[i:i + IN_CHUNK_SIZE]
+        placeholders = ', '.join(['%s'] * len(chunk))
+        try:
+            cursor.execute(sql.format(placeholders=placeholders), tuple(chunk))
+        except mysql.connector.Error as err:
+            if err.errno != ER_NO_SUCH_TABLE:
+                raise
+            return rows
+        for row in cursor.fetchall():
+            rows.append(row if isinstance(row, dict) else dict(zip(fields, row)))
+    return rows
+
+
+def _student_identity(row):
+    identity = {field: row.get(field) for field in STUDENT_FIELDS}
+    identity['role'] = 'student'
+    return identity
+
+
+def _resolve(cursor, namespace, values, load):
+    """先查共享缓存，未命中的键交给 load(cursor, 键列表) 查询并写回缓存"""
+    values = [value for value in dict.fromkeys(values) if value]
+    if not values:
+        return {}
+
+    cached = get_many(namespace, values)
+    resolved = {value: cached[str(value)] or None for value in values if str(value) in cached}
+
+    missing = [value for value in values if value not in resolved]
+    if missing:
+        loaded = load(cursor, missing)
+        found = {value: loaded[value] for value in missing if value in loaded}
+        set_many(namespace, found, IDENTITY_TTL)
+        set_many(namespace, {value: {} for value in missing if value not in loaded}, MISSING_TTL)
+        for value in missing:
+            resolved[value] = loaded.get(value)
+    return resolved
+
+
+def _load_by_email(cursor, emails):
+    """学生个人信息中找不到的邮箱再查教师个人信息"""
+    loaded = {}
+    for row in _fetch(cursor, """
+        SELECT email, student_id, name, class_name, major
+        FROM edu_profiles_student
+        WHERE email IN ({placeholders})
+    """, STUDENT_FIELDS, emails):
+        loaded[row['email']] = _student_identity(row)
+
+    rest = [email for email in emails if email not in loaded]
+    if rest:
+        for row in _fetch(cursor, """
+            SELECT email, name
+            FROM edu_profiles_teacher
+            WHERE email IN ({placeholders})
+        """, TEACHER_FIELDS, rest):
+            loaded[row['email']] = {
+                'email': row['email'],
+                'student_id': None,
+                'name': row['name'],
+                'class_name': None,
+                'major': None,
+                'role': 'teacher'
+            }
+    return loaded
+
+
+def _load_by_student_id(cursor, student_ids):
+    loaded = {}
+    for row in _fetch(cursor, """
+        SELECT email, student_id, name, class_name, major
+        FROM edu_profiles_student
+        WHERE student_id IN ({placeholders})
+    """, STUDENT_FIELDS, student_ids):
+        loaded.setdefault(row['student_id'], _student_identity(row))
+    return loaded
+
+
+def resolve_emails(cursor, emails):
+    """批量解析邮箱，返回 {邮箱: 身份}，没有个人信息的邮箱对应 None"""
+    return _resolve(cursor, EMAIL_NAMESPACE, emails, _load_by_email)
+
+
+def resolve_student_ids(cursor, student_ids):
+    """批量解析学号，返回 {学号: 身份}，没有个人信息的学号对应 None"""
+    return _resolve(cursor, STUDENT_NAMESPACE, [str(s) for s in student_ids if s], _load_by_student_id)
+
+
+def display_name(identity, fallback):
+    """身份的显示名称，没有个人信息或姓名为空时使用 fallback"""
+    if identity and identity.get('name'):
+        return identity['name']
+    return fallback
+
+
+def email_fallback(email):
+    """没有个人信息时显示邮箱的用户名部分"""
+    return email.split('@')[0] if email else email
+
+
+def invalidate(emails=(), student_ids=()):
+    """个人信息变更后使相关缓存失效"""
+    delete_many(EMAIL_NAMESPACE, emails)
+    delete_many(STUDENT_NAMESPACE, student_ids)
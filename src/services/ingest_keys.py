@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+提交幂等键
+每条提交可以带一个 idempotency_key（本地预写日志为每条记录生成一个UUID）。
+写入提交时在同一事务中登记幂等键，同一个键再次写入时跳过，
+预写日志重放、网络超时后的重试都不会产生重复的提交记录和重复的统计。
+
+清理过期的幂等键（默认保留30天，远长于预写日志的积压时间）:
+    python ingest_keys.py prune [保留天数]
+"""
+
+import sys
+import json
+import mysql.connector
+from db_pool import get_db_connection
+
+KEY_RETENTION_DAYS = 30
+
+
+def create_key_table(cursor):
+    """创建幂等键表"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS edu_ingest_keys (
+            idempotency_key VARCHAR(64) NOT NULL PRIMARY KEY,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX (created_at)
+        )
+    """)
+
+
+def batch_keys(batch):
+    """批次中带幂等键的提交的键列表"""
+    return [data['idempotency_key'] for data in batch if data.get('idempotency_key')]
+
+
+def find_existing_keys(cursor, keys):
+    """返回已经写入过的幂等键集合"""
+    if not keys:
+        return set()
+    placeholders = ', '.join(['%s'] * len(keys))
+    cursor.execute(
+        f"SELECT idempotency_key FROM edu_ingest_keys WHERE idempotency_key IN ({placeholders})",
+        tuple(keys)
+    )
+    return {row['idempotency_key'] if isinstance(row, dict) else row[0] for row in cursor.fetchall()}
+
+
+def build_key_insert(keys):
+    """生成登记幂等键的语句，没有键时返回 (None, {})
+
+    使用普通 INSERT: 并发写入同一个键时后到的事务因主键冲突（errno 1062）回滚。
+    """
+    if not keys:
+        return None, {}
+    params = {f'ingest_key_{i}': key for i, key in enumerate(keys)}
+    sql = """
+        INSERT INTO edu_ingest_keys (idempotency_key)
+        VALUES
+    """ + ',\n'.join(f"(%(ingest_key_{i})s)" for i in range(len(keys)))
+    return sql, params
+
+
+def prune(days=KEY_RETENTION_DAYS):
+    """删除超过保留天数的幂等键"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    try:
+        create_key_table(cursor)
+        cursor.execute("""
+            DELETE FROM edu_ingest_keys
+            WHERE created_at < NOW() - INTERVAL %s DAY
+        """, (days,))
+        deleted = cursor.rowcount
+        conn.commit()
+        print(json.dumps({
+            'success': True,
+            'message': "过期幂等键清理完成",
+            'deleted': deleted
+        }))
+    except mysql.connector.Error as err:
+        conn.rollback()
+        print(json.dumps({
+            'success': False,
+            'message': f"清理幂等键失败: {str(err)}"
+        }))
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(json.dumps({
+            'success': False,
+            'message': "缺少操作参数"
+        }))
+        sys.exit(1)
+
+    operation = sys.argv[1]
+
+    if operation == "prune":
+        prune(int(sys.argv[2]) if len(sys.argv) > 2 else KEY_RETENTION_DAYS)
+    else:
+        print(json.dumps({
+            'success': False,
+            'message': "无效的操作或参数不足"
+        }))
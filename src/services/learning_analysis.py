@@ -11,9 +11,11 @@ import json
 import io
 import re
 import mysql.connector
-from datetime import datetime, timedelta, date
+from datetime import datetime, date
 from decimal import Decimal
 from openai import OpenAI
+from db_pool import get_db_connection
+from student_detail import build_submission_queries
 
 # 设置标准输出和标准错误的编码为UTF-8
 sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
@@ -30,23 +32,6 @@ class CustomJSONEncoder(json.JSONEncoder):
             return obj.strftime('%Y-%m-%d')
         return super(CustomJSONEncoder, self).default(obj)
 
-def get_db_connection():
-    """获取数据库连接"""
-    try:
-        conn = mysql.connector.connect(
-            host='localhost',
-            user='root',
-            password='mwYgR7#*X2',
-            database='education_platform'
-        )
-        return conn
-    except mysql.connector.Error as err:
-        print(json.dumps({
-            'success': False,
-            'message': f"数据库连接失败: {str(err)}"
-        }))
-        sys.exit(1)
-
 def analyze_behavior(student_id):
     """分析学生学习行为"""
     print(f"开始分析学生学习行为，学生ID: {student_id}", file=sys.stderr)
@@ -64,6 +49,8 @@ def analyze_behavior(student_id):
             return
 
         cursor = conn.cursor(dictionary=True)
+        # 读取提交记录表的查询与学生详情页相同
+        submission_queries = build_submission_queries(student_id)
 
         # 获取学生学习数据
         print(f"查询学生学习统计数据...", file=sys.stderr)
@@ -99,18 +86,7 @@ def analyze_behavior(student_id):
         # 获取学生按难度分类的解题情况
         print(f"查询学生按难度分类的解题情况...", file=sys.stderr)
         try:
-            cursor.execute("""
-                SELECT
-                    p.difficulty,
-                    COUNT(DISTINCT cs.problem_id) as attempted_problems,
-                    SUM(CASE WHEN cs.submit_result = 'success' THEN 1 ELSE 0 END) > 0 as solved_problems,
-                    AVG(ps.time_spent_seconds) as avg_time_spent
-                FROM edu_coding_submissions cs
-                JOIN edu_problems p ON cs.problem_id = p.id
-                LEFT JOIN edu_problem_solving_stats ps ON cs.student_id = ps.student_id AND cs.problem_id = ps.problem_id
-                WHERE cs.student_id = %s
-                GROUP BY p.difficulty
-            """, (student_id,))
+            cursor.execute(*submission_queries['difficulty_stats'])
 
             difficulty_stats = cursor.fetchall()
         except mysql.connector.Error as err:
@@ -120,16 +96,7 @@ def analyze_behavior(student_id):
         # 获取学生常见错误类型
         print(f"查询学生常见错误类型...", file=sys.stderr)
         try:
-            cursor.execute("""
-                SELECT
-                    SUBSTRING_INDEX(execution_errors, '\n', 1) as error_type,
-                    COUNT(*) as occurrence_count
-                FROM edu_coding_submissions
-                WHERE student_id = %s AND submit_result = 'failed' AND execution_errors IS NOT NULL
-                GROUP BY error_type
-                ORDER BY occurrence_count DESC
-                LIMIT 5
-            """, (student_id,))
+            cursor.execute(*submission_queries['error_patterns'])
 
             error_patterns = cursor.fetchall()
         except mysql.connector.Error as err:
@@ -138,19 +105,8 @@ def analyze_behavior(student_id):
 
         # 获取学生最近一周的活动
         print(f"查询学生最近一周的活动...", file=sys.stderr)
-        one_week_ago = (datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d')
-
         try:
-            cursor.execute("""
-                SELECT
-                    DATE(submission_time) as submission_date,
-                    COUNT(*) as submission_count,
-                    SUM(CASE WHEN submit_result = 'success' THEN 1 ELSE 0 END) as successful_count
-                FROM edu_coding_submissions
-                WHERE student_id = %s AND submission_time >= %s
-                GROUP BY DATE(submission_time)
-                ORDER BY submission_date
-            """, (student_id, one_week_ago))
+            cursor.execute(*submission_queries['recent_activity'])
 
             recent_activity = cursor.fetchall()
         except mysql.connector.Error as err:
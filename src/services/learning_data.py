@@ -12,6 +12,8 @@ import io
 import mysql.connector
 from datetime import datetime, timedelta, date
 from decimal import Decimal
+from db_pool import get_db_connection
+from error_signatures import build_student_errors_query
 
 # 设置标准输出和标准错误的编码为UTF-8
 sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
@@ -28,25 +30,51 @@ class CustomJSONEncoder(json.JSONEncoder):
             return obj.strftime('%Y-%m-%d')
         return super(CustomJSONEncoder, self).default(obj)
 
-def get_db_connection():
-    """获取数据库连接"""
-    try:
-        conn = mysql.connector.connect(
-            host='localhost',
-            user='root',
-            password='mwYgR7#*X2',
-            database='education_platform'
-        )
-        return conn
-    except mysql.connector.Error as err:
-        print(json.dumps({
-            'success': False,
-            'message': f"数据库连接失败: {str(err)}"
-        }))
-        sys.exit(1)
+def build_submission_queries(student_id):
+    """学习数据中读取提交记录表的查询 {名称: (sql, params)}
+
+    src/scripts/check_query_plans.py 对同一组查询做执行计划检查。
+    """
+    return {
+        # 学生编程提交统计
+        'submission_stats': ("""
+            SELECT
+                COUNT(*) as total_submissions,
+                SUM(CASE WHEN submit_result = 'success' THEN 1 ELSE 0 END) as successful_submissions,
+                COUNT(DISTINCT problem_id) as total_problems,
+                SUM(CASE WHEN submit_result = 'success' THEN 1 ELSE 0 END) / COUNT(*) * 100 as success_rate
+            FROM edu_coding_submissions
+            WHERE student_id = %s
+        """, (student_id,)),
+        # 学生所有的活动记录（不限制时间范围）
+        'activity_history': ("""
+            SELECT
+                DATE(submission_time) as submission_date,
+                COUNT(*) as submission_count,
+                SUM(CASE WHEN submit_result = 'success' THEN 1 ELSE 0 END) as successful_count
+            FROM edu_coding_submissions
+            WHERE student_id = %s
+            GROUP BY DATE(submission_time)
+            ORDER BY submission_date
+        """, (student_id,)),
+        # 学生按难度分类的解题情况
+        'difficulty_stats': ("""
+            SELECT
+                p.difficulty,
+                COUNT(DISTINCT cs.problem_id) as attempted_problems,
+                SUM(CASE WHEN cs.submit_result = 'success' THEN 1 ELSE 0 END) > 0 as solved_problems
+            FROM edu_coding_submissions cs
+            JOIN edu_problems p ON cs.problem_id = p.id
+            WHERE cs.student_id = %s
+            GROUP BY p.difficulty
+        """, (student_id,)),
+        # 学生常见错误类型
+        'error_patterns': build_student_errors_query(student_id),
+    }
 
 def get_student_data(student_id):
     """获取学生学习数据"""
+    submission_queries = build_submission_queries(student_id)
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
 
@@ -72,15 +100,7 @@ def get_student_data(student_id):
             return
 
         # 获取学生编程提交统计
-        cursor.execute("""
-            SELECT
-                COUNT(*) as total_submissions,
-                SUM(CASE WHEN submit_result = 'success' THEN 1 ELSE 0 END) as successful_submissions,
-                COUNT(DISTINCT problem_id) as total_problems,
-                SUM(CASE WHEN submit_result = 'success' THEN 1 ELSE 0 END) / COUNT(*) * 100 as success_rate
-            FROM edu_coding_submissions
-            WHERE student_id = %s
-        """, (student_id,))
+        cursor.execute(*submission_queries['submission_stats'])
 
         submission_stats = cursor.fetchone()
 
@@ -98,44 +118,17 @@ def get_student_data(student_id):
         problem_stats = cursor.fetchone()
 
         # 获取学生所有的活动记录（不限制时间范围）
-        cursor.execute("""
-            SELECT
-                DATE(submission_time) as submission_date,
-                COUNT(*) as submission_count,
-                SUM(CASE WHEN submit_result = 'success' THEN 1 ELSE 0 END) as successful_count
-            FROM edu_coding_submissions
-            WHERE student_id = %s
-            GROUP BY DATE(submission_time)
-            ORDER BY submission_date
-        """, (student_id,))
+        cursor.execute(*submission_queries['activity_history'])
 
         activity_history = cursor.fetchall()
 
         # 获取学生按难度分类的解题情况
-        cursor.execute("""
-            SELECT
-                p.difficulty,
-                COUNT(DISTINCT cs.problem_id) as attempted_problems,
-                SUM(CASE WHEN cs.submit_result = 'success' THEN 1 ELSE 0 END) > 0 as solved_problems
-            FROM edu_coding_submissions cs
-            JOIN edu_problems p ON cs.problem_id = p.id
-            WHERE cs.student_id = %s
-            GROUP BY p.difficulty
-        """, (student_id,))
+        cursor.execute(*submission_queries['difficulty_stats'])
 
         difficulty_stats = cursor.fetchall()
 
         # 获取学生常见错误类型
-        cursor.execute("""
-            SELECT
-                SUBSTRING_INDEX(execution_errors, '\n', 1) as error_type,
-                COUNT(*) as occurrence_count
-            FROM edu_coding_submissions
-            WHERE student_id = %s AND submit_result = 'failed' AND execution_errors IS NOT NULL
-            GROUP BY error_type
-            ORDER BY occurrence_count DESC
-            LIMIT 5
-        """, (student_id,))
+        cursor.execute(*submission_queries['error_patterns'])
 
         error_patterns = cursor.fetchall()
 
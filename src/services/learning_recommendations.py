@@ -11,6 +11,7 @@ import json
 import mysql.connector
 from datetime import datetime, date
 from decimal import Decimal
+from db_pool import get_db_connection
 
 # 自定义JSON编码器，处理Decimal、datetime和date类型
 class CustomJSONEncoder(json.JSONEncoder):
@@ -23,23 +24,6 @@ class CustomJSONEncoder(json.JSONEncoder):
             return obj.strftime('%Y-%m-%d')
         return super(CustomJSONEncoder, self).default(obj)
 
-def get_db_connection():
-    """获取数据库连接"""
-    try:
-        conn = mysql.connector.connect(
-            host='localhost',
-            user='root',
-            password='mwYgR7#*X2',
-            database='education_platform'
-        )
-        return conn
-    except mysql.connector.Error as err:
-        print(json.dumps({
-            'success': False,
-            'message': f"数据库连接失败: {str(err)}"
-        }))
-        sys.exit(1)
-
 def create_tables():
     """创建必要的数据表"""
     conn = get_db_connection()
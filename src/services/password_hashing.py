@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+密码哈希模块
+登录时的 PBKDF2-SHA256 验证直接在当前进程中计算。登录、注册由 Node 交给密码哈希专用的
+工作进程池执行（HASHING_WORKERS 个，默认为CPU核数），不占用处理其他调用的工作进程，
+server/routes/auth.js 按 LOGIN_CONCURRENCY 限制同时进行的登录数。
+批量导入账号时在一个随调用创建、用完即关闭的进程池中并行计算。
+
+环境变量:
+    PASSWORD_HASH_WORKERS  批量导入时的进程池大小，默认等于CPU核数
+"""
+
+import os
+import hmac
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+PBKDF2_ITERATIONS = 100000
+HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', str(os.cpu_count() or 1)))
+
+# 少于该数量的密码直接在当前进程计算，启动进程池的开销不值得
+PARALLEL_THRESHOLD = 32
+
+
+def _derive_key(password, salt):
+    """计算PBKDF2-SHA256密钥（十六进制）"""
+    return hashlib.pbkdf2_hmac(
+        'sha256',
+        password.encode('utf-8'),
+        salt.encode('utf-8'),
+        PBKDF2_ITERATIONS
+    ).hex()
+
+
+def hash_password(password):
+    """密码加密"""
+    salt = os.urandom(32).hex()
+    return salt, _derive_key(password, salt)
+
+
+def verify_password(stored_salt, stored_password, provided_password):
+    """验证密码，使用常数时间比较"""
+    key = _derive_key(provided_password, stored_salt)
+    return hmac.compare_digest(key, stored_password)
+
+
+def hash_passwords_parallel(passwords):
+    """批量加密密码，结果顺序与输入一致
+
+    进程池只在本次调用中存在，大小不超过 HASH_WORKERS；
+    密码较少或进程池不可用时在当前进程计算。
+    """
+    if len(passwords) < PARALLEL_THRESHOLD or HASH_WORKERS <= 1:
+        return [hash_password(password) for password in passwords]
+    try:
+        with ProcessPoolExecutor(max_workers=HASH_WORKERS) as executor:
+            return list(executor.map(hash_password, passwords, chunksize=16))
+    except (BrokenProcessPool, OSError):
+        return [hash_password(password) for password in passwords]
@@ -2,26 +2,8 @@ import mysql.connector
 import json
 import sys
 from datetime import datetime
-
-# 数据库连接配置
-DB_CONFIG = {
-    'host': 'localhost',
-    'user': 'root',
-    'password': 'mwYgR7#*X2',
-    'database': 'education_platform'
-}
-
-def get_db_connection():
-    """建立数据库连接"""
-    try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        return conn
-    except mysql.connector.Error as err:
-        print(json.dumps({
-            'success': False,
-            'message': f"数据库连接失败: {str(err)}"
-        }))
-        sys.exit(1)
+from db_pool import get_db_connection
+from dashboard_cache import bump_tags, TAG_PROBLEMS
 
 def create_tables():
     """创建必要的数据表"""
@@ -70,6 +52,7 @@ def submit_problem(email, title, difficulty, content, input_example, output_exam
         """, (email, title, difficulty, content, input_example, output_example, chapter_id))
 
         conn.commit()
+        bump_tags(TAG_PROBLEMS)
         print(json.dumps({
             'success': True,
             'message': "题目提交成功"
@@ -139,6 +122,7 @@ def update_problem(problem_id, title, difficulty, content, input_example, output
         """, (title, difficulty, content, input_example, output_example, chapter_id, problem_id))
 
         conn.commit()
+        bump_tags(TAG_PROBLEMS)
         print(json.dumps({
             'success': True,
             'message': "题目更新成功"
@@ -163,6 +147,7 @@ def delete_problem(problem_id):
         """, (problem_id,))
 
         conn.commit()
+        bump_tags(TAG_PROBLEMS)
         print(json.dumps({
             'success': True,
             'message': "题目删除成功"
@@ -2,26 +2,9 @@ import mysql.connector
 import json
 import sys
 from datetime import datetime
-
-# 数据库连接配置
-DB_CONFIG = {
-    'host': 'localhost',
-    'user': 'root',
-    'password': 'mwYgR7#*X2',
-    'database': 'education_platform'
-}
-
-def get_db_connection():
-    """建立数据库连接"""
-    try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        return conn
-    except mysql.connector.Error as err:
-        print(json.dumps({
-            'success': False,
-            'message': f"数据库连接失败: {str(err)}"
-        }))
-        sys.exit(1)
+from db_pool import get_db_connection
+from class_roster import create_roster_tables, update_profile_member
+from identity_resolution import invalidate as invalidate_identities
 
 def create_tables():
     """创建用户个人信息表"""
@@ -40,7 +23,8 @@ def create_tables():
                 name VARCHAR(100),
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                INDEX (email)
+                INDEX (email),
+                INDEX idx_student_id (student_id)
             )
         """)
 
@@ -61,6 +45,9 @@ def create_tables():
             )
         """)
 
+        # 班级名册
+        create_roster_tables(cursor)
+
         conn.commit()
         return True
     except mysql.connector.Error as err:
@@ -85,7 +72,7 @@ def save_profile(email, student_id, class_name, major, name):
     try:
         # 检查是否已经存在该用户的记录
         cursor.execute("""
-            SELECT id FROM edu_profiles_student WHERE email = %s
+            SELECT id, student_id, class_name FROM edu_profiles_student WHERE email = %s
         """, (email,))
 
         result = cursor.fetchone()
@@ -104,7 +91,14 @@ def save_profile(email, student_id, class_name, major, name):
                 VALUES (%s, %s, %s, %s, %s)
             """, (email, student_id, class_name, major, name))
 
+        # 同一事务中更新班级名册
+        update_profile_member(
+            cursor, student_id, class_name,
+            result[1] if result else None, result[2] if result else None
+        )
+
         conn.commit()
+        invalidate_identities(emails=[email], student_ids=[student_id, result[1] if result else None])
         print(json.dumps({
             'success': True,
             'message': "个人信息保存成功"
@@ -192,6 +186,7 @@ def save_teacher_profile(email, teacher_id, department, title, name, phone, offi
             """, (email, teacher_id, department, title, name, phone, office_location))
 
         conn.commit()
+        invalidate_identities(emails=[email])
         print(json.dumps({
             'success': True,
             'message': "教师个人信息保存成功"
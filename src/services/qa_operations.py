@@ -2,26 +2,10 @@ import mysql.connector
 import json
 import sys
 from datetime import datetime
-
-# 数据库连接配置
-DB_CONFIG = {
-    'host': 'localhost',
-    'user': 'root',
-    'password': 'mwYgR7#*X2',
-    'database': 'education_platform'
-}
-
-def get_db_connection():
-    """建立数据库连接"""
-    try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        return conn
-    except mysql.connector.Error as err:
-        print(json.dumps({
-            'success': False,
-            'message': f"数据库连接失败: {str(err)}"
-        }))
-        sys.exit(1)
+from db_pool import get_db_connection
+from identity_resolution import resolve_emails, display_name, email_fallback
+from dashboard_cache import bump_tags, TAG_QUESTIONS
+from daily_activity import create_activity_tables, record_question
 
 def create_tables():
     """创建必要的数据表"""
@@ -43,6 +27,9 @@ def create_tables():
                 follow_ups JSON  
             )
         """)
+
+        # 每日活动汇总（提问次数）
+        create_activity_tables(cursor)
         
         conn.commit()
     except mysql.connector.Error as err:
@@ -65,8 +52,13 @@ def submit_question(email, title, content):
             INSERT INTO edu_qa_questions (email, title, content)
             VALUES (%s, %s, %s)
         """, (email, title, content))
+
+        # 同一事务中计入提问学生所在班级的每日提问次数
+        identity = resolve_emails(cursor, [email]).get(email)
+        record_question(cursor, identity['class_name'] if identity else None)
         
         conn.commit()
+        bump_tags(TAG_QUESTIONS)
         print(json.dumps({
             'success': True,
             'message': "问题提交成功"
@@ -93,9 +85,13 @@ def get_student_questions(email):
         """)
         
         questions = cursor.fetchall()
+
+        # 一次解析所有提问者的姓名
+        identities = resolve_emails(cursor, [q['email'] for q in questions])
         
         # 转换时间戳为字符串，以便JSON序列化
         for q in questions:
+            q['author_name'] = display_name(identities.get(q['email']), email_fallback(q['email']))
             q['created_at'] = q['created_at'].isoformat()
             if q['answered_at']:
                 q['answered_at'] = q['answered_at'].isoformat()
@@ -132,9 +128,13 @@ def get_all_questions():
         """)
         
         questions = cursor.fetchall()
+
+        # 一次解析所有提问者的姓名
+        identities = resolve_emails(cursor, [q['email'] for q in questions])
         
         # 转换时间戳为字符串
         for q in questions:
+            q['author_name'] = display_name(identities.get(q['email']), email_fallback(q['email']))
             q['created_at'] = q['created_at'].strftime('%Y-%m-%d %H:%M:%S')
             if q['answered_at']:
                 q['answered_at'] = q['answered_at'].strftime('%Y-%m-%d %H:%M:%S')
@@ -0,0 +1,376 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+解题次数和解题用时的分位数草图
+题目难度原来只用 AVG(attempts_until_success)、AVG(time_spent_seconds) 衡量，
+少数把页面开着好几个小时的学生会把平均值拉高，而且每次都要扫描解题统计表。
+这里为每个 (题目, 班级) 维护两个可合并的分位数草图，学生首次解出题目后由派生表更新（derived_updates.py）计入:
+
+    attempts        解出前的提交次数（与 attempts_until_success 一致）
+    solve_seconds   解题用时（与 time_spent_seconds 一致，只统计大于0的值）
+
+草图采用相对误差的对数分桶（DDSketch）: 值 x 落在桶 ceil(log_GAMMA(x))，
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)，
+任意分位数的估计值与真实值的相对误差不超过 RELATIVE_ACCURACY（1%）。
+桶计数可以直接相加，因此:
+- 写入是按 (指标, 题目, 班级, 桶) 累加计数的多行upsert，和汇总表一样可以并发执行
+- 题目维度由各班级的同一个桶相加得到，班级维度由各题目相加得到，合并都在SQL中完成
+- 只保存非零的桶，一个草图最多几百行（1秒到一周约700个桶），读取开销与提交数量无关
+
+首次解出的取值来自解题统计: 解出后 attempts_until_success 和 time_spent_seconds 不再变化，
+因此提交写入之后再读取也能得到首次解出时的值。首次解出的那条提交是该 (学生, 题目) ID 最小的
+成功提交，与重建时的判断相同。
+
+    python quantile_sketches.py get_problem <题目ID> [班级名称]
+    python quantile_sketches.py get_class <班级名称>
+    python quantile_sketches.py rebuild
+"""
+
+import sys
+import json
+import math
+import time
+import mysql.connector
+from db_pool import get_db_connection
+
+RELATIVE_ACCURACY = 0.01
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+LOG_GAMMA = math.log(GAMMA)
+
+METRIC_ATTEMPTS = 'attempts'
+METRIC_SOLVE_SECONDS = 'solve_seconds'
+METRICS = (METRIC_ATTEMPTS, METRIC_SOLVE_SECONDS)
+
+QUANTILES = (('p50', 0.5), ('p90', 0.9), ('p99', 0.99))
+
+# 表不存在
+ER_NO_SUCH_TABLE = 1146
+
+# 重建时每条语句写入的桶数
+REBUILD_CHUNK_SIZE = 1000
+
+
+def create_sketch_table(cursor):
+    """创建分位数草图表"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS edu_quantile_sketch (
+            metric VARCHAR(20) NOT NULL,
+            problem_id VARCHAR(50) NOT NULL,
+            student_class VARCHAR(100) NOT NULL,
+            bucket SMALLINT NOT NULL,
+            count INT NOT NULL DEFAULT 0,
+            PRIMARY KEY (metric, problem_id, student_class, bucket),
+            INDEX idx_class_bucket (metric, student_class, bucket)
+        )
+    """)
+
+
+def bucket_of(value):
+    """正数所在的桶"""
+    return int(math.ceil(math.log(value) / LOG_GAMMA))
+
+
+def bucket_value(bucket):
+    """桶的代表值，与桶内任意值的相对误差不超过 RELATIVE_ACCURACY"""
+    return 2 * GAMMA ** bucket / (GAMMA + 1)
+
+
+def _sketch_upsert(counts):
+    """{(指标, 题目, 班级, 桶): 计数} 生成多行upsert语句"""
+    params = {}
+    rows = []
+    for j, ((metric, problem_id, student_class, bucket), count) in enumerate(counts.items()):
+        params[f'qs_metric_{j}'] = metric
+        params[f'qs_problem_{j}'] = problem_id
+        params[f'qs_class_{j}'] = student_class
+        params[f'qs_bucket_{j}'] = bucket
+        params[f'qs_count_{j}'] = count
+        rows.append(
+            f"(%(qs_metric_{j})s, %(qs_problem_{j})s, %(qs_class_{j})s, %(qs_bucket_{j})s, %(qs_count_{j})s)"
+        )
+
+    sql = """
+        INSERT INTO edu_quantile_sketch (metric, problem_id, student_class, bucket, count)
+        VALUES
+    """ + ',\n'.join(rows) + """
+        ON DUPLICATE KEY UPDATE count = count + VALUES(count)
+    """
+    return sql, params
+
+
+def _add(counts, metric, problem_id, student_class, value):
+    if value is None or value <= 0:
+        return
+    key = (metric, problem_id, student_class, bucket_of(value))
+    counts[key] = counts.get(key, 0) + 1
+
+
+def build_first_solve_query(batch):
+    """读取批次中有成功提交的 (学生, 题目) 的首次解出信息，批次中没有成功提交时返回 (None, {})
+
+    每行为 (学号, 题目ID, 解出前的提交次数, 解题用时, 首次成功提交的ID)。
+    """
+    pairs = list(dict.fromkeys(
+        (data.get('student_id'), data.get('problem_id'))
+        for data in batch if data.get('submit_result') == 'success'
+    ))
+    if not pairs:
+        return None, {}
+
+    params = {}
+    rows = []
+    for j, (student_id, problem_id) in enumerate(pairs):
+        params[f'qs_sid_{j}'] = student_id
+        params[f'qs_pid_{j}'] = problem_id
+        rows.append(f"(%(qs_sid_{j})s, %(qs_pid_{j})s)")
+
+    sql = """
+        SELECT
+            ps.student_id, ps.problem_id, ps.attempts_until_success, ps.time_spent_seconds,
+            (
+                SELECT MIN(s.id) FROM edu_coding_submissions s
+                WHERE s.student_id = ps.student_id AND s.problem_id = ps.problem_id
+                AND s.submit_result = 'success'
+            ) as first_success
+        FROM edu_problem_solving_stats ps
+        WHERE ps.is_solved = TRUE AND (ps.student_id, ps.problem_id) IN (""" + ', '.join(rows) + """)
+    """
+    return sql, params
+
+
+def first_solves(batch, rows):
+    """批次中首次解出的提交 {批次中的位置: (解出前的提交次数, 解题用时)}
+
+    batch 中的提交需要带 id，rows 为 build_first_solve_query 的结果（字典或元组）。
+    """
+    solved = {}
+    for row in rows:
+        if not isinstance(row, dict):
+            row = dict(zip(('student_id', 'problem_id', 'attempts_until_success',
+                            'time_spent_seconds', 'first_success'), row))
+        solved[row['first_success']] = (
+            int(row['attempts_until_success'] or 0),
+            int(row['time_spent_seconds'] or 0)
+        )
+
+    return {
+        index: solved[data['id']]
+        for index, data in enumerate(batch)
+        if data.get('submit_result') == 'success' and data.get('id') in solved
+    }
+
+
+def build_sketch_upsert(batch, solves):
+    """生成计入批次中首次解出的草图语句，没有首次解出时返回 (None, {})
+
+    solves 为 first_solves 的结果，首次解出记在该次提交所在的班级下。
+    """
+    counts = {}
+    for index, (attempts, seconds) in solves.items():
+        data = batch[index]
+        student_class = data.get('student_class') or ''
+        _add(counts, METRIC_ATTEMPTS, data.get('problem_id'), student_class, attempts)
+        _add(counts, METRIC_SOLVE_SECONDS, data.get('problem_id'), student_class, seconds)
+
+    if not counts:
+        return None, {}
+    return _sketch_upsert(counts)
+
+
+def quantiles(buckets, integer=False):
+    """由 [(桶, 计数)]（按桶升序）估算 {count, p50, p90, p99}，integer 为真时取整（提交次数）"""
+    total = sum(count for _, count in buckets)
+    result = {'count': total}
+    for name, q in QUANTILES:
+        if total == 0:
+            result[name] = None
+            continue
+        rank = q * (total - 1)
+        seen = 0
+        for bucket, count in buckets:
+            seen += count
+            if seen > rank:
+                value = bucket_value(bucket)
+                result[name] = int(round(value)) if integer else round(value, 2)
+                break
+    return result
+
+
+def _summaries(rows, group_fields):
+    """按 group_fields 分组的 (指标, 桶, 计数) 行汇总为 {分组: {指标: 分位数}}"""
+    groups = {}
+    for row in rows:
+        group = tuple(row[field] for field in group_fields)
+        groups.setdefault(group, {}).setdefault(row['metric'], []).append((row['bucket'], int(row['count'])))
+
+    return {
+        group: {
+            metric: quantiles(sorted(metrics.get(metric, [])), integer=metric == METRIC_ATTEMPTS)
+            for metric in METRICS
+        }
+        for group, metrics in groups.items()
+    }
+
+
+def read_quantiles(cursor, problem_id=None, class_name=None):
+    """读取一个题目（可限定班级）或一个班级（所有题目合并）的分位数 {指标: {count, p50, p90, p99}}"""
+    conditions = []
+    params = {}
+    if problem_id is not None:
+        conditions.append("problem_id = %(problem_id)s")
+        params['problem_id'] = problem_id
+    if class_name:
+        conditions.append("student_class = %(class_name)s")
+        params['class_name'] = class_name
+    where = ("WHERE " + " AND ".join(conditions)) if conditions else ""
+
+    cursor.execute(f"""
+        SELECT metric, bucket, SUM(count) as count
+        FROM edu_quantile_sketch
+        {where}
+        GROUP BY metric, bucket
+    """, params)
+    summary = _summaries(cursor.fetchall(), ())
+    return summary.get((), {metric: quantiles([]) for metric in METRICS})
+
+
+def read_problem_quantiles(cursor, class_name=None):
+    """一次读取所有题目（可限定班级）的分位数 {题目ID: {指标: {count, p50, p90, p99}}}"""
+    params = {}
+    where = ""
+    if class_name:
+        where = "WHERE student_class = %(class_name)s"
+        params['class_name'] = class_name
+
+    cursor.execute(f"""
+        SELECT problem_id, metric, bucket, SUM(count) as count
+        FROM edu_quantile_sketch
+        {where}
+        GROUP BY problem_id, metric, bucket
+    """, params)
+    return {group[0]: summary for group, summary in _summaries(cursor.fetchall(), ('problem_id',)).items()}
+
+
+def get_quantiles(problem_id=None, class_name=None):
+    """输出题目或班级的解题次数、解题用时分位数"""
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+
+    try:
+        try:
+            data = read_quantiles(cursor, problem_id, class_name)
+        except mysql.connector.Error as err:
+            if err.errno != ER_NO_SUCH_TABLE:
+                raise
+            # 首次使用时创建草图表，历史数据通过 rebuild 导入
+            create_sketch_table(cursor)
+            conn.commit()
+            data = read_quantiles(cursor, problem_id, class_name)
+
+        print(json.dumps({
+            'success': True,
+            'data': {
+                'problem_id': problem_id,
+                'class_name': class_name,
+                'relative_accuracy': RELATIVE_ACCURACY,
+                **data
+            }
+        }))
+    except mysql.connector.Error as err:
+        print(json.dumps({
+            'success': False,
+            'message': f"获取分位数失败: {str(err)}"
+        }))
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def rebuild():
+    """从解题统计重建分位数草图
+
+    每条解出记录归入该学生在这道题上第一次成功提交时所在的班级，与提交写入时的归类一致
+    （学生以多个班级提交过同一题目时只计一次）。
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    started = time.time()
+
+    try:
+        # 先计入待更新派生表的提交，重建之后不会再次计入（derived_updates 依赖本模块，延迟导入）
+        from derived_updates import drain
+        drain()
+
+        create_sketch_table(cursor)
+        cursor.execute("DELETE FROM edu_quantile_sketch")
+
+        cursor.execute("""
+            SELECT m.student_class, ps.problem_id, ps.attempts_until_success, ps.time_spent_seconds
+            FROM edu_problem_solving_stats ps
+            JOIN (
+                SELECT s.student_id, s.problem_id, COALESCE(s.student_class, '') as student_class
+                FROM edu_coding_submissions s
+                JOIN (
+                    SELECT MIN(id) as first_success
+                    FROM edu_coding_submissions
+                    WHERE submit_result = 'success'
+                    GROUP BY student_id, problem_id
+                ) f ON f.first_success = s.id
+            ) m ON m.student_id = ps.student_id AND m.problem_id = ps.problem_id
+            WHERE ps.is_solved = TRUE
+        """)
+        counts = {}
+        solved = 0
+        for student_class, problem_id, attempts, seconds in cursor.fetchall():
+            solved += 1
+            _add(counts, METRIC_ATTEMPTS, problem_id, student_class, attempts)
+            _add(counts, METRIC_SOLVE_SECONDS, problem_id, student_class, seconds)
+
+        items = list(counts.items())
+        for i in range(0, len(items), REBUILD_CHUNK_SIZE):
+            sql, params = _sketch_upsert(dict(items[i:i + REBUILD_CHUNK_SIZE]))
+            cursor.execute(sql, params)
+
+        conn.commit()
+        print(json.dumps({
+            'success': True,
+            'message': "分位数草图重建完成",
+            'data': {
+                'solved_records': solved,
+                'sketch_rows': len(items),
+                'elapsed_seconds': round(time.time() - started, 2)
+            }
+        }))
+    except mysql.connector.Error as err:
+        conn.rollback()
+        print(json.dumps({
+            'success': False,
+            'message': f"重建分位数草图失败: {str(err)}"
+        }))
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(json.dumps({
+            'success': False,
+            'message': "缺少操作参数"
+        }))
+        sys.exit(1)
+
+    operation = sys.argv[1]
+
+    if operation == "get_problem" and len(sys.argv) > 2:
+        get_quantiles(sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else None)
+    elif operation == "get_class" and len(sys.argv) > 2:
+        get_quantiles(None, sys.argv[2])
+    elif operation == "rebuild":
+        rebuild()
+    else:
+        print(json.dumps({
+            'success': False,
+            'message': "无效的操作或参数不足"
+        }))
@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+查询分区并发执行
+学习模式分析、学生详情等报告由多段互不依赖的聚合查询组成，依次执行时耗时是各段之和。
+这里把每段作为一个分区放到线程池中，各自从连接池借一个连接并发执行，耗时由最慢的一段决定。
+线程池随每次调用创建，大小为分区数，最多为连接池大小减1（留一个连接给 KILL QUERY），
+超出的分区排队等待。默认的连接池大小（8）足够现有报告的所有分区（最多7个）同时执行。
+
+每个分区有超时时间，从该分区开始执行时计算（排队时间不计入）: 到时未完成的分区返回默认值
+并标记为超时，不阻塞整个报告。分区的连接上设置 max_execution_time，超时后再对该连接执行
+KILL QUERY，让服务器中止查询、分区线程及时结束并归还连接（MariaDB 等不支持该变量时忽略）。
+分区出错时同样返回默认值，并附带错误信息。
+
+分区函数不写标准输出和标准错误: 在常驻工作进程中，超时分区的线程可能在本次调用返回后才结束，
+此时写入的内容会混进下一次调用的输出。超时和错误信息由 run_sections 在调用线程中输出。
+
+环境变量:
+    QUERY_SECTION_TIMEOUT   分区超时时间（秒），默认5
+"""
+
+import os
+import sys
+import math
+import time
+import mysql.connector
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from db_pool import get_connection, POOL_SIZE
+
+SECTION_TIMEOUT = float(os.environ.get('QUERY_SECTION_TIMEOUT', '5'))
+
+TIMEOUT = 'timeout'
+
+
+def _run_section(name, func, timeout, started):
+    """在独立的连接上执行一个分区，开始时在 started 中登记 (开始时间, 连接ID)"""
+    conn = get_connection()
+    cursor = conn.cursor(dictionary=True)
+    started[name] = (time.monotonic(), getattr(conn, 'connection_id', None))
+    try:
+        try:
+            cursor.execute("SET SESSION max_execution_time = %s", (int(timeout * 1000),))
+        except mysql.connector.Error:
+            pass
+        return func(cursor)
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def _kill_queries(connection_ids):
+    """中止超时分区的连接上正在执行的查询，失败时只能等待 max_execution_time 生效"""
+    if not connection_ids:
+        return
+    try:
+        conn = get_connection()
+    except mysql.connector.Error:
+        return
+    cursor = conn.cursor()
+    try:
+        for connection_id in connection_ids:
+            try:
+                cursor.execute("KILL QUERY %s", (int(connection_id),))
+            except mysql.connector.Error:
+                pass
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def run_sections(sections, timeout=SECTION_TIMEOUT):
+    """并发执行互不依赖的查询分区
+
+    sections 为 [(名称, 函数, 默认值)]，函数接收一个字典游标并返回该分区的结果。
+    返回 (结果 {名称: 值}, 未完成的分区 {名称: 'timeout' 或错误信息})，
+    未完成的分区在结果中为默认值。
+    """
+    if not sections:
+        return {}, {}
+
+    workers = max(1, min(len(sections), POOL_SIZE - 1))
+    # 排队的分区要等前面的分区结束才开始，整体最长等待按轮数计算
+    overall_deadline = time.monotonic() + timeout * math.ceil(len(sections) / workers)
+    started = {}
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='query-fanout')
+    try:
+        futures = {
+            name: executor.submit(_run_section, name, func, timeout, started)
+            for name, func, _ in sections
+        }
+
+        pending = set(futures)
+        timed_out = set()
+        while pending:
+            now = time.monotonic()
+            deadlines = [started[name][0] + timeout for name in pending if name in started]
+            next_deadline = min(deadlines + [overall_deadline])
+            if next_deadline > now:
+                done, _ = wait([futures[name] for name in pending],
+                               timeout=next_deadline - now, return_when=FIRST_COMPLETED)
+                pending -= {name for name in pending if futures[name] in done}
+
+            now = time.monotonic()
+            expired = {
+                name for name in pending
+                if now >= overall_deadline or (name in started and now >= started[name][0] + timeout)
+            }
+            timed_out |= expired
+            pending -= expired
+
+        for name in timed_out:
+            futures[name].cancel()
+        _kill_queries([started[name][1] for name in timed_out if name in started and started[name][1]])
+    finally:
+        # 不等待超时分区的线程，它们在查询被中止后自行结束
+        executor.shutdown(wait=False)
+
+    results = {}
+    incomplete = {}
+    for name, _, default in sections:
+        future = futures[name]
+        if name in timed_out:
+            print(f"查询分区 {name} 超时（{timeout}秒）", file=sys.stderr)
+            results[name] = default
+            incomplete[name] = TIMEOUT
+            continue
+
+        try:
+            results[name] = future.result()
+        except Exception as err:
+            print(f"查询分区 {name} 失败: {str(err)}", file=sys.stderr)
+            results[name] = default
+            incomplete[name] = str(err)
+    return results, incomplete
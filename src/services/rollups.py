@@ -0,0 +1,482 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+编程提交汇总表
+提交写入后由派生表更新（derived_updates.py）按批增量维护两张汇总表，教师端的统计页面直接读取汇总表，
+不再每次对 edu_coding_submissions 做全表 GROUP BY。
+
+    edu_class_problem_rollup  (班级, 题目): 提交次数、成功次数、提交学生数、
+                              解出学生数、解题用时合计（秒）
+    edu_class_day_rollup      (班级, 日期): 提交次数、成功次数、活跃学生数
+    edu_class_student_rollup  (班级, 学生): 提交次数、成功次数、解出题目数（班级学生排名）
+
+学生数和解出题目数的去重按提交顺序判断: 查询提交记录表中该学生在同一 (班级, 题目)、
+(班级, 日期) 下是否已有ID更小的提交（解出题目数为ID更小的成功提交），
+与重建时的 COUNT(DISTINCT ...) 定义相同。
+班级为 NULL 和空字符串的提交都记在 '' 下。
+学生数只在班级内去重，不能跨班级相加: 同一学生可能以多个班级提交。
+跨班级的题目学生数读取解题统计（每个 (学生, 题目) 一行），
+跨班级的每日活跃学生数读取 daily_activity 的 HyperLogLog 草图。
+
+解出学生数和解题用时记在首次成功提交所在的班级下（增量更新和重建相同），
+解题用时与 edu_problem_solving_stats.time_spent_seconds 的取值一致，
+只统计 0 到 3 小时之间的值。
+
+汇总数据出现偏差时（如并发写入同一个新学生）可以从原始数据重建:
+    python rollups.py rebuild [班级名称]
+
+过期分区归档到 edu_coding_submissions_archive 之后（submission_partitions.py），汇总表仍包含归档的提交:
+重建读取热表和归档表的 UNION ALL。增量更新的学生数去重只查找热表，
+学生在保留期之后再次提交同一题目（或同一班级）时会多计一次，重建后修正。
+"""
+
+import sys
+import json
+import time
+import mysql.connector
+from db_pool import get_db_connection
+
+# 解题用时的有效上限（秒），与 teaching_stats 中的过滤条件一致
+MAX_SOLVE_SECONDS = 10800
+
+SUBMISSION_TABLE = 'edu_coding_submissions'
+# 过期分区的归档表（submission_partitions.py maintain 创建）
+ARCHIVE_TABLE = 'edu_coding_submissions_archive'
+# 重建时从热表和归档表读取的列
+REBUILD_COLUMNS = "id, student_class, student_id, problem_id, problem_title, submit_result, submission_time"
+
+
+def create_rollup_tables(cursor):
+    """创建汇总表"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS edu_class_problem_rollup (
+            student_class VARCHAR(100) NOT NULL,
+            problem_id VARCHAR(50) NOT NULL,
+            problem_title TEXT,
+            attempts INT NOT NULL DEFAULT 0,
+            successes INT NOT NULL DEFAULT 0,
+            students INT NOT NULL DEFAULT 0,
+            solved_students INT NOT NULL DEFAULT 0,
+            solve_seconds BIGINT NOT NULL DEFAULT 0,
+            timed_solves INT NOT NULL DEFAULT 0,
+            PRIMARY KEY (student_class, problem_id),
+            INDEX (problem_id)
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS edu_class_day_rollup (
+            student_class VARCHAR(100) NOT NULL,
+            activity_date DATE NOT NULL,
+            attempts INT NOT NULL DEFAULT 0,
+            successes INT NOT NULL DEFAULT 0,
+            active_students INT NOT NULL DEFAULT 0,
+            PRIMARY KEY (student_class, activity_date)
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS edu_class_student_rollup (
+            student_class VARCHAR(100) NOT NULL,
+            student_id VARCHAR(50) NOT NULL,
+            attempts INT NOT NULL DEFAULT 0,
+            successes INT NOT NULL DEFAULT 0,
+            solved_problems INT NOT NULL DEFAULT 0,
+            PRIMARY KEY (student_class, student_id)
+        )
+    """)
+
+
+def submission_day(data):
+    """提交日期（YYYY-MM-DD），兼容 'YYYY-MM-DD HH:MM:SS' 和 ISO 格式"""
+    submission_time = data.get('submission_time') or ''
+    if len(submission_time) >= 10:
+        return submission_time[:10]
+    return time.strftime('%Y-%m-%d')
+
+
+def _class_match(raw_class, key, params):
+    """提交记录表上属于同一汇总班级的条件，汇总表把 NULL 和空字符串都记为 ''"""
+    if not raw_class:
+        return "(student_class = '' OR student_class IS NULL)"
+    params[key] = raw_class
+    return f"student_class = %({key})s"
+
+
+def _build_class_problem(batch, solves):
+    """生成 (班级, 题目) 汇总的多行upsert语句"""
+    params = {}
+    groups = {}
+    # 批次内已计入学生数的 (班级, 学生, 题目)
+    counted = set()
+
+    for i, data in enumerate(batch):
+        key = (data.get('student_class') or '', data.get('problem_id'))
+        group = groups.setdefault(key, {
+            'title': i, 'attempts': 0, 'successes': 0, 'students': [],
+            'solved': 0, 'seconds': 0, 'timed': 0
+        })
+        group['title'] = i
+        group['attempts'] += 1
+        if data.get('submit_result') == 'success':
+            group['successes'] += 1
+
+        member_key = (key[0], data.get('student_id'), data.get('problem_id'))
+        if member_key not in counted:
+            counted.add(member_key)
+            params[f'sid_{i}'] = data.get('student_id')
+            params[f'pid_{i}'] = data.get('problem_id')
+            params[f'before_{i}'] = data['id']
+            class_match = _class_match(data.get('student_class'), f'pcls_{i}', params)
+            group['students'].append(
+                f"(NOT EXISTS (SELECT 1 FROM edu_coding_submissions"
+                f" WHERE student_id = %(sid_{i})s AND problem_id = %(pid_{i})s AND {class_match}"
+                f" AND id < %(before_{i})s))"
+            )
+
+        if i in solves:
+            _, seconds = solves[i]
+            group['solved'] += 1
+            if 0 < seconds <= MAX_SOLVE_SECONDS:
+                group['seconds'] += seconds
+                group['timed'] += 1
+
+    rows = []
+    for j, ((student_class, problem_id), group) in enumerate(groups.items()):
+        params[f'cp_class_{j}'] = student_class
+        params[f'cp_problem_{j}'] = problem_id
+        params[f'cp_title_{j}'] = batch[group['title']].get('problem_title')
+        params[f'cp_attempts_{j}'] = group['attempts']
+        params[f'cp_successes_{j}'] = group['successes']
+        params[f'cp_solved_{j}'] = group['solved']
+        params[f'cp_seconds_{j}'] = group['seconds']
+        params[f'cp_timed_{j}'] = group['timed']
+        rows.append(
+            f"(%(cp_class_{j})s, %(cp_problem_{j})s, %(cp_title_{j})s, "
+            f"%(cp_attempts_{j})s, %(cp_successes_{j})s, "
+            f"{' + '.join(group['students']) or '0'}, "
+            f"%(cp_solved_{j})s, %(cp_seconds_{j})s, %(cp_timed_{j})s)"
+        )
+
+    sql = """
+        INSERT INTO edu_class_problem_rollup (
+            student_class, problem_id, problem_title, attempts, successes,
+            students, solved_students, solve_seconds, timed_solves
+        ) VALUES
+    """ + ',\n'.join(rows) + """
+        ON DUPLICATE KEY UPDATE
+            problem_title = VALUES(problem_title),
+            attempts = attempts + VALUES(attempts),
+            successes = successes + VALUES(successes),
+            students = students + VALUES(students),
+            solved_students = solved_students + VALUES(solved_students),
+            solve_seconds = solve_seconds + VALUES(solve_seconds),
+            timed_solves = timed_solves + VALUES(timed_solves)
+    """
+    return sql, params
+
+
+def _build_class_day(batch):
+    """生成 (班级, 日期) 汇总的多行upsert语句"""
+    params = {}
+    groups = {}
+    seen = set()
+
+    for i, data in enumerate(batch):
+        student_class = data.get('student_class') or ''
+        day = submission_day(data)
+        group = groups.setdefault((student_class, day), {'attempts': 0, 'successes': 0, 'active': []})
+        group['attempts'] += 1
+        if data.get('submit_result') == 'success':
+            group['successes'] += 1
+
+        student_key = (student_class, day, data.get('student_id'))
+        if student_key not in seen:
+            seen.add(student_key)
+            params[f'sid_{i}'] = data.get('student_id')
+            params[f'day_{i}'] = day
+            params[f'before_{i}'] = data['id']
+            class_match = _class_match(data.get('student_class'), f'cls_{i}', params)
+            group['active'].append(
+                f"(NOT EXISTS (SELECT 1 FROM edu_coding_submissions"
+                f" WHERE student_id = %(sid_{i})s AND {class_match}"
+                f" AND submission_time >= %(day_{i})s AND submission_time < %(day_{i})s + INTERVAL 1 DAY"
+                f" AND id < %(before_{i})s))"
+            )
+
+    rows = []
+    for j, ((student_class, day), group) in enumerate(groups.items()):
+        params[f'cd_class_{j}'] = student_class
+        params[f'cd_day_{j}'] = day
+        params[f'cd_attempts_{j}'] = group['attempts']
+        params[f'cd_successes_{j}'] = group['successes']
+        rows.append(
+            f"(%(cd_class_{j})s, %(cd_day_{j})s, %(cd_attempts_{j})s, %(cd_successes_{j})s, "
+            f"{' + '.join(group['active'])})"
+        )
+
+    sql = """
+        INSERT INTO edu_class_day_rollup (
+            student_class, activity_date, attempts, successes, active_students
+        ) VALUES
+    """ + ',\n'.join(rows) + """
+        ON DUPLICATE KEY UPDATE
+            attempts = attempts + VALUES(attempts),
+            successes = successes + VALUES(successes),
+            active_students = active_students + VALUES(active_students)
+    """
+    return sql, params
+
+
+def _build_class_student(batch):
+    """生成 (班级, 学生) 汇总的多行upsert语句"""
+    params = {}
+    groups = {}
+    # 批次内已计入解出题目数的 (班级, 学生, 题目)
+    counted = set()
+
+    for i, data in enumerate(batch):
+        key = (data.get('student_class') or '', data.get('student_id'))
+        group = groups.setdefault(key, {'attempts': 0, 'successes': 0, 'solved': []})
+        group['attempts'] += 1
+        if data.get('submit_result') != 'success':
+            continue
+        group['successes'] += 1
+
+        solved_key = key + (data.get('problem_id'),)
+        if solved_key not in counted:
+            counted.add(solved_key)
+            params[f'sid_{i}'] = data.get('student_id')
+            params[f'pid_{i}'] = data.get('problem_id')
+            params[f'before_{i}'] = data['id']
+            class_match = _class_match(data.get('student_class'), f'cls_{i}', params)
+            group['solved'].append(
+                f"(NOT EXISTS (SELECT 1 FROM edu_coding_submissions"
+                f" WHERE student_id = %(sid_{i})s AND problem_id = %(pid_{i})s AND {class_match}"
+                f" AND submit_result = 'success' AND id < %(before_{i})s))"
+            )
+
+    rows = []
+    for j, ((student_class, student_id), group) in enumerate(groups.items()):
+        params[f'cs_class_{j}'] = student_class
+        params[f'cs_student_{j}'] = student_id
+        params[f'cs_attempts_{j}'] = group['attempts']
+        params[f'cs_successes_{j}'] = group['successes']
+        rows.append(
+            f"(%(cs_class_{j})s, %(cs_student_{j})s, %(cs_attempts_{j})s, %(cs_successes_{j})s, "
+            f"{' + '.join(group['solved']) or '0'})"
+        )
+
+    sql = """
+        INSERT INTO edu_class_student_rollup (
+            student_class, student_id, attempts, successes, solved_problems
+        ) VALUES
+    """ + ',\n'.join(rows) + """
+        ON DUPLICATE KEY UPDATE
+            attempts = attempts + VALUES(attempts),
+            successes = successes + VALUES(successes),
+            solved_problems = solved_problems + VALUES(solved_problems)
+    """
+    return sql, params
+
+
+def build_rollup_statements(batch, solves):
+    """生成更新汇总表的语句列表 [(sql, params)]
+
+    batch 为已写入的提交（带 id，按 id 升序），solves 为其中的首次解出
+    （quantile_sketches.first_solves 的结果）。
+    """
+    return [_build_class_problem(batch, solves), _build_class_day(batch), _build_class_student(batch)]
+
+
+def rebuild_source(include_archive, alias='s'):
+    """重建读取的提交记录: include_archive 为True时是热表和归档表的 UNION ALL"""
+    if not include_archive:
+        return f"{SUBMISSION_TABLE} {alias}"
+    return (f"(SELECT {REBUILD_COLUMNS} FROM {SUBMISSION_TABLE}"
+            f" UNION ALL SELECT {REBUILD_COLUMNS} FROM {ARCHIVE_TABLE}) {alias}")
+
+
+def build_rebuild_statements(class_name=None, include_archive=False):
+    """生成重建汇总表的语句列表 [(结果字段, sql, params)]
+
+    结果字段不为None的语句，其影响行数作为该字段输出。
+    include_archive 为True时汇总包含已归档的提交（submission_partitions.py）。
+    """
+    class_filter = ""
+    params = ()
+    if class_name:
+        class_filter = "WHERE student_class = %s"
+        params = (class_name,)
+
+    # 与增量更新相同，NULL 和空字符串的班级都记为 ''
+    source_filter = "WHERE COALESCE(s.student_class, '') = %s" if class_name else ""
+    source = rebuild_source(include_archive)
+
+    statements = [
+        (None, f"DELETE FROM edu_class_problem_rollup {class_filter}", params),
+        (None, f"DELETE FROM edu_class_day_rollup {class_filter}", params),
+        (None, f"DELETE FROM edu_class_student_rollup {class_filter}", params)
+    ]
+
+    statements.append(('class_problem_rows', f"""
+        INSERT INTO edu_class_problem_rollup (
+            student_class, problem_id, problem_title, attempts, successes, students
+        )
+        SELECT
+            COALESCE(s.student_class, '') as rollup_class,
+            s.problem_id,
+            MAX(s.problem_title),
+            COUNT(*),
+            SUM(CASE WHEN s.submit_result = 'success' THEN 1 ELSE 0 END),
+            COUNT(DISTINCT s.student_id)
+        FROM {source}
+        {source_filter}
+        GROUP BY rollup_class, s.problem_id
+    """, params))
+
+    # 解出学生数和解题用时来自解题统计，记在 (学生, 题目) 首次成功提交所在的班级下
+    statements.append((None, f"""
+        UPDATE edu_class_problem_rollup r
+        JOIN (
+            SELECT
+                m.student_class,
+                ps.problem_id,
+                COUNT(*) as solved_students,
+                SUM(CASE WHEN ps.time_spent_seconds > 0 AND ps.time_spent_seconds <= {MAX_SOLVE_SECONDS}
+                    THEN ps.time_spent_seconds ELSE 0 END) as solve_seconds,
+                SUM(CASE WHEN ps.time_spent_seconds > 0 AND ps.time_spent_seconds <= {MAX_SOLVE_SECONDS}
+                    THEN 1 ELSE 0 END) as timed_solves
+            FROM edu_problem_solving_stats ps
+            JOIN (
+                SELECT s.student_id, s.problem_id, COALESCE(s.student_class, '') as student_class
+                FROM {source}
+                JOIN (
+                    SELECT MIN(a.id) as first_success
+                    FROM {rebuild_source(include_archive, 'a')}
+                    WHERE a.submit_result = 'success'
+                    GROUP BY a.student_id, a.problem_id
+                ) f ON f.first_success = s.id
+                {source_filter}
+            ) m ON m.student_id = ps.student_id AND m.problem_id = ps.problem_id
+            WHERE ps.is_solved = TRUE
+            GROUP BY m.student_class, ps.problem_id
+        ) s ON s.student_class = r.student_class AND s.problem_id = r.problem_id
+        SET
+            r.solved_students = s.solved_students,
+            r.solve_seconds = s.solve_seconds,
+            r.timed_solves = s.timed_solves
+    """, params))
+
+    statements.append(('class_day_rows', f"""
+        INSERT INTO edu_class_day_rollup (
+            student_class, activity_date, attempts, successes, active_students
+        )
+        SELECT
+            COALESCE(s.student_class, '') as rollup_class,
+            DATE(s.submission_time) as activity_date,
+            COUNT(*),
+            SUM(CASE WHEN s.submit_result = 'success' THEN 1 ELSE 0 END),
+            COUNT(DISTINCT s.student_id)
+        FROM {source}
+        {source_filter}
+        {'AND' if source_filter else 'WHERE'} s.submission_time IS NOT NULL
+        GROUP BY rollup_class, activity_date
+    """, params))
+
+    statements.append(('class_student_rows', f"""
+        INSERT INTO edu_class_student_rollup (
+            student_class, student_id, attempts, successes, solved_problems
+        )
+        SELECT
+            COALESCE(s.student_class, '') as rollup_class,
+            s.student_id,
+            COUNT(*),
+            SUM(CASE WHEN s.submit_result = 'success' THEN 1 ELSE 0 END),
+            COUNT(DISTINCT CASE WHEN s.submit_result = 'success' THEN s.problem_id END)
+        FROM {source}
+        {source_filter}
+        GROUP BY rollup_class, s.student_id
+    """, params))
+    return statements
+
+
+def _table_exists(cursor, table):
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.tables
+        WHERE table_schema = DATABASE() AND table_name = %s
+    """, (table,))
+    return cursor.fetchone()[0] > 0
+
+
+def rebuild(class_name=None):
+    """从原始提交记录（包括已归档的提交）和解题统计重建汇总表"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    started = time.time()
+
+    try:
+        # 先计入待更新派生表的提交，重建之后不会再次计入（derived_updates 依赖本模块，延迟导入）
+        from derived_updates import drain
+        drain()
+
+        create_rollup_tables(cursor)
+        include_archive = _table_exists(cursor, ARCHIVE_TABLE)
+
+        counts = {}
+        for field, sql, params in build_rebuild_statements(class_name, include_archive):
+            cursor.execute(sql, params)
+            if field:
+                counts[field] = cursor.rowcount
+
+        conn.commit()
+        print(json.dumps({
+            'success': True,
+            'message': "汇总表重建完成",
+            'data': dict(counts, **{
+                'class_name': class_name,
+                'include_archive': include_archive,
+                'elapsed_seconds': round(time.time() - started, 2)
+            })
+        }))
+    except mysql.connector.Error as err:
+        conn.rollback()
+        print(json.dumps({
+            'success': False,
+            'message': f"重建汇总表失败: {str(err)}"
+        }))
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(json.dumps({
+            'success': False,
+            'message': "缺少操作参数"
+        }))
+        sys.exit(1)
+
+    operation = sys.argv[1]
+
+    if operation == "rebuild":
+        rebuild(sys.argv[2] if len(sys.argv) > 2 else None)
+    elif operation == "create_tables":
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            create_rollup_tables(cursor)
+            conn.commit()
+            print(json.dumps({'success': True, 'message': "汇总表创建成功"}))
+        except mysql.connector.Error as err:
+            print(json.dumps({'success': False, 'message': f"创建汇总表失败: {str(err)}"}))
+        finally:
+            cursor.close()
+            conn.close()
+    else:
+        print(json.dumps({
+            'success': False,
+            'message': "无效的操作或参数不足"
+        }))
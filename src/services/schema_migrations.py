@@ -0,0 +1,307 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+版本化的表结构迁移
+每个迁移有一个递增的版本号，执行后记录在 edu_schema_migrations 表中，
+已执行的版本不会重复执行。create_tables 建表后也会调用 apply_migrations，
+新建的库和已有的库最终得到相同的索引。
+
+版本1: 提交记录表的复合/覆盖索引
+    原来只有 student_id、problem_id、student_class 三个单列索引，
+    热点查询按 (班级, 时间)、(学生, 结果)、(题目, 结果) 过滤并按时间排序，
+    只能用单列索引定位后逐行回表。新索引让每个热点查询只读索引即可完成，
+    被新索引前缀覆盖的单列索引随之删除，避免写入时多维护一份。
+    EXPLAIN 回归检查见 src/scripts/check_query_plans.py。
+
+版本2: 提交记录分页（submission_history.py）按题目翻页用的 (problem_id, submission_time) 索引，
+    按学生和按班级翻页使用版本1的 idx_student_time、idx_class_time。
+
+版本3: 学生个人信息表的 student_id 索引，身份解析（identity_resolution.py）按学号批量查询。
+    个人信息表还不存在时跳过，新建的表自带该索引。
+
+版本4: 解题统计表的 (problem_id, is_solved) 索引。汇总表的学生数只在班级内去重，
+    跨班级的题目学生数（题目统计、学习模式分析）按题目读取解题统计。
+
+版本5: 提交记录表的 derived、ingested_at 列和 (derived, id) 索引。提交写入只写提交记录和解题统计，
+    各派生表由 derived_updates.py 按 derived = 0 的记录分批补上。已有记录默认 derived = 1；
+    归档表已存在时同样补充这两列，归档时仍可整行复制。
+
+    python schema_migrations.py migrate
+    python schema_migrations.py status
+"""
+
+import sys
+import json
+import mysql.connector
+from db_pool import get_db_connection
+
+TABLE = 'edu_coding_submissions'
+ARCHIVE_TABLE = 'edu_coding_submissions_archive'
+
+# 索引名 -> 列，注释为使用该索引的查询
+COMPOSITE_INDEXES = {
+    # student_detail / learning_data: 学生统计、按日活动、按难度统计、题目完成情况；
+    # rollups: 按天去重学生的 NOT EXISTS 子查询
+    'idx_student_time': ('student_id', 'submission_time', 'submit_result', 'problem_id', 'student_class'),
+    # student_detail / learning_data: 学生常见错误
+    'idx_student_error': ('student_id', 'submit_result', 'error_fingerprint'),
+    # coding_data.get_problem_stats: 题目常见错误；export_submissions 按题目导出
+    'idx_problem_error': ('problem_id', 'submit_result', 'error_fingerprint'),
+    # 按班级和时间范围的查询
+    'idx_class_time': ('student_class', 'submission_time'),
+    # teaching_stats 学习效率分析；class_roster 重建；
+    # rollups: 按 (班级, 题目) 去重学生、按 (班级, 学生) 去重解出题目的 NOT EXISTS 子查询
+    'idx_class_student': ('student_class', 'student_id', 'submit_result', 'problem_id'),
+    # teaching_stats: 班级常见错误（影响学生数、相关题目）
+    'idx_class_error': ('student_class', 'error_fingerprint', 'student_id', 'problem_id'),
+    # teaching_stats_api: 活跃学生数、每日提交趋势
+    'idx_submission_time': ('submission_time', 'student_id'),
+    # teaching_stats_api.get_todos: 最近的成功提交
+    'idx_result_time': ('submit_result', 'submission_time'),
+    'idx_code_hash': ('code_hash',),
+}
+
+HISTORY_INDEXES = {
+    # submission_history: 按题目分页
+    'idx_problem_time': ('problem_id', 'submission_time'),
+}
+
+PROFILE_TABLE = 'edu_profiles_student'
+
+PROFILE_INDEXES = {
+    # identity_resolution: 按学号批量解析学生身份
+    'idx_student_id': ('student_id',),
+}
+
+STATS_TABLE = 'edu_problem_solving_stats'
+
+STATS_INDEXES = {
+    # coding_data.get_problem_stats / teaching_stats: 跨班级的题目学生数
+    'idx_problem_solved': ('problem_id', 'is_solved'),
+}
+
+# 提交记录表和归档表的派生表更新标记列
+DERIVE_COLUMNS = {
+    'derived': "TINYINT NOT NULL DEFAULT 1",
+    'ingested_at': "TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP",
+}
+
+DERIVE_INDEXES = {
+    # derived_updates: 按ID顺序读取待更新派生表的提交
+    'idx_derive_pending': ('derived', 'id'),
+}
+
+# 全部迁移执行后提交记录表应有的索引
+SUBMISSION_INDEXES = {**COMPOSITE_INDEXES, **HISTORY_INDEXES, **DERIVE_INDEXES}
+
+# 已被上面的索引前缀覆盖的旧单列索引
+OBSOLETE_SUBMISSION_INDEXES = ('student_id', 'problem_id', 'student_class')
+
+
+def create_migrations_table(cursor):
+    """创建迁移记录表"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS edu_schema_migrations (
+            version INT NOT NULL PRIMARY KEY,
+            name VARCHAR(100) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def get_index_columns(cursor, table):
+    """表的二级索引 {索引名: (列, ...)}"""
+    cursor.execute("""
+        SELECT INDEX_NAME, COLUMN_NAME
+        FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME != 'PRIMARY'
+        ORDER BY INDEX_NAME, SEQ_IN_INDEX
+    """, (table,))
+    indexes = {}
+    for row in cursor.fetchall():
+        if isinstance(row, dict):
+            row = (row['INDEX_NAME'], row['COLUMN_NAME'])
+        indexes.setdefault(row[0], []).append(row[1])
+    return {name: tuple(columns) for name, columns in indexes.items()}
+
+
+def sync_indexes(cursor, table, wanted, obsolete=()):
+    """让表的索引与 wanted 一致，列不同的同名索引重建，obsolete 中的索引删除
+
+    所有改动合并为一条 ALTER TABLE，大表只需重建一次。返回执行的改动列表。
+    """
+    existing = get_index_columns(cursor, table)
+    changes = []
+    for name in obsolete:
+        if name in existing and name not in wanted:
+            changes.append(f"DROP INDEX `{name}`")
+    for name, columns in wanted.items():
+        if existing.get(name) == tuple(columns):
+            continue
+        if name in existing:
+            changes.append(f"DROP INDEX `{name}`")
+        changes.append(f"ADD INDEX `{name}` (" + ", ".join(columns) + ")")
+
+    if changes:
+        cursor.execute(f"ALTER TABLE {table} " + ", ".join(changes))
+    return changes
+
+
+def _submission_composite_indexes(cursor):
+    return sync_indexes(cursor, TABLE, COMPOSITE_INDEXES, OBSOLETE_SUBMISSION_INDEXES)
+
+
+def _submission_history_indexes(cursor):
+    return sync_indexes(cursor, TABLE, HISTORY_INDEXES)
+
+
+def _table_exists(cursor, table):
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.TABLES
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+    """, (table,))
+    row = cursor.fetchone()
+    return bool(list(row.values())[0] if isinstance(row, dict) else row[0])
+
+
+def _profile_student_index(cursor):
+    if not _table_exists(cursor, PROFILE_TABLE):
+        return []
+    return sync_indexes(cursor, PROFILE_TABLE, PROFILE_INDEXES)
+
+
+def _stats_problem_index(cursor):
+    if not _table_exists(cursor, STATS_TABLE):
+        return []
+    return sync_indexes(cursor, STATS_TABLE, STATS_INDEXES)
+
+
+def _get_columns(cursor, table):
+    cursor.execute("""
+        SELECT COLUMN_NAME FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+    """, (table,))
+    return {row['COLUMN_NAME'] if isinstance(row, dict) else row[0] for row in cursor.fetchall()}
+
+
+def _submission_derive_columns(cursor):
+    changes = []
+    for table in (TABLE, ARCHIVE_TABLE):
+        if not _table_exists(cursor, table):
+            continue
+        existing = _get_columns(cursor, table)
+        added = [f"ADD COLUMN {name} {ddl}" for name, ddl in DERIVE_COLUMNS.items() if name not in existing]
+        if added:
+            cursor.execute(f"ALTER TABLE {table} " + ", ".join(added))
+            changes.extend(f"{table}: {change}" for change in added)
+    return changes + sync_indexes(cursor, TABLE, DERIVE_INDEXES)
+
+
+# (版本, 名称, 函数)，只能在末尾追加
+MIGRATIONS = [
+    (1, 'submission_composite_indexes', _submission_composite_indexes),
+    (2, 'submission_history_indexes', _submission_history_indexes),
+    (3, 'profile_student_index', _profile_student_index),
+    (4, 'stats_problem_index', _stats_problem_index),
+    (5, 'submission_derive_columns', _submission_derive_columns),
+]
+
+
+def get_applied_versions(cursor):
+    create_migrations_table(cursor)
+    cursor.execute("SELECT version FROM edu_schema_migrations")
+    return {row['version'] if isinstance(row, dict) else row[0] for row in cursor.fetchall()}
+
+
+def apply_migrations(cursor):
+    """依次执行未执行的迁移，返回 [{version, name, changes}]"""
+    applied = get_applied_versions(cursor)
+    results = []
+    for version, name, migration in MIGRATIONS:
+        if version in applied:
+            continue
+        changes = migration(cursor)
+        cursor.execute(
+            "INSERT INTO edu_schema_migrations (version, name) VALUES (%s, %s)",
+            (version, name)
+        )
+        results.append({'version': version, 'name': name, 'changes': changes})
+    return results
+
+
+def migrate():
+    """执行未执行的迁移"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    try:
+        results = apply_migrations(cursor)
+        conn.commit()
+        print(json.dumps({
+            'success': True,
+            'message': f"执行了 {len(results)} 个迁移" if results else "没有需要执行的迁移",
+            'data': results
+        }))
+    except mysql.connector.Error as err:
+        conn.rollback()
+        print(json.dumps({
+            'success': False,
+            'message': f"执行迁移失败: {str(err)}"
+        }))
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def get_status():
+    """输出迁移执行情况和提交记录表当前的索引"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    try:
+        applied = get_applied_versions(cursor)
+        indexes = get_index_columns(cursor, TABLE)
+        print(json.dumps({
+            'success': True,
+            'data': {
+                'migrations': [
+                    {'version': version, 'name': name, 'applied': version in applied}
+                    for version, name, _ in MIGRATIONS
+                ],
+                'indexes': {name: list(columns) for name, columns in indexes.items()},
+                'missing_indexes': [
+                    name for name, columns in SUBMISSION_INDEXES.items()
+                    if indexes.get(name) != columns
+                ]
+            }
+        }))
+    except mysql.connector.Error as err:
+        print(json.dumps({
+            'success': False,
+            'message': f"获取迁移状态失败: {str(err)}"
+        }))
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(json.dumps({
+            'success': False,
+            'message': "缺少操作参数"
+        }))
+        sys.exit(1)
+
+    operation = sys.argv[1]
+
+    if operation == "migrate":
+        migrate()
+    elif operation == "status":
+        get_status()
+    else:
+        print(json.dumps({
+            'success': False,
+            'message': "无效的操作或参数不足"
+        }))
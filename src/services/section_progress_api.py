@@ -6,6 +6,7 @@ import json
 import mysql.connector
 from datetime import datetime
 import traceback
+from db_pool import get_connection
 
 # 自定义JSON编码器，处理日期和Decimal类型
 class CustomJSONEncoder(json.JSONEncoder):
@@ -24,19 +25,11 @@ class CustomJSONEncoder(json.JSONEncoder):
             pass
         return super(CustomJSONEncoder, self).default(obj)
 
-# 数据库连接配置
-DB_CONFIG = {
-    'host': 'localhost',
-    'user': 'root',
-    'password': 'mwYgR7#*X2',
-    'database': 'education_platform'
-}
-
 def save_section_progress(student_id, section_id):
     """保存学生完成小节的进度"""
     try:
         # 连接数据库
-        conn = mysql.connector.connect(**DB_CONFIG)
+        conn = get_connection()
         cursor = conn.cursor(dictionary=True)
         
         # 检查记录是否已存在
@@ -85,7 +78,7 @@ def get_completed_sections(student_id):
     """获取学生已完成的小节列表"""
     try:
         # 连接数据库
-        conn = mysql.connector.connect(**DB_CONFIG)
+        conn = get_connection()
         cursor = conn.cursor(dictionary=True)
         
         # 获取已完成的小节
@@ -119,7 +112,7 @@ def import_from_localstorage(student_id, section_ids):
     """从localStorage导入学习进度数据"""
     try:
         # 连接数据库
-        conn = mysql.connector.connect(**DB_CONFIG)
+        conn = get_connection()
         cursor = conn.cursor()
         
         # 导入每个小节的进度
@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+常驻Python服务进程
+由 server/services/pythonPool.js 启动，通过标准输入/输出以长度前缀的JSON帧通信，
+在同一个解释器中反复执行 src/services 下各脚本的 __main__ 操作，
+避免每次请求都重新启动解释器、重新导入 mysql.connector / openai。
+
+帧格式: 4字节大端无符号长度 + UTF-8编码的JSON
+请求:   {"id": 1, "script": "coding_data.py", "args": ["get_class_stats", "1班"]}
+        可选的 "stdin" 字段作为本次调用的标准输入（用于提交数据等较大的参数）
+响应:   {"id": 1, "exit_code": 0, "stdout": "...", "stderr": "..."}
+"""
+
+import sys
+import os
+import io
+import json
+import struct
+import builtins
+import traceback
+
+SERVICES_DIR = os.path.dirname(os.path.abspath(__file__))
+WORKER_SCRIPT = os.path.basename(__file__)
+
+# 保证脚本之间的相互导入（如 from coding_data import DB_CONFIG）可以正常工作
+if SERVICES_DIR not in sys.path:
+    sys.path.insert(0, SERVICES_DIR)
+
+# 已注册的处理函数: 名称 -> handler(args) -> exit_code
+HANDLERS = {}
+
+# 已编译的脚本代码缓存
+_code_cache = {}
+
+
+class _CaptureBuffer(io.BytesIO):
+    """捕获输出的缓冲区，忽略关闭操作
+
+    部分脚本在导入时执行 sys.stdout = io.TextIOWrapper(sys.stdout.buffer)，
+    被替换下来的包装器回收时会关闭底层缓冲区，这里保证缓冲区始终可读。
+    """
+
+    def close(self):
+        pass
+
+
+def register_handler(name, handler):
+    """注册一个处理函数，handler接收参数列表并返回退出码"""
+    HANDLERS[name] = handler
+
+
+def _load_code(script_path):
+    """编译并缓存脚本代码，脚本文件更新后自动重新编译"""
+    mtime = os.path.getmtime(script_path)
+    cached = _code_cache.get(script_path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    with open(script_path, 'r', encoding='utf-8') as f:
+        code = compile(f.read(), script_path, 'exec')
+    _code_cache[script_path] = (mtime, code)
+    return code
+
+
+def _make_main_handler(script_name):
+    """把脚本的 __main__ 入口包装为处理函数"""
+    script_path = os.path.join(SERVICES_DIR, script_name)
+
+    def handler(args):
+        code = _load_code(script_path)
+        namespace = {
+            '__name__': '__main__',
+            '__file__': script_path,
+            '__builtins__': builtins
+        }
+        sys.argv = [script_path] + list(args)
+        try:
+            exec(code, namespace)
+        except SystemExit as e:
+            if e.code is None:
+                return 0
+            if isinstance(e.code, int):
+                return e.code
+            print(e.code, file=sys.stderr)
+            return 1
+        return 0
+
+    return handler
+
+
+def _stats_handler(args):
+    """输出工作进程内的运行统计"""
+    db_pool = sys.modules.get('db_pool')
+    print(json.dumps({
+        'success': True,
+        'data': {
+            'pid': os.getpid(),
+            'db_pool': db_pool.get_pool_stats() if db_pool else None
+        }
+    }))
+    return 0
+
+
+def discover_handlers():
+    """为服务目录中的每个脚本注册 __main__ 处理函数"""
+    for file_name in sorted(os.listdir(SERVICES_DIR)):
+        if file_name.endswith('.py') and file_name != WORKER_SCRIPT:
+            register_handler(file_name, _make_main_handler(file_name))
+    register_handler('__stats__', _stats_handler)
+
+
+def execute(script, args, stdin_text=None):
+    """执行一次调用，捕获其标准输出和标准错误，stdin_text 作为本次调用的标准输入"""
+    stdout_buffer = _CaptureBuffer()
+    stderr_buffer = _CaptureBuffer()
+    saved_stdout, saved_stderr, saved_stdin, saved_argv = sys.stdout, sys.stderr, sys.stdin, sys.argv
+    sys.stdin = io.StringIO(stdin_text or '')
+
+    # 使用带 .buffer 的包装器，兼容在导入时重新包装 sys.stdout 的脚本
+    sys.stdout = io.TextIOWrapper(stdout_buffer, encoding='utf-8')
+    sys.stderr = io.TextIOWrapper(stderr_buffer, encoding='utf-8')
+
+    try:
+        handler = HANDLERS.get(script)
+        if handler is None:
+            print(json.dumps({
+                'success': False,
+                'message': f'未知脚本: {script}'
+            }))
+            exit_code = 1
+        else:
+            exit_code = handler(args)
+    except BaseException:
+        traceback.print_exc(file=sys.stderr)
+        exit_code = 1
+    finally:
+        # 脚本可能替换过 sys.stdout/sys.stderr，先刷新当前对象再读取缓冲区
+        for stream in (sys.stdout, sys.stderr):
+            try:
+                stream.flush()
+            except (ValueError, OSError):
+                pass
+        stdout_text = stdout_buffer.getvalue().decode('utf-8', errors='replace')
+        stderr_text = stderr_buffer.getvalue().decode('utf-8', errors='replace')
+        sys.stdout, sys.stderr, sys.stdin, sys.argv = saved_stdout, saved_stderr, saved_stdin, saved_argv
+
+    return exit_code, stdout_text, stderr_text
+
+
+def read_frame(stream):
+    """读取一帧，输入结束时返回None"""
+    header = stream.read(4)
+    if len(header) < 4:
+        return None
+    (length,) = struct.unpack('>I', header)
+    payload = stream.read(length)
+    if len(payload) < length:
+        return None
+    return json.loads(payload.decode('utf-8'))
+
+
+def write_frame(stream, message):
+    """写入一帧并立即刷新"""
+    payload = json.dumps(message, ensure_ascii=False).encode('utf-8')
+    stream.write(struct.pack('>I', len(payload)) + payload)
+    stream.flush()
+
+
+def serve():
+    """主循环: 逐帧读取请求并返回结果"""
+    # 协议专用一个独立的文件描述符，原stdout重定向到stderr，防止脚本的杂散输出破坏帧
+    protocol_out = os.fdopen(os.dup(sys.stdout.fileno()), 'wb')
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    protocol_in = sys.stdin.buffer
+
+    discover_handlers()
+
+    while True:
+        request = read_frame(protocol_in)
+        if request is None:
+            break
+
+        request_id = request.get('id')
+        exit_code, stdout_text, stderr_text = execute(
+            request.get('script'), request.get('args') or [], request.get('stdin')
+        )
+        write_frame(protocol_out, {
+            'id': request_id,
+            'exit_code': exit_code,
+            'stdout': stdout_text,
+            'stderr': stderr_text
+        })
+
+
+if __name__ == "__main__":
+    serve()
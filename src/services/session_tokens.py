@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+会话令牌模块
+登录成功后签发带过期时间的HMAC签名令牌，后续的身份校验只需一次HMAC计算，
+不访问数据库，也不做PBKDF2密钥拉伸。
+
+令牌格式: base64url(JSON载荷).base64url(HMAC-SHA256签名)
+载荷字段: sub(邮箱) typ(用户类型) iat(签发时间) exp(过期时间) jti(令牌ID)
+
+签名密钥优先使用环境变量；都未设置时生成随机密钥并保存到本地文件（权限0600），
+所有工作进程共用同一个密钥，不会回退到公开的默认值。
+
+已注销的令牌ID记录在本地的追加写文件中（每行 "jti exp"），
+各进程按文件修改时间缓存，过期条目在读取时忽略。
+追加和清理都在文件锁内进行，清理时重新读取文件并写入唯一的临时文件后替换，
+不会丢失其他进程同时写入的注销记录。
+
+环境变量:
+    SESSION_SECRET            签名密钥（未设置时使用 JWT_SECRET）
+    SESSION_SECRET_FILE       两者都未设置时保存随机密钥的文件路径
+    SESSION_TTL               令牌有效期（秒），默认86400
+    SESSION_REVOCATION_FILE   注销列表文件路径
+"""
+
+import os
+import json
+import hmac
+import time
+import base64
+import hashlib
+import tempfile
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+SESSION_DIR = os.path.join(tempfile.gettempdir(), 'edu_platform')
+SESSION_SECRET = os.environ.get('SESSION_SECRET') or os.environ.get('JWT_SECRET')
+SECRET_FILE = os.environ.get('SESSION_SECRET_FILE', os.path.join(SESSION_DIR, 'session_secret'))
+SESSION_TTL = int(os.environ.get('SESSION_TTL', '86400'))
+REVOCATION_FILE = os.environ.get(
+    'SESSION_REVOCATION_FILE',
+    os.path.join(SESSION_DIR, 'revoked_sessions.txt')
+)
+
+# 注销列表文件超过该大小时，注销操作会顺带清理已过期的条目
+REVOCATION_COMPACT_BYTES = 64 * 1024
+
+# 注销列表缓存: (文件修改时间, 文件大小, {jti: exp})
+_revocation_cache = (None, None, {})
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+@contextmanager
+def _file_lock(path):
+    """以 path + '.lock' 作为跨进程的互斥锁"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+    with open(path + '.lock', 'a+b') as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _load_secret():
+    """读取本地保存的签名密钥，不存在时生成随机密钥并写入（在文件锁内，各进程得到同一个密钥）"""
+    with _file_lock(SECRET_FILE):
+        try:
+            with open(SECRET_FILE, 'r', encoding='ascii') as f:
+                secret = f.read().strip()
+            if secret:
+                return secret
+        except FileNotFoundError:
+            pass
+
+        secret = os.urandom(32).hex()
+        fd = os.open(SECRET_FILE, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w', encoding='ascii') as f:
+            f.write(secret)
+        return secret
+
+
+def _get_secret():
+    global SESSION_SECRET
+    if not SESSION_SECRET:
+        SESSION_SECRET = _load_secret()
+    return SESSION_SECRET
+
+
+def _sign(payload_part):
+    return hmac.new(_get_secret().encode('utf-8'), payload_part.encode('ascii'), hashlib.sha256).digest()
+
+
+def issue_token(user_type, email, ttl=None):
+    """签发会话令牌，返回 (令牌, 过期时间戳)"""
+    now = int(time.time())
+    expires_at = now + (ttl if ttl is not None else SESSION_TTL)
+    payload = {
+        'sub': email,
+        'typ': user_type,
+        'iat': now,
+        'exp': expires_at,
+        'jti': os.urandom(12).hex()
+    }
+    payload_part = _b64encode(json.dumps(payload, separators=(',', ':')).encode('utf-8'))
+    return f"{payload_part}.{_b64encode(_sign(payload_part))}", expires_at
+
+
+def _load_revocations():
+    """读取注销列表，文件未变化时直接使用缓存"""
+    global _revocation_cache
+    try:
+        stat = os.stat(REVOCATION_FILE)
+    except OSError:
+        return {}
+
+    mtime, size, revoked = _revocation_cache
+    if mtime == stat.st_mtime and size == stat.st_size:
+        return revoked
+
+    revoked = {}
+    with open(REVOCATION_FILE, 'r', encoding='utf-8') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 2:
+                revoked[parts[0]] = int(parts[1])
+    _revocation_cache = (stat.st_mtime, stat.st_size, revoked)
+    return revoked
+
+
+def decode_token(token):
+    """校验签名和有效期，返回 (载荷, 错误信息)"""
+    try:
+        payload_part, signature_part = token.split('.')
+        signature = _b64decode(signature_part)
+    except (ValueError, AttributeError):
+        return None, '会话令牌格式错误'
+
+    if not hmac.compare_digest(signature, _sign(payload_part)):
+        return None, '会话令牌无效'
+
+    try:
+        payload = json.loads(_b64decode(payload_part))
+    except ValueError:
+        return None, '会话令牌格式错误'
+
+    if payload.get('exp', 0) <= time.time():
+        return None, '会话已过期'
+
+    if payload.get('jti') in _load_revocations():
+        return None, '会话已注销'
+
+    return payload, None
+
+
+def revoke_token(token):
+    """注销令牌，返回是否成功"""
+    payload, error = decode_token(token)
+    if payload is None:
+        return False, error
+
+    with _file_lock(REVOCATION_FILE):
+        with open(REVOCATION_FILE, 'a', encoding='utf-8') as f:
+            f.write(f"{payload['jti']} {payload['exp']}\n")
+
+        if os.path.getsize(REVOCATION_FILE) > REVOCATION_COMPACT_BYTES:
+            _compact_revocations()
+    return True, None
+
+
+def _compact_revocations():
+    """清理注销列表中已过期的条目，调用方需持有注销列表的文件锁"""
+    global _revocation_cache
+    now = time.time()
+    # 在锁内重新读取整个文件，包含其他进程刚追加的记录
+    _revocation_cache = (None, None, {})
+    revoked = _load_revocations()
+    fd, temp_path = tempfile.mkstemp(
+        prefix=os.path.basename(REVOCATION_FILE) + '.', suffix='.tmp',
+        dir=os.path.dirname(REVOCATION_FILE) or '.'
+    )
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            for jti, expires_at in revoked.items():
+                if expires_at > now:
+                    f.write(f"{jti} {expires_at}\n")
+        os.replace(temp_path, REVOCATION_FILE)
+    except OSError:
+        os.unlink(temp_path)
+        raise
@@ -0,0 +1,223 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+进程间共享缓存
+常驻的Python服务进程有多个，进程内的字典缓存各自为政，命中率低且失效不一致。
+这里用本地的SQLite文件（WAL模式）保存带过期时间的键值对，同一台机器上的所有进程共享，
+值以JSON文本保存。缓存只是加速手段: 读写出错时按未命中处理，不影响业务查询。
+另有一张计数器表，记录缓存命中/未命中等次数，同样由各进程共享。
+SQLite 连接只能在打开它的线程中使用，查询分区在线程池中执行时也会读写缓存，
+因此每个线程各自打开一个连接。
+
+环境变量:
+    SHARED_CACHE_FILE   缓存文件路径，默认在系统临时目录下
+
+    python shared_cache.py clear
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import tempfile
+import threading
+
+CACHE_FILE = os.environ.get(
+    'SHARED_CACHE_FILE',
+    os.path.join(tempfile.gettempdir(), 'edu_platform', 'shared_cache.sqlite3')
+)
+
+# SQLite 单条语句的参数个数有上限，IN 查询按块执行
+CHUNK_SIZE = 500
+
+# 每写入这么多次清理一次过期条目
+PURGE_EVERY_WRITES = 1000
+
+# 每个线程复用一个连接
+_local = threading.local()
+_writes = 0
+
+
+def _connect():
+    """打开（必要时创建）缓存文件，返回当前线程的连接"""
+    if getattr(_local, 'connection', None) is None:
+        os.makedirs(os.path.dirname(CACHE_FILE), exist_ok=True)
+        conn = sqlite3.connect(CACHE_FILE, timeout=1.0, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # 缓存内容丢失无害，不需要每次提交都落盘
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            ) WITHOUT ROWID
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache_counters (
+                name TEXT NOT NULL PRIMARY KEY,
+                value INTEGER NOT NULL
+            ) WITHOUT ROWID
+        """)
+        _local.connection = conn
+    return _local.connection
+
+
+def _warn(action, err):
+    print(f"共享缓存{action}失败: {str(err)}", file=sys.stderr)
+
+
+def get_many(namespace, keys):
+    """批量读取未过期的条目，返回 {键: 值}，未命中的键不在结果中"""
+    keys = list(dict.fromkeys(str(key) for key in keys))
+    found = {}
+    if not keys:
+        return found
+
+    try:
+        conn = _connect()
+        now = time.time()
+        for i in range(0, len(keys), CHUNK_SIZE):
+            chunk = keys[i:i + CHUNK_SIZE]
+            placeholders = ', '.join(['?'] * len(chunk))
+            rows = conn.execute(
+                f"SELECT key, value FROM cache_entries "
+                f"WHERE namespace = ? AND key IN ({placeholders}) AND expires_at > ?",
+                [namespace] + chunk + [now]
+            ).fetchall()
+            for key, value in rows:
+                found[key] = json.loads(value)
+    except (sqlite3.Error, OSError, ValueError) as err:
+        _warn("读取", err)
+        return {}
+    return found
+
+
+def set_many(namespace, items, ttl):
+    """批量写入条目，items 为 {键: 值}，ttl 为有效秒数"""
+    global _writes
+    if not items:
+        return
+
+    try:
+        conn = _connect()
+        expires_at = time.time() + ttl
+        rows = [
+            (namespace, str(key), json.dumps(value, ensure_ascii=False, default=str), expires_at)
+            for key, value in items.items()
+        ]
+        conn.executemany(
+            "INSERT OR REPLACE INTO cache_entries (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+            rows
+        )
+        _writes += 1
+        if _writes % PURGE_EVERY_WRITES == 0:
+            conn.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (time.time(),))
+    except (sqlite3.Error, OSError) as err:
+        _warn("写入", err)
+
+
+def add(namespace, key, value, ttl):
+    """键不存在（或已过期）时写入并返回True，已存在时返回False
+
+    INSERT OR IGNORE 是单条语句，多个进程同时写入同一个键时只有一个成功，可以用作进程间的互斥标记。
+    出错时返回False。
+    """
+    try:
+        conn = _connect()
+        now = time.time()
+        conn.execute(
+            "DELETE FROM cache_entries WHERE namespace = ? AND key = ? AND expires_at <= ?",
+            (namespace, str(key), now)
+        )
+        conn.execute(
+            "INSERT OR IGNORE INTO cache_entries (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+            (namespace, str(key), json.dumps(value, ensure_ascii=False, default=str), now + ttl)
+        )
+        return conn.execute("SELECT changes()").fetchone()[0] == 1
+    except (sqlite3.Error, OSError) as err:
+        _warn("写入", err)
+        return False
+
+
+def delete_many(namespace, keys):
+    """删除条目（数据变更后使缓存失效）"""
+    keys = list(dict.fromkeys(str(key) for key in keys if key is not None))
+    if not keys:
+        return
+
+    try:
+        conn = _connect()
+        for i in range(0, len(keys), CHUNK_SIZE):
+            chunk = keys[i:i + CHUNK_SIZE]
+            placeholders = ', '.join(['?'] * len(chunk))
+            conn.execute(
+                f"DELETE FROM cache_entries WHERE namespace = ? AND key IN ({placeholders})",
+                [namespace] + chunk
+            )
+    except (sqlite3.Error, OSError) as err:
+        _warn("删除", err)
+
+
+def incr_counter(name, amount=1):
+    """计数器增加 amount（原子操作）"""
+    try:
+        _connect().execute("""
+            INSERT INTO cache_counters (name, value) VALUES (?, ?)
+            ON CONFLICT (name) DO UPDATE SET value = value + excluded.value
+        """, (name, amount))
+    except (sqlite3.Error, OSError) as err:
+        _warn("计数", err)
+
+
+def get_counters(prefix=''):
+    """读取名称以 prefix 开头的计数器 {名称: 值}"""
+    try:
+        rows = _connect().execute(
+            "SELECT name, value FROM cache_counters WHERE name >= ? AND name < ?",
+            (prefix, prefix + '\uffff')
+        ).fetchall()
+    except (sqlite3.Error, OSError) as err:
+        _warn("读取计数", err)
+        return {}
+    return dict(rows)
+
+
+def clear():
+    """清空缓存和计数器"""
+    try:
+        conn = _connect()
+        conn.execute("DELETE FROM cache_entries")
+        conn.execute("DELETE FROM cache_counters")
+        print(json.dumps({
+            'success': True,
+            'message': "共享缓存已清空"
+        }))
+    except (sqlite3.Error, OSError) as err:
+        print(json.dumps({
+            'success': False,
+            'message': f"清空共享缓存失败: {str(err)}"
+        }))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(json.dumps({
+            'success': False,
+            'message': "缺少操作参数"
+        }))
+        sys.exit(1)
+
+    operation = sys.argv[1]
+
+    if operation == "clear":
+        clear()
+    else:
+        print(json.dumps({
+            'success': False,
+            'message': "无效的操作或参数不足"
+        }))
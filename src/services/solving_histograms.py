@@ -0,0 +1,260 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+解题用时直方图
+成功提交的解题用时（从首次查看题目到提交，单位分钟）按对数刻度分桶，
+成功提交由派生表更新（derived_updates.py）增量计入 (班级, 题目, 桶) 的计数。
+题目维度的直方图由各班级的同一个桶相加得到，读取只是一次按主键前缀的查询。
+
+分桶规则（半倍频程）:
+    桶0:   [0, 1) 分钟
+    桶k:   [2^((k-1)/2), 2^(k/2)) 分钟，k = 1..MAX_BUCKET-1
+    桶MAX_BUCKET: >= 2^((MAX_BUCKET-1)/2) 分钟（约68小时以上）
+
+中位数和P90在桶内按对数插值，误差不超过一个桶的宽度（约41%）。
+
+    python solving_histograms.py get <题目ID> [班级名称]
+    python solving_histograms.py rebuild
+"""
+
+import sys
+import json
+import math
+import mysql.connector
+from datetime import datetime
+from db_pool import get_db_connection
+
+MAX_BUCKET = 25
+
+
+def create_histogram_table(cursor):
+    """创建解题用时直方图表"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS edu_solving_time_histogram (
+            problem_id VARCHAR(50) NOT NULL,
+            student_class VARCHAR(100) NOT NULL,
+            bucket TINYINT NOT NULL,
+            count INT NOT NULL DEFAULT 0,
+            PRIMARY KEY (problem_id, student_class, bucket)
+        )
+    """)
+
+
+def bucket_of(minutes):
+    """解题用时（分钟）所在的桶"""
+    if minutes < 1:
+        return 0
+    return min(int(math.floor(2 * math.log2(minutes))) + 1, MAX_BUCKET)
+
+
+def bucket_bounds(bucket):
+    """桶的范围（分钟），最后一个桶的上界为None"""
+    if bucket == 0:
+        return 0.0, 1.0
+    lower = 2 ** ((bucket - 1) / 2)
+    upper = 2 ** (bucket / 2) if bucket < MAX_BUCKET else None
+    return lower, upper
+
+
+def _parse_time(value):
+    """解析提交数据中的时间，兼容 'YYYY-MM-DD HH:MM:SS' 和 ISO 格式"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).replace(tzinfo=None)
+    except (TypeError, ValueError):
+        return None
+
+
+def solving_minutes(data):
+    """成功提交的解题用时（分钟），无法计算时返回None"""
+    if data.get('submit_result') != 'success':
+        return None
+    first_view = _parse_time(data.get('first_view_time'))
+    submitted = _parse_time(data.get('submission_time'))
+    if first_view is None or submitted is None:
+        return None
+    return max((submitted - first_view).total_seconds() / 60, 0)
+
+
+def build_histogram_upsert(batch):
+    """生成更新直方图的语句，批次中没有可统计的成功提交时返回 (None, {})"""
+    counts = {}
+    for data in batch:
+        minutes = solving_minutes(data)
+        if minutes is None:
+            continue
+        key = (data.get('problem_id'), data.get('student_class') or '', bucket_of(minutes))
+        counts[key] = counts.get(key, 0) + 1
+
+    if not counts:
+        return None, {}
+
+    rows = []
+    params = {}
+    for i, ((problem_id, student_class, bucket), count) in enumerate(counts.items()):
+        params[f'h_problem_{i}'] = problem_id
+        params[f'h_class_{i}'] = student_class
+        params[f'h_bucket_{i}'] = bucket
+        params[f'h_count_{i}'] = count
+        rows.append(f"(%(h_problem_{i})s, %(h_class_{i})s, %(h_bucket_{i})s, %(h_count_{i})s)")
+
+    sql = """
+        INSERT INTO edu_solving_time_histogram (problem_id, student_class, bucket, count)
+        VALUES
+    """ + ',\n'.join(rows) + """
+        ON DUPLICATE KEY UPDATE count = count + VALUES(count)
+    """
+    return sql, params
+
+
+def _quantile(buckets, q):
+    """按桶计数估算分位数（分钟），桶内按对数插值"""
+    total = sum(count for _, count in buckets)
+    if total == 0:
+        return None
+
+    rank = q * total
+    seen = 0
+    for bucket, count in buckets:
+        if seen + count >= rank:
+            lower, upper = bucket_bounds(bucket)
+            if upper is None:
+                return round(lower, 2)
+            fraction = (rank - seen) / count
+            if bucket == 0:
+                return round(lower + (upper - lower) * fraction, 2)
+            return round(lower * (upper / lower) ** fraction, 2)
+        seen += count
+    return round(bucket_bounds(buckets[-1][0])[0], 2)
+
+
+def read_histogram(cursor, problem_id, class_name=None):
+    """读取直方图，返回 {buckets, total, median_minutes, p90_minutes}"""
+    sql = """
+        SELECT bucket, SUM(count) as count
+        FROM edu_solving_time_histogram
+        WHERE problem_id = %s
+    """
+    params = [problem_id]
+    if class_name:
+        sql += " AND student_class = %s"
+        params.append(class_name)
+    sql += " GROUP BY bucket ORDER BY bucket"
+
+    cursor.execute(sql, tuple(params))
+    rows = cursor.fetchall()
+    buckets = [
+        (row['bucket'], int(row['count'])) if isinstance(row, dict) else (row[0], int(row[1]))
+        for row in rows
+    ]
+
+    result = []
+    for bucket, count in buckets:
+        lower, upper = bucket_bounds(bucket)
+        result.append({
+            'bucket': bucket,
+            'lower_minutes': round(lower, 2),
+            'upper_minutes': round(upper, 2) if upper is not None else None,
+            'count': count
+        })
+
+    return {
+        'buckets': result,
+        'total': sum(count for _, count in buckets),
+        'median_minutes': _quantile(buckets, 0.5),
+        'p90_minutes': _quantile(buckets, 0.9)
+    }
+
+
+def get_histogram(problem_id, class_name=None):
+    """输出题目（或班级×题目）的解题用时直方图"""
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+
+    try:
+        data = read_histogram(cursor, problem_id, class_name)
+        data['problem_id'] = problem_id
+        data['class_name'] = class_name
+        print(json.dumps({
+            'success': True,
+            'data': data
+        }))
+    except mysql.connector.Error as err:
+        print(json.dumps({
+            'success': False,
+            'message': f"获取解题用时分布失败: {str(err)}"
+        }))
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def rebuild():
+    """从原始提交记录重建直方图"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    try:
+        # 先计入待更新派生表的提交，重建之后不会再次计入（derived_updates 依赖本模块，延迟导入）
+        from derived_updates import drain
+        drain()
+
+        create_histogram_table(cursor)
+        cursor.execute("DELETE FROM edu_solving_time_histogram")
+        # 与 bucket_of 的分桶规则一致
+        cursor.execute(f"""
+            INSERT INTO edu_solving_time_histogram (problem_id, student_class, bucket, count)
+            SELECT problem_id, student_class, bucket, COUNT(*)
+            FROM (
+                SELECT
+                    problem_id,
+                    student_class,
+                    CASE
+                        WHEN TIMESTAMPDIFF(SECOND, first_view_time, submission_time) < 60 THEN 0
+                        ELSE LEAST(FLOOR(2 * LOG2(TIMESTAMPDIFF(SECOND, first_view_time, submission_time) / 60)) + 1, {MAX_BUCKET})
+                    END as bucket
+                FROM edu_coding_submissions
+                WHERE submit_result = 'success'
+                AND first_view_time IS NOT NULL AND submission_time IS NOT NULL
+            ) b
+            GROUP BY problem_id, student_class, bucket
+        """)
+        rows = cursor.rowcount
+        conn.commit()
+        print(json.dumps({
+            'success': True,
+            'message': "解题用时直方图重建完成",
+            'rows': rows
+        }))
+    except mysql.connector.Error as err:
+        conn.rollback()
+        print(json.dumps({
+            'success': False,
+            'message': f"重建解题用时直方图失败: {str(err)}"
+        }))
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(json.dumps({
+            'success': False,
+            'message': "缺少操作参数"
+        }))
+        sys.exit(1)
+
+    operation = sys.argv[1]
+
+    if operation == "get" and len(sys.argv) > 2:
+        get_histogram(sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else None)
+    elif operation == "rebuild":
+        rebuild()
+    else:
+        print(json.dumps({
+            'success': False,
+            'message': "无效的操作或参数不足"
+        }))
@@ -7,6 +7,8 @@ import mysql.connector
 from datetime import datetime, timedelta
 import traceback
 import random
+from db_pool import get_connection
+from identity_resolution import resolve_student_ids
 
 # 自定义JSON编码器，处理日期和Decimal类型
 class CustomJSONEncoder(json.JSONEncoder):
@@ -25,19 +27,11 @@ class CustomJSONEncoder(json.JSONEncoder):
             pass
         return super(CustomJSONEncoder, self).default(obj)
 
-# 数据库连接配置
-DB_CONFIG = {
-    'host': 'localhost',
-    'user': 'root',
-    'password': 'mwYgR7#*X2',
-    'database': 'education_platform'
-}
-
 def get_student_activities(student_id):
     """获取学生活动记录"""
     try:
         # 连接数据库
-        conn = mysql.connector.connect(**DB_CONFIG)
+        conn = get_connection()
         cursor = conn.cursor(dictionary=True)
 
         activities = []
@@ -71,18 +65,19 @@ def get_student_activities(student_id):
             print(f"获取学生提交记录失败: {str(inner_e)}", file=sys.stderr)
 
         try:
-            # 获取学生提问记录
-            cursor.execute("""
-                SELECT id, title, created_at
-                FROM edu_questions
-                WHERE student_email = (
-                    SELECT email FROM edu_profiles_student WHERE student_id = %s
-                )
-                ORDER BY created_at DESC
-                LIMIT 5
-            """, (student_id,))
-
-            question_results = cursor.fetchall()
+            # 获取学生提问记录，提问按邮箱记录，先把学号解析为邮箱
+            identity = resolve_student_ids(cursor, [student_id]).get(str(student_id))
+            question_results = []
+            if identity and identity['email']:
+                cursor.execute("""
+                    SELECT id, title, created_at
+                    FROM edu_questions
+                    WHERE student_email = %s
+                    ORDER BY created_at DESC
+                    LIMIT 5
+                """, (identity['email'],))
+
+                question_results = cursor.fetchall()
             for question in question_results:
                 activities.append({
                     'id': question['id'],
@@ -126,7 +121,7 @@ def get_student_progress(student_id):
     """获取学生学习进度"""
     try:
         # 连接数据库
-        conn = mysql.connector.connect(**DB_CONFIG)
+        conn = get_connection()
         cursor = conn.cursor(dictionary=True)
 
         try:
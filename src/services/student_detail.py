@@ -7,10 +7,12 @@
 
 import sys
 import json
-import mysql.connector
 from datetime import datetime, timedelta, date
 import traceback
 from decimal import Decimal
+from query_fanout import run_sections
+from identity_resolution import resolve_student_ids
+from error_signatures import build_student_errors_query
 
 # 自定义JSON编码器，处理datetime、date和Decimal等类型
 class CustomJSONEncoder(json.JSONEncoder):
@@ -30,75 +32,79 @@ class CustomJSONEncoder(json.JSONEncoder):
             # 如果无法转换，返回一个默认值
             return None
 
-def get_db_connection():
-    """获取数据库连接"""
-    try:
-        conn = mysql.connector.connect(
-            host='localhost',
-            user='root',
-            password='mwYgR7#*X2',
-            database='education_platform'
-        )
-        return conn
-    except mysql.connector.Error as err:
-        print(json.dumps({
-            'success': False,
-            'message': f"数据库连接失败: {str(err)}"
-        }))
-        sys.exit(1)
-
-def get_student_detail(student_id):
-    """获取学生详细信息"""
-    print(f"开始获取学生详细信息，学生ID: {student_id}", file=sys.stderr)
-
-    conn = None
-    cursor = None
+def build_submission_queries(student_id):
+    """学生详情中读取提交记录表的查询 {分区: (sql, params)}
 
-    try:
-        conn = get_db_connection()
-        if not conn:
-            print(json.dumps({
-                'success': False,
-                'message': f"无法连接到数据库"
-            }))
-            return
-
-        cursor = conn.cursor(dictionary=True)
-
-        # 1. 获取学生基本信息
-        print(f"查询学生基本信息...", file=sys.stderr)
-        cursor.execute("""
-            SELECT
+    src/scripts/check_query_plans.py 对同一组查询做执行计划检查。
+    """
+    one_week_ago = (datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d')
+    return {
+        # 学生档案中没有该学生时，从提交记录获取班级
+        'student': ("""
+            SELECT DISTINCT
                 student_id,
-                name,
-                class_name,
-                major,
-                email
-            FROM edu_profiles_student
+                student_class as class_name
+            FROM edu_coding_submissions
             WHERE student_id = %s
-        """, (student_id,))
+        """, (student_id,)),
+        'difficulty_stats': ("""
+            SELECT
+                p.difficulty,
+                COUNT(DISTINCT cs.problem_id) as attempted_problems,
+                CASE WHEN SUM(CASE WHEN cs.submit_result = 'success' THEN 1 ELSE 0 END) > 0 THEN 1 ELSE 0 END as solved_problems,
+                AVG(ps.time_spent_seconds) as avg_time_spent
+            FROM edu_coding_submissions cs
+            JOIN edu_problems p ON cs.problem_id = p.id
+            LEFT JOIN edu_problem_solving_stats ps ON cs.student_id = ps.student_id AND cs.problem_id = ps.problem_id
+            WHERE cs.student_id = %s
+            GROUP BY p.difficulty
+        """, (student_id,)),
+        'error_patterns': build_student_errors_query(student_id),
+        'recent_activity': ("""
+            SELECT
+                DATE(submission_time) as submission_date,
+                COUNT(*) as submission_count,
+                SUM(CASE WHEN submit_result = 'success' THEN 1 ELSE 0 END) as successful_count
+            FROM edu_coding_submissions
+            WHERE student_id = %s AND submission_time >= %s
+            GROUP BY DATE(submission_time)
+            ORDER BY submission_date
+        """, (student_id, one_week_ago)),
+        # 解题统计中没有该学生的记录时，从提交记录汇总题目完成情况
+        'problems': ("""
+            SELECT
+                cs.problem_id,
+                MAX(cs.problem_title) as problem_title,
+                MAX(CASE WHEN cs.submit_result = 'success' THEN 1 ELSE 0 END) as is_solved,
+                COUNT(*) as attempts,
+                NULL as time_spent_seconds,
+                MAX(cs.submission_time) as submission_time
+            FROM edu_coding_submissions cs
+            WHERE cs.student_id = %s
+            GROUP BY cs.problem_id
+            ORDER BY submission_time DESC
+        """, (student_id,)),
+    }
 
-        student = cursor.fetchone()
-        if not student:
-            # 尝试从其他表获取学生信息
-            cursor.execute("""
-                SELECT DISTINCT
-                    student_id,
-                    student_class as class_name
-                FROM edu_coding_submissions
-                WHERE student_id = %s
-            """, (student_id,))
-            student = cursor.fetchone()
 
-        if not student:
-            print(json.dumps({
-                'success': False,
-                'message': f"未找到学生信息，学生ID: {student_id}"
-            }))
-            return
+def get_student_detail(student_id):
+    """获取学生详细信息"""
+    print(f"开始获取学生详细信息，学生ID: {student_id}", file=sys.stderr)
+    submission_queries = build_submission_queries(student_id)
 
+    # 七个分区互不依赖，通过 query_fanout 在各自的连接上并发执行，
+    # 超时或出错的分区返回默认值，并列在 incomplete_sections 中
+    def fetch_student(cursor):
+        # 1. 获取学生基本信息
+        identity = resolve_student_ids(cursor, [student_id]).get(str(student_id))
+        if identity:
+            return {field: identity[field] for field in ('student_id', 'name', 'class_name', 'major', 'email')}
+        # 尝试从其他表获取学生信息
+        cursor.execute(*submission_queries['student'])
+        return cursor.fetchone()
+
+    def fetch_learning_stats(cursor):
         # 2. 获取学生学习统计数据
-        print(f"查询学生学习统计数据...", file=sys.stderr)
         cursor.execute("""
             SELECT
                 ps.student_id,
@@ -112,136 +118,96 @@ def get_student_detail(student_id):
             WHERE ps.student_id = %s
             GROUP BY ps.student_id
         """, (student_id,))
+        return cursor.fetchone() or {}
 
-        learning_stats = cursor.fetchone() or {}
-
+    def fetch_difficulty_stats(cursor):
         # 3. 获取学生按难度分类的解题情况
-        print(f"查询学生按难度分类的解题情况...", file=sys.stderr)
-        try:
-            cursor.execute("""
-                SELECT
-                    p.difficulty,
-                    COUNT(DISTINCT cs.problem_id) as attempted_problems,
-                    CASE WHEN SUM(CASE WHEN cs.submit_result = 'success' THEN 1 ELSE 0 END) > 0 THEN 1 ELSE 0 END as solved_problems,
-                    AVG(ps.time_spent_seconds) as avg_time_spent
-                FROM edu_coding_submissions cs
-                JOIN edu_problems p ON cs.problem_id = p.id
-                LEFT JOIN edu_problem_solving_stats ps ON cs.student_id = ps.student_id AND cs.problem_id = ps.problem_id
-                WHERE cs.student_id = %s
-                GROUP BY p.difficulty
-            """, (student_id,))
-
-            difficulty_stats = cursor.fetchall()
-        except mysql.connector.Error as err:
-            print(f"查询难度分类数据失败: {str(err)}", file=sys.stderr)
-            traceback.print_exc(file=sys.stderr)
-            difficulty_stats = []
-            # 不要让这个错误中断整个流程
+        cursor.execute(*submission_queries['difficulty_stats'])
+        return cursor.fetchall()
 
+    def fetch_error_patterns(cursor):
         # 4. 获取学生常见错误类型
-        print(f"查询学生常见错误类型...", file=sys.stderr)
-        try:
-            cursor.execute("""
-                SELECT
-                    SUBSTRING_INDEX(execution_errors, '\n', 1) as error_type,
-                    COUNT(*) as occurrence_count
-                FROM edu_coding_submissions
-                WHERE student_id = %s AND submit_result = 'failed' AND execution_errors IS NOT NULL
-                GROUP BY error_type
-                ORDER BY occurrence_count DESC
-                LIMIT 5
-            """, (student_id,))
-
-            error_patterns = cursor.fetchall()
-        except mysql.connector.Error as err:
-            print(f"查询错误类型数据失败: {str(err)}", file=sys.stderr)
-            error_patterns = []
+        cursor.execute(*submission_queries['error_patterns'])
+        return cursor.fetchall()
 
+    def fetch_recent_activity(cursor):
         # 5. 获取学生最近一周的活动
-        print(f"查询学生最近一周的活动...", file=sys.stderr)
-        one_week_ago = (datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d')
-
-        try:
-            cursor.execute("""
-                SELECT
-                    DATE(submission_time) as submission_date,
-                    COUNT(*) as submission_count,
-                    SUM(CASE WHEN submit_result = 'success' THEN 1 ELSE 0 END) as successful_count
-                FROM edu_coding_submissions
-                WHERE student_id = %s AND submission_time >= %s
-                GROUP BY DATE(submission_time)
-                ORDER BY submission_date
-            """, (student_id, one_week_ago))
-
-            recent_activity = cursor.fetchall()
-        except mysql.connector.Error as err:
-            print(f"查询最近活动数据失败: {str(err)}", file=sys.stderr)
-            recent_activity = []
+        cursor.execute(*submission_queries['recent_activity'])
+        return cursor.fetchall()
 
+    def fetch_problems(cursor):
         # 6. 获取学生题目完成情况
-        print(f"查询学生题目完成情况...", file=sys.stderr)
-        try:
-            cursor.execute("""
-                SELECT
-                    ps.problem_id,
-                    MAX(p.title) as problem_title,
-                    MAX(ps.is_solved) as is_solved,
-                    MAX(ps.attempts_until_success) as attempts,
-                    MAX(ps.time_spent_seconds) as time_spent_seconds,
-                    MAX(ps.solved_time) as submission_time
-                FROM edu_problem_solving_stats ps
-                LEFT JOIN edu_problems p ON ps.problem_id = p.id
-                WHERE ps.student_id = %s
-                GROUP BY ps.problem_id
-                ORDER BY submission_time DESC
-            """, (student_id,))
-
-            problems = cursor.fetchall()
+        cursor.execute("""
+            SELECT
+                ps.problem_id,
+                MAX(p.title) as problem_title,
+                MAX(ps.is_solved) as is_solved,
+                MAX(ps.attempts_until_success) as attempts,
+                MAX(ps.time_spent_seconds) as time_spent_seconds,
+                MAX(ps.solved_time) as submission_time
+            FROM edu_problem_solving_stats ps
+            LEFT JOIN edu_problems p ON ps.problem_id = p.id
+            WHERE ps.student_id = %s
+            GROUP BY ps.problem_id
+            ORDER BY submission_time DESC
+        """, (student_id,))
+        problems = cursor.fetchall()
+        if problems:
+            return problems
 
-            # 如果没有从edu_problem_solving_stats获取到数据，尝试从edu_coding_submissions获取
-            if not problems:
-                print(f"从edu_problem_solving_stats未找到数据，尝试从edu_coding_submissions获取...", file=sys.stderr)
-                cursor.execute("""
-                    SELECT
-                        cs.problem_id,
-                        MAX(cs.problem_title) as problem_title,
-                        MAX(CASE WHEN cs.submit_result = 'success' THEN 1 ELSE 0 END) as is_solved,
-                        COUNT(*) as attempts,
-                        NULL as time_spent_seconds,
-                        MAX(cs.submission_time) as submission_time
-                    FROM edu_coding_submissions cs
-                    WHERE cs.student_id = %s
-                    GROUP BY cs.problem_id
-                    ORDER BY submission_time DESC
-                """, (student_id,))
+        # 如果没有从edu_problem_solving_stats获取到数据，尝试从edu_coding_submissions获取
+        cursor.execute(*submission_queries['problems'])
+        return cursor.fetchall()
 
-                problems = cursor.fetchall()
+    def fetch_ai_analysis(cursor):
+        # 7. 获取学生已有的AI分析结果
+        cursor.execute("""
+            SELECT
+                pattern,
+                strengths,
+                weaknesses,
+                suggestions,
+                created_at
+            FROM edu_student_ai_analysis
+            WHERE student_id = %s
+            ORDER BY created_at DESC
+            LIMIT 1
+        """, (student_id,))
+        return cursor.fetchone()
 
-        except mysql.connector.Error as err:
-            print(f"查询题目完成情况失败: {str(err)}", file=sys.stderr)
-            traceback.print_exc(file=sys.stderr)
-            problems = []
+    try:
+        sections, incomplete = run_sections([
+            ('student', fetch_student, None),
+            ('learning_stats', fetch_learning_stats, {}),
+            ('difficulty_stats', fetch_difficulty_stats, []),
+            ('error_patterns', fetch_error_patterns, []),
+            ('recent_activity', fetch_recent_activity, []),
+            ('problems', fetch_problems, []),
+            ('ai_analysis', fetch_ai_analysis, None),
+        ])
+
+        # 基本信息查询失败或超时（数据库不可用等）时整体按失败返回
+        if 'student' in incomplete:
+            print(json.dumps({
+                'success': False,
+                'message': f"获取学生详细信息失败: {incomplete['student']}"
+            }))
+            return
 
-        # 7. 获取学生已有的AI分析结果
-        print(f"查询学生AI分析结果...", file=sys.stderr)
-        try:
-            cursor.execute("""
-                SELECT
-                    pattern,
-                    strengths,
-                    weaknesses,
-                    suggestions,
-                    created_at
-                FROM edu_student_ai_analysis
-                WHERE student_id = %s
-                ORDER BY created_at DESC
-                LIMIT 1
-            """, (student_id,))
+        student = sections['student']
+        if not student:
+            print(json.dumps({
+                'success': False,
+                'message': f"未找到学生信息，学生ID: {student_id}"
+            }))
+            return
 
-            ai_analysis = cursor.fetchone()
-        except mysql.connector.Error as err:
-            print(f"查询AI分析结果失败: {str(err)}", file=sys.stderr)
-            ai_analysis = None
+        learning_stats = sections['learning_stats']
+        difficulty_stats = sections['difficulty_stats']
+        error_patterns = sections['error_patterns']
+        recent_activity = sections['recent_activity']
+        problems = sections['problems']
+        ai_analysis = sections['ai_analysis']
 
         # 构建结果数据
         result = {
@@ -277,11 +243,15 @@ def get_student_detail(student_id):
                         else:
                             problem['submission_time'] = problem['submission_time'].strftime('%Y-%m-%d %H:%M:%S')
 
-            # 尝试序列化结果
-            print(json.dumps({
+            output = {
                 'success': True,
                 'data': result
-            }, cls=CustomJSONEncoder))
+            }
+            if incomplete:
+                output['incomplete_sections'] = incomplete
+
+            # 尝试序列化结果
+            print(json.dumps(output, cls=CustomJSONEncoder))
 
         except Exception as e:
             print(f"序列化结果数据时发生错误: {str(e)}", file=sys.stderr)
@@ -303,11 +273,6 @@ def get_student_detail(student_id):
             'success': False,
             'message': f"获取学生详细信息失败: {str(e)}"
         }))
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
 
 if __name__ == "__main__":
     if len(sys.argv) < 3:
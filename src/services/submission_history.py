@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+提交记录分页查询
+按学生、题目或班级翻阅提交记录，按 (submission_time, id) 倒序做键集分页:
+下一页的条件是 "排在上一页最后一条之后"，由 (学生/题目/班级, submission_time) 索引直接定位，
+每一页的开销只与页大小有关，翻到第几页都一样（不使用 OFFSET）。
+
+    python submission_history.py list <student|problem|class> <值> [选项JSON]
+
+选项:
+    result  success/failed，只看某种结果
+    from    开始时间（包含），'YYYY-MM-DD' 或 'YYYY-MM-DD HH:MM:SS'
+    to      结束时间，只有日期时包含当天，带时间时不包含该时刻
+    limit   每页条数，默认50，最大500
+    cursor  上一页返回的 next_cursor
+"""
+
+import sys
+import json
+import base64
+import mysql.connector
+from datetime import datetime, date, timedelta
+from decimal import Decimal
+from db_pool import get_db_connection
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# 分页范围 -> 提交记录表的列，每一列都有以 (列, submission_time) 开头的索引
+SCOPES = {
+    'student': 'student_id',
+    'problem': 'problem_id',
+    'class': 'student_class',
+}
+
+RESULTS = ('success', 'failed')
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+class CustomJSONEncoder(json.JSONEncoder):
+    def default(self, obj):
+        if isinstance(obj, (datetime, date)):
+            return obj.strftime(TIME_FORMAT)
+        if isinstance(obj, Decimal):
+            return float(obj)
+        return super().default(obj)
+
+
+def encode_cursor(submission_time, submission_id):
+    """把一页最后一条记录的位置编码为游标"""
+    raw = json.dumps([submission_time.strftime(TIME_FORMAT), submission_id])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor_value):
+    """解析游标，返回 (submission_time, id)，格式不对时抛出 ValueError"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor_value.encode('ascii')).decode('utf-8')
+        time_text, submission_id = json.loads(raw)
+        return datetime.strptime(time_text, TIME_FORMAT), int(submission_id)
+    except (TypeError, ValueError, UnicodeError) as err:
+        raise ValueError("无效的分页游标") from err
+
+
+def _parse_bound(value, is_end):
+    """解析时间范围，只有日期的结束时间取下一天零点"""
+    if len(value) == 10:
+        day = datetime.strptime(value, '%Y-%m-%d')
+        return day + timedelta(days=1) if is_end else day
+    return datetime.strptime(value, TIME_FORMAT)
+
+
+def build_page_query(scope, value, options):
+    """生成一页的查询，返回 (sql, params, limit)，参数不合法时抛出 ValueError"""
+    if scope not in SCOPES:
+        raise ValueError(f"不支持的查询范围: {scope}")
+
+    limit = int(options.get('limit') or DEFAULT_PAGE_SIZE)
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    conditions = [f"s.{SCOPES[scope]} = %(value)s"]
+    params = {'value': value, 'limit': limit + 1}
+
+    result = options.get('result')
+    if result:
+        if result not in RESULTS:
+            raise ValueError(f"不支持的提交结果: {result}")
+        conditions.append("s.submit_result = %(result)s")
+        params['result'] = result
+
+    try:
+        if options.get('from'):
+            conditions.append("s.submission_time >= %(time_from)s")
+            params['time_from'] = _parse_bound(options['from'], False)
+        if options.get('to'):
+            conditions.append("s.submission_time < %(time_to)s")
+            params['time_to'] = _parse_bound(options['to'], True)
+    except ValueError as err:
+        raise ValueError("时间格式应为 YYYY-MM-DD 或 YYYY-MM-DD HH:MM:SS") from err
+
+    if options.get('cursor'):
+        params['cursor_time'], params['cursor_id'] = decode_cursor(options['cursor'])
+        conditions.append("""(
+            s.submission_time < %(cursor_time)s
+            OR (s.submission_time = %(cursor_time)s AND s.id < %(cursor_id)s)
+        )""")
+
+    # 多取一条判断是否还有下一页
+    sql = f"""
+        SELECT
+            s.id as submission_id,
+            s.student_class,
+            s.student_id,
+            s.problem_id,
+            s.problem_title,
+            s.submit_result,
+            s.execution_errors,
+            es.canonical_message as error_type,
+            s.first_view_time,
+            s.submission_time
+        FROM edu_coding_submissions s
+        LEFT JOIN edu_error_signatures es ON es.fingerprint = s.error_fingerprint
+        WHERE {' AND '.join(conditions)}
+        ORDER BY s.submission_time DESC, s.id DESC
+        LIMIT %(limit)s
+    """
+    return sql, params, limit
+
+
+def list_submissions(scope, value, options=None):
+    """输出一页提交记录和下一页的游标"""
+    try:
+        sql, params, limit = build_page_query(scope, value, options or {})
+    except ValueError as err:
+        print(json.dumps({
+            'success': False,
+            'message': str(err)
+        }))
+        return
+
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+
+    try:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = None
+        if has_more:
+            last = rows[-1]
+            next_cursor = encode_cursor(last['submission_time'], last['submission_id'])
+
+        print(json.dumps({
+            'success': True,
+            'data': {
+                'submissions': rows,
+                'page_size': limit,
+                'has_more': has_more,
+                'next_cursor': next_cursor
+            }
+        }, cls=CustomJSONEncoder))
+    except mysql.connector.Error as err:
+        print(json.dumps({
+            'success': False,
+            'message': f"获取提交记录失败: {str(err)}"
+        }))
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(json.dumps({
+            'success': False,
+            'message': "缺少操作参数"
+        }))
+        sys.exit(1)
+
+    operation = sys.argv[1]
+
+    if operation == "list" and len(sys.argv) > 3:
+        list_submissions(sys.argv[2], sys.argv[3], json.loads(sys.argv[4]) if len(sys.argv) > 4 else {})
+    else:
+        print(json.dumps({
+            'success': False,
+            'message': "无效的操作或参数不足"
+        }))
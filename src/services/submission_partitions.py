@@ -0,0 +1,441 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+提交记录表按月分区
+edu_coding_submissions 按 submission_time 做 RANGE 分区（每月一个分区，另有一个 pmax 分区
+接收超出范围的数据）。带 submission_time 范围条件的查询只扫描相关月份的分区。
+
+MySQL要求分区列包含在每个唯一键中，因此主键改为 (id, submission_time)，
+submission_time 改为 NOT NULL。TIMESTAMP 列的 RANGE 分区需要使用 UNIX_TIMESTAMP()。
+
+冷热分层: 超过保留月数的分区先复制到压缩格式的归档表 edu_coding_submissions_archive，
+再删除分区。教师端的汇总统计来自汇总表（见 rollups.py），不受归档影响，
+rollups.py rebuild 从热表和归档表一起重建。其余直接读取提交记录表的查询只包含热数据。
+
+    python submission_partitions.py partition              把现有表改为分区表（一次性迁移）
+    python submission_partitions.py maintain [提前月数] [保留月数]
+                                                           创建未来的分区，归档过期分区
+    python submission_partitions.py status                 查看分区和行数
+    python submission_partitions.py benchmark [行数] [--keep]
+                                                           对比分区前后的查询耗时（默认1000万行）
+
+环境变量:
+    SUBMISSION_PARTITION_AHEAD  maintain 默认提前创建的月数，默认3
+    SUBMISSION_HOT_MONTHS       maintain 默认保留在热表中的月数，默认12
+"""
+
+import os
+import sys
+import json
+import time
+import statistics
+import mysql.connector
+from datetime import datetime, timedelta
+from db_pool import get_db_connection
+
+TABLE = 'edu_coding_submissions'
+ARCHIVE_TABLE = 'edu_coding_submissions_archive'
+
+PARTITION_AHEAD = int(os.environ.get('SUBMISSION_PARTITION_AHEAD', '3'))
+HOT_MONTHS = int(os.environ.get('SUBMISSION_HOT_MONTHS', '12'))
+
+BENCHMARK_ROWS = 10000000
+BENCHMARK_CHUNK = 1000000
+BENCHMARK_RUNS = 3
+
+
+def _month_start(value):
+    return datetime(value.year, value.month, 1)
+
+
+def _add_months(value, months):
+    month_index = value.year * 12 + value.month - 1 + months
+    return datetime(month_index // 12, month_index % 12 + 1, 1)
+
+
+def _partition_name(month):
+    return f"p{month.strftime('%Y%m')}"
+
+
+def _partition_clause(month):
+    """某月分区的定义，上界为下个月第一天"""
+    upper = _add_months(month, 1).strftime('%Y-%m-%d %H:%M:%S')
+    return f"PARTITION {_partition_name(month)} VALUES LESS THAN (UNIX_TIMESTAMP('{upper}'))"
+
+
+def _month_range(first, last):
+    """first 到 last（包含）之间每个月的第一天"""
+    months = []
+    month = _month_start(first)
+    while month <= last:
+        months.append(month)
+        month = _add_months(month, 1)
+    return months
+
+
+def get_partitions(cursor, table=TABLE):
+    """表的分区列表 [(分区名, 行数估计)]，未分区时为空"""
+    cursor.execute("""
+        SELECT PARTITION_NAME, TABLE_ROWS
+        FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+        AND PARTITION_NAME IS NOT NULL
+        ORDER BY PARTITION_ORDINAL_POSITION
+    """, (table,))
+    return [(row[0], row[1]) for row in cursor.fetchall()]
+
+
+def _has_index(cursor, table, index_name):
+    cursor.execute("""
+        SELECT COUNT(*)
+        FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+    """, (table, index_name))
+    return cursor.fetchone()[0] > 0
+
+
+def _partition_by_clause(months):
+    clauses = [_partition_clause(month) for month in months]
+    clauses.append("PARTITION pmax VALUES LESS THAN MAXVALUE")
+    return "PARTITION BY RANGE (UNIX_TIMESTAMP(submission_time)) (\n    " + ",\n    ".join(clauses) + "\n)"
+
+
+def partition_table(months_ahead=PARTITION_AHEAD):
+    """把提交记录表改为按月分区的表"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    started = time.time()
+
+    try:
+        if get_partitions(cursor):
+            print(json.dumps({
+                'success': True,
+                'message': "提交记录表已经是分区表"
+            }))
+            return
+
+        # 分区列不能为空
+        cursor.execute(f"""
+            UPDATE {TABLE}
+            SET submission_time = COALESCE(first_view_time, CURRENT_TIMESTAMP)
+            WHERE submission_time IS NULL
+        """)
+        conn.commit()
+
+        cursor.execute(f"SELECT MIN(submission_time) FROM {TABLE}")
+        first = cursor.fetchone()[0] or datetime.now()
+        months = _month_range(first, _add_months(_month_start(datetime.now()), months_ahead))
+
+        alter = [
+            "MODIFY submission_time TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP",
+            "DROP PRIMARY KEY",
+            "ADD PRIMARY KEY (id, submission_time)"
+        ]
+        if not _has_index(cursor, TABLE, 'idx_submission_time'):
+            alter.append("ADD INDEX idx_submission_time (submission_time, student_id)")
+        cursor.execute(f"ALTER TABLE {TABLE} " + ", ".join(alter))
+
+        cursor.execute(f"ALTER TABLE {TABLE} " + _partition_by_clause(months))
+
+        print(json.dumps({
+            'success': True,
+            'message': "提交记录表分区完成",
+            'data': {
+                'partitions': len(months) + 1,
+                'first_partition': _partition_name(months[0]),
+                'last_partition': _partition_name(months[-1]),
+                'elapsed_seconds': round(time.time() - started, 2)
+            }
+        }))
+    except mysql.connector.Error as err:
+        print(json.dumps({
+            'success': False,
+            'message': f"提交记录表分区失败: {str(err)}"
+        }))
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def _ensure_archive_table(cursor):
+    """创建压缩格式的归档表，结构与热表一致但不分区"""
+    cursor.execute(f"CREATE TABLE IF NOT EXISTS {ARCHIVE_TABLE} LIKE {TABLE}")
+    if get_partitions(cursor, ARCHIVE_TABLE):
+        cursor.execute(f"ALTER TABLE {ARCHIVE_TABLE} REMOVE PARTITIONING")
+        cursor.execute(f"ALTER TABLE {ARCHIVE_TABLE} ROW_FORMAT=COMPRESSED KEY_BLOCK_SIZE=8")
+
+
+def maintain(months_ahead=PARTITION_AHEAD, hot_months=HOT_MONTHS):
+    """创建未来月份的分区，把超过保留月数的分区归档到冷表"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    started = time.time()
+    created = []
+    archived = []
+
+    try:
+        partitions = [name for name, _ in get_partitions(cursor)]
+        if not partitions:
+            print(json.dumps({
+                'success': False,
+                'message': "提交记录表尚未分区，请先执行 partition"
+            }))
+            return
+
+        this_month = _month_start(datetime.now())
+
+        # 1. 从 pmax 中拆分出未来月份的分区
+        monthly = [name for name in partitions if name != 'pmax']
+        last_month = datetime.strptime(monthly[-1][1:], '%Y%m') if monthly else _add_months(this_month, -1)
+        new_months = _month_range(_add_months(last_month, 1), _add_months(this_month, months_ahead))
+        if new_months:
+            clauses = [_partition_clause(month) for month in new_months]
+            clauses.append("PARTITION pmax VALUES LESS THAN MAXVALUE")
+            cursor.execute(
+                f"ALTER TABLE {TABLE} REORGANIZE PARTITION pmax INTO (\n    " + ",\n    ".join(clauses) + "\n)"
+            )
+            created = [_partition_name(month) for month in new_months]
+
+        # 2. 归档早于保留期的分区: 先复制到冷表，再删除分区
+        cutoff = _add_months(this_month, -hot_months)
+        expired = [name for name in monthly if datetime.strptime(name[1:], '%Y%m') < cutoff]
+        if expired:
+            _ensure_archive_table(cursor)
+        for name in expired:
+            # INSERT IGNORE 保证中断后重新执行不会重复归档
+            cursor.execute(f"INSERT IGNORE INTO {ARCHIVE_TABLE} SELECT * FROM {TABLE} PARTITION ({name})")
+            rows = cursor.rowcount
+            conn.commit()
+            cursor.execute(f"ALTER TABLE {TABLE} DROP PARTITION {name}")
+            archived.append({'partition': name, 'rows': rows})
+
+        print(json.dumps({
+            'success': True,
+            'message': "分区维护完成",
+            'data': {
+                'created_partitions': created,
+                'archived_partitions': archived,
+                'elapsed_seconds': round(time.time() - started, 2)
+            }
+        }))
+    except mysql.connector.Error as err:
+        conn.rollback()
+        print(json.dumps({
+            'success': False,
+            'message': f"分区维护失败: {str(err)}",
+            'created_partitions': created,
+            'archived_partitions': archived
+        }))
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def get_status():
+    """输出热表分区和归档表的行数"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    try:
+        partitions = get_partitions(cursor)
+        cursor.execute("""
+            SELECT TABLE_ROWS, ROW_FORMAT
+            FROM information_schema.TABLES
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+        """, (ARCHIVE_TABLE,))
+        archive = cursor.fetchone()
+
+        print(json.dumps({
+            'success': True,
+            'data': {
+                'partitioned': bool(partitions),
+                'partitions': [{'name': name, 'rows': rows} for name, rows in partitions],
+                'archive_rows': archive[0] if archive else 0,
+                'archive_row_format': archive[1] if archive else None
+            }
+        }))
+    except mysql.connector.Error as err:
+        print(json.dumps({
+            'success': False,
+            'message': f"获取分区状态失败: {str(err)}"
+        }))
+    finally:
+        cursor.close()
+        conn.close()
+
+
+# 基准测试使用的查询，与 teaching_stats_api 中的仪表盘查询形式一致
+BENCHMARK_QUERIES = {
+    'active_students_7d': """
+        SELECT COUNT(DISTINCT student_id) FROM {table}
+        WHERE submission_time >= %(week_ago)s
+    """,
+    'active_students_prev_week': """
+        SELECT COUNT(DISTINCT student_id) FROM {table}
+        WHERE submission_time >= %(two_weeks_ago)s AND submission_time < %(week_ago)s
+    """,
+    'activity_trend_30d': """
+        SELECT DATE(submission_time) as d, COUNT(*) FROM {table}
+        WHERE submission_time >= %(month_ago)s
+        GROUP BY d
+    """,
+    'recent_successes': """
+        SELECT id, student_id, problem_id, submission_time FROM {table}
+        WHERE submit_result = 'success' AND submission_time >= %(month_ago)s
+        ORDER BY submission_time DESC
+        LIMIT 5
+    """
+}
+
+
+def _time_query(cursor, sql, params):
+    """执行查询若干次，返回耗时中位数（毫秒）"""
+    timings = []
+    for _ in range(BENCHMARK_RUNS):
+        started = time.perf_counter()
+        cursor.execute(sql, params)
+        cursor.fetchall()
+        timings.append((time.perf_counter() - started) * 1000)
+    return round(statistics.median(timings), 2)
+
+
+def benchmark(rows=BENCHMARK_ROWS, keep=False):
+    """生成模拟数据，对比未分区无时间索引的表与按月分区的表的仪表盘查询耗时"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    flat_table = 'bench_submissions_flat'
+    part_table = 'bench_submissions_part'
+    now = datetime.now()
+
+    try:
+        cursor.execute(f"DROP TABLE IF EXISTS {flat_table}, {part_table}, bench_seq")
+        cursor.execute("CREATE TABLE bench_seq (n INT PRIMARY KEY)")
+        cursor.executemany("INSERT INTO bench_seq (n) VALUES (%s)", [(i,) for i in range(1000)])
+
+        columns = """
+            id INT AUTO_INCREMENT,
+            student_class VARCHAR(100) NOT NULL,
+            student_id VARCHAR(50) NOT NULL,
+            problem_id VARCHAR(50) NOT NULL,
+            submit_result ENUM('success', 'failed') NOT NULL,
+            submission_time TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        """
+        # 分区前: 与现有表一致，只有主键和学生/题目/班级索引
+        cursor.execute(f"""
+            CREATE TABLE {flat_table} (
+                {columns}
+                PRIMARY KEY (id),
+                INDEX (student_id), INDEX (problem_id), INDEX (student_class)
+            )
+        """)
+        # 分区后: 主键包含分区列，增加时间索引
+        months = _month_range(_add_months(now, -25), _add_months(now, 1))
+        cursor.execute(f"""
+            CREATE TABLE {part_table} (
+                {columns}
+                PRIMARY KEY (id, submission_time),
+                INDEX (student_id), INDEX (problem_id), INDEX (student_class),
+                INDEX idx_submission_time (submission_time)
+            ) {_partition_by_clause(months)}
+        """)
+        conn.commit()
+
+        # 生成两年内均匀分布的提交
+        load_started = time.time()
+        remaining = rows
+        while remaining > 0:
+            chunk = min(BENCHMARK_CHUNK, remaining)
+            cursor.execute(f"""
+                INSERT INTO {flat_table} (student_class, student_id, problem_id, submit_result, submission_time)
+                SELECT
+                    CONCAT('班级', FLOOR(RAND() * 50)),
+                    CONCAT('s', FLOOR(RAND() * 5000)),
+                    FLOOR(RAND() * 300),
+                    IF(RAND() < 0.4, 'success', 'failed'),
+                    NOW() - INTERVAL FLOOR(RAND() * 730 * 86400) SECOND
+                FROM bench_seq a CROSS JOIN bench_seq b
+                LIMIT %s
+            """, (chunk,))
+            conn.commit()
+            remaining -= chunk
+        cursor.execute(f"INSERT INTO {part_table} SELECT * FROM {flat_table}")
+        conn.commit()
+        cursor.execute(f"ANALYZE TABLE {flat_table}, {part_table}")
+        cursor.fetchall()
+        load_seconds = round(time.time() - load_started, 2)
+
+        params = {
+            'week_ago': now - timedelta(days=7),
+            'two_weeks_ago': now - timedelta(days=14),
+            'month_ago': now - timedelta(days=30)
+        }
+        results = {}
+        for name, sql in BENCHMARK_QUERIES.items():
+            before = _time_query(cursor, sql.format(table=flat_table), params)
+            after = _time_query(cursor, sql.format(table=part_table), params)
+
+            cursor.execute("EXPLAIN " + sql.format(table=part_table), params)
+            explain_columns = [column[0] for column in cursor.description]
+            plan = dict(zip(explain_columns, cursor.fetchone()))
+            cursor.fetchall()
+
+            results[name] = {
+                'before_ms': before,
+                'after_ms': after,
+                'speedup': round(before / after, 1) if after else None,
+                'partitions_scanned': plan.get('partitions')
+            }
+
+        print(json.dumps({
+            'success': True,
+            'data': {
+                'rows': rows,
+                'partitions': len(months) + 1,
+                'load_seconds': load_seconds,
+                'runs_per_query': BENCHMARK_RUNS,
+                'queries': results
+            }
+        }, ensure_ascii=False))
+    except mysql.connector.Error as err:
+        print(json.dumps({
+            'success': False,
+            'message': f"分区基准测试失败: {str(err)}"
+        }))
+    finally:
+        if not keep:
+            try:
+                cursor.execute(f"DROP TABLE IF EXISTS {flat_table}, {part_table}, bench_seq")
+            except mysql.connector.Error:
+                pass
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(json.dumps({
+            'success': False,
+            'message': "缺少操作参数"
+        }))
+        sys.exit(1)
+
+    operation = sys.argv[1]
+
+    if operation == "partition":
+        partition_table()
+    elif operation == "maintain":
+        maintain(
+            int(sys.argv[2]) if len(sys.argv) > 2 else PARTITION_AHEAD,
+            int(sys.argv[3]) if len(sys.argv) > 3 else HOT_MONTHS
+        )
+    elif operation == "status":
+        get_status()
+    elif operation == "benchmark":
+        numbers = [arg for arg in sys.argv[2:] if arg != '--keep']
+        benchmark(int(numbers[0]) if numbers else BENCHMARK_ROWS, '--keep' in sys.argv)
+    else:
+        print(json.dumps({
+            'success': False,
+            'message': "无效的操作或参数不足"
+        }))
@@ -6,6 +6,7 @@ import json
 import mysql.connector
 from datetime import datetime, date
 from decimal import Decimal
+from db_pool import get_db_connection
 
 # 添加自定义JSON编码器
 class CustomJSONEncoder(json.JSONEncoder):
@@ -16,26 +17,6 @@ class CustomJSONEncoder(json.JSONEncoder):
             return float(obj)
         return super().default(obj)
 
-# 数据库连接配置
-DB_CONFIG = {
-    'host': 'localhost',
-    'user': 'root',
-    'password': 'mwYgR7#*X2',
-    'database': 'education_platform'
-}
-
-def get_db_connection():
-    """建立数据库连接"""
-    try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        return conn
-    except mysql.connector.Error as err:
-        print(json.dumps({
-            'success': False,
-            'message': f"数据库连接失败: {str(err)}"
-        }))
-        sys.exit(1)
-
 def create_tables():
     """创建教学内容相关的数据表"""
     conn = get_db_connection()
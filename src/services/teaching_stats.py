@@ -3,9 +3,12 @@ import json
 import mysql.connector
 from datetime import datetime, date
 from decimal import Decimal
-
-# 使用与其他服务相同的数据库配置
-from coding_data import DB_CONFIG
+from db_pool import get_db_connection
+from dashboard_cache import cached_output, TAG_SUBMISSIONS, TAG_PROBLEMS
+from query_fanout import run_sections, TIMEOUT
+from error_signatures import build_top_errors_query
+from daily_activity import read_trend
+from quantile_sketches import read_problem_quantiles, METRIC_ATTEMPTS, METRIC_SOLVE_SECONDS, ER_NO_SUCH_TABLE
 
 # 添加自定义JSON编码器
 class CustomJSONEncoder(json.JSONEncoder):
@@ -16,186 +19,233 @@ class CustomJSONEncoder(json.JSONEncoder):
             return float(obj)
         return super().default(obj)
 
-def get_db_connection():
-    """建立数据库连接"""
-    try:
-        return mysql.connector.connect(**DB_CONFIG)
-    except mysql.connector.Error as err:
-        print(json.dumps({
-            'success': False,
-            'message': f"数据库连接失败: {str(err)}"
-        }))
-        sys.exit(1)
-
-def analyze_learning_patterns(class_name=None):
-    """分析学习模式和趋势"""
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    try:
-        where_clause = "WHERE 1=1"
-        params = []
-        if class_name:
-            where_clause += " AND cs.student_class = %s"
-            params.append(class_name)
-
-        # 首先检查是否有该班级的数据
-        cursor.execute(f"""
-            SELECT COUNT(*) as count
-            FROM edu_coding_submissions cs
-            {where_clause}
-        """, params)
+def build_learning_pattern_queries(class_name=None):
+    """学习模式分析各分区的查询 {分区: (sql, params)}
+
+    src/scripts/check_query_plans.py 对同一组查询做执行计划检查。
+    """
+    where_clause = "WHERE 1=1"
+    params = []
+    if class_name:
+        where_clause += " AND cs.student_class = %s"
+        params.append(class_name)
+
+    # 数据量、提交趋势和题目难度读取汇总表（见 rollups.py）
+    rollup_where = "WHERE student_class = %s" if class_name else ""
+
+    # 首先检查是否有该班级的数据
+    count_sql = f"""
+        SELECT COUNT(*) as count
+        FROM edu_class_day_rollup
+        {rollup_where}
+    """
+
+    # 1. 分析每日提交趋势
+    daily_trends_sql = f"""
+        SELECT
+            activity_date as date,
+            SUM(attempts) as total_submissions,
+            SUM(active_students) as active_students,
+            SUM(successes) as successful_submissions
+        FROM edu_class_day_rollup
+        {rollup_where}
+        GROUP BY activity_date
+        ORDER BY date DESC
+        LIMIT 30
+    """
+
+    # 2. 分析问题难度分布
+    # 平均解题时间使用解出学生在edu_problem_solving_stats中的time_spent_seconds（秒），
+    # 只统计0到3小时之间的值，汇总表在写入提交时累加。
+    # 汇总表的学生数只在班级内去重，不指定班级时改用解题统计中每道题的学生数
+    # （同一学生以多个班级提交时只计一次）
+    if class_name:
+        student_join = ""
+        student_count = "SUM(r.students)"
+    else:
+        student_join = """
+        LEFT JOIN (
+            SELECT problem_id, COUNT(*) as students
+            FROM edu_problem_solving_stats
+            GROUP BY problem_id
+        ) ps ON ps.problem_id = r.problem_id"""
+        student_count = "COALESCE(MAX(ps.students), 0)"
+    problem_difficulty_sql = f"""
+        SELECT
+            r.problem_id,
+            MAX(r.problem_title) as problem_title,
+            SUM(r.attempts) as attempt_count,
+            {student_count} as student_count,
+            SUM(r.successes) / SUM(r.attempts) * 100 as success_rate,
+            SUM(r.solve_seconds) / NULLIF(SUM(r.timed_solves), 0) as avg_solution_time
+        FROM edu_class_problem_rollup r{student_join}
+        {'WHERE r.student_class = %s' if class_name else ''}
+        GROUP BY r.problem_id
+        ORDER BY success_rate ASC
+    """
+
+    # 3. 分析常见错误模式
+    error_patterns_query = build_top_errors_query(
+        ["student_class = %s"] if class_name else [], params, 10,
+        aggregates={
+            'affected_students': 'COUNT(DISTINCT student_id)',
+            'related_problems': 'GROUP_CONCAT(DISTINCT problem_id)'
+        }
+    )
+
+    # 4. 学习进度分布
+    progress_distribution_sql = f"""
+        SELECT
+            ps.student_id,
+            COUNT(DISTINCT ps.problem_id) as problems_attempted,
+            SUM(ps.is_solved) as problems_solved,
+            AVG(ps.attempts_until_success) as avg_attempts,
+            AVG(ps.time_spent_seconds) as avg_time_spent
+        FROM edu_problem_solving_stats ps
+        JOIN edu_coding_submissions cs ON ps.student_id = cs.student_id
+        {where_clause}
+        GROUP BY ps.student_id
+    """
+
+    # 5. 学习效率分析
+    efficiency_analysis_sql = f"""
+        SELECT
+            cs.student_id,
+            COUNT(*) as total_submissions,
+            SUM(CASE WHEN cs.submit_result = 'success' THEN 1 ELSE 0 END) as successful_submissions,
+            AVG(ps.time_spent_seconds) as avg_solving_time,
+            MAX(ps.attempts_until_success) as max_attempts
+        FROM edu_coding_submissions cs
+        LEFT JOIN edu_problem_solving_stats ps
+            ON cs.student_id = ps.student_id AND cs.problem_id = ps.problem_id
+        {where_clause}
+        GROUP BY cs.student_id
+    """
+
+    return {
+        'count': (count_sql, params),
+        'daily_trends': (daily_trends_sql, params),
+        'problem_difficulty': (problem_difficulty_sql, params),
+        'error_patterns': error_patterns_query,
+        'progress_distribution': (progress_distribution_sql, params),
+        'efficiency_analysis': (efficiency_analysis_sql, params),
+    }
 
-        count_result = cursor.fetchone()
-        has_data = count_result and count_result['count'] > 0
 
-        if not has_data:
-            print(f"警告: 没有找到班级 '{class_name}' 的数据", file=sys.stderr)
+def analyze_learning_patterns(class_name=None):
+    """分析学习模式和趋势
 
-            # 返回空数据结构
-            result = {
-                'daily_trends': [],
-                'problem_difficulty': [],
-                'error_patterns': [],
-                'progress_distribution': [],
-                'efficiency_analysis': []
-            }
+    七个分区互不依赖，通过 query_fanout 在各自的连接上并发执行，
+    超时或出错的分区返回空列表，并列在 incomplete_sections 中。
+    """
+    queries = build_learning_pattern_queries(class_name)
 
-            print(json.dumps({
-                'success': True,
-                'data': result,
-                'message': f"没有找到班级 '{class_name}' 的数据"
-            }, cls=CustomJSONEncoder))
-            return
+    def fetch_all(name):
+        def section(cursor):
+            cursor.execute(*queries[name])
+            return cursor.fetchall() or []
+        return section
 
-        # 1. 分析每日提交趋势
-        cursor.execute(f"""
-            SELECT
-                DATE(submission_time) as date,
-                COUNT(*) as total_submissions,
-                COUNT(DISTINCT student_id) as active_students,
-                SUM(CASE WHEN submit_result = 'success' THEN 1 ELSE 0 END) as successful_submissions
-            FROM edu_coding_submissions cs
-            {where_clause}
-            GROUP BY DATE(submission_time)
-            ORDER BY date DESC
-            LIMIT 30
-        """, params)
-
-        daily_trends = cursor.fetchall() or []
-
-        # 2. 分析问题难度分布
-        # 使用edu_problem_solving_stats表中的time_spent_seconds字段计算平均解题时间
-        # 这个字段记录了学生在解题过程中实际花费的时间（秒），更准确地反映了解题难度
-        cursor.execute(f"""
-            SELECT
-                cs.problem_id,
-                MAX(cs.problem_title) as problem_title,
-                COUNT(*) as attempt_count,
-                COUNT(DISTINCT cs.student_id) as student_count,
-                SUM(CASE WHEN cs.submit_result = 'success' THEN 1 ELSE 0 END) / COUNT(*) * 100 as success_rate,
-                AVG(CASE
-                    WHEN ps.time_spent_seconds > 0
-                    AND ps.time_spent_seconds <= 10800  -- 3小时 = 10800秒
-                    THEN ps.time_spent_seconds  -- 直接使用秒数，不转换为分钟
-                    ELSE NULL
-                END) as avg_solution_time
-            FROM edu_coding_submissions cs
-            LEFT JOIN edu_problem_solving_stats ps ON cs.problem_id = ps.problem_id AND cs.student_id = ps.student_id
-            {where_clause}
-            GROUP BY cs.problem_id
-            ORDER BY success_rate ASC
-        """, params)
-
-        problem_difficulty = cursor.fetchall() or []
-
-        # 3. 分析常见错误模式
-        cursor.execute(f"""
-            SELECT
-                SUBSTRING_INDEX(execution_errors, '\n', 1) as error_type,
-                COUNT(*) as occurrence_count,
-                COUNT(DISTINCT student_id) as affected_students,
-                GROUP_CONCAT(DISTINCT problem_id) as related_problems
-            FROM edu_coding_submissions cs
-            {where_clause} AND execution_errors IS NOT NULL
-            GROUP BY error_type
-            ORDER BY occurrence_count DESC
-            LIMIT 10
-        """, params)
-
-        error_patterns = cursor.fetchall() or []
-
-        # 4. 学习进度分布 - 修改查询以处理没有匹配记录的情况
+    def count_rows(cursor):
+        cursor.execute(*queries['count'])
+        count_result = cursor.fetchone()
+        return count_result['count'] if count_result else 0
+
+    def daily_trends(cursor):
+        cursor.execute(*queries['daily_trends'])
+        trends = cursor.fetchall() or []
+        if class_name or not trends:
+            return trends
+        # 各班级的活跃学生数不能相加，不指定班级时读取每日活跃学生草图（跨班级合并后的估计值）
+        dates = [row['date'] for row in trends]
         try:
-            cursor.execute(f"""
-                SELECT
-                    ps.student_id,
-                    COUNT(DISTINCT ps.problem_id) as problems_attempted,
-                    SUM(ps.is_solved) as problems_solved,
-                    AVG(ps.attempts_until_success) as avg_attempts,
-                    AVG(ps.time_spent_seconds) as avg_time_spent
-                FROM edu_problem_solving_stats ps
-                JOIN edu_coding_submissions cs ON ps.student_id = cs.student_id
-                {where_clause}
-                GROUP BY ps.student_id
-            """, params)
-
-            progress_distribution = cursor.fetchall() or []
+            daily, _ = read_trend(cursor, min(dates), max(dates))
         except mysql.connector.Error as err:
-            print(f"获取学习进度分布失败: {str(err)}", file=sys.stderr)
-            progress_distribution = []
-
-        # 5. 学习效率分析
-        cursor.execute(f"""
-            SELECT
-                cs.student_id,
-                COUNT(*) as total_submissions,
-                SUM(CASE WHEN cs.submit_result = 'success' THEN 1 ELSE 0 END) as successful_submissions,
-                AVG(ps.time_spent_seconds) as avg_solving_time,
-                MAX(ps.attempts_until_success) as max_attempts
-            FROM edu_coding_submissions cs
-            LEFT JOIN edu_problem_solving_stats ps
-                ON cs.student_id = ps.student_id AND cs.problem_id = ps.problem_id
-            {where_clause}
-            GROUP BY cs.student_id
-        """, params)
-
-        efficiency_analysis = cursor.fetchall() or []
-
-        # 检查是否所有数据都为空
-        all_empty = (
-            len(daily_trends) == 0 and
-            len(problem_difficulty) == 0 and
-            len(error_patterns) == 0 and
-            len(progress_distribution) == 0 and
-            len(efficiency_analysis) == 0
-        )
-
-        if all_empty:
-            print(f"警告: 所有查询都没有返回数据", file=sys.stderr)
+            if err.errno != ER_NO_SUCH_TABLE:
+                raise
+            daily = {}
+        for row in trends:
+            key = row['date'].strftime('%Y-%m-%d') if hasattr(row['date'], 'strftime') else str(row['date'])
+            row['active_students'] = daily.get(key, {}).get('active_students')
+        return trends
+
+    def problem_quantiles(cursor):
+        # 各题目解题次数、解题用时的分位数，读取分位数草图（见 quantile_sketches.py），
+        # 草图表尚未创建时按没有数据处理
+        try:
+            return read_problem_quantiles(cursor, class_name)
+        except mysql.connector.Error as err:
+            if err.errno != ER_NO_SUCH_TABLE:
+                raise
+            return {}
+
+    sections, incomplete = run_sections([
+        ('count', count_rows, None),
+        ('daily_trends', daily_trends, []),
+        ('problem_difficulty', fetch_all('problem_difficulty'), []),
+        ('error_patterns', fetch_all('error_patterns'), []),
+        ('progress_distribution', fetch_all('progress_distribution'), []),
+        ('efficiency_analysis', fetch_all('efficiency_analysis'), []),
+        ('problem_quantiles', problem_quantiles, {}),
+    ])
+
+    # 连数据量都查不到时（数据库不可用等）按失败返回
+    if incomplete.get('count') and incomplete['count'] != TIMEOUT:
+        print(json.dumps({
+            'success': False,
+            'message': f"分析学习数据失败: {incomplete['count']}"
+        }))
+        return
+
+    if sections['count'] == 0:
+        print(f"警告: 没有找到班级 '{class_name}' 的数据", file=sys.stderr)
 
+        # 返回空数据结构
         result = {
-            'daily_trends': daily_trends,
-            'problem_difficulty': problem_difficulty,
-            'error_patterns': error_patterns,
-            'progress_distribution': progress_distribution,
-            'efficiency_analysis': efficiency_analysis
+            'daily_trends': [],
+            'problem_difficulty': [],
+            'error_patterns': [],
+            'progress_distribution': [],
+            'efficiency_analysis': []
         }
 
         print(json.dumps({
             'success': True,
             'data': result,
-            'message': '获取学习数据成功' if not all_empty else '没有找到有效的学习数据'
-        }, cls=CustomJSONEncoder))  # 使用自定义编码器
-
-    except mysql.connector.Error as err:
-        print(json.dumps({
-            'success': False,
-            'message': f"分析学习数据失败: {str(err)}"
-        }))
-    finally:
-        cursor.close()
-        conn.close()
+            'message': f"没有找到班级 '{class_name}' 的数据"
+        }, cls=CustomJSONEncoder))
+        return
+
+    result = {name: sections[name] for name in (
+        'daily_trends', 'problem_difficulty', 'error_patterns',
+        'progress_distribution', 'efficiency_analysis'
+    )}
+
+    # 平均值之外补充不受个别极端值影响的中位数和P90
+    for problem in result['problem_difficulty']:
+        summary = sections['problem_quantiles'].get(problem['problem_id'], {})
+        attempts = summary.get(METRIC_ATTEMPTS, {})
+        seconds = summary.get(METRIC_SOLVE_SECONDS, {})
+        problem['median_attempts'] = attempts.get('p50')
+        problem['p90_attempts'] = attempts.get('p90')
+        problem['median_solution_time'] = seconds.get('p50')
+        problem['p90_solution_time'] = seconds.get('p90')
+
+    # 检查是否所有数据都为空
+    all_empty = all(len(value) == 0 for value in result.values())
+
+    if all_empty:
+        print(f"警告: 所有查询都没有返回数据", file=sys.stderr)
+
+    output = {
+        'success': True,
+        'data': result,
+        'message': '获取学习数据成功' if not all_empty else '没有找到有效的学习数据'
+    }
+    if incomplete:
+        output['incomplete_sections'] = incomplete
+
+    print(json.dumps(output, cls=CustomJSONEncoder))  # 使用自定义编码器
 
 def get_class_list():
     """获取所有班级列表"""
@@ -203,33 +253,17 @@ def get_class_list():
     cursor = conn.cursor()
 
     try:
-        # 从edu_coding_submissions表获取班级列表
+        # 从班级名册读取，提交写入和保存个人信息时维护（见 class_roster.py）
         cursor.execute("""
-            SELECT DISTINCT cs.student_class
-            FROM edu_coding_submissions cs
-            WHERE cs.student_class IS NOT NULL
-            AND cs.student_class != ''
-            AND cs.student_class != 'null'
+            SELECT c.class_name
+            FROM edu_classes c
+            WHERE EXISTS (
+                SELECT 1 FROM edu_class_members m WHERE m.class_name = c.class_name
+            )
+            ORDER BY c.class_name
         """)
 
-        rows_from_submissions = cursor.fetchall()
-        classes_from_submissions = [row[0] for row in rows_from_submissions if row[0]]
-
-        # 从edu_profiles_student表获取班级列表
-        cursor.execute("""
-            SELECT DISTINCT class_name
-            FROM edu_profiles_student
-            WHERE class_name IS NOT NULL
-            AND class_name != ''
-            AND class_name != 'null'
-        """)
-
-        rows_from_profiles = cursor.fetchall()
-        classes_from_profiles = [row[0] for row in rows_from_profiles if row[0]]
-
-        # 合并两个来源的班级列表并去重
-        all_classes = list(set(classes_from_submissions + classes_from_profiles))
-        all_classes.sort()  # 确保稳定的排序
+        all_classes = [row[0] for row in cursor.fetchall() if row[0]]
 
         if not all_classes:
             print(json.dumps({
@@ -260,7 +294,9 @@ if __name__ == "__main__":
         get_class_list()
     elif operation == "analyze_learning_patterns":
         class_name = sys.argv[2] if len(sys.argv) > 2 else None
-        analyze_learning_patterns(class_name)
+        # 通过共享缓存返回，写入提交、修改题目时失效（见 dashboard_cache.py）
+        cached_output(__file__, sys.argv[1:3], [TAG_SUBMISSIONS, TAG_PROBLEMS],
+                      lambda: analyze_learning_patterns(class_name))
     else:
         print(json.dumps({
             'success': False,
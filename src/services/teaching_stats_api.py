@@ -3,10 +3,25 @@
 
 import sys
 import json
+import time
 import mysql.connector
 from datetime import datetime, timedelta
 import traceback
-import random
+from db_pool import get_connection
+from difficulty_levels import create_difficulty_table, level_columns
+from identity_resolution import resolve_emails, resolve_student_ids, display_name, email_fallback
+from dashboard_cache import cached_output, TAG_SUBMISSIONS, TAG_QUESTIONS, TAG_PROBLEMS
+from daily_activity import create_activity_tables, read_trend
+
+# 表不存在
+ER_NO_SUCH_TABLE = 1146
+
+# 活动趋势的时间范围（天）
+TREND_RANGES = {
+    'week': 7,
+    'month': 30,
+    'semester': 180,
+}
 
 # 自定义JSON编码器，处理日期和Decimal类型
 class CustomJSONEncoder(json.JSONEncoder):
@@ -25,127 +40,149 @@ class CustomJSONEncoder(json.JSONEncoder):
             pass
         return super(CustomJSONEncoder, self).default(obj)
 
-# 数据库连接配置
-DB_CONFIG = {
-    'host': 'localhost',
-    'user': 'root',
-    'password': 'mwYgR7#*X2',
-    'database': 'education_platform'
-}
-
-def get_teaching_stats():
-    """获取教学统计数据"""
-    try:
-        # 连接数据库
-        conn = mysql.connector.connect(**DB_CONFIG)
-        cursor = conn.cursor(dictionary=True)
+def _trend_dates(days, offset=0):
+    """截止到 offset 天前（含）的 days 个日期"""
+    end = datetime.now() - timedelta(days=offset)
+    return [(end - timedelta(days=days - i - 1)).strftime('%Y-%m-%d') for i in range(days)]
 
-        # 获取学生总数
-        cursor.execute("""
-            SELECT COUNT(*) as total_students
-            FROM edu_profiles_student
-        """)
-        total_students_result = cursor.fetchone()
-        total_students = total_students_result['total_students'] if total_students_result else 0
 
-        # 获取上个月学生总数，计算增长率
-        last_month = datetime.now() - timedelta(days=30)
-        student_growth = 0
+def _shared(shared, key, compute):
+    """同一次调用中多个部分共用的中间结果，只计算一次"""
+    if key not in shared:
+        shared[key] = compute()
+    return shared[key]
 
-        try:
-            cursor.execute("""
-                SELECT COUNT(*) as last_month_students
-                FROM edu_profiles_student
-                WHERE created_at < %s
-            """, (last_month,))
-            last_month_result = cursor.fetchone()
-            last_month_students = last_month_result['last_month_students'] if last_month_result else 0
-
-            if last_month_students > 0:
-                student_growth = round(((total_students - last_month_students) / last_month_students) * 100, 1)
-        except Exception as inner_e:
-            print(f"获取上个月学生总数失败: {str(inner_e)}", file=sys.stderr)
-            # 不使用随机数据，保持增长率为0
-
-        # 获取活跃学生数（过去7天有提交记录的学生）
-        cursor.execute("""
-            SELECT COUNT(DISTINCT student_id) as active_students
-            FROM edu_coding_submissions
-            WHERE submission_time >= %s
-        """, (datetime.now() - timedelta(days=7),))
-        active_students_result = cursor.fetchone()
-        active_students = active_students_result['active_students'] if active_students_result else 0
-
-        # 获取上周活跃学生数，计算增长率
-        active_growth = 0
-        cursor.execute("""
-            SELECT COUNT(DISTINCT student_id) as last_week_active
-            FROM edu_coding_submissions
-            WHERE submission_time >= %s AND submission_time < %s
-        """, (datetime.now() - timedelta(days=14), datetime.now() - timedelta(days=7)))
-        last_week_result = cursor.fetchone()
-        last_week_active = last_week_result['last_week_active'] if last_week_result else 0
 
-        if last_week_active > 0:
-            active_growth = round(((active_students - last_week_active) / last_week_active) * 100, 1)
+def _read_trend(conn, cursor, start_date, end_date, class_name=None):
+    """读取每日活动汇总，首次使用时创建汇总表（历史数据通过 daily_activity.py rebuild 导入）"""
+    try:
+        return read_trend(cursor, start_date, end_date, class_name)
+    except mysql.connector.Error as err:
+        if err.errno != ER_NO_SUCH_TABLE:
+            raise
+        create_activity_tables(cursor)
+        conn.commit()
+        return read_trend(cursor, start_date, end_date, class_name)
+
+
+def _recent_week(conn, cursor, shared):
+    """最近7天（含今天）的 (日期列表, 每日活动, 活跃学生数)，统计卡片和周活动趋势共用"""
+    def compute():
+        dates = _trend_dates(7)
+        daily, active_students = _read_trend(conn, cursor, dates[0], dates[-1])
+        return dates, daily, active_students
+    return _shared(shared, 'recent_week', compute)
+
+
+def compute_teaching_stats(conn, cursor, shared):
+    """计算教学统计数据
+
+    最近7天的活跃学生数来自每日活动汇总（与活动趋势相同的数据），
+    活跃学生数为 HyperLogLog 估计值，班级规模下接近精确值。
+    提交增长率使用 (班级, 日期) 汇总表中的提交总数和最近7天的提交数。
+    """
+    # 获取学生总数
+    cursor.execute("""
+        SELECT COUNT(*) as total_students
+        FROM edu_profiles_student
+    """)
+    total_students_result = cursor.fetchone()
+    total_students = total_students_result['total_students'] if total_students_result else 0
+
+    # 获取上个月学生总数，计算增长率
+    last_month = datetime.now() - timedelta(days=30)
+    student_growth = 0
 
-        # 获取题目总数
+    try:
         cursor.execute("""
-            SELECT COUNT(*) as total_problems
+            SELECT COUNT(*) as last_month_students
+            FROM edu_profiles_student
+            WHERE created_at < %s
+        """, (last_month,))
+        last_month_result = cursor.fetchone()
+        last_month_students = last_month_result['last_month_students'] if last_month_result else 0
+
+        if last_month_students > 0:
+            student_growth = round(((total_students - last_month_students) / last_month_students) * 100, 1)
+    except Exception as inner_e:
+        print(f"获取上个月学生总数失败: {str(inner_e)}", file=sys.stderr)
+        # 不使用随机数据，保持增长率为0
+
+    # 获取活跃学生数（最近7天有提交记录的学生）
+    dates, _, active_students = _recent_week(conn, cursor, shared)
+
+    # 获取上周活跃学生数，计算增长率
+    active_growth = 0
+    last_week = _trend_dates(7, offset=7)
+    _, last_week_active = _read_trend(conn, cursor, last_week[0], last_week[-1])
+
+    if last_week_active > 0:
+        active_growth = round(((active_students - last_week_active) / last_week_active) * 100, 1)
+
+    # 获取题目总数
+    cursor.execute("""
+        SELECT COUNT(*) as total_problems
+        FROM edu_problems
+    """)
+    total_problems_result = cursor.fetchone()
+    total_problems = total_problems_result['total_problems'] if total_problems_result else 0
+
+    # 获取上个月题目总数，计算增长率
+    problem_growth = 0
+    try:
+        cursor.execute("""
+            SELECT COUNT(*) as last_month_problems
             FROM edu_problems
-        """)
-        total_problems_result = cursor.fetchone()
-        total_problems = total_problems_result['total_problems'] if total_problems_result else 0
+            WHERE created_at < %s
+        """, (last_month,))
+        last_month_problems_result = cursor.fetchone()
+        last_month_problems = last_month_problems_result['last_month_problems'] if last_month_problems_result else 0
+
+        if last_month_problems > 0:
+            problem_growth = round(((total_problems - last_month_problems) / last_month_problems) * 100, 1)
+    except Exception as inner_e:
+        print(f"获取上个月题目总数失败: {str(inner_e)}", file=sys.stderr)
+        # 不使用随机数据，保持增长率为0
+
+    # 获取提交总数和最近7天的提交数，读取 (班级, 日期) 汇总表，包含已归档的历史提交。
+    # 两者来自同一张表的同一次查询，一周前的总数（总数减去最近7天）不会为负
+    cursor.execute("""
+        SELECT
+            COALESCE(SUM(attempts), 0) as total_submissions,
+            COALESCE(SUM(CASE WHEN activity_date >= %s THEN attempts ELSE 0 END), 0) as recent_submissions
+        FROM edu_class_day_rollup
+    """, (dates[0],))
+    submissions_result = cursor.fetchone()
+    total_submissions = int(submissions_result['total_submissions']) if submissions_result else 0
+    recent_submissions = int(submissions_result['recent_submissions']) if submissions_result else 0
+
+    # 获取一周前的提交总数，计算增长率
+    submission_growth = 0
+    last_week_submissions = total_submissions - recent_submissions
+
+    if last_week_submissions > 0:
+        submission_growth = round(((total_submissions - last_week_submissions) / last_week_submissions) * 100, 1)
+
+    return {
+        'total_students': total_students,
+        'student_growth': student_growth,
+        'active_students': active_students,
+        'active_growth': active_growth,
+        'total_problems': total_problems,
+        'problem_growth': problem_growth,
+        'total_submissions': total_submissions,
+        'submission_growth': submission_growth
+    }
 
-        # 获取上个月题目总数，计算增长率
-        problem_growth = 0
-        try:
-            cursor.execute("""
-                SELECT COUNT(*) as last_month_problems
-                FROM edu_problems
-                WHERE created_at < %s
-            """, (last_month,))
-            last_month_problems_result = cursor.fetchone()
-            last_month_problems = last_month_problems_result['last_month_problems'] if last_month_problems_result else 0
-
-            if last_month_problems > 0:
-                problem_growth = round(((total_problems - last_month_problems) / last_month_problems) * 100, 1)
-        except Exception as inner_e:
-            print(f"获取上个月题目总数失败: {str(inner_e)}", file=sys.stderr)
-            # 不使用随机数据，保持增长率为0
-
-        # 获取提交总数
-        cursor.execute("""
-            SELECT COUNT(*) as total_submissions
-            FROM edu_coding_submissions
-        """)
-        total_submissions_result = cursor.fetchone()
-        total_submissions = total_submissions_result['total_submissions'] if total_submissions_result else 0
 
-        # 获取上周提交总数，计算增长率
-        submission_growth = 0
-        cursor.execute("""
-            SELECT COUNT(*) as last_week_submissions
-            FROM edu_coding_submissions
-            WHERE submission_time < %s
-        """, (datetime.now() - timedelta(days=7),))
-        last_week_submissions_result = cursor.fetchone()
-        last_week_submissions = last_week_submissions_result['last_week_submissions'] if last_week_submissions_result else 0
-
-        if last_week_submissions > 0:
-            submission_growth = round(((total_submissions - last_week_submissions) / last_week_submissions) * 100, 1)
-
-        # 构建结果
-        result = {
-            'total_students': total_students,
-            'student_growth': student_growth,
-            'active_students': active_students,
-            'active_growth': active_growth,
-            'total_problems': total_problems,
-            'problem_growth': problem_growth,
-            'total_submissions': total_submissions,
-            'submission_growth': submission_growth
-        }
+def get_teaching_stats():
+    """获取教学统计数据"""
+    try:
+        # 连接数据库
+        conn = get_connection()
+        cursor = conn.cursor(dictionary=True)
+
+        result = compute_teaching_stats(conn, cursor, {})
 
         # 关闭数据库连接
         cursor.close()
@@ -164,69 +201,41 @@ def get_teaching_stats():
             'error': traceback.format_exc()
         }), file=sys.stderr)
 
-def get_activity_trend(time_range='week'):
+def compute_activity_trend(conn, cursor, shared, time_range='week', class_name=None):
+    """计算活动趋势数据
+
+    读取每日活动汇总（见 daily_activity.py），开销只与天数有关；
+    活跃学生数为各天及整个范围的 HyperLogLog 估计值。
+    """
+    days = TREND_RANGES.get(time_range, TREND_RANGES['week'])
+    if days == TREND_RANGES['week'] and not class_name:
+        dates, daily, range_active_students = _recent_week(conn, cursor, shared)
+    else:
+        dates = _trend_dates(days)
+        daily, range_active_students = _read_trend(conn, cursor, dates[0], dates[-1], class_name)
+
+    empty = {'submissions': 0, 'successes': 0, 'questions': 0, 'active_students': 0}
+    series = [daily.get(date, empty) for date in dates]
+
+    # 不包含登录数据，因为没有真实数据
+    return {
+        'dates': dates,
+        'submissions': [day['submissions'] for day in series],
+        'successes': [day['successes'] for day in series],
+        'questions': [day['questions'] for day in series],
+        'active_students': [day['active_students'] for day in series],
+        'range_active_students': range_active_students
+    }
+
+
+def get_activity_trend(time_range='week', class_name=None):
     """获取活动趋势数据"""
     try:
         # 连接数据库
-        conn = mysql.connector.connect(**DB_CONFIG)
+        conn = get_connection()
         cursor = conn.cursor(dictionary=True)
 
-        # 确定日期范围
-        if time_range == 'month':
-            days = 30
-            date_format = '%Y-%m-%d'
-        else:  # 默认为周
-            days = 7
-            date_format = '%Y-%m-%d'
-
-        # 生成日期列表
-        dates = []
-        date_values = []
-        for i in range(days):
-            date = datetime.now() - timedelta(days=days-i-1)
-            dates.append(date.strftime(date_format))
-            date_values.append(date)
-
-        # 获取每日提交次数
-        submissions = [0] * days
-        cursor.execute("""
-            SELECT DATE(submission_time) as submission_date, COUNT(*) as submission_count
-            FROM edu_coding_submissions
-            WHERE submission_time >= %s
-            GROUP BY submission_date
-            ORDER BY submission_date
-        """, (datetime.now() - timedelta(days=days),))
-
-        submission_results = cursor.fetchall()
-        for result in submission_results:
-            submission_date = result['submission_date'].strftime(date_format)
-            if submission_date in dates:
-                index = dates.index(submission_date)
-                submissions[index] = result['submission_count']
-
-        # 获取每日提问次数
-        questions = [0] * days
-        cursor.execute("""
-            SELECT DATE(created_at) as question_date, COUNT(*) as question_count
-            FROM edu_questions
-            WHERE created_at >= %s
-            GROUP BY question_date
-            ORDER BY question_date
-        """, (datetime.now() - timedelta(days=days),))
-
-        question_results = cursor.fetchall()
-        for result in question_results:
-            question_date = result['question_date'].strftime(date_format)
-            if question_date in dates:
-                index = dates.index(question_date)
-                questions[index] = result['question_count']
-
-        # 构建结果 - 不包含登录数据，因为没有真实数据
-        result = {
-            'dates': dates,
-            'submissions': submissions,
-            'questions': questions
-        }
+        result = compute_activity_trend(conn, cursor, {}, time_range, class_name)
 
         # 关闭数据库连接
         cursor.close()
@@ -245,199 +254,164 @@ def get_activity_trend(time_range='week'):
             'error': traceback.format_exc()
         }), file=sys.stderr)
 
+# 以下 build_*_query 生成读取提交记录表的查询，返回 (sql, params)，
+# src/scripts/check_query_plans.py 对同一组查询做执行计划检查
+
+def build_active_students_query():
+    """有提交记录的学生总数"""
+    return """
+        SELECT COUNT(DISTINCT student_id) as active_students
+        FROM edu_coding_submissions
+    """, ()
+
+
+def build_difficulty_metrics_query():
+    """按难度分组的题目数和提交指标（见 compute_problem_completion）
+
+    从题目表出发 LEFT JOIN 提交记录，没有提交的题目也计入题目数。
+    映射表中没有的难度原始值按 unmapped_value 各自成为一组，与原来按原始值逐个统计一致。
+    分组使用与 edu_difficulty_levels 列名不同的别名: MySQL 的 GROUP BY 先按 FROM 中的列解析名称，
+    写成 GROUP BY level 会按 dl.level 分组，未映射的难度全部合并为一组。
+    """
+    level, label = level_columns()
+    return f"""
+        SELECT
+            difficulty_level as level,
+            difficulty_label as label,
+            COUNT(DISTINCT problem_id) as total,
+            COUNT(DISTINCT student_id) as students,
+            SUM(solved) as solved_pairs,
+            COUNT(DISTINCT CASE WHEN student_id IS NOT NULL THEN problem_id END) as attempted_problems,
+            SUM(attempts) as total_submissions,
+            SUM(successes) as successful_submissions
+        FROM (
+            SELECT
+                {level} as difficulty_level,
+                {label} as difficulty_label,
+                CASE WHEN dl.raw_value IS NULL THEN p.difficulty END as unmapped_value,
+                p.id as problem_id,
+                s.student_id,
+                COUNT(s.id) as attempts,
+                SUM(CASE WHEN s.submit_result = 'success' THEN 1 ELSE 0 END) as successes,
+                MAX(CASE WHEN s.submit_result = 'success' THEN 1 ELSE 0 END) as solved
+            FROM edu_problems p
+            LEFT JOIN edu_difficulty_levels dl ON dl.raw_value = p.difficulty
+            LEFT JOIN edu_coding_submissions s ON s.problem_id = p.id
+            GROUP BY difficulty_level, difficulty_label, unmapped_value, p.id, s.student_id
+        ) student_problem
+        GROUP BY difficulty_level, difficulty_label, unmapped_value
+        ORDER BY difficulty_level, difficulty_label, unmapped_value
+    """, ()
+
+
+def build_recent_successes_query(days=30):
+    """最近 days 天内的成功提交，时间条件使查询只扫描最近的分区"""
+    return """
+        SELECT s.id, s.student_id, s.problem_id, s.submission_time, p.title as problem_title
+        FROM edu_coding_submissions s
+        JOIN edu_problems p ON s.problem_id = p.id
+        WHERE s.submit_result = 'success' AND s.submission_time >= %s
+        ORDER BY s.submission_time DESC
+        LIMIT 5
+    """, (datetime.now() - timedelta(days=days),)
+
+
+def compute_problem_completion(cursor):
+    """按难度统计题目完成情况，返回 (结果, 错误信息)
+
+    只执行两条查询:
+        1. 按难度分组的题目数和提交指标（build_difficulty_metrics_query）: 提交记录先按
+           (难度, 题目, 学生) 分组，再按难度汇总出题目数、学生数、学生已解决的题目数之和、
+           被尝试的题目数、提交数和成功提交数（难度通过 edu_difficulty_levels 归一化，同时决定排序）
+        2. 有提交记录的学生总数
+    学生平均完成率 = 各学生 (已解决题目数 / 题目总数) 的平均值
+                  = 已解决题目数之和 / 学生数 / 题目总数。
+    """
+    cursor.execute(*build_difficulty_metrics_query())
+    difficulty_results = cursor.fetchall()
+
+    if not difficulty_results:
+        return None, '没有找到题目难度分类数据'
+
+    # 获取活跃学生总数（有提交记录的学生）
+    cursor.execute(*build_active_students_query())
+    active_students_result = cursor.fetchone()
+    active_students = active_students_result['active_students'] if active_students_result else 0
+
+    if active_students == 0:
+        return None, '没有找到活跃学生数据'
+
+    difficulties = []
+    student_completion_rates = []  # 学生平均完成率
+    problem_attempt_rates = []     # 题目尝试率
+    success_rates = []             # 提交成功率
+    avg_attempts_per_problem = []  # 每题平均尝试次数
+
+    for row in difficulty_results:
+        total_problems = row['total']
+        difficulties.append(row['label'])
+
+        students = row['students']
+        if not students:
+            student_completion_rates.append(0)
+            problem_attempt_rates.append(0)
+            success_rates.append(0)
+            avg_attempts_per_problem.append(0)
+            continue
+
+        attempted_problems = row['attempted_problems']
+        total_submissions = int(row['total_submissions'])
+        student_completion_rates.append(
+            round(int(row['solved_pairs']) / total_problems * 100 / students, 1)
+        )
+        problem_attempt_rates.append(round((attempted_problems / total_problems) * 100, 1))
+        success_rates.append(
+            round((int(row['successful_submissions']) / total_submissions) * 100, 1) if total_submissions > 0 else 0
+        )
+        avg_attempts_per_problem.append(round(total_submissions / attempted_problems, 1))
+
+    return {
+        'difficulties': difficulties,
+        'student_completion_rates': student_completion_rates,  # 学生平均完成率
+        'problem_attempt_rates': problem_attempt_rates,        # 题目尝试率
+        'success_rates': success_rates,                        # 提交成功率
+        'avg_attempts_per_problem': avg_attempts_per_problem,  # 每题平均尝试次数
+        'active_students': active_students                     # 活跃学生总数
+    }, None
+
+
+def _problem_completion(conn, cursor):
+    """计算题目完成情况，首次使用时创建难度映射表"""
+    try:
+        return compute_problem_completion(cursor)
+    except mysql.connector.Error as err:
+        if err.errno != ER_NO_SUCH_TABLE:
+            raise
+        create_difficulty_table(cursor)
+        conn.commit()
+        return compute_problem_completion(cursor)
+
+
 def get_problem_completion():
     """获取题目完成情况数据 - 更科学的统计方法"""
     try:
         # 连接数据库
-        conn = mysql.connector.connect(**DB_CONFIG)
+        conn = get_connection()
         cursor = conn.cursor(dictionary=True)
 
-        # 获取题目难度分类
-        cursor.execute("""
-            SELECT DISTINCT difficulty
-            FROM edu_problems
-            ORDER BY
-                CASE
-                    WHEN difficulty = 'easy' THEN 1
-                    WHEN difficulty = 'medium' THEN 2
-                    WHEN difficulty = 'hard' THEN 3
-                    WHEN difficulty = '1' THEN 1
-                    WHEN difficulty = '2' THEN 2
-                    WHEN difficulty = '3' THEN 3
-                    ELSE 4
-                END
-        """)
-
-        difficulty_results = cursor.fetchall()
-
-        if not difficulty_results:
-            # 如果没有获取到难度分类，返回错误
-            cursor.close()
-            conn.close()
-            print(json.dumps({
-                'success': False,
-                'message': '没有找到题目难度分类数据'
-            }), file=sys.stderr)
-            return
+        result, message = _problem_completion(conn, cursor)
 
-        # 获取活跃学生总数（有提交记录的学生）
-        cursor.execute("""
-            SELECT COUNT(DISTINCT student_id) as active_students
-            FROM edu_coding_submissions
-        """)
-        active_students_result = cursor.fetchone()
-        active_students = active_students_result['active_students'] if active_students_result else 0
+        # 关闭数据库连接
+        cursor.close()
+        conn.close()
 
-        if active_students == 0:
-            # 如果没有活跃学生，返回错误
-            cursor.close()
-            conn.close()
+        if result is None:
             print(json.dumps({
                 'success': False,
-                'message': '没有找到活跃学生数据'
+                'message': message
             }), file=sys.stderr)
             return
 
-        # 准备结果数据结构
-        difficulties = []
-        difficulty_map = {}  # 用于映射难度名称
-
-        # 统计指标
-        student_completion_rates = []  # 学生平均完成率
-        problem_attempt_rates = []     # 题目尝试率
-        success_rates = []             # 提交成功率
-        avg_attempts_per_problem = []  # 每题平均尝试次数
-
-        for i, difficulty in enumerate(difficulty_results):
-            diff = difficulty['difficulty']
-
-            # 转换难度显示
-            difficulty_name = diff
-            if diff == 'easy' or diff == '1':
-                difficulty_name = '简单'
-            elif diff == 'medium' or diff == '2':
-                difficulty_name = '中等'
-            elif diff == 'hard' or diff == '3':
-                difficulty_name = '困难'
-
-            difficulties.append(difficulty_name)
-            difficulty_map[diff] = difficulty_name
-
-            # 获取该难度的题目总数
-            cursor.execute("""
-                SELECT COUNT(*) as total
-                FROM edu_problems
-                WHERE difficulty = %s
-            """, (diff,))
-
-            total_result = cursor.fetchone()
-            total_problems = total_result['total'] if total_result else 0
-
-            if total_problems == 0:
-                # 如果该难度没有题目，添加0值
-                student_completion_rates.append(0)
-                problem_attempt_rates.append(0)
-                success_rates.append(0)
-                avg_attempts_per_problem.append(0)
-                continue
-
-            # 1. 学生平均完成率 - 每个学生平均完成了该难度多少比例的题目
-            cursor.execute("""
-                SELECT
-                    student_id,
-                    COUNT(DISTINCT CASE WHEN submit_result = 'success' THEN problem_id END) as solved_problems
-                FROM
-                    edu_coding_submissions s
-                JOIN
-                    edu_problems p ON s.problem_id = p.id
-                WHERE
-                    p.difficulty = %s
-                GROUP BY
-                    student_id
-            """, (diff,))
-
-            student_results = cursor.fetchall()
-            if not student_results:
-                student_completion_rates.append(0)
-            else:
-                total_completion_rate = 0
-                for student in student_results:
-                    student_completion = (student['solved_problems'] / total_problems) * 100
-                    total_completion_rate += student_completion
-
-                avg_completion_rate = round(total_completion_rate / len(student_results), 1)
-                student_completion_rates.append(avg_completion_rate)
-
-            # 2. 题目尝试率 - 该难度有多少比例的题目至少被一名学生尝试
-            cursor.execute("""
-                SELECT COUNT(DISTINCT p.id) as attempted_problems
-                FROM edu_problems p
-                JOIN edu_coding_submissions s ON p.id = s.problem_id
-                WHERE p.difficulty = %s
-            """, (diff,))
-
-            attempted_result = cursor.fetchone()
-            attempted_problems = attempted_result['attempted_problems'] if attempted_result else 0
-            attempt_rate = round((attempted_problems / total_problems) * 100, 1) if total_problems > 0 else 0
-            problem_attempt_rates.append(attempt_rate)
-
-            # 3. 提交成功率 - 该难度所有提交中成功的比例
-            cursor.execute("""
-                SELECT
-                    COUNT(*) as total_submissions,
-                    SUM(CASE WHEN submit_result = 'success' THEN 1 ELSE 0 END) as successful_submissions
-                FROM
-                    edu_coding_submissions s
-                JOIN
-                    edu_problems p ON s.problem_id = p.id
-                WHERE
-                    p.difficulty = %s
-            """, (diff,))
-
-            submission_result = cursor.fetchone()
-            if submission_result and submission_result['total_submissions'] > 0:
-                success_rate = round((submission_result['successful_submissions'] / submission_result['total_submissions']) * 100, 1)
-                success_rates.append(success_rate)
-            else:
-                success_rates.append(0)
-
-            # 4. 每题平均尝试次数
-            cursor.execute("""
-                SELECT
-                    p.id,
-                    COUNT(*) as attempts
-                FROM
-                    edu_problems p
-                JOIN
-                    edu_coding_submissions s ON p.id = s.problem_id
-                WHERE
-                    p.difficulty = %s
-                GROUP BY
-                    p.id
-            """, (diff,))
-
-            problem_attempts = cursor.fetchall()
-            if not problem_attempts:
-                avg_attempts_per_problem.append(0)
-            else:
-                total_attempts = sum(p['attempts'] for p in problem_attempts)
-                avg_attempts = round(total_attempts / len(problem_attempts), 1)
-                avg_attempts_per_problem.append(avg_attempts)
-
-        # 构建结果
-        result = {
-            'difficulties': difficulties,
-            'student_completion_rates': student_completion_rates,  # 学生平均完成率
-            'problem_attempt_rates': problem_attempt_rates,        # 题目尝试率
-            'success_rates': success_rates,                        # 提交成功率
-            'avg_attempts_per_problem': avg_attempts_per_problem,  # 每题平均尝试次数
-            'active_students': active_students                     # 活跃学生总数
-        }
-
-        # 关闭数据库连接
-        cursor.close()
-        conn.close()
-
         # 返回结果
         print(json.dumps({
             'success': True,
@@ -451,90 +425,72 @@ def get_problem_completion():
             'error': traceback.format_exc()
         }), file=sys.stderr)
 
+def compute_todos(cursor):
+    """获取待处理事项列表: 最近的未回答问题和成功提交"""
+    todos = []
+
+    try:
+        # 获取未回答的问题
+        cursor.execute("""
+            SELECT id, student_email, title, created_at
+            FROM edu_questions
+            WHERE answer IS NULL OR answer = ''
+            ORDER BY created_at DESC
+            LIMIT 5
+        """)
+
+        question_results = cursor.fetchall()
+        # 一次解析所有提问学生的姓名
+        identities = resolve_emails(cursor, [q['student_email'] for q in question_results])
+        for question in question_results:
+            student_email = question['student_email']
+            student_name = display_name(identities.get(student_email), email_fallback(student_email))
+
+            todos.append({
+                'id': question['id'],
+                'type': 'question',
+                'title': f'回答学生提问',
+                'description': f'{student_name}: {question["title"]}',
+                'time': question['created_at'],
+                'route': f'/teacher/answer?id={question["id"]}'
+            })
+    except Exception as e:
+        print(f"获取未回答问题失败: {str(e)}", file=sys.stderr)
+
+    try:
+        # 获取最近30天内的成功提交记录
+        cursor.execute(*build_recent_successes_query())
+
+        submission_results = cursor.fetchall()
+        identities = resolve_student_ids(cursor, [s['student_id'] for s in submission_results])
+        for submission in submission_results:
+            student_name = display_name(identities.get(submission['student_id']), submission['student_id'])
+
+            todos.append({
+                'id': submission['id'],
+                'type': 'submission',
+                'title': f'查看学生提交',
+                'description': f'{student_name} 完成了 {submission["problem_title"]}',
+                'time': submission['submission_time'],
+                'route': f'/teacher/data-analysis'
+            })
+    except Exception as e:
+        print(f"获取提交记录失败: {str(e)}", file=sys.stderr)
+
+    # 按时间排序
+    todos.sort(key=lambda x: x['time'], reverse=True)
+
+    return todos
+
+
 def get_todos():
     """获取待处理事项"""
     try:
         # 连接数据库
-        conn = mysql.connector.connect(**DB_CONFIG)
+        conn = get_connection()
         cursor = conn.cursor(dictionary=True)
 
-        todos = []
-
-        try:
-            # 获取未回答的问题
-            cursor.execute("""
-                SELECT id, student_email, title, created_at
-                FROM edu_questions
-                WHERE answer IS NULL OR answer = ''
-                ORDER BY created_at DESC
-                LIMIT 5
-            """)
-
-            question_results = cursor.fetchall()
-            for question in question_results:
-                try:
-                    # 获取学生姓名
-                    cursor.execute("""
-                        SELECT name
-                        FROM edu_profiles_student
-                        WHERE email = %s
-                    """, (question['student_email'],))
-
-                    student_result = cursor.fetchone()
-                    student_name = student_result['name'] if student_result else question['student_email'].split('@')[0]
-
-                    todos.append({
-                        'id': question['id'],
-                        'type': 'question',
-                        'title': f'回答学生提问',
-                        'description': f'{student_name}: {question["title"]}',
-                        'time': question['created_at'],
-                        'route': f'/teacher/answer?id={question["id"]}'
-                    })
-                except Exception as inner_e:
-                    print(f"获取学生姓名失败: {str(inner_e)}", file=sys.stderr)
-        except Exception as e:
-            print(f"获取未回答问题失败: {str(e)}", file=sys.stderr)
-
-        try:
-            # 获取最近的提交记录
-            cursor.execute("""
-                SELECT s.id, s.student_id, s.problem_id, s.submission_time, p.title as problem_title
-                FROM edu_coding_submissions s
-                JOIN edu_problems p ON s.problem_id = p.id
-                WHERE s.submit_result = 'success'
-                ORDER BY s.submission_time DESC
-                LIMIT 5
-            """)
-
-            submission_results = cursor.fetchall()
-            for submission in submission_results:
-                try:
-                    # 获取学生姓名
-                    cursor.execute("""
-                        SELECT name
-                        FROM edu_profiles_student
-                        WHERE student_id = %s
-                    """, (submission['student_id'],))
-
-                    student_result = cursor.fetchone()
-                    student_name = student_result['name'] if student_result else submission['student_id']
-
-                    todos.append({
-                        'id': submission['id'],
-                        'type': 'submission',
-                        'title': f'查看学生提交',
-                        'description': f'{student_name} 完成了 {submission["problem_title"]}',
-                        'time': submission['submission_time'],
-                        'route': f'/teacher/data-analysis'
-                    })
-                except Exception as inner_e:
-                    print(f"获取学生姓名失败: {str(inner_e)}", file=sys.stderr)
-        except Exception as e:
-            print(f"获取提交记录失败: {str(e)}", file=sys.stderr)
-
-        # 按时间排序
-        todos.sort(key=lambda x: x['time'], reverse=True)
+        todos = compute_todos(cursor)
 
         # 关闭数据库连接
         cursor.close()
@@ -553,6 +509,65 @@ def get_todos():
             'error': traceback.format_exc()
         }), file=sys.stderr)
 
+def get_dashboard_bundle(time_range='week', class_name=None):
+    """一次获取教师首页的全部数据: 教学统计、活动趋势、题目完成情况、待处理事项
+
+    四个部分使用同一个连接，最近7天的活跃学生数和每日提交数只读取一次，
+    由统计卡片和活动趋势共用。某个部分失败时该部分为 null，错误信息在 errors 中，
+    timings_ms 为各部分的耗时（毫秒）。
+    """
+    try:
+        conn = get_connection()
+        cursor = conn.cursor(dictionary=True)
+        shared = {}
+
+        def problem_completion():
+            result, message = _problem_completion(conn, cursor)
+            if result is None:
+                raise ValueError(message)
+            return result
+
+        sections = [
+            ('stats', lambda: compute_teaching_stats(conn, cursor, shared)),
+            ('activity_trend', lambda: compute_activity_trend(conn, cursor, shared, time_range, class_name)),
+            ('problem_completion', problem_completion),
+            ('todos', lambda: compute_todos(cursor)),
+        ]
+
+        data = {}
+        timings = {}
+        errors = {}
+        started = time.perf_counter()
+        for name, compute in sections:
+            section_started = time.perf_counter()
+            try:
+                data[name] = compute()
+            except Exception as e:
+                print(f"获取看板数据 {name} 失败: {str(e)}", file=sys.stderr)
+                data[name] = None
+                errors[name] = str(e)
+            timings[name] = round((time.perf_counter() - section_started) * 1000, 1)
+        timings['total'] = round((time.perf_counter() - started) * 1000, 1)
+
+        cursor.close()
+        conn.close()
+
+        output = {
+            'success': True,
+            'data': data,
+            'timings_ms': timings
+        }
+        if errors:
+            output['errors'] = errors
+        print(json.dumps(output, cls=CustomJSONEncoder))
+
+    except Exception as e:
+        print(json.dumps({
+            'success': False,
+            'message': f'获取看板数据失败: {str(e)}',
+            'error': traceback.format_exc()
+        }), file=sys.stderr)
+
 if __name__ == '__main__':
     if len(sys.argv) < 2:
         print(json.dumps({
@@ -563,15 +578,23 @@ if __name__ == '__main__':
 
     operation = sys.argv[1]
 
+    # 看板统计通过共享缓存返回，写入提交、提问、修改题目时失效（见 dashboard_cache.py）
     if operation == 'get_stats':
-        get_teaching_stats()
+        cached_output(__file__, ['get_stats'], [TAG_SUBMISSIONS, TAG_PROBLEMS], get_teaching_stats)
     elif operation == 'get_activity_trend':
         time_range = sys.argv[2] if len(sys.argv) > 2 else 'week'
-        get_activity_trend(time_range)
+        class_name = sys.argv[3] if len(sys.argv) > 3 else None
+        cached_output(__file__, sys.argv[1:4], [TAG_SUBMISSIONS, TAG_QUESTIONS],
+                      lambda: get_activity_trend(time_range, class_name))
     elif operation == 'get_problem_completion':
-        get_problem_completion()
+        cached_output(__file__, ['get_problem_completion'], [TAG_SUBMISSIONS, TAG_PROBLEMS], get_problem_completion)
     elif operation == 'get_todos':
         get_todos()
+    elif operation == 'get_dashboard_bundle':
+        time_range = sys.argv[2] if len(sys.argv) > 2 else 'week'
+        class_name = sys.argv[3] if len(sys.argv) > 3 else None
+        cached_output(__file__, sys.argv[1:4], [TAG_SUBMISSIONS, TAG_QUESTIONS, TAG_PROBLEMS],
+                      lambda: get_dashboard_bundle(time_range, class_name))
     else:
         print(json.dumps({
             'success': False,
@@ -4,26 +4,7 @@
 import mysql.connector
 import json
 import sys
-
-# 数据库连接配置
-DB_CONFIG = {
-    'host': 'localhost',
-    'user': 'root',
-    'password': 'mwYgR7#*X2',
-    'database': 'education_platform'
-}
-
-def get_db_connection():
-    """建立数据库连接"""
-    try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        return conn
-    except mysql.connector.Error as err:
-        print(json.dumps({
-            'success': False,
-            'message': f"数据库连接失败: {str(err)}"
-        }))
-        sys.exit(1)
+from db_pool import get_db_connection
 
 def alter_table():
     """修改edu_problems表，添加chapter_id字段"""
@@ -35,7 +16,7 @@ def alter_table():
         cursor.execute("""
             SELECT COUNT(*) 
             FROM information_schema.COLUMNS 
-            WHERE TABLE_SCHEMA = 'education_platform' 
+            WHERE TABLE_SCHEMA = DATABASE() 
             AND TABLE_NAME = 'edu_problems' 
             AND COLUMN_NAME = 'chapter_id'
         """)
@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+
+"""
+单元测试公共配置: 服务脚本之间按脚本目录互相导入，这里把 src/services 加入模块搜索路径
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src', 'services'))
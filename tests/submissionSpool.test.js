@@ -0,0 +1,115 @@
+/**
+ * 预写日志的分段恢复: 最后一条有效记录的位置、打开时截断不完整的记录
+ *
+ * 运行: node --test tests/
+ */
+const test = require('node:test');
+const assert = require('node:assert');
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const { SubmissionSpool, encodeRecord, decodeRecord } = require('../server/services/submissionSpool');
+
+function record(n) {
+    return encodeRecord({ key: `key-${n}`, data: { student_id: 's1', problem_id: `p${n}` }, spooledAt: '2025-03-01T10:00:00.000Z' });
+}
+
+function tempDir() {
+    return fs.mkdtempSync(path.join(os.tmpdir(), 'spool-test-'));
+}
+
+function openSpool(dir) {
+    const spool = new SubmissionSpool({ dir });
+    spool.open();
+    return spool;
+}
+
+function closeSpool(spool) {
+    fs.closeSync(spool.fd);
+}
+
+test('编码的记录可以解码，校验和不匹配时返回null', () => {
+    const line = record(1).toString('utf-8').trimEnd();
+    assert.strictEqual(decodeRecord(line).key, 'key-1');
+    assert.strictEqual(decodeRecord(line.replace('p1', 'p2')), null);
+    assert.strictEqual(decodeRecord('not a record'), null);
+});
+
+test('lastValidOffset: 全部是完整记录时为内容长度', () => {
+    const spool = new SubmissionSpool({ dir: tempDir() });
+    const content = Buffer.concat([record(1), record(2)]);
+    assert.strictEqual(spool.lastValidOffset(content), content.length);
+    assert.strictEqual(spool.lastValidOffset(Buffer.alloc(0)), 0);
+});
+
+test('lastValidOffset: 末尾没有换行的半条记录不计入', () => {
+    const spool = new SubmissionSpool({ dir: tempDir() });
+    const valid = Buffer.concat([record(1), record(2)]);
+    const partial = record(3).subarray(0, 20);
+    assert.strictEqual(spool.lastValidOffset(Buffer.concat([valid, partial])), valid.length);
+});
+
+test('lastValidOffset: 末尾校验和错误的整行不计入', () => {
+    const spool = new SubmissionSpool({ dir: tempDir() });
+    const valid = record(1);
+    const corrupt = Buffer.from(record(2).toString('utf-8').replace('p2', 'p9'), 'utf-8');
+    assert.strictEqual(spool.lastValidOffset(Buffer.concat([valid, corrupt])), valid.length);
+});
+
+test('lastValidOffset: 中间的损坏记录之后还有有效记录时保留到最后一条有效记录', () => {
+    const spool = new SubmissionSpool({ dir: tempDir() });
+    const content = Buffer.concat([record(1), Buffer.from('garbage\n'), record(2), Buffer.from('{"key"')]);
+    assert.strictEqual(spool.lastValidOffset(content), content.length - 6);
+});
+
+test('open: 截断活动分段末尾不完整的记录并统计待重放的记录', (t) => {
+    t.mock.method(console, 'warn', () => {});
+    const dir = tempDir();
+    const segmentPath = path.join(dir, 'segment-000000000001.log');
+    const valid = Buffer.concat([record(1), record(2)]);
+    fs.writeFileSync(segmentPath, Buffer.concat([valid, record(3).subarray(0, 15)]));
+
+    const spool = openSpool(dir);
+    try {
+        assert.strictEqual(fs.statSync(segmentPath).size, valid.length);
+        assert.strictEqual(spool.activeSegment, 1);
+        assert.strictEqual(spool.activeSize, valid.length);
+        assert.strictEqual(spool.metrics.pending, 2);
+        assert.strictEqual(console.warn.mock.calls.length, 1);
+    } finally {
+        closeSpool(spool);
+    }
+});
+
+test('open: 完整的分段不截断，从检查点开始统计并删除检查点之前的分段', () => {
+    const dir = tempDir();
+    fs.writeFileSync(path.join(dir, 'segment-000000000001.log'), record(1));
+    fs.writeFileSync(path.join(dir, 'segment-000000000002.log'), Buffer.concat([record(2), record(3)]));
+    fs.writeFileSync(path.join(dir, 'segment-000000000003.log'), record(4));
+    fs.writeFileSync(path.join(dir, 'checkpoint.json'), JSON.stringify({ segment: 2, offset: record(2).length }));
+
+    const spool = openSpool(dir);
+    try {
+        assert.ok(!fs.existsSync(path.join(dir, 'segment-000000000001.log')));
+        assert.strictEqual(spool.activeSegment, 3);
+        assert.strictEqual(spool.activeSize, record(4).length);
+        assert.strictEqual(spool.readSegment, 2);
+        assert.strictEqual(spool.readOffset, record(2).length);
+        // 分段2中检查点之后的1条 + 分段3的1条
+        assert.strictEqual(spool.metrics.pending, 2);
+    } finally {
+        closeSpool(spool);
+    }
+});
+
+test('open: 空目录时创建第一个分段', () => {
+    const dir = tempDir();
+    const spool = openSpool(dir);
+    try {
+        assert.ok(fs.existsSync(path.join(dir, 'segment-000000000001.log')));
+        assert.strictEqual(spool.activeSize, 0);
+        assert.strictEqual(spool.metrics.pending, 0);
+    } finally {
+        closeSpool(spool);
+    }
+});
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+"""活跃位图: 连续天数和留存"""
+
+import random
+
+from activity_bitmaps import BitSlicedCounter, current_streak, fold_weeks, longest_streak, retention
+
+
+def bits_of(*days):
+    """由活跃日列表构造位图"""
+    bits = 0
+    for day in days:
+        bits |= 1 << day
+    return bits
+
+
+def test_current_streak_counts_back_from_today():
+    assert current_streak(bits_of(0, 1, 2), 2) == 3
+    assert current_streak(bits_of(0, 2, 3), 3) == 2
+
+
+def test_current_streak_ends_yesterday_when_today_inactive():
+    assert current_streak(bits_of(0, 1, 2), 3) == 3
+
+
+def test_current_streak_broken_before_yesterday():
+    assert current_streak(bits_of(0, 1), 3) == 0
+    assert current_streak(0, 5) == 0
+    assert current_streak(bits_of(0), -1) == 0
+
+
+def test_current_streak_from_first_day():
+    assert current_streak(bits_of(0, 1, 2, 3), 3) == 4
+    assert current_streak(bits_of(0), 0) == 1
+
+
+def test_current_streak_matches_day_by_day_count():
+    rng = random.Random(7)
+    for _ in range(200):
+        days = [day for day in range(60) if rng.random() < 0.7]
+        bits = bits_of(*days)
+        today = rng.randrange(60)
+        end = today if today in days else today - 1
+        expected = 0
+        while end - expected >= 0 and (end - expected) in days:
+            expected += 1
+        assert current_streak(bits, today) == expected
+
+
+def test_longest_streak():
+    assert longest_streak(0) == 0
+    assert longest_streak(bits_of(0, 1, 3, 4, 5, 9)) == 3
+
+
+def test_fold_weeks():
+    assert fold_weeks(bits_of(0, 6, 14), 3) == 0b101
+    assert fold_weeks(bits_of(21), 3) == 0
+
+
+def test_bit_sliced_counter_matches_naive_count():
+    rng = random.Random(3)
+    counter = BitSlicedCounter()
+    expected = [0] * 40
+    for _ in range(300):
+        bits = rng.getrandbits(40)
+        counter.add(bits)
+        for i in range(40):
+            expected[i] += (bits >> i) & 1
+    assert counter.counts(40) == expected
+
+
+def test_daily_retention_aligns_to_first_day():
+    bitmaps = {'a': bits_of(0, 1, 3), 'b': bits_of(1, 2), 'inactive': 0}
+    result = retention(bitmaps, today=3, days=4, weeks=1)
+
+    assert result['students'] == 2
+    # 第3天只有 a 首次活跃已满3天
+    assert result['daily_retention'] == [100.0, 100.0, 0.0, 100.0]
+    assert result['weekly_retention'] == [100.0]
+
+
+def test_daily_retention_without_eligible_students():
+    result = retention({'a': bits_of(5)}, today=5, days=3, weeks=1)
+    assert result['daily_retention'] == [100.0, None, None]
+
+
+def test_weekly_retention_and_cohorts():
+    bitmaps = {'a': bits_of(0, 7), 'b': bits_of(1), 'c': bits_of(7)}
+    result = retention(bitmaps, today=8, days=1, weeks=2)
+
+    # 第1周: a、b 已满一周，只有 a 仍活跃
+    assert result['weekly_retention'] == [100.0, 50.0]
+    assert result['cohorts'] == [
+        {'cohort_week': 0, 'size': 2, 'retention': [100.0, 50.0]},
+        {'cohort_week': 1, 'size': 1, 'retention': [100.0]}
+    ]
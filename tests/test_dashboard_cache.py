@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+
+"""看板缓存: 标签变更后的最短刷新间隔和后台刷新互斥"""
+
+import json
+import threading
+
+import pytest
+
+import dashboard_cache
+import shared_cache
+
+
+@pytest.fixture(autouse=True)
+def cache_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(shared_cache, 'CACHE_FILE', str(tmp_path / 'cache.sqlite3'))
+    monkeypatch.setattr(shared_cache, '_local', threading.local())
+
+
+@pytest.fixture
+def refreshes(monkeypatch):
+    started = []
+    monkeypatch.setattr(dashboard_cache.subprocess, 'Popen', lambda args, **kwargs: started.append(args))
+    return started
+
+
+def compute():
+    print(json.dumps({'success': True, 'data': 1}))
+
+
+def serve(capsys):
+    dashboard_cache.cached_output('teaching_stats_api.py', ['get_stats'], [dashboard_cache.TAG_SUBMISSIONS], compute)
+    return capsys.readouterr().out
+
+
+def test_recent_entry_is_not_refreshed_after_tag_bump(capsys, refreshes):
+    serve(capsys)
+    dashboard_cache.bump_tags(dashboard_cache.TAG_SUBMISSIONS)
+    serve(capsys)
+
+    assert refreshes == []
+    assert shared_cache.get_counters('dashboard.')['dashboard.teaching_stats_api.get_stats.hit'] == 1
+
+
+def test_tag_bump_refreshes_once_after_min_interval(capsys, refreshes, monkeypatch):
+    monkeypatch.setattr(dashboard_cache, 'MIN_REFRESH', 0)
+    serve(capsys)
+    dashboard_cache.bump_tags(dashboard_cache.TAG_SUBMISSIONS)
+    for _ in range(3):
+        assert json.loads(serve(capsys))['success'] is True
+
+    # 刷新进程结束前只启动一次
+    assert len(refreshes) == 1
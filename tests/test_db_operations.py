@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+
+"""批量导入学生账号: 名单解析和初始密码"""
+
+from db_operations import parse_roster, _generated_passwords
+
+
+def write_roster(tmp_path, content):
+    path = tmp_path / 'roster.csv'
+    path.write_text(content, encoding='utf-8')
+    return str(path)
+
+
+def test_missing_password_generates_random_one_time_password(tmp_path):
+    students, invalid = parse_roster(write_roster(tmp_path, (
+        "email,student_id,class,name,password\n"
+        "a@example.com,2026001,c1,A,\n"
+        "b@example.com,2026002,c1,B,\n"
+        "c@example.com,2026003,c1,C,given-secret\n"
+    )))
+
+    assert invalid == []
+    a, b, c = students
+    assert a['generated'] and b['generated'] and not c['generated']
+    assert a['password'] != a['student_id'] and len(a['password']) >= 12
+    assert a['password'] != b['password']
+    assert c['password'] == 'given-secret'
+    assert _generated_passwords(students) == [
+        {'email': 'a@example.com', 'student_id': '2026001', 'password': a['password']},
+        {'email': 'b@example.com', 'student_id': '2026002', 'password': b['password']}
+    ]
+
+
+def test_rows_without_email_or_student_id_are_invalid(tmp_path):
+    students, invalid = parse_roster(write_roster(tmp_path, (
+        '[{"email": "a@example.com", "name": "A"}, {"student_id": "2026002"}]'
+    )))
+
+    assert students == []
+    assert [row['row'] for row in invalid] == [1, 2]
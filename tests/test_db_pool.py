@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+
+"""数据库连接池: 密码只从环境变量读取"""
+
+import mysql.connector
+import pytest
+
+import db_pool
+
+
+def test_missing_password_fails_before_connecting(monkeypatch):
+    monkeypatch.setitem(db_pool.DB_CONFIG, 'password', None)
+    monkeypatch.setattr(db_pool, '_pools', {})
+
+    with pytest.raises(mysql.connector.Error, match='DB_PASSWORD'):
+        db_pool.get_connection()
+    assert db_pool._pools == {}
+
+
+def test_missing_password_is_reported_as_json(monkeypatch, capsys):
+    monkeypatch.setitem(db_pool.DB_CONFIG, 'password', None)
+
+    with pytest.raises(SystemExit):
+        db_pool.get_db_connection()
+    assert 'DB_PASSWORD' in capsys.readouterr().out
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+
+"""提交写入的语句预算和派生表更新的语句生成"""
+
+from datetime import datetime
+
+from coding_data import _new_meter, _write_submission_batch
+from derived_updates import as_batch, build_mark_statements
+
+
+class FakeCursor:
+    """按多语句执行的方式逐条返回结果，记录执行的SQL"""
+
+    def __init__(self):
+        self.executed = []
+        self.statement = None
+        self.with_rows = False
+        self.lastrowid = None
+        self._remaining = 0
+
+    def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+        self.statement = sql
+        self._remaining = sql.count(';\n')
+        self.lastrowid = 100
+
+    def nextset(self):
+        if not self._remaining:
+            return None
+        self._remaining -= 1
+        self.lastrowid += 1
+        return True
+
+
+def submission(**extra):
+    data = {
+        'student_class': 'c1', 'student_id': 's1', 'problem_id': 'p1', 'problem_title': 't',
+        'code_content': 'int main() {}', 'submit_result': 'failed',
+        'execution_errors': "main.cpp:3:5: error: 'x' was not declared in this scope",
+        'first_view_time': '2026-10-01 10:00:00', 'submission_time': '2026-10-01 10:05:00',
+        'coding_time': 300
+    }
+    data.update(extra)
+    return data
+
+
+def test_submit_writes_two_statements_in_one_round_trip():
+    cursor = FakeCursor()
+    meter = _new_meter()
+    ids = _write_submission_batch(cursor, [submission()], meter)
+
+    assert ids == [100]
+    assert meter['round_trips'] == 1
+    assert meter['statements'] == 2
+    assert meter['bytes_sent'] > 0
+    sql, params = cursor.executed[0]
+    assert 'edu_code_blobs' not in sql and 'rollup' not in sql
+    assert params['s0_code_content_0'] == 'int main() {}'
+    assert params['s0_error_fingerprint_0'] is not None
+
+
+def test_idempotency_key_adds_one_statement():
+    cursor = FakeCursor()
+    meter = _new_meter()
+    ids = _write_submission_batch(cursor, [submission(idempotency_key='k1')], meter)
+
+    assert ids == [101]
+    assert meter['statements'] == 3
+    assert 'edu_ingest_keys' in cursor.executed[0][0].split(';\n')[0]
+
+
+def test_as_batch_formats_times():
+    batch = as_batch([{'id': 1, 'submission_time': datetime(2026, 10, 1, 10, 5), 'first_view_time': None}])
+    assert batch == [{'id': 1, 'submission_time': '2026-10-01 10:05:00', 'first_view_time': None}]
+
+
+def test_mark_statements_move_code_and_keep_migrated_hash():
+    batch = [
+        {'id': 1, 'code_content': 'a', 'submission_time': '2026-10-01 10:00:00'},
+        {'id': 2, 'code_content': None, 'submission_time': '2026-10-02 10:00:00'}
+    ]
+    statements = build_mark_statements(batch)
+
+    assert len(statements) == 2
+    assert 'edu_code_blobs' in statements[0][0]
+    sql, params = statements[1]
+    assert 'ELSE code_hash END' in sql and 'derived = 1' in sql
+    assert 'dm_code_id_1' not in params
+    assert (params['dm_from'], params['dm_to']) == ('2026-10-01 10:00:00', '2026-10-02 10:00:00')
+
+
+def test_mark_statements_without_code_or_times():
+    statements = build_mark_statements([{'id': 3, 'code_content': None, 'submission_time': None}])
+
+    assert len(statements) == 1
+    sql, params = statements[0]
+    assert 'SET code_hash = code_hash' in sql
+    assert 'dm_from' not in params
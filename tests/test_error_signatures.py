@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+
+"""错误信息归一化"""
+
+from error_signatures import MAX_MESSAGE_LENGTH, fingerprint, normalize_error
+
+
+def test_empty_errors():
+    assert normalize_error(None) == (None, None)
+    assert normalize_error('') == (None, None)
+    assert normalize_error('  \n\t') == (None, None)
+
+
+def test_compile_error_strips_path_location_and_identifier():
+    errors = (
+        "/tmp/run/8f14e45f-ceea-467e-9b5a-1234567890ab.cpp:12:5: error: ‘total’ was not declared in this scope\n"
+        "   12 |     total += x;"
+    )
+    assert normalize_error(errors) == ("error: '<id>' was not declared in this scope", 'compile')
+
+
+def test_same_error_in_different_files_has_same_signature():
+    first, _ = normalize_error("/tmp/a/main.cpp:3:1: error: expected ';' before '}' token")
+    second, _ = normalize_error("C:\\work\\b\\solution.cpp:41:9: error: expected ';' before '}' token")
+    assert first == second == "error: expected ';' before '}' token"
+    assert fingerprint(first) == fingerprint(second)
+
+
+def test_error_line_is_preferred_over_first_line():
+    errors = "In function 'int main()':\n/tmp/main.cpp:5:3: error: 'cout' was not declared in this scope"
+    message, category = normalize_error(errors)
+    assert message == "error: '<id>' was not declared in this scope"
+    assert category == 'compile'
+
+
+def test_runtime_errors():
+    assert normalize_error('Segmentation fault at 0x7ffd1234') == ('Segmentation fault at <addr>', 'runtime')
+    assert normalize_error('程序进程退出，返回值 139')[1] == 'runtime'
+
+
+def test_other_errors_use_first_line():
+    assert normalize_error('note: something\nwarning: unused') == ('note: something', 'other')
+
+
+def test_message_is_truncated():
+    message, _ = normalize_error('error: ' + 'x' * 1000)
+    assert len(message) == MAX_MESSAGE_LENGTH
+
+
+def test_fingerprint_fits_signed_bigint():
+    value = fingerprint("error: '<id>' was not declared in this scope")
+    assert 0 <= value < 2 ** 63
+    assert value == fingerprint("error: '<id>' was not declared in this scope")
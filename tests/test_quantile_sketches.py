@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+
+"""分位数草图: 由解题统计和最早的成功提交ID确定首次解出"""
+
+from quantile_sketches import (
+    METRIC_ATTEMPTS, METRIC_SOLVE_SECONDS, RELATIVE_ACCURACY,
+    bucket_of, bucket_value, build_first_solve_query, first_solves, build_sketch_upsert
+)
+
+
+def submission(submission_id, student_id, result, problem_id='p1', student_class='c1'):
+    return {
+        'id': submission_id,
+        'student_id': student_id,
+        'problem_id': problem_id,
+        'student_class': student_class,
+        'submit_result': result
+    }
+
+
+def solved(student_id, attempts, seconds, first_success, problem_id='p1'):
+    return {'student_id': student_id, 'problem_id': problem_id, 'attempts_until_success': attempts,
+            'time_spent_seconds': seconds, 'first_success': first_success}
+
+
+def sketch_counts(params):
+    """把upsert语句的参数还原为 {(指标, 题目, 班级, 桶): 计数}"""
+    counts = {}
+    j = 0
+    while f'qs_metric_{j}' in params:
+        key = (params[f'qs_metric_{j}'], params[f'qs_problem_{j}'],
+               params[f'qs_class_{j}'], params[f'qs_bucket_{j}'])
+        counts[key] = params[f'qs_count_{j}']
+        j += 1
+    return counts
+
+
+def test_first_solve_query_covers_successful_pairs_once():
+    batch = [submission(1, 's1', 'success'), submission(2, 's1', 'success'),
+             submission(3, 's2', 'failed')]
+    sql, params = build_first_solve_query(batch)
+
+    assert 'MIN(s.id)' in sql
+    assert params == {'qs_sid_0': 's1', 'qs_pid_0': 'p1'}
+    assert build_first_solve_query([submission(1, 's1', 'failed')]) == (None, {})
+
+
+def test_first_solve_uses_stats_values():
+    batch = [submission(7, 's1', 'failed'), submission(8, 's1', 'success')]
+    solves = first_solves(batch, [solved('s1', 4, 50, 8)])
+    assert solves == {1: (4, 50)}
+
+    sql, params = build_sketch_upsert(batch, solves)
+    assert 'ON DUPLICATE KEY UPDATE' in sql
+    assert sketch_counts(params) == {
+        (METRIC_ATTEMPTS, 'p1', 'c1', bucket_of(4)): 1,
+        (METRIC_SOLVE_SECONDS, 'p1', 'c1', bucket_of(50)): 1
+    }
+
+
+def test_accepts_tuple_rows():
+    solves = first_solves([submission(3, 's1', 'success')], [('s1', 'p1', 2, 40, 3)])
+    assert solves == {0: (2, 40)}
+
+
+def test_later_success_is_not_counted_again():
+    # 首次解出是更早的提交（ID 5），本批次中的成功提交不再计入
+    batch = [submission(9, 's1', 'success')]
+    solves = first_solves(batch, [solved('s1', 3, 60, 5)])
+    assert solves == {}
+    assert build_sketch_upsert(batch, solves) == (None, {})
+
+
+def test_only_first_success_in_batch_is_counted():
+    batch = [submission(1, 's1', 'success'), submission(2, 's1', 'success')]
+    solves = first_solves(batch, [solved('s1', 1, 10, 1)])
+    assert solves == {0: (1, 10)}
+
+
+def test_same_bucket_is_merged_into_one_row():
+    batch = [submission(1, 's1', 'success'), submission(2, 's2', 'success')]
+    solves = first_solves(batch, [solved('s1', 1, 60, 1), solved('s2', 1, 60, 2)])
+    _, params = build_sketch_upsert(batch, solves)
+    assert sketch_counts(params) == {
+        (METRIC_ATTEMPTS, 'p1', 'c1', bucket_of(1)): 2,
+        (METRIC_SOLVE_SECONDS, 'p1', 'c1', bucket_of(60)): 2
+    }
+
+
+def test_zero_solve_time_is_skipped():
+    batch = [submission(1, 's1', 'success', student_class=None)]
+    _, params = build_sketch_upsert(batch, {0: (1, 0)})
+    assert sketch_counts(params) == {(METRIC_ATTEMPTS, 'p1', '', bucket_of(1)): 1}
+
+
+def test_bucket_value_relative_error():
+    for value in (1, 2, 7, 30, 61, 3600, 86400):
+        estimate = bucket_value(bucket_of(value))
+        assert abs(estimate - value) / value <= RELATIVE_ACCURACY + 1e-9
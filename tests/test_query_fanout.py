@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+"""查询分区并发: 线程数不超过连接池可用的连接，连接池计数线程安全"""
+
+import threading
+import time
+
+import db_pool
+import query_fanout
+
+
+class FakeConnection:
+    connection_id = 1
+
+    def cursor(self, dictionary=False):
+        return self
+
+    def execute(self, sql, params=None):
+        pass
+
+    def close(self):
+        pass
+
+
+def run_concurrently(monkeypatch, pool_size, sections):
+    monkeypatch.setattr(query_fanout, 'POOL_SIZE', pool_size)
+    monkeypatch.setattr(query_fanout, 'get_connection', FakeConnection)
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def section(cursor):
+        with lock:
+            active.append(1)
+            peak.append(len(active))
+        time.sleep(0.05)
+        with lock:
+            active.pop()
+        return True
+
+    results, incomplete = query_fanout.run_sections(
+        [(f's{i}', section, None) for i in range(sections)], timeout=2)
+    assert incomplete == {}
+    assert all(results.values())
+    return max(peak)
+
+
+def test_default_pool_runs_all_sections_at_once(monkeypatch):
+    assert run_concurrently(monkeypatch, db_pool.POOL_SIZE, 7) == 7
+
+
+def test_small_pool_leaves_one_connection_free(monkeypatch):
+    assert run_concurrently(monkeypatch, 4, 7) == 3
+
+
+def test_pool_stats_count_from_many_threads(monkeypatch):
+    monkeypatch.setattr(db_pool, '_stats', {'hits': 0, 'misses': 0, 'reconnects': 0})
+    threads = [threading.Thread(target=lambda: [db_pool._count('hits') for _ in range(1000)])
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert db_pool.get_pool_stats()['hits'] == 8000
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+
+"""汇总表: (班级, 学生) 排名汇总的增量语句和归档后的重建"""
+
+import sqlite3
+
+from rollups import ARCHIVE_TABLE, SUBMISSION_TABLE, build_rebuild_statements, build_rollup_statements
+
+
+def submission(submission_id, student_id, problem_id, result, student_class='c1'):
+    return {
+        'id': submission_id, 'student_id': student_id, 'problem_id': problem_id,
+        'student_class': student_class, 'submit_result': result,
+        'problem_title': problem_id, 'submission_time': '2026-10-01 10:00:00'
+    }
+
+
+def student_rows(params):
+    """把upsert语句的参数还原为 {(班级, 学生): (提交次数, 成功次数)}"""
+    rows = {}
+    j = 0
+    while f'cs_class_{j}' in params:
+        rows[(params[f'cs_class_{j}'], params[f'cs_student_{j}'])] = (
+            params[f'cs_attempts_{j}'], params[f'cs_successes_{j}'])
+        j += 1
+    return rows
+
+
+def test_class_student_rollup_counts_per_student():
+    batch = [
+        submission(1, 's1', 'p1', 'failed'),
+        submission(2, 's1', 'p1', 'success'),
+        submission(3, 's1', 'p1', 'success'),
+        submission(4, 's2', 'p2', 'success', student_class=None),
+    ]
+    sql, params = build_rollup_statements(batch, {})[2]
+
+    assert 'edu_class_student_rollup' in sql
+    assert student_rows(params) == {('c1', 's1'): (3, 2), ('', 's2'): (1, 1)}
+    # 解出题目数每个 (班级, 学生, 题目) 在批次中只检查第一条成功提交
+    assert sql.count('NOT EXISTS') == 2
+    assert params['before_1'] == 2 and 'before_2' not in params
+    assert "(student_class = '' OR student_class IS NULL)" in sql
+
+
+def test_failures_add_no_solved_problems():
+    sql, params = build_rollup_statements([submission(5, 's1', 'p1', 'failed')], {})[2]
+    assert 'NOT EXISTS' not in sql
+    assert student_rows(params) == {('c1', 's1'): (1, 0)}
+
+
+ROLLUP_TABLES = """
+    CREATE TABLE edu_class_problem_rollup (
+        student_class TEXT, problem_id TEXT, problem_title TEXT, attempts INT, successes INT,
+        students INT, solved_students INT DEFAULT 0, solve_seconds INT DEFAULT 0, timed_solves INT DEFAULT 0);
+    CREATE TABLE edu_class_day_rollup (
+        student_class TEXT, activity_date TEXT, attempts INT, successes INT, active_students INT);
+    CREATE TABLE edu_class_student_rollup (
+        student_class TEXT, student_id TEXT, attempts INT, successes INT, solved_problems INT);
+"""
+
+SUBMISSIONS = [
+    (1, 'c1', 's1', 'p1', 'failed', '2025-01-10 10:00:00'),
+    (2, 'c1', 's1', 'p1', 'success', '2025-01-10 10:05:00'),
+    (3, 'c1', 's2', 'p1', 'success', '2025-01-11 09:00:00'),
+    (4, 'c1', 's1', 'p1', 'failed', '2026-10-01 10:00:00'),
+    (5, None, 's3', 'p2', 'success', '2026-10-01 11:00:00'),
+]
+
+
+def rebuilt_rollups(db, include_archive):
+    """执行重建语句（解题统计的 UPDATE ... JOIN 只能在MySQL中执行，这里跳过），返回三张汇总表的内容"""
+    for field, sql, params in build_rebuild_statements(include_archive=include_archive):
+        if field or sql.lstrip().startswith('DELETE'):
+            db.execute(sql, params)
+    return {
+        table: sorted(db.execute(f"SELECT * FROM {table}").fetchall(), key=repr)
+        for table in ('edu_class_problem_rollup', 'edu_class_day_rollup', 'edu_class_student_rollup')
+    }
+
+
+def test_rebuild_after_archiving_keeps_archived_submissions():
+    db = sqlite3.connect(':memory:')
+    for table in (SUBMISSION_TABLE, ARCHIVE_TABLE):
+        db.execute(f"""
+            CREATE TABLE {table} (id INT, student_class TEXT, student_id TEXT, problem_id TEXT,
+                                  problem_title TEXT, submit_result TEXT, submission_time TEXT)
+        """)
+    db.executescript(ROLLUP_TABLES)
+    db.executemany(
+        f"INSERT INTO {SUBMISSION_TABLE} VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [(i, cls, sid, pid, pid, result, at) for i, cls, sid, pid, result, at in SUBMISSIONS]
+    )
+    before = rebuilt_rollups(db, include_archive=False)
+
+    # 与 submission_partitions.maintain 相同: 过期月份的提交复制到归档表后从热表删除
+    db.execute(f"INSERT INTO {ARCHIVE_TABLE} SELECT * FROM {SUBMISSION_TABLE} WHERE submission_time < '2025-02-01'")
+    db.execute(f"DELETE FROM {SUBMISSION_TABLE} WHERE submission_time < '2025-02-01'")
+
+    assert rebuilt_rollups(db, include_archive=True) == before
+    hot_only = rebuilt_rollups(db, include_archive=False)
+    assert hot_only != before
+    assert ('c1', 's1', 1, 0, 0) in hot_only['edu_class_student_rollup']
+
+
+def test_rebuild_statements_read_archive_only_when_requested():
+    hot = build_rebuild_statements('c1')
+    archived = build_rebuild_statements('c1', include_archive=True)
+
+    assert not any(ARCHIVE_TABLE in sql for _, sql, _ in hot)
+    reads = [sql for _, sql, _ in archived if 'FROM edu_coding_submissions' in sql]
+    assert len(reads) == 4
+    assert all('UNION ALL SELECT' in sql and ARCHIVE_TABLE in sql for sql in reads)
+    assert all(params == ('c1',) for _, _, params in archived)
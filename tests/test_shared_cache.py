@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+
+"""共享缓存: 查询分区线程和主线程交替使用"""
+
+import threading
+
+import pytest
+
+import dashboard_cache
+import shared_cache
+
+
+@pytest.fixture(autouse=True)
+def cache_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(shared_cache, 'CACHE_FILE', str(tmp_path / 'cache.sqlite3'))
+    monkeypatch.setattr(shared_cache, '_local', threading.local())
+
+
+def in_thread(func, *args):
+    result = {}
+    thread = threading.Thread(target=lambda: result.setdefault('value', func(*args)))
+    thread.start()
+    thread.join()
+    return result.get('value')
+
+
+def test_main_thread_after_worker_thread(capsys):
+    in_thread(shared_cache.set_many, 'ns', {'a': 1}, 60)
+    assert in_thread(shared_cache.get_many, 'ns', ['a']) == {'a': 1}
+
+    # 主线程在分区线程打开连接之后仍可读写
+    shared_cache.set_many('ns', {'b': 2}, 60)
+    assert shared_cache.get_many('ns', ['a', 'b']) == {'a': 1, 'b': 2}
+    shared_cache.incr_counter('hits', 3)
+    in_thread(shared_cache.incr_counter, 'hits', 2)
+    assert shared_cache.get_counters('hits') == {'hits': 5}
+    assert capsys.readouterr().err == ''
+
+
+def test_delete_from_thread_is_visible_to_main_thread():
+    shared_cache.set_many('ns', {'a': 1, 'b': 2}, 60)
+    in_thread(shared_cache.delete_many, 'ns', ['a'])
+    assert shared_cache.get_many('ns', ['a', 'b']) == {'b': 2}
+
+
+def test_expired_entries_are_misses():
+    shared_cache.set_many('ns', {'a': 1}, -1)
+    assert shared_cache.get_many('ns', ['a']) == {}
+
+
+def test_bump_tags_after_lookup_in_worker_thread():
+    in_thread(shared_cache.get_many, 'ns', ['a'])
+    dashboard_cache.bump_tags(dashboard_cache.TAG_SUBMISSIONS)
+    assert dashboard_cache.tag_versions([dashboard_cache.TAG_SUBMISSIONS])[dashboard_cache.TAG_SUBMISSIONS] != 0
+
+
+def test_add_only_succeeds_once_until_expired():
+    assert shared_cache.add('lock', 'k', True, 60)
+    assert not shared_cache.add('lock', 'k', True, 60)
+    assert not in_thread(shared_cache.add, 'lock', 'k', True, 60)
+
+    shared_cache.set_many('lock', {'old': True}, -1)
+    assert shared_cache.add('lock', 'old', True, 60)
+
+
+def test_add_is_exclusive_across_threads():
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(shared_cache.add('lock', 'race', True, 60)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results.count(True) == 1
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+
+"""解题用时直方图的分桶"""
+
+from solving_histograms import (
+    MAX_BUCKET, _quantile, bucket_bounds, bucket_of, build_histogram_upsert, solving_minutes
+)
+
+
+def success(minutes_after, problem_id='p1', student_class='c1'):
+    return {
+        'problem_id': problem_id,
+        'student_class': student_class,
+        'submit_result': 'success',
+        'first_view_time': '2025-03-01 10:00:00',
+        'submission_time': f'2025-03-01 10:{minutes_after:02d}:00'
+    }
+
+
+def test_bucket_of_boundaries():
+    assert bucket_of(0) == 0
+    assert bucket_of(0.5) == 0
+    assert bucket_of(1) == 1
+    assert bucket_of(1.5) == 2
+    assert bucket_of(2) == 3
+    assert bucket_of(4) == 5
+    assert bucket_of(10 ** 9) == MAX_BUCKET
+
+
+def test_value_falls_within_its_bucket_bounds():
+    for minutes in (0.2, 0.99, 1.1, 1.7, 2.5, 3.3, 7, 45, 180, 1000):
+        lower, upper = bucket_bounds(bucket_of(minutes))
+        assert lower <= minutes < upper
+
+
+def test_last_bucket_is_open():
+    lower, upper = bucket_bounds(MAX_BUCKET)
+    assert upper is None
+    assert lower == bucket_bounds(MAX_BUCKET - 1)[1]
+
+
+def test_solving_minutes():
+    assert solving_minutes(success(30)) == 30
+    assert solving_minutes(dict(success(0), submission_time='2025-03-01T10:00:30Z')) == 0.5
+    # 提交时间早于查看时间时按0计
+    assert solving_minutes(dict(success(0), first_view_time='2025-03-01 11:00:00')) == 0
+
+
+def test_solving_minutes_unavailable():
+    assert solving_minutes(dict(success(5), submit_result='error')) is None
+    assert solving_minutes(dict(success(5), first_view_time=None)) is None
+    assert solving_minutes(dict(success(5), submission_time='not a time')) is None
+
+
+def test_histogram_upsert_counts_per_bucket():
+    batch = [success(30), success(31), success(3), success(30, student_class=None),
+             dict(success(30), submit_result='error')]
+    sql, params = build_histogram_upsert(batch)
+
+    assert 'ON DUPLICATE KEY UPDATE' in sql
+    rows = {
+        (params[f'h_problem_{i}'], params[f'h_class_{i}'], params[f'h_bucket_{i}']): params[f'h_count_{i}']
+        for i in range(len(params) // 4)
+    }
+    assert rows == {
+        ('p1', 'c1', bucket_of(30)): 2,
+        ('p1', 'c1', bucket_of(3)): 1,
+        ('p1', '', bucket_of(30)): 1
+    }
+
+
+def test_histogram_upsert_without_successes():
+    assert build_histogram_upsert([dict(success(5), submit_result='error')]) == (None, {})
+
+
+def test_quantile_stays_within_bucket():
+    assert _quantile([], 0.5) is None
+    assert _quantile([(3, 0)], 0.5) is None
+
+    lower, upper = bucket_bounds(3)
+    median = _quantile([(3, 4)], 0.5)
+    assert lower <= median <= upper
+
+    buckets = [(1, 5), (5, 5), (9, 10)]
+    # 第10个落在第二个桶的上界
+    assert _quantile(buckets, 0.5) == round(bucket_bounds(5)[1], 2)
+    assert _quantile(buckets, 0.9) >= bucket_bounds(9)[0]
+    assert _quantile([(MAX_BUCKET, 3)], 0.9) == round(bucket_bounds(MAX_BUCKET)[0], 2)
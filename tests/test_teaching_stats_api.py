@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+
+"""题目完成情况: 两条查询按难度分组，未映射的难度各自成为一组"""
+
+import sqlite3
+
+from difficulty_levels import DIFFICULTY_LEVELS
+from teaching_stats_api import compute_problem_completion
+
+
+class CountingCursor:
+    """sqlite游标包装，按列名读取结果并记录执行的语句数"""
+
+    def __init__(self, db):
+        self.cursor = db.cursor()
+        self.statements = 0
+
+    def execute(self, sql, params=()):
+        self.statements += 1
+        self.cursor.execute(sql, params)
+
+    def fetchall(self):
+        return self.cursor.fetchall()
+
+    def fetchone(self):
+        return self.cursor.fetchone()
+
+
+def database(problems, submissions):
+    db = sqlite3.connect(':memory:')
+    db.row_factory = sqlite3.Row
+    db.executescript("""
+        CREATE TABLE edu_problems (id TEXT, difficulty TEXT);
+        CREATE TABLE edu_difficulty_levels (raw_value TEXT, level INT, label TEXT);
+        CREATE TABLE edu_coding_submissions (id INT, student_id TEXT, problem_id TEXT, submit_result TEXT);
+    """)
+    db.executemany("INSERT INTO edu_difficulty_levels VALUES (?, ?, ?)", DIFFICULTY_LEVELS)
+    db.executemany("INSERT INTO edu_problems VALUES (?, ?)", problems)
+    db.executemany("INSERT INTO edu_coding_submissions VALUES (?, ?, ?, ?)",
+                   [(i, *row) for i, row in enumerate(submissions, start=1)])
+    return db
+
+
+def test_two_queries_and_unmapped_difficulties_stay_separate():
+    db = database(
+        [('p1', 'easy'), ('p2', '1'), ('p3', 'hard'), ('p4', 'expert'), ('p5', 'bonus')],
+        [('s1', 'p1', 'failed'), ('s1', 'p1', 'success'), ('s2', 'p2', 'failed'),
+         ('s2', 'p4', 'success')]
+    )
+    cursor = CountingCursor(db)
+    result, message = compute_problem_completion(cursor)
+
+    assert message is None
+    assert cursor.statements == 2
+    # 'easy' 和 '1' 归一化为同一组；'bonus'、'expert' 不在映射表中，各自成为一组
+    assert result['difficulties'] == ['简单', '困难', 'bonus', 'expert']
+    assert result['student_completion_rates'] == [25.0, 0, 0, 100.0]
+    assert result['problem_attempt_rates'] == [100.0, 0, 0, 100.0]
+    assert result['success_rates'] == [33.3, 0, 0, 100.0]
+    assert result['avg_attempts_per_problem'] == [1.5, 0, 0, 1.0]
+    assert result['active_students'] == 2
+
+
+def test_no_active_students():
+    cursor = CountingCursor(database([('p1', 'easy')], []))
+    assert compute_problem_completion(cursor) == (None, '没有找到活跃学生数据')
+    assert cursor.statements == 2